@@ -0,0 +1,51 @@
+"""Add content-addressed workflow version storage
+
+Revision ID: ebcbb3cfee91
+Revises: b906a59f43f0
+Create Date: 2026-10-19 12:55:51.958722
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'ebcbb3cfee91'
+down_revision: Union[str, None] = 'b906a59f43f0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('workflow_blobs',
+    sa.Column('hash', sa.String(length=32), nullable=False),
+    sa.Column('content', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('hash', name=op.f('pk_workflow_blobs'))
+    )
+    op.add_column('workflow_versions', sa.Column('description', sa.Text(), nullable=True))
+    op.add_column('workflow_versions', sa.Column('manifest', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+    op.add_column('workflow_versions', sa.Column('is_published', sa.Boolean(), server_default=sa.false(), nullable=False))
+    op.alter_column('workflow_versions', 'nodes',
+               existing_type=postgresql.JSONB(astext_type=sa.Text()),
+               nullable=True)
+    op.alter_column('workflow_versions', 'edges',
+               existing_type=postgresql.JSONB(astext_type=sa.Text()),
+               nullable=True)
+
+
+def downgrade() -> None:
+    # 降版前需先將 manifest 版本還原為完整複本，否則 nodes / edges 為 NULL 會違反約束
+    op.alter_column('workflow_versions', 'edges',
+               existing_type=postgresql.JSONB(astext_type=sa.Text()),
+               nullable=False)
+    op.alter_column('workflow_versions', 'nodes',
+               existing_type=postgresql.JSONB(astext_type=sa.Text()),
+               nullable=False)
+    op.drop_column('workflow_versions', 'is_published')
+    op.drop_column('workflow_versions', 'manifest')
+    op.drop_column('workflow_versions', 'description')
+    op.drop_table('workflow_blobs')
@@ -0,0 +1,56 @@
+"""Add atomic version counter and unique version numbers
+
+Revision ID: fcc8340f2f1c
+Revises: ebcbb3cfee91
+Create Date: 2026-10-19 12:58:21.182013
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'fcc8340f2f1c'
+down_revision: Union[str, None] = 'ebcbb3cfee91'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('workflows', sa.Column('last_version_number', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('workflow_versions', sa.Column('is_auto', sa.Boolean(), server_default=sa.false(), nullable=False))
+
+    # 既有的重複版本號（併發建立造成）依建立時間重新編號
+    op.execute("""
+        UPDATE workflow_versions AS v
+        SET version_number = numbered.new_number
+        FROM (
+            SELECT id, ROW_NUMBER() OVER (
+                PARTITION BY workflow_id ORDER BY version_number, created_at, id
+            ) AS new_number
+            FROM workflow_versions
+        ) AS numbered
+        WHERE v.id = numbered.id AND v.version_number <> numbered.new_number
+    """)
+
+    # 以現有最大版本號初始化計數器
+    op.execute("""
+        UPDATE workflows AS w
+        SET last_version_number = latest.max_number
+        FROM (
+            SELECT workflow_id, MAX(version_number) AS max_number
+            FROM workflow_versions
+            GROUP BY workflow_id
+        ) AS latest
+        WHERE w.id = latest.workflow_id
+    """)
+
+    op.create_unique_constraint('uq_workflow_versions_workflow_id_version_number', 'workflow_versions', ['workflow_id', 'version_number'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_workflow_versions_workflow_id_version_number', 'workflow_versions', type_='unique')
+    op.drop_column('workflow_versions', 'is_auto')
+    op.drop_column('workflows', 'last_version_number')
@@ -4,7 +4,8 @@ API v1 路由集合
 
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import auth, health, workflows, users, demo
+from app.core.config import settings
+from app.api.v1.endpoints import auth, health, workflows, users, demo, node_types, profiling
 
 api_router = APIRouter()
 
@@ -36,9 +37,24 @@ api_router.include_router(
     tags=["工作流管理"]
 )
 
+# 節點類型目錄路由
+api_router.include_router(
+    node_types.router,
+    prefix="/node-types",
+    tags=["節點類型"]
+)
+
 # Demo 路由
 api_router.include_router(
     demo.router,
     prefix="/demo",
     tags=["Demo 工作流"]
 )
+
+# 效能分析路由（僅限管理員，未啟用時不註冊）
+if settings.PROFILING_ENABLED:
+    api_router.include_router(
+        profiling.router,
+        prefix="/admin/profiling",
+        tags=["效能分析"]
+    )
@@ -3,10 +3,12 @@
 """
 
 from datetime import timedelta
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
 from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 import logging
+import uuid
 
 from app.core.database import get_db
 from app.core.security import (
@@ -18,6 +20,7 @@ from app.core.security import (
     verify_password,
     get_password_hash
 )
+from app.core.etag import make_etag, not_modified_response, set_etag
 from app.core.exceptions import AuthenticationError, ValidationError
 from app.schemas.auth import (
     LoginRequest, 
@@ -226,11 +229,13 @@ async def logout(
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
 ):
     """
-    取得當前使用者資訊
+    取得當前使用者資訊（資料未變更時回應 304）
     """
     try:
         # 驗證權杖
@@ -239,10 +244,16 @@ async def get_current_user(
             raise AuthenticationError("無效的權杖")
         
         user_service = UserService(db)
-        user = await user_service.get_user_by_id(int(user_id))
+        user = await user_service.get_user_by_id(uuid.UUID(user_id))
         
         if not user:
             raise AuthenticationError("使用者不存在")
+
+        etag = make_etag("user", user.id, user.updated_at.isoformat() if user.updated_at else None)
+        not_modified = not_modified_response(if_none_match, etag)
+        if not_modified:
+            return not_modified
+        set_etag(response, etag)
         
         return UserResponse.from_orm(user)
         
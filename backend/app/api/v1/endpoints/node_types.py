@@ -0,0 +1,60 @@
+"""
+節點類型目錄 API 端點
+"""
+
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, Response
+from sqlalchemy.orm import Session
+import logging
+
+from app.core.database import get_db
+from app.core.etag import etag_headers, not_modified_response
+from app.core.exceptions import ResourceNotFoundError
+from app.schemas.node import NodeParametersValidate, NodeParametersValidationResponse, NodeTypeResponse
+from app.services.node_catalog import node_catalog
+
+router = APIRouter()
+logger = logging.getLogger("app.api.node_types")
+
+
+@router.get("/", response_model=List[NodeTypeResponse])
+async def list_node_types(
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """
+    取得所有啟用中的節點類型（內容未變更時回應 304）
+    """
+    node_catalog.ensure_fresh(db)
+    not_modified = not_modified_response(if_none_match, node_catalog.etag)
+    if not_modified:
+        return not_modified
+    return Response(content=node_catalog.payload, media_type="application/json", headers=etag_headers(node_catalog.etag))
+
+
+@router.get("/{name}", response_model=NodeTypeResponse)
+async def get_node_type(name: str, db: Session = Depends(get_db)):
+    """
+    取得單一節點類型
+    """
+    node_catalog.ensure_fresh(db)
+    entry = node_catalog.get(name)
+    if entry is None:
+        raise ResourceNotFoundError("節點類型", name)
+    return NodeTypeResponse(**entry.data)
+
+
+@router.post("/{name}/validate", response_model=NodeParametersValidationResponse)
+async def validate_node_parameters(
+    name: str,
+    payload: NodeParametersValidate,
+    db: Session = Depends(get_db)
+):
+    """
+    以節點類型預先編譯的 schema 驗證參數
+    """
+    node_catalog.ensure_fresh(db)
+    if node_catalog.get(name) is None:
+        raise ResourceNotFoundError("節點類型", name)
+    errors = node_catalog.validate(name, payload.parameters, payload.kind)
+    return NodeParametersValidationResponse(node_type=name, valid=not errors, errors=errors)
@@ -0,0 +1,100 @@
+"""
+效能分析 API 端點（僅限管理員，PROFILING_ENABLED 時註冊）
+"""
+
+import asyncio
+import logging
+import os
+import time
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import PlainTextResponse
+
+from app.core import profiler
+from app.core.config import settings
+from app.core.exceptions import AuthorizationError, ResourceConflictError, ResourceNotFoundError
+from app.core.security import create_profiling_token, get_current_user
+from app.models.user import User
+
+router = APIRouter()
+logger = logging.getLogger("app.api.profiling")
+
+
+async def get_current_admin(current_user: User = Depends(get_current_user)) -> User:
+    """
+    只允許管理員使用效能分析
+    """
+    if not current_user.is_superuser:
+        raise AuthorizationError("只有管理員可以使用效能分析")
+    return current_user
+
+
+def _collapsed_response(content: str, filename: str, samples: int) -> PlainTextResponse:
+    return PlainTextResponse(
+        content,
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Profile-Samples": str(samples),
+            "X-Profile-Pid": str(os.getpid()),
+        }
+    )
+
+
+@router.post("/sample", response_class=PlainTextResponse)
+async def sample_worker(
+    seconds: float = Query(10.0, gt=0, description="取樣秒數"),
+    interval_ms: float = Query(None, gt=0, description="取樣間隔（毫秒），預設為 PROFILING_INTERVAL_MS"),
+    current_user: User = Depends(get_current_admin)
+):
+    """
+    取樣處理本請求的 worker 所有執行緒，回傳 collapsed stack 檔案（可直接交給 flamegraph.pl / speedscope）
+    """
+    if seconds > settings.PROFILING_MAX_SECONDS:
+        seconds = settings.PROFILING_MAX_SECONDS
+    if not profiler.try_acquire_session():
+        raise ResourceConflictError("此 worker 已有進行中的效能分析", resource="profiling")
+
+    interval = (interval_ms or settings.PROFILING_INTERVAL_MS) / 1000
+    try:
+        sampler = await profiler.sample_process(seconds, interval)
+    finally:
+        profiler.release_session()
+
+    logger.info(
+        f"效能分析完成: user_id={current_user.id}, 行程={os.getpid()}, "
+        f"{sampler.elapsed:.1f} 秒取樣 {sampler.samples} 次"
+    )
+    content = await asyncio.to_thread(sampler.collapsed)
+    return _collapsed_response(content, f"profile-{os.getpid()}-{int(time.time())}.collapsed", sampler.samples)
+
+
+@router.post("/request-token")
+async def create_request_token(
+    current_user: User = Depends(get_current_admin)
+):
+    """
+    產生單一請求效能分析權杖：請求帶上 X-Profile-Token 標頭後，回應的 X-Profile-Id 可用於取回結果
+    """
+    logger.info(f"產生請求效能分析權杖: user_id={current_user.id}")
+    return {
+        "header": "X-Profile-Token",
+        "token": create_profiling_token(settings.PROFILING_TOKEN_TTL_SECONDS),
+        "expires_in": settings.PROFILING_TOKEN_TTL_SECONDS,
+    }
+
+
+@router.get("/requests/{profile_id}", response_class=PlainTextResponse)
+async def get_request_profile(
+    profile_id: str,
+    current_user: User = Depends(get_current_admin)
+):
+    """
+    取回單一請求的效能分析結果（collapsed stack 格式）
+    """
+    path = profiler.profile_path(profile_id)
+    if path is None or not path.exists():
+        raise ResourceNotFoundError("效能分析結果", profile_id)
+
+    content = await asyncio.to_thread(path.read_text, encoding="utf-8")
+    samples = sum(int(line.rsplit(" ", 1)[1]) for line in content.splitlines() if line)
+    return _collapsed_response(content, path.name, samples)
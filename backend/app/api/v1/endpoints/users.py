@@ -11,6 +11,7 @@ import logging
 from app.core.database import get_db
 from app.core.security import security, verify_token
 from app.core.exceptions import AuthenticationError, AuthorizationError, ResourceNotFoundError
+from app.core.logging import bind_log_context
 from app.schemas.user import UserResponse, UserUpdate, UserCreate
 from app.services.user_service import UserService
 
@@ -27,6 +28,7 @@ async def get_current_user_id(
     user_id = verify_token(credentials.credentials)
     if not user_id:
         raise AuthenticationError("無效的權杖")
+    bind_log_context(user_id=user_id)
     return int(user_id)
 
 
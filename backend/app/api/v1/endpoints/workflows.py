@@ -2,37 +2,91 @@
 工作流管理 API 端點 - 支援UUID格式和完整CRUD操作
 """
 
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import Any, Dict, List, Literal, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Query, Request, Response, WebSocket, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.requests import HTTPConnection
 from sqlalchemy.orm import Session
+import asyncio
+import json
 import logging
 import uuid
 
-from app.core.database import get_db
-from app.core.security import get_current_user, security, verify_token
+from app.core.config import settings
+from app.core.database import get_db, SessionLocal
+from app.core.security import (
+    create_stream_token,
+    get_current_user,
+    optional_security,
+    security,
+    verify_stream_token,
+    verify_token,
+)
+from app.core.etag import etag_headers, make_etag, not_modified_response, set_etag
 from app.core.exceptions import (
+    TaiwanZapierException,
+    AuthenticationError,
     ResourceNotFoundError,
+    ResourceConflictError,
+    PreconditionFailedError,
     AuthorizationError,
+    ValidationError,
     WorkflowExecutionError
 )
+from app.core.idempotency import idempotency_guard, resolve_idempotency_key
+from app.core.logging import bind_log_context
 from app.schemas.workflow import (
     WorkflowCreate,
     WorkflowUpdate,
     WorkflowSave,
+    WorkflowGraphPatch,
+    WorkflowGraphPatchResponse,
+    WorkflowGraphValidate,
+    WorkflowGraphValidationResponse,
     WorkflowResponse,
     WorkflowExecutionCreate,
     WorkflowExecutionResponse,
+    WorkflowBatchExecutionResponse,
+    WorkflowBulkOperation,
+    WorkflowImportResponse,
+    WorkflowSearchResponse,
+    WorkflowTemplateSearchResponse,
     WorkflowVersionCreate,
     WorkflowVersionResponse,
+    WorkflowVersionSummary,
+    WorkflowVersionDiffResponse,
+    dump_template_list,
+    dump_workflow,
+    dump_workflow_list,
+    dump_execution_list,
+    dump_version,
+    dump_version_summary_list,
     WorkflowTemplateResponse,
+    WorkflowTemplateRating,
+    WorkflowCopyCreate,
     WorkflowStatsResponse
 )
+from app.services import export_service, import_service
+from app.services.export_service import EXPORT_FORMATS, gzip_stream
+from app.services.search_service import SearchService
+from app.services.template_leaderboard import serialize_templates, template_leaderboard
 from app.services.workflow_service import WorkflowService
+from app.services.execution_events import execution_event_hub
 from app.models.user import User
+from app.models.workflow import ExecutionStatus as ExecutionStatusEnum, Workflow
+
+async def bind_workflow_log_context(connection: HTTPConnection):
+    """路徑含工作流 ID 時，之後的日誌帶上 workflow_id"""
+    bind_log_context(workflow_id=connection.path_params.get("workflow_id"))
 
-router = APIRouter()
+
+router = APIRouter(dependencies=[Depends(bind_workflow_log_context)])
 logger = logging.getLogger("app.api.workflows")
 
+# SSE 保持連線的心跳間隔（秒）
+SSE_KEEPALIVE_SECONDS = 15
+
 
 async def get_current_user_from_token(
     credentials = Depends(security),
@@ -59,6 +113,7 @@ async def get_current_user_from_token(
         if not user.is_active:
             raise AuthenticationError("帳號已被停用")
 
+        bind_log_context(user_id=user.id)
         return user
 
     except AuthenticationError:
@@ -70,6 +125,14 @@ async def get_current_user_from_token(
         )
 
 
+def _workflow_json_response(workflow) -> Response:
+    """
+    序列化單一工作流並附上 ETag（只驗證一次，不經 response_model 再驗證）
+    """
+    etag = WorkflowService.workflow_etag(workflow.id, workflow.version, workflow.updated_at)
+    return Response(content=dump_workflow(workflow), media_type="application/json", headers=etag_headers(etag))
+
+
 # ==================== 工作流 CRUD API ====================
 
 @router.get("/", response_model=List[WorkflowResponse])
@@ -78,14 +141,20 @@ async def get_workflows(
     limit: int = Query(100, ge=1, le=1000, description="返回的記錄數"),
     category: Optional[str] = Query(None, description="分類篩選"),
     is_active: Optional[bool] = Query(None, description="是否啟用篩選"),
+    if_none_match: Optional[str] = Header(None),
     current_user: User = Depends(get_current_user_from_token),
     db: Session = Depends(get_db)
 ):
     """
-    取得使用者的工作流列表
+    取得使用者的工作流列表（集合未變更時回應 304）
     """
     try:
         workflow_service = WorkflowService(db)
+        etag = workflow_service.get_workflows_collection_etag(current_user.id, skip, limit, category, is_active)
+        not_modified = not_modified_response(if_none_match, etag)
+        if not_modified:
+            return not_modified
+
         workflows = await workflow_service.get_user_workflows(
             user_id=current_user.id,
             skip=skip,
@@ -94,7 +163,8 @@ async def get_workflows(
             is_active=is_active
         )
         
-        return [WorkflowResponse.from_orm(workflow) for workflow in workflows]
+        # 直接回傳序列化後的 JSON，避免 FastAPI 依 response_model 再驗證一次
+        return Response(content=dump_workflow_list(workflows), media_type="application/json", headers=etag_headers(etag))
         
     except Exception as e:
         logger.error(f"取得工作流列表失敗: {str(e)}")
@@ -121,8 +191,10 @@ async def create_workflow(
         )
         
         logger.info(f"工作流建立成功: workflow_id={workflow.id}, user_id={current_user.id}")
-        return WorkflowResponse.from_orm(workflow)
+        return _workflow_json_response(workflow)
         
+    except ValidationError:
+        raise
     except Exception as e:
         logger.error(f"建立工作流失敗: {str(e)}")
         raise HTTPException(
@@ -131,9 +203,184 @@ async def create_workflow(
         )
 
 
+def _export_response(chunks, export_format: str, filename: str) -> StreamingResponse:
+    """
+    包裝匯出串流（jsonl.gz 逐段壓縮）
+    """
+    media_type, extension = EXPORT_FORMATS[export_format]
+    if export_format == "jsonl.gz":
+        chunks = gzip_stream(chunks)
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{extension}"'}
+    )
+
+
+@router.get("/export")
+async def export_workflows(
+    export_format: Literal["ndjson", "jsonl.gz"] = Query("ndjson", alias="format", description="匯出格式"),
+    after: Optional[str] = Query(None, description="續傳游標（上次匯出最後一行的 _cursor）"),
+    current_user: User = Depends(get_current_user_from_token)
+):
+    """
+    串流匯出使用者的所有工作流（每行一個工作流，結尾為完成標記）
+    """
+    chunks = export_service.export_workflows(current_user.id, after=after)
+    return _export_response(chunks, export_format, "workflows")
+
+
+async def _run_import(request: Request, target: str, import_format: str, owner_id: uuid.UUID):
+    """
+    暫存請求內容後於執行緒池中匯入（解析驗證另由子行程平行處理）
+    """
+    body = await import_service.spool_body(request.stream())
+    try:
+        return await run_in_threadpool(import_service.import_records, target, body, import_format, owner_id)
+    finally:
+        body.close()
+
+
+@router.post("/import", response_model=WorkflowImportResponse)
+async def import_workflows(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    import_format: Literal["ndjson", "jsonl.gz", "zip"] = Query("ndjson", alias="format", description="匯入格式"),
+    sync_n8n: bool = Query(True, description="匯入後於背景同步到 n8n"),
+    current_user: User = Depends(get_current_user_from_token)
+):
+    """
+    批次匯入工作流（請求內容為 NDJSON、gzip JSONL 或 zip 封存檔，每行一個工作流，可直接匯入 /export 的輸出）
+
+    驗證失敗的列會略過並列於 errors，其餘以 COPY 在同一個交易內寫入；
+    n8n 同步在回應後於背景分批進行。
+    """
+    try:
+        result = await _run_import(request, "workflows", import_format, current_user.id)
+    except ValidationError:
+        raise
+    except Exception as e:
+        logger.error(f"批次匯入工作流失敗: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="批次匯入工作流失敗"
+        )
+
+    n8n_sync = "skipped"
+    if sync_n8n and result.row_ids:
+        background_tasks.add_task(WorkflowService.sync_imported_workflows_to_n8n, result.row_ids)
+        n8n_sync = "scheduled"
+
+    logger.info(f"批次匯入工作流: user_id={current_user.id}, 成功={result.imported}, 失敗={result.failed}")
+    return {**result.to_dict(), "n8n_sync": n8n_sync}
+
+
+@router.post("/bulk")
+async def bulk_workflow_operation(
+    operation: WorkflowBulkOperation,
+    current_user: User = Depends(get_current_user_from_token),
+    db: Session = Depends(get_db)
+):
+    """
+    批次啟用 / 停用 / 刪除 / 標籤工作流
+
+    資料庫變更以單一 SQL 語句完成，n8n 同步以有限並行度進行，
+    逐筆結果以 NDJSON 串流回傳，最後一行為彙總。
+    """
+    if len(operation.workflow_ids) > settings.BULK_OPERATION_MAX_ITEMS:
+        raise ValidationError(
+            f"批次操作最多 {settings.BULK_OPERATION_MAX_ITEMS} 個工作流",
+            field="workflow_ids"
+        )
+
+    try:
+        workflow_service = WorkflowService(db)
+        result = await workflow_service.bulk_update_workflows(
+            user_id=current_user.id,
+            action=operation.action,
+            workflow_ids=operation.workflow_ids,
+            tags=operation.tags
+        )
+    except Exception as e:
+        logger.error(f"批次操作工作流失敗: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="批次操作工作流失敗"
+        )
+
+    logger.info(
+        f"批次操作工作流: action={operation.action.value}, user_id={current_user.id}, "
+        f"成功={len(result['updated'])}, 略過={len(result['missing'])}"
+    )
+
+    async def result_stream():
+        # 不存在或非本人的工作流不透露差異，一律回報 not_found
+        for workflow_id in result["missing"]:
+            yield json.dumps({"workflow_id": workflow_id, "status": "not_found"}) + "\n"
+
+        n8n_failed = 0
+        async for item in workflow_service.sync_bulk_operation_to_n8n(operation.action, result["updated"]):
+            if item.get("n8n_synced") is False:
+                n8n_failed += 1
+            yield json.dumps(item, ensure_ascii=False) + "\n"
+
+        yield json.dumps({
+            "type": "summary",
+            "action": operation.action.value,
+            "updated": len(result["updated"]),
+            "not_found": len(result["missing"]),
+            "n8n_failed": n8n_failed,
+        }) + "\n"
+
+    return StreamingResponse(result_stream(), media_type="application/x-ndjson")
+
+
+@router.get("/search", response_model=WorkflowSearchResponse)
+async def search_workflows(
+    q: Optional[str] = Query(None, min_length=1, max_length=200, description="搜尋字詞（支援 \"片語\"、OR、-排除）"),
+    tags: Optional[List[str]] = Query(None, description="須包含的標籤（全部符合）"),
+    node_types: Optional[List[str]] = Query(None, description="須包含的節點類型（全部符合）"),
+    category: Optional[str] = Query(None, description="分類篩選"),
+    limit: int = Query(20, ge=1, le=100, description="返回的記錄數"),
+    offset: int = Query(0, ge=0, le=10000, description="跳過的記錄數"),
+    current_user: User = Depends(get_current_user_from_token),
+    db: Session = Depends(get_db)
+):
+    """
+    搜尋自己的工作流（全文檢索 + 名稱模糊比對，依相關性排序）
+    """
+    try:
+        items, has_more = await SearchService(db).search_workflows(
+            current_user.id, query=q, tags=tags, node_types=node_types,
+            category=category, limit=limit, offset=offset
+        )
+        return {"items": items, "has_more": has_more}
+    except Exception as e:
+        logger.error(f"搜尋工作流失敗: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="搜尋工作流失敗"
+        )
+
+
+@router.post("/validate", response_model=WorkflowGraphValidationResponse)
+async def validate_workflow_graph(
+    graph: WorkflowGraphValidate,
+    current_user: User = Depends(get_current_user_from_token),
+    db: Session = Depends(get_db)
+):
+    """
+    驗證尚未儲存的工作流圖形（結構、環路、可到達性與節點參數）
+    """
+    workflow_service = WorkflowService(db)
+    analysis = await workflow_service.validate_graph(graph.nodes, graph.edges)
+    return WorkflowGraphValidationResponse(**analysis.to_dict())
+
+
 @router.get("/{workflow_id}", response_model=WorkflowResponse)
 async def get_workflow(
     workflow_id: str,
+    if_none_match: Optional[str] = Header(None),
     current_user: User = Depends(get_current_user_from_token),
     db: Session = Depends(get_db)
 ):
@@ -151,16 +398,26 @@ async def get_workflow(
             )
         
         workflow_service = WorkflowService(db)
-        workflow = await workflow_service.get_workflow_by_id(workflow_id)
-        
-        if not workflow:
+
+        # 先只讀取 ETag 所需欄位，未變更時不載入也不序列化 nodes / edges
+        etag_row = workflow_service.get_workflow_etag(workflow_id)
+        if not etag_row:
             raise ResourceNotFoundError("工作流", workflow_id)
         
         # 檢查權限：只能查看自己的工作流
-        if workflow.user_id != current_user.id:
+        owner_id, etag = etag_row
+        if owner_id != current_user.id:
             raise AuthorizationError("只能查看自己的工作流")
-        
-        return WorkflowResponse.from_orm(workflow)
+
+        not_modified = not_modified_response(if_none_match, etag)
+        if not_modified:
+            return not_modified
+
+        workflow = await workflow_service.get_workflow_by_id(workflow_id)
+        if not workflow:
+            raise ResourceNotFoundError("工作流", workflow_id)
+
+        return _workflow_json_response(workflow)
         
     except (ResourceNotFoundError, AuthorizationError):
         raise
@@ -176,6 +433,7 @@ async def get_workflow(
 async def update_workflow(
     workflow_id: str,
     workflow_data: WorkflowUpdate,
+    if_match: Optional[str] = Header(None),
     current_user: User = Depends(get_current_user_from_token),
     db: Session = Depends(get_db)
 ):
@@ -204,13 +462,14 @@ async def update_workflow(
         
         updated_workflow = await workflow_service.update_workflow(
             workflow_id=workflow_id,
-            workflow_data=workflow_data
+            workflow_data=workflow_data,
+            if_match=if_match
         )
         
         logger.info(f"工作流更新成功: workflow_id={workflow_id}, user_id={current_user.id}")
-        return WorkflowResponse.from_orm(updated_workflow)
+        return _workflow_json_response(updated_workflow)
         
-    except (ResourceNotFoundError, AuthorizationError):
+    except (ResourceNotFoundError, AuthorizationError, PreconditionFailedError, ValidationError):
         raise
     except Exception as e:
         logger.error(f"更新工作流失敗: {str(e)}")
@@ -224,6 +483,7 @@ async def update_workflow(
 async def save_workflow(
     workflow_id: str,
     workflow_data: WorkflowSave,
+    if_match: Optional[str] = Header(None),
     current_user: User = Depends(get_current_user_from_token),
     db: Session = Depends(get_db)
 ):
@@ -244,11 +504,12 @@ async def save_workflow(
         workflow = await workflow_service.save_workflow(
             workflow_id=workflow_id,
             user_id=str(current_user.id),
-            workflow_data=workflow_data
+            workflow_data=workflow_data,
+            if_match=if_match
         )
 
         logger.info(f"工作流儲存成功: workflow_id={workflow_id}, user_id={current_user.id}")
-        return WorkflowResponse.from_orm(workflow)
+        return _workflow_json_response(workflow)
 
     except ResourceNotFoundError:
         raise HTTPException(
@@ -260,6 +521,8 @@ async def save_workflow(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="沒有權限儲存此工作流"
         )
+    except (PreconditionFailedError, ValidationError):
+        raise
     except Exception as e:
         logger.error(f"儲存工作流失敗: {str(e)}")
         raise HTTPException(
@@ -268,6 +531,67 @@ async def save_workflow(
         )
 
 
+@router.patch("/{workflow_id}/graph", response_model=WorkflowGraphPatchResponse)
+async def patch_workflow_graph(
+    workflow_id: str,
+    patch: WorkflowGraphPatch,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_user_from_token),
+    db: Session = Depends(get_db)
+):
+    """
+    增量儲存工作流圖形（編輯器自動儲存，只傳送節點/連線的新增、移動、更新與刪除操作）
+    """
+    try:
+        # 驗證UUID格式
+        try:
+            uuid.UUID(workflow_id)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="無效的工作流ID格式"
+            )
+
+        workflow_service = WorkflowService(db)
+        result = await workflow_service.patch_workflow_graph(
+            workflow_id=workflow_id,
+            user_id=str(current_user.id),
+            patch=patch,
+            if_match=if_match
+        )
+
+        logger.debug(f"工作流增量儲存成功: workflow_id={workflow_id}, version={result['version']}")
+        set_etag(response, result.pop("etag"))
+        return WorkflowGraphPatchResponse(**result)
+
+    except (ResourceNotFoundError, ResourceConflictError, PreconditionFailedError, ValidationError):
+        raise
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"增量儲存工作流失敗: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="增量儲存工作流失敗"
+        )
+
+
+@router.get("/{workflow_id}/validate", response_model=WorkflowGraphValidationResponse)
+async def validate_saved_workflow(
+    workflow_id: str,
+    current_user: User = Depends(get_current_user_from_token),
+    db: Session = Depends(get_db)
+):
+    """
+    驗證已儲存的工作流圖形
+    """
+    workflow_service = WorkflowService(db)
+    workflow = await _get_owned_workflow(workflow_service, workflow_id, current_user)
+    analysis = await workflow_service.validate_graph(workflow.nodes, workflow.edges)
+    return WorkflowGraphValidationResponse(**analysis.to_dict())
+
+
 @router.delete("/{workflow_id}")
 async def delete_workflow(
     workflow_id: str,
@@ -318,12 +642,18 @@ async def delete_workflow(
 async def execute_workflow(
     workflow_id: str,
     execution_data: Optional[WorkflowExecutionCreate] = None,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     current_user: User = Depends(get_current_user_from_token),
     db: Session = Depends(get_db)
 ):
     """
     執行工作流
+
+    支援 Idempotency-Key 標頭（或 webhook 觸發資料中可辨識的金流供應商交易），
+    冪等視窗內的重複請求直接回傳第一次的回應；失敗的執行可由重試重新執行。
     """
+    resolved_key = None
+    key_acquired = False
     try:
         # 驗證UUID格式
         try:
@@ -351,19 +681,52 @@ async def execute_workflow(
                 message="工作流已停用，無法執行"
             )
         
+        trigger_data = execution_data.trigger_data if execution_data else None
+        trigger_type = execution_data.trigger_type if execution_data else None
+        resolved_key = resolve_idempotency_key(idempotency_key, trigger_data, trigger_type)
+        
+        if resolved_key:
+            # 冪等視窗內的重送請求直接回傳第一次的回應
+            cached_response = await idempotency_guard.get_response(workflow_id, resolved_key)
+            if cached_response:
+                return JSONResponse(
+                    content=cached_response,
+                    headers={"Idempotent-Replayed": "true"}
+                )
+            
+            key_acquired = await idempotency_guard.acquire(workflow_id, resolved_key)
+            if not key_acquired:
+                raise ResourceConflictError("相同冪等鍵的請求正在處理中，請稍後重試", resource="工作流執行")
+        
         # 執行工作流
         execution = await workflow_service.execute_workflow(
             workflow_id=workflow_id,
-            trigger_data=execution_data.trigger_data if execution_data else None,
-            user_id=current_user.id
+            trigger_data=trigger_data,
+            user_id=current_user.id,
+            trigger_type=trigger_type,
+            idempotency_key=resolved_key
         )
         
+        response = WorkflowExecutionResponse.model_validate(execution)
+        if resolved_key:
+            if execution.status == ExecutionStatusEnum.FAILED:
+                # 失敗的執行不快取，重試時重新執行
+                await idempotency_guard.release(workflow_id, resolved_key)
+            else:
+                await idempotency_guard.store_response(workflow_id, resolved_key, response.model_dump())
+        
         logger.info(f"工作流執行成功: workflow_id={workflow_id}, execution_id={execution.id}")
-        return WorkflowExecutionResponse.from_orm(execution)
+        return Response(content=response.model_dump_json(), media_type="application/json")
         
+    except ResourceConflictError:
+        raise
     except (ResourceNotFoundError, AuthorizationError, WorkflowExecutionError):
+        if key_acquired:
+            await idempotency_guard.release(workflow_id, resolved_key)
         raise
     except Exception as e:
+        if key_acquired:
+            await idempotency_guard.release(workflow_id, resolved_key)
         logger.error(f"執行工作流失敗: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -371,6 +734,166 @@ async def execute_workflow(
         )
 
 
+async def _read_batch_payloads(request: Request) -> List[Optional[Dict[str, Any]]]:
+    """
+    讀取批次觸發資料：支援 JSON 陣列（或 {"items": [...]}）與 NDJSON 串流
+    """
+    content_type = request.headers.get("content-type", "")
+    max_items = settings.BATCH_EXECUTION_MAX_ITEMS
+
+    if "ndjson" in content_type or "jsonl" in content_type:
+        payloads: List[Optional[Dict[str, Any]]] = []
+        buffer = b""
+        line_number = 0
+
+        def parse_line(line: bytes):
+            nonlocal line_number
+            line_number += 1
+            if not line.strip():
+                return
+            try:
+                payloads.append(json.loads(line))
+            except ValueError:
+                raise ValidationError(f"第 {line_number} 行不是有效的 JSON", field="body")
+            if len(payloads) > max_items:
+                raise ValidationError(f"批次執行最多 {max_items} 筆", field="body")
+
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                parse_line(line)
+        parse_line(buffer)
+    else:
+        try:
+            body = await request.json()
+        except ValueError:
+            raise ValidationError("請求內容不是有效的 JSON", field="body")
+        payloads = body.get("items") if isinstance(body, dict) else body
+        if not isinstance(payloads, list):
+            raise ValidationError("批次觸發資料必須為陣列", field="items")
+        if len(payloads) > max_items:
+            raise ValidationError(f"批次執行最多 {max_items} 筆", field="items")
+
+    for index, payload in enumerate(payloads):
+        if payload is not None and not isinstance(payload, dict):
+            raise ValidationError(f"第 {index + 1} 筆觸發資料必須為物件", field="items")
+
+    return payloads
+
+
+@router.post(
+    "/{workflow_id}/execute/batch",
+    response_model=WorkflowBatchExecutionResponse,
+    status_code=status.HTTP_202_ACCEPTED
+)
+async def execute_workflow_batch(
+    workflow_id: str,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user_from_token),
+    db: Session = Depends(get_db)
+):
+    """
+    批次執行工作流（一次請求觸發多筆執行，回傳批次 ID 供查詢進度）
+    """
+    try:
+        # 驗證UUID格式
+        try:
+            uuid.UUID(workflow_id)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="無效的工作流ID格式"
+            )
+
+        workflow_service = WorkflowService(db)
+        workflow = await workflow_service.get_workflow_by_id(workflow_id)
+
+        if not workflow:
+            raise ResourceNotFoundError("工作流", workflow_id)
+
+        # 檢查權限：只能執行自己的工作流
+        if workflow.user_id != current_user.id:
+            raise AuthorizationError("只能執行自己的工作流")
+
+        trigger_payloads = await _read_batch_payloads(request)
+        if not trigger_payloads:
+            raise ValidationError("批次執行至少需要一筆觸發資料", field="items")
+
+        batch = await workflow_service.create_execution_batch(
+            workflow_id=workflow_id,
+            trigger_payloads=trigger_payloads,
+            user_id=current_user.id
+        )
+
+        # 回應後於背景以有限並行度送至 n8n 執行
+        background_tasks.add_task(
+            WorkflowService.dispatch_execution_batch,
+            workflow_id,
+            batch["batch_id"],
+            batch["items"]
+        )
+
+        logger.info(f"批次執行已建立: workflow_id={workflow_id}, batch_id={batch['batch_id']}, total={len(trigger_payloads)}")
+        return WorkflowBatchExecutionResponse(**batch["progress"])
+
+    except (ResourceNotFoundError, AuthorizationError, ValidationError, WorkflowExecutionError):
+        raise
+    except Exception as e:
+        logger.error(f"批次執行工作流失敗: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="批次執行工作流失敗"
+        )
+
+
+@router.get("/{workflow_id}/execute/batch/{batch_id}", response_model=WorkflowBatchExecutionResponse)
+async def get_workflow_batch_progress(
+    workflow_id: str,
+    batch_id: str,
+    current_user: User = Depends(get_current_user_from_token),
+    db: Session = Depends(get_db)
+):
+    """
+    取得批次執行彙總進度
+    """
+    try:
+        # 驗證UUID格式
+        try:
+            uuid.UUID(workflow_id)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="無效的工作流ID格式"
+            )
+
+        workflow_service = WorkflowService(db)
+        workflow = await workflow_service.get_workflow_by_id(workflow_id)
+
+        if not workflow:
+            raise ResourceNotFoundError("工作流", workflow_id)
+
+        # 檢查權限：只能查看自己的工作流執行記錄
+        if workflow.user_id != current_user.id:
+            raise AuthorizationError("只能查看自己的工作流執行記錄")
+
+        progress = await workflow_service.get_execution_batch_progress(workflow_id, batch_id)
+        if not progress:
+            raise ResourceNotFoundError("批次執行", batch_id)
+
+        return WorkflowBatchExecutionResponse(**progress)
+
+    except (ResourceNotFoundError, AuthorizationError):
+        raise
+    except Exception as e:
+        logger.error(f"取得批次執行進度失敗: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="取得批次執行進度失敗"
+        )
+
+
 @router.get("/{workflow_id}/executions", response_model=List[WorkflowExecutionResponse])
 async def get_workflow_executions(
     workflow_id: str,
@@ -408,7 +931,7 @@ async def get_workflow_executions(
             limit=limit
         )
 
-        return [WorkflowExecutionResponse.from_orm(execution) for execution in executions]
+        return Response(content=dump_execution_list(executions), media_type="application/json")
 
     except (ResourceNotFoundError, AuthorizationError):
         raise
@@ -420,6 +943,175 @@ async def get_workflow_executions(
         )
 
 
+def _authorize_execution_watch(
+    workflow_id: str,
+    stream_token: Optional[str] = None,
+    access_token: Optional[str] = None
+) -> None:
+    """
+    驗證觀看執行狀態的權限
+
+    網址中的 token 查詢參數只接受該工作流的短效推播權杖；一般存取權杖只接受 Authorization 標頭，
+    避免長效權杖出現在網址與存取日誌裡。使用短暫的 session 完成檢查後立即釋放，
+    長時間的推播連線不會佔用資料庫連線。
+    """
+    try:
+        workflow_uuid = uuid.UUID(workflow_id)
+    except ValueError:
+        raise ResourceNotFoundError("工作流", workflow_id)
+
+    if stream_token is not None:
+        user_id = verify_stream_token(stream_token, workflow_id)
+    elif access_token is not None:
+        user_id = verify_token(access_token)
+    else:
+        raise AuthenticationError("缺少存取權杖")
+    if not user_id:
+        raise AuthenticationError("無效的權杖")
+    try:
+        user_uuid = uuid.UUID(user_id)
+    except (TypeError, ValueError):
+        raise AuthenticationError("無效的權杖")
+
+    db = SessionLocal()
+    try:
+        user_is_active = db.query(User.is_active).filter(User.id == user_uuid).scalar()
+        owner_id = db.query(Workflow.user_id).filter(Workflow.id == workflow_uuid).scalar()
+    finally:
+        db.close()
+
+    if not user_is_active:
+        raise AuthenticationError("使用者不存在或帳號已被停用")
+
+    if owner_id is None:
+        raise ResourceNotFoundError("工作流", workflow_id)
+
+    if str(owner_id) != user_id:
+        raise AuthorizationError("只能查看自己的工作流執行記錄")
+
+
+@router.get("/{workflow_id}/executions/export")
+async def export_workflow_executions(
+    workflow_id: str,
+    export_format: Literal["ndjson", "jsonl.gz"] = Query("ndjson", alias="format", description="匯出格式"),
+    after: Optional[str] = Query(None, description="續傳游標（上次匯出最後一行的 _cursor）"),
+    current_user: User = Depends(get_current_user_from_token),
+    db: Session = Depends(get_db)
+):
+    """
+    串流匯出工作流的完整執行歷史（依開始時間排序，可用游標續傳）
+    """
+    workflow = await _get_owned_workflow(WorkflowService(db), workflow_id, current_user)
+    chunks = export_service.export_executions(workflow.id, after=after)
+    return _export_response(chunks, export_format, f"executions-{workflow_id}")
+
+
+@router.post("/{workflow_id}/executions/stream-token")
+async def create_execution_stream_token(
+    workflow_id: str,
+    current_user: User = Depends(get_current_user_from_token),
+    db: Session = Depends(get_db)
+):
+    """
+    簽發訂閱執行狀態推播的短效權杖
+
+    瀏覽器的 EventSource 與 WebSocket 無法設定 Authorization 標頭，權杖只能放在網址中；
+    改用只對該工作流有效、短時間到期的權杖，避免長效存取權杖出現在網址與存取日誌裡。
+    權杖只在建立連線時檢查，到期後重新連線須再取得新權杖。
+    """
+    workflow = await _get_owned_workflow(WorkflowService(db), workflow_id, current_user)
+    return {
+        "token": create_stream_token(current_user.id, workflow.id),
+        "expires_in": settings.EXECUTION_STREAM_TOKEN_TTL_SECONDS
+    }
+
+
+@router.get("/{workflow_id}/executions/stream")
+async def stream_workflow_executions(
+    workflow_id: str,
+    request: Request,
+    token: Optional[str] = Query(None, description="短效推播權杖（瀏覽器 EventSource 無法設定標頭）"),
+    credentials = Depends(optional_security)
+):
+    """
+    以 Server-Sent Events 推送工作流執行狀態變化（取代輪詢執行歷史）
+
+    瀏覽器以 token 查詢參數帶入 /executions/stream-token 取得的權杖，其他客戶端也可使用 Bearer 標頭。
+    """
+    _authorize_execution_watch(
+        workflow_id,
+        stream_token=token,
+        access_token=credentials.credentials if credentials else None
+    )
+    queue = await execution_event_hub.subscribe(workflow_id)
+
+    async def event_stream():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    data = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+                    yield f"event: execution\ndata: {data}\n\n"
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+        finally:
+            await execution_event_hub.unsubscribe(workflow_id, queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"X-Accel-Buffering": "no"}
+    )
+
+
+@router.websocket("/{workflow_id}/executions/ws")
+async def watch_workflow_executions(
+    websocket: WebSocket,
+    workflow_id: str,
+    token: Optional[str] = Query(None, description="短效推播權杖（瀏覽器 WebSocket 無法設定標頭）")
+):
+    """
+    以 WebSocket 推送工作流執行狀態變化
+
+    瀏覽器以 token 查詢參數帶入短效推播權杖，其他客戶端也可使用 Bearer 標頭。
+    """
+    scheme, _, access_token = websocket.headers.get("authorization", "").partition(" ")
+    try:
+        _authorize_execution_watch(
+            workflow_id,
+            stream_token=token,
+            access_token=access_token if scheme.lower() == "bearer" and access_token else None
+        )
+    except TaiwanZapierException as e:
+        logger.warning(f"執行狀態訂閱被拒絕: workflow_id={workflow_id}, reason={e.message}")
+        await websocket.close(code=1008)
+        return
+
+    await websocket.accept()
+    queue = await execution_event_hub.subscribe(workflow_id)
+
+    async def forward_events():
+        while True:
+            data = await queue.get()
+            await websocket.send_text(data)
+
+    sender = asyncio.create_task(forward_events())
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+    finally:
+        sender.cancel()
+        try:
+            await sender
+        except (asyncio.CancelledError, Exception):
+            pass
+        await execution_event_hub.unsubscribe(workflow_id, queue)
+
+
 @router.post("/{workflow_id}/activate")
 async def activate_workflow(
     workflow_id: str,
@@ -508,6 +1200,54 @@ async def deactivate_workflow(
         )
 
 
+@router.post("/{workflow_id}/duplicate", response_model=WorkflowResponse)
+async def duplicate_workflow(
+    workflow_id: str,
+    background_tasks: BackgroundTasks,
+    copy_data: Optional[WorkflowCopyCreate] = None,
+    current_user: User = Depends(get_current_user_from_token),
+    db: Session = Depends(get_db)
+):
+    """
+    複製工作流（於資料庫端複製；沿用模板圖形的工作流，複本同樣沿用模板），n8n 同步於背景進行
+    """
+    try:
+        try:
+            uuid.UUID(workflow_id)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="無效的工作流ID格式"
+            )
+
+        workflow_service = WorkflowService(db)
+        # 只讀取擁有者，不載入 nodes / edges
+        owner = workflow_service.get_workflow_etag(workflow_id)
+        if not owner:
+            raise ResourceNotFoundError("工作流", workflow_id)
+        if owner[0] != current_user.id:
+            raise AuthorizationError("只能複製自己的工作流")
+
+        workflow = await workflow_service.duplicate_workflow(
+            workflow_id,
+            new_name=copy_data.name if copy_data else None,
+            user_id=current_user.id
+        )
+        background_tasks.add_task(WorkflowService.sync_imported_workflows_to_n8n, [str(workflow.id)])
+
+        logger.info(f"工作流複製成功: workflow_id={workflow_id}, new_id={workflow.id}, user_id={current_user.id}")
+        return _workflow_json_response(workflow)
+
+    except (ResourceNotFoundError, AuthorizationError):
+        raise
+    except Exception as e:
+        logger.error(f"複製工作流失敗: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="複製工作流失敗"
+        )
+
+
 # ==================== 工作流統計和模板 API ====================
 
 @router.get("/{workflow_id}/stats", response_model=WorkflowStatsResponse)
@@ -541,7 +1281,7 @@ async def get_workflow_stats(
 
         stats = await workflow_service.get_workflow_stats(workflow_id)
 
-        return WorkflowStatsResponse(**stats)
+        return Response(content=WorkflowStatsResponse(**stats).model_dump_json(), media_type="application/json")
 
     except (ResourceNotFoundError, AuthorizationError):
         raise
@@ -559,13 +1299,19 @@ async def get_workflow_templates(
     limit: int = Query(50, ge=1, le=200, description="返回的記錄數"),
     category: Optional[str] = Query(None, description="分類篩選"),
     taiwan_featured: Optional[bool] = Query(None, description="是否只顯示台灣特色模板"),
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db)
 ):
     """
-    取得工作流模板列表（公開API，不需要認證）
+    取得工作流模板列表（公開API，不需要認證；依預先建立的排行榜分頁，集合與排行榜未變更時回應 304）
     """
     try:
         workflow_service = WorkflowService(db)
+        etag = await workflow_service.get_templates_collection_etag(skip, limit, category, taiwan_featured)
+        not_modified = not_modified_response(if_none_match, etag)
+        if not_modified:
+            return not_modified
+
         templates = await workflow_service.get_workflow_templates(
             skip=skip,
             limit=limit,
@@ -573,7 +1319,8 @@ async def get_workflow_templates(
             taiwan_featured=taiwan_featured
         )
 
-        return [WorkflowTemplateResponse.from_orm(template) for template in templates]
+        # 直接回傳序列化後的 JSON，避免 FastAPI 依 response_model 再驗證一次
+        return Response(content=dump_template_list(templates), media_type="application/json", headers=etag_headers(etag))
 
     except Exception as e:
         logger.error(f"取得工作流模板失敗: {str(e)}")
@@ -581,3 +1328,320 @@ async def get_workflow_templates(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="取得工作流模板失敗"
         )
+
+
+async def _cached_templates_response(kind: str, if_none_match: Optional[str], fallback) -> Response:
+    """
+    回傳排行榜重建時預先序列化的模板列表；快取不存在時以 fallback 產生
+    """
+    payload = None
+    try:
+        payload = await (template_leaderboard.top_payload() if kind == "top" else template_leaderboard.trending_payload())
+    except Exception as e:
+        logger.warning(f"讀取模板列表快取失敗: kind={kind}, error={e}")
+    if payload is None:
+        payload = serialize_templates(await fallback())
+
+    etag = make_etag("templates", kind, payload)
+    not_modified = not_modified_response(if_none_match, etag)
+    if not_modified:
+        return not_modified
+    return Response(payload, media_type="application/json", headers=etag_headers(etag))
+
+
+@router.get("/templates/top", response_model=List[WorkflowTemplateResponse])
+async def get_top_workflow_templates(
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """
+    取得使用次數最多的模板（公開API，不需要認證；由快取回傳）
+    """
+    async def fallback():
+        return await WorkflowService(db).get_workflow_templates(skip=0, limit=settings.TEMPLATE_TOP_LIMIT)
+
+    return await _cached_templates_response("top", if_none_match, fallback)
+
+
+@router.get("/templates/trending", response_model=List[WorkflowTemplateResponse])
+async def get_trending_workflow_templates(
+    if_none_match: Optional[str] = Header(None)
+):
+    """
+    取得近期（TEMPLATE_TRENDING_WINDOW_HOURS 小時內）使用次數最多的模板（公開API，不需要認證；由快取回傳）
+    """
+    async def fallback():
+        # 熱門統計只存在 Redis，快取尚未建立時回傳空列表
+        return []
+
+    return await _cached_templates_response("trending", if_none_match, fallback)
+
+
+@router.post("/templates/{template_id}/rating")
+async def rate_workflow_template(
+    template_id: str,
+    rating: WorkflowTemplateRating,
+    current_user: User = Depends(get_current_user_from_token),
+    db: Session = Depends(get_db)
+):
+    """
+    為模板評分（每位使用者一次；評分於下一次排行榜重建時寫回）
+    """
+    try:
+        uuid.UUID(template_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="無效的模板ID格式"
+        )
+
+    try:
+        recorded = await WorkflowService(db).rate_template(template_id, current_user.id, rating.rating)
+    except ResourceNotFoundError:
+        raise
+    except Exception as e:
+        logger.error(f"模板評分失敗: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="模板評分失敗"
+        )
+
+    if not recorded:
+        raise ResourceConflictError("已經為此模板評分過")
+    return {"template_id": template_id, "rating": rating.rating, "status": "recorded"}
+
+
+@router.post("/templates/{template_id}/instantiate", response_model=WorkflowResponse)
+async def create_workflow_from_template(
+    template_id: str,
+    background_tasks: BackgroundTasks,
+    copy_data: Optional[WorkflowCopyCreate] = None,
+    current_user: User = Depends(get_current_user_from_token),
+    db: Session = Depends(get_db)
+):
+    """
+    從模板建立工作流（寫入時複製：第一次編輯前沿用模板圖形），n8n 同步於背景進行
+    """
+    try:
+        uuid.UUID(template_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="無效的模板ID格式"
+        )
+
+    try:
+        workflow = await WorkflowService(db).create_workflow_from_template(
+            template_id,
+            current_user.id,
+            workflow_name=copy_data.name if copy_data else None
+        )
+    except ResourceNotFoundError:
+        raise
+    except Exception as e:
+        logger.error(f"從模板建立工作流失敗: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="從模板建立工作流失敗"
+        )
+
+    background_tasks.add_task(WorkflowService.sync_imported_workflows_to_n8n, [str(workflow.id)])
+    logger.info(f"從模板建立工作流: template_id={template_id}, workflow_id={workflow.id}, user_id={current_user.id}")
+    return _workflow_json_response(workflow)
+
+
+@router.get("/templates/search", response_model=WorkflowTemplateSearchResponse)
+async def search_workflow_templates(
+    q: Optional[str] = Query(None, min_length=1, max_length=200, description="搜尋字詞（支援 \"片語\"、OR、-排除）"),
+    tags: Optional[List[str]] = Query(None, description="須包含的標籤（全部符合）"),
+    node_types: Optional[List[str]] = Query(None, description="須包含的節點類型（全部符合）"),
+    category: Optional[str] = Query(None, description="分類篩選"),
+    limit: int = Query(20, ge=1, le=100, description="返回的記錄數"),
+    offset: int = Query(0, ge=0, le=10000, description="跳過的記錄數"),
+    db: Session = Depends(get_db)
+):
+    """
+    搜尋公開模板（公開API，不需要認證；分數相同時依使用次數排序）
+    """
+    try:
+        items, has_more = await SearchService(db).search_templates(
+            query=q, tags=tags, node_types=node_types,
+            category=category, limit=limit, offset=offset
+        )
+        return {"items": items, "has_more": has_more}
+    except Exception as e:
+        logger.error(f"搜尋工作流模板失敗: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="搜尋工作流模板失敗"
+        )
+
+
+@router.post("/templates/import", response_model=WorkflowImportResponse)
+async def import_workflow_templates(
+    request: Request,
+    import_format: Literal["ndjson", "jsonl.gz", "zip"] = Query("ndjson", alias="format", description="匯入格式"),
+    current_user: User = Depends(get_current_user_from_token)
+):
+    """
+    批次匯入工作流模板（僅限管理員；格式與工作流匯入相同，模板不同步到 n8n）
+    """
+    if not current_user.is_superuser:
+        raise AuthorizationError("只有管理員可以匯入模板")
+
+    try:
+        result = await _run_import(request, "templates", import_format, current_user.id)
+    except ValidationError:
+        raise
+    except Exception as e:
+        logger.error(f"批次匯入模板失敗: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="批次匯入模板失敗"
+        )
+
+    if result.imported:
+        try:
+            await template_leaderboard.mark_changed()
+        except Exception as e:
+            logger.warning(f"更新模板異動標記失敗: {e}")
+
+    logger.info(f"批次匯入模板: user_id={current_user.id}, 成功={result.imported}, 失敗={result.failed}")
+    return {**result.to_dict(), "n8n_sync": "skipped"}
+
+
+# ==================== 工作流版本管理 API ====================
+
+async def _get_owned_workflow(workflow_service: WorkflowService, workflow_id: str, current_user: User):
+    """
+    取得使用者自己的工作流（驗證 ID 格式與權限）
+    """
+    try:
+        uuid.UUID(workflow_id)
+    except ValueError:
+        raise ValidationError("無效的工作流ID格式", field="workflow_id")
+
+    workflow = await workflow_service.get_workflow_by_id(workflow_id)
+    if not workflow:
+        raise ResourceNotFoundError("工作流", workflow_id)
+
+    # 檢查權限：只能存取自己的工作流
+    if workflow.user_id != current_user.id:
+        raise AuthorizationError("只能存取自己的工作流")
+    return workflow
+
+
+@router.get("/{workflow_id}/versions", response_model=List[WorkflowVersionSummary])
+async def get_workflow_versions(
+    workflow_id: str,
+    skip: int = Query(0, ge=0, description="跳過的記錄數"),
+    limit: int = Query(20, ge=1, le=100, description="返回的記錄數"),
+    current_user: User = Depends(get_current_user_from_token),
+    db: Session = Depends(get_db)
+):
+    """
+    取得工作流版本列表（不含內容）
+    """
+    workflow_service = WorkflowService(db)
+    await _get_owned_workflow(workflow_service, workflow_id, current_user)
+
+    versions = await workflow_service.get_workflow_versions(workflow_id, skip=skip, limit=limit)
+    return Response(content=dump_version_summary_list(versions), media_type="application/json")
+
+
+@router.post("/{workflow_id}/versions", response_model=WorkflowVersionSummary)
+async def create_workflow_version(
+    workflow_id: str,
+    version_data: WorkflowVersionCreate,
+    current_user: User = Depends(get_current_user_from_token),
+    db: Session = Depends(get_db)
+):
+    """
+    建立工作流版本快照（未提供內容時以目前內容建立）
+    """
+    workflow_service = WorkflowService(db)
+    await _get_owned_workflow(workflow_service, workflow_id, current_user)
+
+    try:
+        version = await workflow_service.create_workflow_version(
+            workflow_id=workflow_id,
+            version_data=version_data,
+            created_by=current_user.id
+        )
+    except ResourceNotFoundError:
+        raise
+    except Exception as e:
+        logger.error(f"建立工作流版本失敗: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="建立工作流版本失敗"
+        )
+
+    logger.info(f"工作流版本建立成功: workflow_id={workflow_id}, version={version.version_number}")
+    return Response(content=WorkflowVersionSummary.model_validate(version).model_dump_json(), media_type="application/json")
+
+
+@router.get("/{workflow_id}/versions/diff", response_model=WorkflowVersionDiffResponse)
+async def diff_workflow_versions(
+    workflow_id: str,
+    base: str = Query(..., description="比對基準版本 ID"),
+    target: str = Query(..., description="比對目標版本 ID"),
+    current_user: User = Depends(get_current_user_from_token),
+    db: Session = Depends(get_db)
+):
+    """
+    比對兩個版本的差異（只載入有差異的內容）
+    """
+    workflow_service = WorkflowService(db)
+    await _get_owned_workflow(workflow_service, workflow_id, current_user)
+
+    diff = await workflow_service.diff_workflow_versions(workflow_id, base, target)
+    return WorkflowVersionDiffResponse(**diff)
+
+
+@router.get("/{workflow_id}/versions/{version_id}", response_model=WorkflowVersionResponse)
+async def get_workflow_version(
+    workflow_id: str,
+    version_id: str,
+    current_user: User = Depends(get_current_user_from_token),
+    db: Session = Depends(get_db)
+):
+    """
+    取得工作流版本（含重建後的內容）
+    """
+    workflow_service = WorkflowService(db)
+    await _get_owned_workflow(workflow_service, workflow_id, current_user)
+
+    version = await workflow_service.get_workflow_version(workflow_id, version_id)
+    if not version:
+        raise ResourceNotFoundError("工作流版本", version_id)
+
+    return Response(content=dump_version(version, workflow_service.get_version_content(version)), media_type="application/json")
+
+
+@router.post("/{workflow_id}/versions/{version_id}/rollback", response_model=WorkflowResponse)
+async def rollback_workflow_version(
+    workflow_id: str,
+    version_id: str,
+    current_user: User = Depends(get_current_user_from_token),
+    db: Session = Depends(get_db)
+):
+    """
+    回滾工作流到指定版本
+    """
+    workflow_service = WorkflowService(db)
+    await _get_owned_workflow(workflow_service, workflow_id, current_user)
+
+    try:
+        workflow = await workflow_service.rollback_to_version(workflow_id, version_id)
+    except ResourceNotFoundError:
+        raise
+    except Exception as e:
+        logger.error(f"回滾工作流版本失敗: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="回滾工作流版本失敗"
+        )
+
+    logger.info(f"工作流版本回滾成功: workflow_id={workflow_id}, version_id={version_id}, user_id={current_user.id}")
+    return _workflow_json_response(workflow)
@@ -58,6 +58,7 @@ class Settings(BaseSettings):
     JWT_ALGORITHM: str = Field(default="HS256", description="JWT 演算法")
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int = Field(default=30, description="存取權杖過期時間(分鐘)")
     JWT_REFRESH_TOKEN_EXPIRE_DAYS: int = Field(default=7, description="重新整理權杖過期時間(天)")
+    EXECUTION_STREAM_TOKEN_TTL_SECONDS: int = Field(default=300, description="執行狀態推播（SSE / WebSocket）短效權杖的有效秒數")
     
     # n8n 設定
     N8N_HOST: str = Field(default="localhost", description="n8n 主機")
@@ -68,6 +69,60 @@ class Settings(BaseSettings):
     N8N_BASIC_AUTH_PASSWORD: str = Field(default="admin123", description="n8n 認證密碼")
     N8N_WEBHOOK_URL: str = Field(default="http://localhost:5678", description="n8n Webhook URL")
     
+    # 排程觸發設定
+    SCHEDULER_ENABLED: bool = Field(default=True, description="啟用排程觸發引擎")
+    SCHEDULER_TICK_SECONDS: float = Field(default=1.0, description="排程器檢查間隔(秒)")
+    SCHEDULER_RELOAD_SECONDS: int = Field(default=60, description="排程重新載入間隔(秒)")
+    SCHEDULER_LEADER_TTL_SECONDS: int = Field(default=15, description="排程器領導者租約(秒)")
+    SCHEDULER_MAX_JITTER_SECONDS: float = Field(default=30.0, description="排程觸發最大抖動(秒)")
+    SCHEDULER_CATCHUP_WINDOW_SECONDS: int = Field(default=3600, description="錯過排程補觸發時間窗口(秒)")
+    SCHEDULER_MAX_CONCURRENCY: int = Field(default=20, description="排程觸發最大並行數")
+    SCHEDULER_DEFAULT_TIMEZONE: str = Field(default="Asia/Taipei", description="排程預設時區")
+    
+    # 版本快照設定
+    AUTO_VERSION_ENABLED: bool = Field(default=True, description="儲存時自動建立版本快照")
+    AUTO_VERSION_DEBOUNCE_SECONDS: int = Field(default=30, description="自動快照最短間隔(秒)")
+    AUTO_VERSION_COALESCE_SECONDS: int = Field(default=600, description="自動快照合併視窗(秒)，視窗內只保留一個自動版本")
+    VERSION_BLOB_GC_ENABLED: bool = Field(default=True, description="定期回收未被任何版本引用的內容 blob")
+    VERSION_BLOB_GC_INTERVAL_SECONDS: int = Field(default=3600, description="內容 blob 回收間隔(秒)")
+    VERSION_BLOB_GC_GRACE_SECONDS: int = Field(default=86400, description="內容 blob 最後引用後的保留時間(秒)")
+    VERSION_BLOB_GC_BATCH_SIZE: int = Field(default=5000, description="內容 blob 每批刪除筆數")
+    VERSION_BLOB_WRITE_BATCH_SIZE: int = Field(default=1000, description="寫入快照時每批查詢/新增的 blob 數（避免超過 PostgreSQL 參數上限）")
+    
+    # 圖形編譯設定
+    GRAPH_COMPILE_CACHE_SIZE: int = Field(default=256, description="圖形編譯結果快取數量（每個 worker）")
+    GRAPH_VALIDATE_ON_SAVE: bool = Field(default=True, description="儲存時檢查圖形結構錯誤")
+    
+    # 節點類型目錄設定
+    NODE_CATALOG_REFRESH_SECONDS: float = Field(default=30.0, description="節點類型目錄檢查更新間隔(秒)")
+    
+    # 批次執行設定
+    BATCH_EXECUTION_MAX_ITEMS: int = Field(default=10000, description="單次批次執行最大筆數")
+    BATCH_EXECUTION_CONCURRENCY: int = Field(default=20, description="批次執行 n8n 最大並行數")
+    BATCH_EXECUTION_FLUSH_SIZE: int = Field(default=500, description="批次執行狀態寫回筆數")
+    BATCH_EXECUTION_PROGRESS_TTL_SECONDS: int = Field(default=86400, description="批次進度保留時間(秒)")
+    BATCH_EXECUTION_LEASE_SECONDS: int = Field(default=120, description="批次執行租約(秒)，逾時未續約的批次視為中斷")
+    BATCH_EXECUTION_SWEEP_SECONDS: int = Field(default=60, description="中斷批次檢查間隔(秒)")
+    BULK_OPERATION_MAX_ITEMS: int = Field(default=1000, description="單次批次操作最大工作流數")
+    BULK_OPERATION_N8N_CONCURRENCY: int = Field(default=10, description="批次操作 n8n 同步最大並行數")
+    WORKFLOW_PATCH_MAX_OPERATIONS: int = Field(default=500, description="單次增量儲存最大操作數")
+    
+    # 匯出設定
+    EXPORT_BATCH_SIZE: int = Field(default=1000, description="串流匯出每批讀取筆數（伺服器端游標）")
+    
+    # 模板排行榜設定
+    TEMPLATE_LEADERBOARD_ENABLED: bool = Field(default=True, description="啟用模板計數緩衝與排行榜重建")
+    TEMPLATE_LEADERBOARD_REFRESH_SECONDS: int = Field(default=60, description="模板計數寫回與排行榜重建間隔(秒)")
+    TEMPLATE_TRENDING_WINDOW_HOURS: int = Field(default=24, description="熱門模板統計時間窗口(小時)")
+    TEMPLATE_TOP_LIMIT: int = Field(default=50, description="快取的排行榜與熱門模板筆數")
+    
+    # 匯入設定
+    IMPORT_CHUNK_SIZE: int = Field(default=2000, description="批次匯入每區塊筆數（每區塊一次 COPY）")
+    IMPORT_MAX_ITEMS: int = Field(default=200000, description="單次匯入最大筆數")
+    IMPORT_MAX_BYTES: int = Field(default=1024 * 1024 * 1024, description="單次匯入請求內容上限(位元組)")
+    IMPORT_VALIDATION_WORKERS: int = Field(default=4, description="匯入時平行解析與驗證的子行程數（0 表示在請求執行緒中處理）")
+    IMPORT_N8N_SYNC_BATCH_SIZE: int = Field(default=200, description="匯入後背景同步 n8n 每批讀取的工作流數")
+    
     # 台灣在地服務 API 設定
     LINE_PAY_CHANNEL_ID: Optional[str] = Field(default=None, description="Line Pay 頻道 ID")
     LINE_PAY_CHANNEL_SECRET: Optional[str] = Field(default=None, description="Line Pay 頻道密鑰")
@@ -90,11 +145,45 @@ class Settings(BaseSettings):
     LOG_LEVEL: str = Field(default="INFO", description="日誌等級")
     LOG_FORMAT: str = Field(default="json", description="日誌格式")
     LOG_FILE_PATH: str = Field(default="logs/app.log", description="日誌檔案路徑")
+    LOG_QUEUE_ENABLED: bool = Field(default=True, description="由背景執行緒格式化與寫入日誌")
+    LOG_QUEUE_MAX_SIZE: int = Field(default=10000, description="日誌佇列上限（已滿時捨棄）")
+    LOG_REQUEST_SAMPLE_RATE: float = Field(
+        default=1.0, ge=0.0, le=1.0,
+        description="成功請求日誌的取樣比例（錯誤回應與例外一律記錄）"
+    )
+    
+    # 監控指標設定（多行程部署時另設 PROMETHEUS_MULTIPROC_DIR 環境變數，由各 worker 共用）
+    METRICS_ENABLED: bool = Field(default=True, description="啟用 Prometheus 指標與 /metrics 端點")
+    METRICS_PATH: str = Field(default="/metrics", description="指標端點路徑")
+    METRICS_FLUSH_INTERVAL_SECONDS: float = Field(default=1.0, description="緩衝的指標觀測值寫入間隔(秒)")
+    
+    # 分散式追蹤設定（OpenTelemetry）
+    TRACING_ENABLED: bool = Field(default=False, description="啟用 OpenTelemetry 追蹤")
+    TRACING_SERVICE_NAME: str = Field(default="tw-zapier-backend", description="追蹤的服務名稱")
+    TRACING_SAMPLE_RATIO: float = Field(default=0.1, ge=0.0, le=1.0, description="根追蹤的取樣比例（上游已取樣時跟隨上游）")
+    TRACING_EXPORTER: str = Field(default="otlp", description="匯出方式：otlp（本機 collector）、file 或 console")
+    TRACING_OTLP_ENDPOINT: str = Field(default="http://localhost:4318/v1/traces", description="OTLP/HTTP collector 端點")
+    TRACING_FILE_PATH: str = Field(default="logs/traces.jsonl", description="file 匯出時的檔案路徑（每行一個 span）")
+    TRACING_SQL_STATEMENT_MAX_LENGTH: int = Field(default=2000, description="span 中記錄的 SQL 語句最大長度")
+    
+    # 查詢監控設定（慢查詢日誌與 N+1 偵測）
+    QUERY_MONITOR_ENABLED: bool = Field(default=True, description="啟用每個請求的查詢統計、慢查詢日誌與 N+1 偵測")
+    DATABASE_ECHO: bool = Field(default=False, description="記錄所有 SQL 語句（SQLAlchemy echo）")
+    SLOW_QUERY_THRESHOLD_MS: float = Field(default=200.0, description="慢查詢門檻（毫秒）")
+    N_PLUS_ONE_THRESHOLD: int = Field(default=5, ge=2, description="同一請求中同一關聯延遲載入或相同語句重複達此次數時視為 N+1")
+    
+    # 效能分析設定（統計式取樣，關閉時不註冊端點與中介軟體）
+    PROFILING_ENABLED: bool = Field(default=False, description="啟用管理員效能分析端點與單一請求分析")
+    PROFILING_INTERVAL_MS: float = Field(default=5.0, gt=0, description="取樣間隔（毫秒）")
+    PROFILING_MAX_SECONDS: float = Field(default=60.0, description="單次取樣的最長秒數")
+    PROFILING_TOKEN_TTL_SECONDS: int = Field(default=300, description="單一請求分析權杖的有效秒數")
+    PROFILING_OUTPUT_DIR: str = Field(default="logs/profiles", description="單一請求分析結果目錄")
     
     # 安全性設定
     ENABLE_RATE_LIMITING: bool = Field(default=True, description="啟用速率限制")
     RATE_LIMIT_PER_MINUTE: int = Field(default=60, description="每分鐘請求限制")
     MAX_UPLOAD_SIZE: str = Field(default="10MB", description="最大上傳檔案大小")
+    IDEMPOTENCY_WINDOW_SECONDS: int = Field(default=86400, description="冪等鍵保留時間(秒)")
 
     # 開發工具設定
     ENABLE_SWAGGER_UI: bool = Field(default=True, description="啟用 Swagger UI")
@@ -0,0 +1,158 @@
+"""
+Cron 表達式解析與下次觸發時間計算
+"""
+
+import re
+from datetime import datetime, timedelta
+from typing import Dict, FrozenSet, Optional, Tuple
+
+
+# 常用別名
+CRON_ALIASES = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+}
+
+# 各欄位範圍：分、時、日、月、星期（0 = 星期日，7 亦視為星期日）
+FIELD_RANGES: Tuple[Tuple[int, int], ...] = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+# 月份與星期的英文縮寫（不分大小寫，可用於範圍與清單，如 MON-FRI、JAN,JUL）
+MONTH_NAMES = {
+    name: number for number, name in enumerate(
+        ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"), start=1
+    )
+}
+WEEKDAY_NAMES = {name: number for number, name in enumerate(("sun", "mon", "tue", "wed", "thu", "fri", "sat"))}
+FIELD_NAMES: Tuple[Optional[Dict[str, int]], ...] = (None, None, None, MONTH_NAMES, WEEKDAY_NAMES)
+
+NAME_PATTERN = re.compile(r"[a-z]+", re.IGNORECASE)
+
+# 搜尋下次觸發時間的上限（年），避免無法觸發的表達式（如 2 月 30 日）無限迴圈
+MAX_SEARCH_YEARS = 5
+
+
+def _replace_names(field: str, names: Optional[Dict[str, int]]) -> str:
+    """將月份 / 星期名稱換成數字"""
+    def replace(match) -> str:
+        value = (names or {}).get(match.group(0).lower())
+        if value is None:
+            raise ValueError(f"無效的欄位值: {match.group(0)}")
+        return str(value)
+
+    return NAME_PATTERN.sub(replace, field)
+
+
+def _parse_field(field: str, low: int, high: int, names: Optional[Dict[str, int]] = None) -> FrozenSet[int]:
+    """
+    解析單一 cron 欄位，支援 *、數字、名稱（月份與星期）、範圍 (a-b)、間隔 (*/n, a-b/n) 與清單 (a,b)
+    """
+    field = _replace_names(field, names)
+    values = set()
+    for part in field.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            step = int(step_text)
+            if step <= 0:
+                raise ValueError(f"無效的間隔值: {step_text}")
+
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start_text, end_text = part.split("-", 1)
+            start, end = int(start_text), int(end_text)
+        else:
+            start = int(part)
+            end = high if step > 1 else start
+
+        if start < low or end > high or start > end:
+            raise ValueError(f"欄位值超出範圍: {part} (允許 {low}-{high})")
+
+        values.update(range(start, end + 1, step))
+
+    return frozenset(values)
+
+
+class CronExpression:
+    """
+    標準 5 欄位 cron 表達式（分 時 日 月 星期）
+
+    與 Vixie cron 相同：日與星期皆有限制時，任一條件符合即觸發。
+    """
+
+    __slots__ = (
+        "expression", "minutes", "hours", "days", "months", "weekdays",
+        "_sorted_minutes", "_sorted_hours", "_day_restricted", "_weekday_restricted"
+    )
+
+    def __init__(self, expression: str):
+        self.expression = expression.strip()
+        normalized = CRON_ALIASES.get(self.expression.lower(), self.expression)
+        parts = normalized.split()
+        if len(parts) != 5:
+            raise ValueError(f"Cron 表達式需為 5 個欄位: {expression}")
+
+        fields = [
+            _parse_field(part, low, high, names)
+            for part, (low, high), names in zip(parts, FIELD_RANGES, FIELD_NAMES)
+        ]
+        self.minutes, self.hours, self.days, self.months, weekdays = fields
+        # 7 與 0 皆代表星期日
+        self.weekdays = frozenset(day % 7 for day in weekdays)
+
+        self._sorted_minutes = sorted(self.minutes)
+        self._sorted_hours = sorted(self.hours)
+        self._day_restricted = parts[2] != "*"
+        self._weekday_restricted = parts[4] != "*"
+
+    def _day_matches(self, dt: datetime) -> bool:
+        """檢查日期是否符合日與星期條件"""
+        day_ok = dt.day in self.days
+        weekday_ok = (dt.weekday() + 1) % 7 in self.weekdays
+        if self._day_restricted and self._weekday_restricted:
+            return day_ok or weekday_ok
+        return day_ok and weekday_ok
+
+    def next_after(self, dt: datetime) -> datetime:
+        """
+        取得嚴格晚於 dt 的下一個觸發時間（以 dt 的時區/naive 時間計算）
+        """
+        current = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        year_limit = current.year + MAX_SEARCH_YEARS
+
+        while current.year <= year_limit:
+            if current.month not in self.months:
+                # 跳到下個月第一天
+                year = current.year + (current.month // 12)
+                month = current.month % 12 + 1
+                current = current.replace(year=year, month=month, day=1, hour=0, minute=0)
+                continue
+
+            if not self._day_matches(current):
+                current = (current + timedelta(days=1)).replace(hour=0, minute=0)
+                continue
+
+            if current.hour not in self.hours:
+                next_hour = next((h for h in self._sorted_hours if h > current.hour), None)
+                if next_hour is None:
+                    current = (current + timedelta(days=1)).replace(hour=0, minute=0)
+                else:
+                    current = current.replace(hour=next_hour, minute=0)
+                continue
+
+            next_minute = next((m for m in self._sorted_minutes if m >= current.minute), None)
+            if next_minute is None:
+                current = current.replace(minute=0) + timedelta(hours=1)
+                continue
+
+            return current.replace(minute=next_minute)
+
+        raise ValueError(f"Cron 表達式在 {MAX_SEARCH_YEARS} 年內不會觸發: {self.expression}")
+
+    def __repr__(self):
+        return f"<CronExpression('{self.expression}')>"
@@ -9,6 +9,8 @@ from sqlalchemy.pool import StaticPool
 import logging
 
 from app.core.config import settings
+from app.core.metrics import instrument_engine
+from app.core import query_monitor, tracing
 
 logger = logging.getLogger(__name__)
 
@@ -19,12 +21,24 @@ engine = create_engine(
     pool_recycle=300,
     pool_size=10,
     max_overflow=20,
-    echo=settings.DEBUG,  # 在除錯模式下顯示 SQL 查詢
+    echo=settings.DATABASE_ECHO,  # 顯示所有 SQL 查詢（慢查詢另由 query_monitor 記錄）
 )
 
+# 查詢時間與連線池使用量指標
+if settings.METRICS_ENABLED:
+    instrument_engine(engine)
+
+# 每個 SQL 語句的追蹤 span
+if settings.TRACING_ENABLED:
+    tracing.instrument_engine(engine)
+
 # 建立 SessionLocal 類別
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 每個請求的查詢統計、慢查詢日誌與 N+1 偵測
+if settings.QUERY_MONITOR_ENABLED:
+    query_monitor.instrument(engine, SessionLocal)
+
 # 建立 Base 類別
 Base = declarative_base()
 
@@ -0,0 +1,65 @@
+"""
+ETag 與條件式請求 - If-None-Match (304) 與 If-Match (412)
+
+單一資源的 ETag 由版本號 / updated_at 組成，集合的 ETag 由集合版本
+（列數與最後更新時間）加上查詢參數組成，兩者都不需要序列化回應內容即可計算。
+"""
+
+import hashlib
+from typing import Any, Dict, Optional
+
+from fastapi import Response, status
+
+from app.core.exceptions import PreconditionFailedError
+
+# 可由瀏覽器快取，但每次使用前都必須以 ETag 重新驗證
+REVALIDATE_CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: Any) -> str:
+    """由識別資料計算強 ETag"""
+    raw = "\x1f".join("" if part is None else str(part) for part in parts)
+    return f'"{hashlib.blake2b(raw.encode("utf-8"), digest_size=12).hexdigest()}"'
+
+
+def _parse(header: Optional[str], weak: bool = True) -> set:
+    """
+    解析 If-None-Match / If-Match 標頭（可含多個 ETag）；
+    弱比較時忽略 W/ 前綴，強比較時弱 ETag 不會與任何 ETag 相符
+    """
+    if not header:
+        return set()
+    tags = (tag.strip() for tag in header.split(","))
+    if weak:
+        return {tag.removeprefix("W/") for tag in tags if tag}
+    return {tag for tag in tags if tag and not tag.startswith("W/")}
+
+
+def etag_matches(header: Optional[str], etag: str, weak: bool = True) -> bool:
+    """標頭是否包含此 ETag（或 *）；If-None-Match 使用弱比較，If-Match 使用強比較 (RFC 9110)"""
+    candidates = _parse(header, weak)
+    return "*" in candidates or etag in candidates
+
+
+def etag_headers(etag: str) -> Dict[str, str]:
+    return {"ETag": etag, "Cache-Control": REVALIDATE_CACHE_CONTROL}
+
+
+def not_modified_response(if_none_match: Optional[str], etag: str) -> Optional[Response]:
+    """If-None-Match 符合時回傳 304 回應，否則回傳 None"""
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=etag_headers(etag))
+    return None
+
+
+def set_etag(response: Response, etag: str):
+    """在回應加上 ETag 與重新驗證快取策略"""
+    response.headers.update(etag_headers(etag))
+
+
+def check_if_match(if_match: Optional[str], current_etag: str):
+    """
+    If-Match 與目前 ETag 不符時拋出 PreconditionFailedError；未帶標頭則不檢查
+    """
+    if if_match and not etag_matches(if_match, current_etag, weak=False):
+        raise PreconditionFailedError("資源已被其他人修改，請重新載入後再試", current_etag=current_etag)
@@ -100,6 +100,19 @@ class ResourceConflictError(TaiwanZapierException):
         )
 
 
+class PreconditionFailedError(TaiwanZapierException):
+    """
+    前置條件失敗（If-Match 與目前資源版本不符）
+    """
+    
+    def __init__(self, message: str = "資源已被修改", current_etag: str = None):
+        super().__init__(
+            message=message,
+            error_code="PRECONDITION_FAILED",
+            details={"current_etag": current_etag} if current_etag else {}
+        )
+
+
 class ExternalServiceError(TaiwanZapierException):
     """
     外部服務錯誤
@@ -177,6 +190,7 @@ async def taiwan_zapier_exception_handler(
         "AUTHORIZATION_ERROR": status.HTTP_403_FORBIDDEN,
         "RESOURCE_NOT_FOUND": status.HTTP_404_NOT_FOUND,
         "RESOURCE_CONFLICT": status.HTTP_409_CONFLICT,
+        "PRECONDITION_FAILED": status.HTTP_412_PRECONDITION_FAILED,
         "EXTERNAL_SERVICE_ERROR": status.HTTP_502_BAD_GATEWAY,
         "WORKFLOW_EXECUTION_ERROR": status.HTTP_500_INTERNAL_SERVER_ERROR,
         "RATE_LIMIT_EXCEEDED": status.HTTP_429_TOO_MANY_REQUESTS,
@@ -0,0 +1,151 @@
+"""
+冪等性控制 - 防止重複投遞的 Webhook 與執行請求產生重複的執行記錄
+"""
+
+import json
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.redis import get_redis
+
+logger = logging.getLogger("app.core.idempotency")
+
+# 處理中標記（第一個請求尚未完成時存放於 Redis 的值）
+PENDING_MARKER = "__pending__"
+
+# 冪等鍵最大長度（與 WorkflowExecution.idempotency_key 欄位一致）
+MAX_KEY_LENGTH = 255
+
+
+def _present(trigger_data: Dict[str, Any], *fields: str) -> bool:
+    return all(trigger_data.get(field) not in (None, "") for field in fields)
+
+
+def provider_transaction(trigger_data: Optional[Dict[str, Any]]) -> Optional[Tuple[str, str, str]]:
+    """
+    辨識金流供應商的 webhook，回傳 (供應商, 事件類型, 交易識別)；無法辨識時回傳 None
+
+    只依各供應商通知特有的欄位組合判斷，單一的 orderId / TradeNo 等欄位不視為交易識別。
+    """
+    if not isinstance(trigger_data, dict):
+        return None
+
+    # 綠界科技付款結果通知：MerchantID + MerchantTradeNo + RtnCode；
+    # 定期定額每期共用 MerchantTradeNo，以已授權次數區分各期
+    if _present(trigger_data, "MerchantID", "MerchantTradeNo", "RtnCode"):
+        transaction = f"{trigger_data['MerchantID']}:{trigger_data['MerchantTradeNo']}"
+        if _present(trigger_data, "TotalSuccessTimes"):
+            return "ecpay", "period", f"{transaction}:{trigger_data['TotalSuccessTimes']}"
+        return "ecpay", "payment", transaction
+
+    # LINE Pay 付款確認：transactionId + orderId；退款另帶 refundTransactionId
+    if _present(trigger_data, "transactionId", "orderId"):
+        if _present(trigger_data, "refundTransactionId"):
+            return "linepay", "refund", f"{trigger_data['transactionId']}:{trigger_data['refundTransactionId']}"
+        return "linepay", "payment", str(trigger_data["transactionId"])
+
+    return None
+
+
+def resolve_idempotency_key(
+    header_value: Optional[str],
+    trigger_data: Optional[Dict[str, Any]] = None,
+    trigger_type: Optional[str] = None
+) -> Optional[str]:
+    """
+    解析冪等鍵：優先使用 Idempotency-Key 標頭；webhook 觸發時其次使用可辨識的金流供應商交易，
+    鍵包含供應商與事件類型（同一訂單的付款與退款是不同的鍵）
+    """
+    if header_value and header_value.strip():
+        return header_value.strip()[:MAX_KEY_LENGTH]
+
+    if trigger_type != "webhook":
+        return None
+
+    transaction = provider_transaction(trigger_data)
+    if transaction:
+        return ":".join(transaction)[:MAX_KEY_LENGTH]
+
+    return None
+
+
+class IdempotencyGuard:
+    """
+    以 Redis SET NX 實作的冪等視窗
+
+    Redis 只負責快速攔截重複請求與快取第一次的回應；
+    最終一致性由資料庫的唯一約束 (workflow_id, idempotency_key) 保證，
+    因此 Redis 無法使用時會放行請求，交由資料庫層處理。
+    執行失敗時不快取回應並釋放鍵，執行記錄上的冪等鍵也會清除，供應商的重試會重新執行。
+    """
+
+    def __init__(self, window_seconds: Optional[int] = None):
+        self.window_seconds = window_seconds or settings.IDEMPOTENCY_WINDOW_SECONDS
+
+    @staticmethod
+    def _key(scope: str, key: str) -> str:
+        return f"idempotency:{scope}:{key}"
+
+    async def acquire(self, scope: str, key: str) -> bool:
+        """
+        嘗試取得冪等鍵，回傳 False 代表已有相同鍵的請求
+        """
+        try:
+            client = get_redis()
+            acquired = await client.set(
+                self._key(scope, key),
+                PENDING_MARKER,
+                nx=True,
+                ex=self.window_seconds
+            )
+            return bool(acquired)
+        except Exception as e:
+            logger.warning(f"冪等鍵取得失敗，改由資料庫約束處理 - key: {key}, error: {e}")
+            return True
+
+    async def get_response(self, scope: str, key: str) -> Optional[Dict[str, Any]]:
+        """
+        取得第一次請求快取的回應，尚未完成時回傳 None
+        """
+        try:
+            client = get_redis()
+            value = await client.get(self._key(scope, key))
+            if value and value != PENDING_MARKER:
+                return json.loads(value)
+            return None
+        except Exception as e:
+            logger.warning(f"取得冪等回應失敗 - key: {key}, error: {e}")
+            return None
+
+    async def store_response(self, scope: str, key: str, response: Dict[str, Any]) -> bool:
+        """
+        快取第一次請求的回應，供重送請求直接回傳
+        """
+        try:
+            client = get_redis()
+            await client.set(
+                self._key(scope, key),
+                json.dumps(response, ensure_ascii=False, default=str),
+                ex=self.window_seconds
+            )
+            return True
+        except Exception as e:
+            logger.warning(f"儲存冪等回應失敗 - key: {key}, error: {e}")
+            return False
+
+    async def release(self, scope: str, key: str) -> bool:
+        """
+        釋放冪等鍵（請求在建立執行記錄前失敗時使用，讓供應商可以重試）
+        """
+        try:
+            client = get_redis()
+            await client.delete(self._key(scope, key))
+            return True
+        except Exception as e:
+            logger.warning(f"釋放冪等鍵失敗 - key: {key}, error: {e}")
+            return False
+
+
+# 全域冪等控制實例
+idempotency_guard = IdempotencyGuard()
@@ -0,0 +1,129 @@
+"""
+JSON Schema 驗證
+
+以 fastjsonschema 將 schema 預先編譯成 Python 驗證函式（支援 draft-04 / 06 / 07 的所有關鍵字，
+包含 anyOf / oneOf / allOf / $ref / format），驗證時不再解析 schema。
+通過與錯誤訊息都由同一個編譯結果判斷；錯誤訊息依違反的規則轉為中文。
+"""
+
+import json
+import re
+from functools import lru_cache
+from typing import Any, Callable, Dict, List
+
+import fastjsonschema
+from fastjsonschema import JsonSchemaValueException
+
+# 驗證失敗時錯誤路徑的根名稱（訊息中會移除）
+ROOT_NAME = "data"
+
+
+def _reject_remote_ref(uri: str):
+    """schema 來自節點類型設定，不允許編譯時連線下載遠端 $ref"""
+    raise ValueError(f"不支援遠端 $ref: {uri}")
+
+
+_REMOTE_HANDLERS = {"http": _reject_remote_ref, "https": _reject_remote_ref}
+
+
+def _path(error: JsonSchemaValueException) -> str:
+    """將 data.a.b[0] 形式的錯誤路徑轉為 a.b[0]"""
+    return (error.name or ROOT_NAME)[len(ROOT_NAME):].lstrip(".")
+
+
+def _additional_names(error: JsonSchemaValueException) -> List[str]:
+    """找出 additionalProperties: false 時不允許的欄位"""
+    definition = error.definition or {}
+    properties = definition.get("properties") or {}
+    patterns = [re.compile(pattern) for pattern in (definition.get("patternProperties") or {})]
+    return [
+        name for name in (error.value or {})
+        if name not in properties and not any(pattern.search(name) for pattern in patterns)
+    ]
+
+
+# 規則 -> 錯誤訊息（label 為欄位路徑，值為 schema 中該規則的設定）
+_MESSAGES: Dict[str, Callable[[str, Any], str]] = {
+    "type": lambda label, types: f"{label} 必須為 {' / '.join(types) if isinstance(types, list) else types}",
+    "enum": lambda label, allowed: f"{label} 必須為 {allowed} 其中之一",
+    "const": lambda label, constant: f"{label} 必須為 {constant!r}",
+    "minLength": lambda label, bound: f"{label} 長度不可少於 {bound}",
+    "maxLength": lambda label, bound: f"{label} 長度不可超過 {bound}",
+    "pattern": lambda label, pattern: f"{label} 格式不符",
+    "format": lambda label, name: f"{label} 必須為 {name} 格式",
+    "minimum": lambda label, bound: f"{label} 不可小於 {bound}",
+    "maximum": lambda label, bound: f"{label} 不可大於 {bound}",
+    "exclusiveMinimum": lambda label, bound: f"{label} 必須大於 {bound}",
+    "exclusiveMaximum": lambda label, bound: f"{label} 必須小於 {bound}",
+    "multipleOf": lambda label, step: f"{label} 必須為 {step} 的倍數",
+    "minItems": lambda label, bound: f"{label} 至少需要 {bound} 個項目",
+    "maxItems": lambda label, bound: f"{label} 最多 {bound} 個項目",
+    "uniqueItems": lambda label, _: f"{label} 的項目不可重複",
+    "minProperties": lambda label, bound: f"{label} 至少需要 {bound} 個欄位",
+    "maxProperties": lambda label, bound: f"{label} 最多 {bound} 個欄位",
+    "anyOf": lambda label, _: f"{label} 不符合任何一個允許的格式",
+    "oneOf": lambda label, _: f"{label} 必須恰好符合一個允許的格式",
+    "not": lambda label, _: f"{label} 不可符合被排除的格式",
+}
+
+
+def _messages(error: JsonSchemaValueException) -> List[str]:
+    """將驗證例外轉為錯誤訊息"""
+    path = _path(error)
+    prefix = f"{path}." if path else ""
+
+    if error.rule == "required":
+        return [
+            f"缺少必要欄位 {prefix}{name}"
+            for name in error.rule_definition if name not in (error.value or {})
+        ]
+    if error.rule == "additionalProperties" and error.rule_definition is False:
+        return [f"不允許的欄位 {prefix}{name}" for name in _additional_names(error)]
+
+    label = path or "值"
+    message = _MESSAGES.get(error.rule)
+    if message is None:
+        return [f"{label} 不符合 schema 規則 {error.rule}"]
+    return [message(label, error.rule_definition)]
+
+
+class CompiledSchema:
+    """
+    編譯後的 JSON Schema
+    """
+
+    __slots__ = ("schema", "_validate")
+
+    def __init__(self, schema: Dict[str, Any]):
+        self.schema = schema
+        # use_default=False：驗證不可把預設值寫回呼叫端的參數
+        self._validate = fastjsonschema.compile(schema, handlers=_REMOTE_HANDLERS, use_default=False)
+
+    def errors(self, value: Any) -> List[str]:
+        """
+        回傳驗證錯誤（空清單代表通過）
+
+        驗證在第一個違反的規則停止；缺少多個必要欄位時會一併列出。
+        """
+        try:
+            self._validate(value)
+        except JsonSchemaValueException as e:
+            return _messages(e) or [e.message]
+        return []
+
+    def is_valid(self, value: Any) -> bool:
+        try:
+            self._validate(value)
+        except JsonSchemaValueException:
+            return False
+        return True
+
+
+@lru_cache(maxsize=512)
+def _compile_cached(schema_json: str) -> CompiledSchema:
+    return CompiledSchema(json.loads(schema_json))
+
+
+def compile_schema(schema: Dict[str, Any]) -> CompiledSchema:
+    """編譯 schema（相同內容共用編譯結果）；schema 無效時拋出 JsonSchemaDefinitionException"""
+    return _compile_cached(json.dumps(schema, sort_keys=True, ensure_ascii=False))
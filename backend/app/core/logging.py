@@ -1,16 +1,71 @@
 """
 日誌設定和管理
+
+LOG_QUEUE_ENABLED 時各輸出（控制台、檔案）改由背景的 QueueListener 執行緒格式化與寫入，
+事件迴圈上只做訊息組合與佇列放入；request_id / user_id / workflow_id 由 contextvar 帶入每筆日誌。
 """
 
+import atexit
 import logging
 import logging.config
+import logging.handlers
+import queue
 import sys
-import json
+import time
+from contextvars import ContextVar
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
+
+import orjson
+from opentelemetry import trace
 
 from app.core.config import settings
+from app.core.metrics import LOG_RECORDS_DROPPED
+
+# 目前請求的 ID（由 RequestLoggingMiddleware 設定），供服務層日誌與對外呼叫使用
+request_id_context: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+# 目前請求的使用者與工作流（由認證依賴與工作流路由設定）
+user_id_context: ContextVar[Optional[str]] = ContextVar("user_id", default=None)
+workflow_id_context: ContextVar[Optional[str]] = ContextVar("workflow_id", default=None)
+
+_LOG_CONTEXT = (
+    ("request_id", request_id_context),
+    ("user_id", user_id_context),
+    ("workflow_id", workflow_id_context),
+)
+
+# 佇列模式下的背景寫入執行緒
+_listeners: List[logging.handlers.QueueListener] = []
+
+
+def bind_log_context(user_id: Any = None, workflow_id: Any = None):
+    """設定目前請求之後日誌所帶的 user_id / workflow_id"""
+    if user_id is not None:
+        user_id_context.set(str(user_id))
+    if workflow_id is not None:
+        workflow_id_context.set(str(workflow_id))
+
+
+class RequestContextFilter(logging.Filter):
+    """
+    為每筆日誌加上目前的 request_id / user_id / workflow_id 與追蹤 ID（trace_id / span_id）
+
+    須掛在呼叫端執行緒的 handler 上（佇列模式為 QueueHandler），contextvar 才讀得到。
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for name, context in _LOG_CONTEXT:
+            if not hasattr(record, name):
+                value = context.get()
+                if value is not None:
+                    setattr(record, name, value)
+
+        span_context = trace.get_current_span().get_span_context()
+        if span_context.is_valid:
+            record.trace_id = format(span_context.trace_id, "032x")
+            record.span_id = format(span_context.span_id, "016x")
+        return True
 
 
 class JSONFormatter(logging.Formatter):
@@ -20,7 +75,7 @@ class JSONFormatter(logging.Formatter):
     
     def format(self, record: logging.LogRecord) -> str:
         log_entry = {
-            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
             "level": record.levelname,
             "logger": record.name,
             "message": record.getMessage(),
@@ -33,6 +88,10 @@ class JSONFormatter(logging.Formatter):
         if hasattr(record, "request_id"):
             log_entry["request_id"] = record.request_id
         
+        if hasattr(record, "trace_id"):
+            log_entry["trace_id"] = record.trace_id
+            log_entry["span_id"] = record.span_id
+        
         if hasattr(record, "user_id"):
             log_entry["user_id"] = record.user_id
         
@@ -43,7 +102,7 @@ class JSONFormatter(logging.Formatter):
         if record.exc_info:
             log_entry["exception"] = self.formatException(record.exc_info)
         
-        return json.dumps(log_entry, ensure_ascii=False)
+        return orjson.dumps(log_entry, default=str).decode()
 
 
 class ColoredFormatter(logging.Formatter):
@@ -82,6 +141,55 @@ class ColoredFormatter(logging.Formatter):
         return log_message
 
 
+class QueueingHandler(logging.handlers.QueueHandler):
+    """
+    將日誌放入佇列的 handler
+
+    呼叫端只組合訊息（參數可能在之後被修改）並保留 exc_info，格式化與寫入留給背景執行緒；
+    佇列已滿時捨棄該筆日誌並計數，不阻塞事件迴圈。
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+
+def _enqueue_handlers(loggers: List[logging.Logger]):
+    """以 QueueingHandler 取代各 logger 的輸出，每個輸出由一個 QueueListener 執行緒寫入"""
+    proxies = {}
+    for logger in loggers:
+        handlers = []
+        for handler in logger.handlers:
+            proxy = proxies.get(handler)
+            if proxy is None:
+                log_queue = queue.Queue(maxsize=settings.LOG_QUEUE_MAX_SIZE)
+                proxy = proxies[handler] = QueueingHandler(log_queue)
+                # 等級與 contextvar 過濾器須在呼叫端判斷
+                proxy.setLevel(handler.level)
+                proxy.filters, handler.filters = handler.filters, []
+                listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+                listener.start()
+                _listeners.append(listener)
+            handlers.append(proxy)
+        logger.handlers = handlers
+
+
+def shutdown_logging():
+    """停止背景寫入執行緒（寫完佇列中剩餘的日誌）"""
+    while _listeners:
+        _listeners.pop().stop()
+
+
+atexit.register(shutdown_logging)
+
+
 def setup_logging():
     """
     設定應用程式日誌
@@ -110,17 +218,24 @@ def setup_logging():
                 "()": console_formatter_class,
             },
         },
+        "filters": {
+            "request_context": {
+                "()": RequestContextFilter,
+            },
+        },
         "handlers": {
             "console": {
                 "class": "logging.StreamHandler",
                 "level": settings.LOG_LEVEL,
                 "formatter": "console",
+                "filters": ["request_context"],
                 "stream": sys.stdout,
             },
             "file": {
                 "class": "logging.handlers.RotatingFileHandler",
                 "level": settings.LOG_LEVEL,
                 "formatter": "default",
+                "filters": ["request_context"],
                 "filename": settings.LOG_FILE_PATH,
                 "maxBytes": 10485760,  # 10MB
                 "backupCount": 5,
@@ -155,16 +270,27 @@ def setup_logging():
         },
     }
     
-    # 應用日誌配置
+    # 應用日誌配置（重新設定前先停止既有的背景寫入執行緒）
+    shutdown_logging()
     logging.config.dictConfig(logging_config)
     
+    # 佇列模式：控制台與檔案輸出改由背景執行緒寫入
+    if settings.LOG_QUEUE_ENABLED:
+        _enqueue_handlers([
+            logging.getLogger(name)
+            for name in ("app", "uvicorn", "uvicorn.access", "sqlalchemy.engine")
+        ] + [logging.getLogger()])
+    
     # 設定第三方套件的日誌等級
     logging.getLogger("httpx").setLevel(logging.WARNING)
     logging.getLogger("httpcore").setLevel(logging.WARNING)
     logging.getLogger("asyncio").setLevel(logging.WARNING)
     
     logger = logging.getLogger("app.core.logging")
-    logger.info(f"日誌系統初始化完成 - 等級: {settings.LOG_LEVEL}, 格式: {settings.LOG_FORMAT}")
+    logger.info(
+        f"日誌系統初始化完成 - 等級: {settings.LOG_LEVEL}, 格式: {settings.LOG_FORMAT}, "
+        f"佇列: {settings.LOG_QUEUE_ENABLED}, 請求日誌取樣: {settings.LOG_REQUEST_SAMPLE_RATE}"
+    )
 
 
 def get_logger(name: str) -> logging.Logger:
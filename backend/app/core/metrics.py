@@ -0,0 +1,386 @@
+"""
+Prometheus 監控指標
+
+- 請求延遲：依路由樣板（而非實際路徑）、方法與狀態類別統計，標籤數量固定
+- 資料庫：每個查詢的時間依當下執行的 WorkflowService 方法歸類（取代 SQLAlchemy 方言的執行方法），
+  並以連線池 checkout / checkin 事件維護使用中的連線數
+- n8n / Redis：N8nService 與 RedisCache 各方法的延遲
+- 執行佇列深度與速率限制拒絕次數
+- 每個請求的查詢數、查詢時間與 N+1 偵測次數（由 query_monitor 記錄）
+
+延遲類觀測值先放入緩衝，抓取指標時與背景每 METRICS_FLUSH_INTERVAL_SECONDS 秒整批寫入，請求路徑上不取鎖。
+
+設定 PROMETHEUS_MULTIPROC_DIR 環境變數時 prometheus_client 以 mmap 檔案記錄數值，
+多個 worker 行程共用同一目錄，/metrics 彙總所有行程；未設定時使用單一行程的預設 registry。
+"""
+
+import asyncio
+import functools
+import inspect
+import logging
+import os
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Callable, Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+
+from app.core.config import settings
+
+logger = logging.getLogger("app.core.metrics")
+
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+# 資料庫 / Redis 單次操作多在毫秒以下，使用較細的區間
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP 請求處理時間",
+    ["method", "route", "status"],
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "資料庫查詢時間（依 WorkflowService 方法歸類）",
+    ["operation"],
+    buckets=FAST_BUCKETS,
+)
+N8N_REQUEST_DURATION = Histogram(
+    "n8n_request_duration_seconds",
+    "n8n API 呼叫時間",
+    ["operation", "outcome"],
+)
+REDIS_OPERATION_DURATION = Histogram(
+    "redis_operation_duration_seconds",
+    "Redis 快取操作時間",
+    ["operation"],
+    buckets=FAST_BUCKETS,
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections",
+    "使用中的資料庫連線數",
+    multiprocess_mode="livesum",
+)
+EXECUTION_QUEUE_DEPTH = Gauge(
+    "workflow_execution_queue_depth",
+    "等待送出至 n8n 的批次執行項目數",
+    multiprocess_mode="livesum",
+)
+RATE_LIMIT_REJECTIONS = Counter(
+    "rate_limit_rejections_total",
+    "速率限制拒絕的請求數",
+)
+LOG_RECORDS_DROPPED = Counter(
+    "log_records_dropped_total",
+    "日誌佇列已滿而捨棄的日誌數",
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request",
+    "每個請求執行的 SQL 語句數",
+    ["route"],
+    buckets=(1, 2, 3, 5, 10, 20, 50, 100, 250),
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "db_time_per_request_seconds",
+    "每個請求的 SQL 執行時間總和",
+    ["route"],
+    buckets=FAST_BUCKETS,
+)
+N_PLUS_ONE_DETECTIONS = Counter(
+    "db_n_plus_one_detections_total",
+    "偵測到 N+1 查詢的請求數（依關聯或重複語句歸類）",
+    ["route", "pattern"],
+)
+
+# 目前執行中的服務方法，資料庫查詢時間依此歸類
+current_operation: ContextVar[str] = ContextVar("current_operation", default="other")
+
+# 各子指標的觀測值緩衝與寫入函式（見 buffered_observer）
+_buffers: list = []
+_flush_lock = threading.Lock()
+_flush_task: Optional[asyncio.Task] = None
+
+
+def buffered_observer(child) -> Callable[[float], None]:
+    """
+    回傳記錄單一標籤子指標的函式
+
+    觀測值只附加到此子指標的緩衝（list.append，不取鎖也不逐一比較區間），
+    由 flush_observations 於抓取指標、背景定期寫入與關閉時整批寫入；
+    prometheus_client 的 Histogram.observe 每次要取兩次鎖並以 Python 迴圈比較區間上限。
+    """
+    buffer = []
+    _buffers.append((buffer, _batch_writer(child)))
+    return buffer.append
+
+
+def _batch_writer(child) -> Callable[[list], None]:
+    """回傳將一批觀測值寫入子指標的函式：每個區間與總和各只加一次"""
+    try:
+        upper_bounds = list(child._upper_bounds)
+        bucket_increments = [bucket.inc for bucket in child._buckets]
+        sum_increment = child._sum.inc
+    except AttributeError:
+        # 取不到內部欄位（其他版本的 prometheus_client）時逐一 observe
+        def observe_all(amounts: list) -> None:
+            for amount in amounts:
+                child.observe(amount)
+
+        return observe_all
+
+    def write(amounts: list) -> None:
+        counts = [0] * len(upper_bounds)
+        for amount in amounts:
+            # 最後一個上限為 +Inf，一定找得到區間（amount <= 上限的第一個區間）
+            counts[bisect_left(upper_bounds, amount)] += 1
+        sum_increment(sum(amounts))
+        for increment, count in zip(bucket_increments, counts):
+            if count:
+                increment(count)
+
+    return write
+
+
+def flush_observations():
+    """將所有緩衝中的觀測值寫入指標"""
+    with _flush_lock:
+        for buffer, write in _buffers:
+            count = len(buffer)
+            if not count:
+                continue
+            # 執行緒池中的查詢可能同時附加：只取出並刪除前 count 筆，之後附加的留待下次
+            amounts = buffer[:count]
+            del buffer[:count]
+            write(amounts)
+
+
+async def _flush_periodically(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            flush_observations()
+        except Exception as e:
+            logger.error(f"指標寫入失敗: {e}")
+
+
+def start_observation_flush():
+    """啟動背景定期寫入（每個 worker 行程各自一個，多行程模式下其他 worker 的 /metrics 才看得到本行程的觀測值）"""
+    global _flush_task
+    if _flush_task is None:
+        _flush_task = asyncio.create_task(_flush_periodically(settings.METRICS_FLUSH_INTERVAL_SECONDS))
+
+
+async def stop_observation_flush():
+    """停止背景定期寫入並寫入剩餘的觀測值"""
+    global _flush_task
+    if _flush_task is not None:
+        _flush_task.cancel()
+        try:
+            await _flush_task
+        except asyncio.CancelledError:
+            pass
+        _flush_task = None
+    flush_observations()
+
+
+def _wrap_method(name: str, func, histogram: Optional[Histogram], track_operation: bool, with_outcome: bool):
+    # 不計時也不歸類的方法維持原樣，不多一層協程
+    if histogram is None and not track_operation:
+        return func
+
+    if histogram is None:
+        @functools.wraps(func)
+        async def track(*args, **kwargs):
+            token = current_operation.set(name)
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                current_operation.reset(token)
+
+        return track
+
+    # 標籤固定，事先建立子指標
+    if with_outcome:
+        observe_success = buffered_observer(histogram.labels(name, "success"))
+        observe_error = buffered_observer(histogram.labels(name, "error"))
+    else:
+        observe_success = observe_error = buffered_observer(histogram.labels(name))
+
+    if not track_operation:
+        @functools.wraps(func)
+        async def timed(*args, **kwargs):
+            started = perf_counter()
+            try:
+                result = await func(*args, **kwargs)
+            except BaseException:
+                observe_error(perf_counter() - started)
+                raise
+            observe_success(perf_counter() - started)
+            return result
+
+        return timed
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        token = current_operation.set(name)
+        started = perf_counter()
+        try:
+            result = await func(*args, **kwargs)
+        except BaseException:
+            observe_error(perf_counter() - started)
+            raise
+        finally:
+            current_operation.reset(token)
+        observe_success(perf_counter() - started)
+        return result
+
+    return wrapper
+
+
+def instrument_methods(
+    histogram: Optional[Histogram] = None,
+    track_operation: bool = False,
+    with_outcome: bool = False
+):
+    """
+    類別裝飾器：為所有公開的 async 方法（含 staticmethod）加上計時
+
+    histogram 依方法名稱（with_outcome 時另加 success / error）記錄呼叫時間；
+    track_operation 時將方法名稱設為 current_operation，供資料庫查詢事件歸類。
+    METRICS_ENABLED 關閉時不做任何包裝。
+    """
+    def decorate(cls):
+        if not settings.METRICS_ENABLED:
+            return cls
+        return wrap_async_methods(
+            cls, lambda name, func: _wrap_method(name, func, histogram, track_operation, with_outcome)
+        )
+
+    return decorate
+
+
+def wrap_async_methods(cls, wrap):
+    """以 wrap(方法名稱, 函式) 的結果取代類別中所有公開的 async 方法（含 staticmethod）"""
+    for name, attribute in list(vars(cls).items()):
+        if name.startswith("_"):
+            continue
+        is_static = isinstance(attribute, staticmethod)
+        func = attribute.__func__ if is_static else attribute
+        if not inspect.iscoroutinefunction(func):
+            continue
+        wrapped = wrap(name, func)
+        setattr(cls, name, staticmethod(wrapped) if is_static else wrapped)
+    return cls
+
+
+def instrument_engine(engine):
+    """
+    記錄查詢時間與連線池使用量
+
+    查詢時間以計時版本取代此引擎方言實例上的 do_execute / do_execute_no_params / do_executemany
+    （同 wrap_async_methods 的做法，只影響這個引擎）：方言事件每次查詢仍要經過事件分派，
+    連線層的 before / after_cursor_execute 更會讓每次執行多出十餘微秒。
+    """
+    dialect = engine.dialect
+    # 依方法名稱快取記錄函式，省去每次查詢的 labels() 查找與鎖
+    observers = {}
+
+    def observer(operation: str) -> Callable[[float], None]:
+        observe = observers[operation] = buffered_observer(DB_QUERY_DURATION.labels(operation))
+        return observe
+
+    def timed(execute):
+        @functools.wraps(execute)
+        def wrapper(*args):
+            started = perf_counter()
+            try:
+                return execute(*args)
+            finally:
+                elapsed = perf_counter() - started
+                operation = current_operation.get()
+                (observers.get(operation) or observer(operation))(elapsed)
+
+        return wrapper
+
+    for name in ("do_execute", "do_execute_no_params", "do_executemany"):
+        setattr(dialect, name, timed(getattr(dialect, name)))
+
+    if not MULTIPROCESS:
+        # 單一行程時於抓取指標時才讀取連線池狀態，不在 checkout / checkin 上增加任何工作
+        DB_POOL_CHECKED_OUT.set_function(lambda: engine.pool.checkedout())
+        return
+
+    @event.listens_for(engine.pool, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        DB_POOL_CHECKED_OUT.inc()
+
+    @event.listens_for(engine.pool, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        DB_POOL_CHECKED_OUT.dec()
+
+
+class MetricsMiddleware:
+    """
+    記錄請求延遲的 ASGI 中介軟體（不經 BaseHTTPMiddleware，避免額外的任務與串流包裝）
+
+    路由於處理完成後由 scope["route"] 取得樣板路徑；未對應任何路由的請求歸為 unmatched。
+    各 (方法, 路由, 狀態類別) 的記錄函式建立一次後快取。
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.metrics_path = settings.METRICS_PATH
+        self.observers = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == self.metrics_path:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = perf_counter() - started
+            key = (scope["method"], getattr(scope.get("route"), "path", "unmatched"), status_code // 100)
+            observe = self.observers.get(key)
+            if observe is None:
+                observe = self.observers[key] = buffered_observer(REQUEST_DURATION.labels(key[0], key[1], f"{key[2]}xx"))
+            observe(elapsed)
+
+
+def render_metrics() -> tuple:
+    """產生 /metrics 回應內容，回傳 (內容, Content-Type)"""
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    flush_observations()
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead():
+    """worker 結束時移除其 livesum 量表檔案，避免計入已結束行程的數值"""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
@@ -2,6 +2,7 @@
 FastAPI 中介軟體
 """
 
+import random
 import time
 import uuid
 from typing import Callable
@@ -9,8 +10,11 @@ from fastapi import Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
 import logging
 
+from app.core.config import settings
 from app.core.security import check_rate_limit
 from app.core.exceptions import RateLimitExceededError
+from app.core.logging import request_id_context
+from app.core.metrics import RATE_LIMIT_REJECTIONS
 
 logger = logging.getLogger("app.core.middleware")
 
@@ -25,27 +29,20 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
         request: Request, 
         call_next: RequestResponseEndpoint
     ) -> Response:
-        # 產生請求 ID
-        request_id = str(uuid.uuid4())
+        # 產生請求 ID（沿用上游傳入的 X-Request-ID），並設為目前內容供服務層日誌與 n8n 呼叫使用
+        request_id = request.headers.get("X-Request-ID", "")[:64] or str(uuid.uuid4())
+        request_id_token = request_id_context.set(request_id)
+        
+        # 成功請求的日誌依比例取樣（錯誤回應與例外一律記錄）
+        sampled = random.random() < settings.LOG_REQUEST_SAMPLE_RATE
         
         # 記錄請求開始時間
         start_time = time.time()
         
-        # 取得客戶端 IP
-        client_ip = request.client.host if request.client else "unknown"
-        
-        # 記錄請求資訊
-        logger.info(
-            f"請求開始: {request.method} {request.url.path}",
-            extra={
-                "request_id": request_id,
-                "method": request.method,
-                "path": request.url.path,
-                "query_params": str(request.query_params),
-                "client_ip": client_ip,
-                "user_agent": request.headers.get("user-agent", "unknown")
-            }
-        )
+        # 記錄請求資訊（request_id 由 contextvar 帶入）
+        if sampled:
+            client_ip = request.client.host if request.client else "unknown"
+            logger.info(f"請求開始: {request.method} {request.url.path} - 來源: {client_ip}")
         
         # 將請求 ID 添加到請求狀態
         request.state.request_id = request_id
@@ -58,15 +55,11 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
             process_time = time.time() - start_time
             
             # 記錄回應資訊
-            logger.info(
-                f"請求完成: {request.method} {request.url.path} - "
-                f"狀態碼: {response.status_code}, 處理時間: {process_time:.3f}s",
-                extra={
-                    "request_id": request_id,
-                    "status_code": response.status_code,
-                    "process_time": process_time
-                }
-            )
+            if sampled or response.status_code >= 400:
+                logger.info(
+                    f"請求完成: {request.method} {request.url.path} - "
+                    f"狀態碼: {response.status_code}, 處理時間: {process_time:.3f}s"
+                )
             
             # 添加回應標頭
             response.headers["X-Request-ID"] = request_id
@@ -82,15 +75,14 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
             logger.error(
                 f"請求失敗: {request.method} {request.url.path} - "
                 f"錯誤: {str(e)}, 處理時間: {process_time:.3f}s",
-                exc_info=True,
-                extra={
-                    "request_id": request_id,
-                    "process_time": process_time
-                }
+                exc_info=True
             )
             
             # 重新拋出例外
             raise
+        
+        finally:
+            request_id_context.reset(request_id_token)
 
 
 class RateLimitMiddleware(BaseHTTPMiddleware):
@@ -111,7 +103,7 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         client_ip = request.client.host if request.client else "unknown"
         
         # 檢查是否為健康檢查或文件端點（跳過速率限制）
-        if request.url.path in ["/health", "/docs", "/redoc", "/openapi.json"]:
+        if request.url.path in ["/health", "/metrics", "/docs", "/redoc", "/openapi.json"]:
             return await call_next(request)
         
         # 檢查速率限制
@@ -124,6 +116,7 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
                     "method": request.method
                 }
             )
+            RATE_LIMIT_REJECTIONS.inc()
             raise RateLimitExceededError(self.calls_per_minute)
         
         return await call_next(request)
@@ -176,7 +169,10 @@ class CacheControlMiddleware(BaseHTTPMiddleware):
         # 根據路徑設定快取策略
         path = request.url.path
         
-        if path.startswith("/api/"):
+        if "cache-control" in response.headers:
+            # 端點自行指定的快取策略（例如搭配 ETag 的重新驗證）優先
+            pass
+        elif path.startswith("/api/"):
             # API 端點不快取
             response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
             response.headers["Pragma"] = "no-cache"
@@ -0,0 +1,230 @@
+"""
+統計式取樣效能分析
+
+背景執行緒每隔固定間隔讀取 sys._current_frames()，累計各執行緒的呼叫堆疊，
+輸出 flamegraph.pl / speedscope 可讀的 collapsed stack 格式（「框架;框架;... 次數」每行一筆）。
+被取樣的執行緒不需任何掛鉤，額外負擔只有取樣執行緒本身（預設每 5ms 一次）。
+
+- 整個 worker：管理員端點在指定秒數內取樣所有執行緒
+- 單一請求：帶有效的 X-Profile-Token 標頭時，ProfilingMiddleware 只記錄事件迴圈執行緒上
+  位於本請求呼叫鏈內的堆疊（以中介軟體自身的框架為根），結果寫入 PROFILING_OUTPUT_DIR
+
+PROFILING_ENABLED 關閉時不註冊路由與中介軟體，也不建立任何執行緒。
+"""
+
+import asyncio
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.logging import request_id_context
+from app.core.security import verify_profiling_token
+
+logger = logging.getLogger("app.core.profiler")
+
+PROFILE_TOKEN_HEADER = b"x-profile-token"
+PROFILE_FILE_SUFFIX = ".collapsed"
+
+# 單一請求結果以請求 ID 命名，只接受安全的檔名字元
+_PROFILE_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+# 同一時間只允許一個取樣工作，限制額外負擔
+_session_lock = threading.Lock()
+
+# 程式碼物件 -> 框架名稱（取樣時不重複組字串）
+_labels: Dict[object, str] = {}
+
+
+def _label(code) -> str:
+    label = _labels.get(code)
+    if label is None:
+        filename = code.co_filename
+        marker = filename.rfind("site-packages/")
+        if marker >= 0:
+            filename = filename[marker + len("site-packages/"):]
+        elif "/app/" in filename:
+            filename = filename[filename.rfind("/app/") + 1:]
+        elif "/lib/python" in filename:
+            # 標準函式庫只保留模組路徑
+            filename = filename.split("/lib/python", 1)[1].partition("/")[2]
+        label = _labels[code] = f"{code.co_qualname} ({filename}:{code.co_firstlineno})"
+    return label
+
+
+class StackSampler:
+    """
+    統計式堆疊取樣器
+
+    thread_id 指定時只取樣該執行緒；root 指定時只記錄包含該框架的堆疊，並由該框架開始。
+    """
+
+    __slots__ = ("interval", "thread_id", "root", "stacks", "samples", "started", "elapsed", "_stop", "_thread")
+
+    def __init__(self, interval: float, thread_id: Optional[int] = None, root=None):
+        self.interval = interval
+        self.thread_id = thread_id
+        self.root = root
+        self.stacks: Dict[Tuple[str, ...], int] = {}
+        self.samples = 0
+        self.started = 0.0
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "StackSampler":
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> "StackSampler":
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.elapsed = time.perf_counter() - self.started
+        return self
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            if self.thread_id is not None:
+                frame = frames.get(self.thread_id)
+                if frame is not None:
+                    self._record(self._stack(frame))
+            else:
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for thread_id, frame in frames.items():
+                    if thread_id != own_id:
+                        self._record(self._stack(frame), names.get(thread_id, str(thread_id)))
+            self.samples += 1
+
+    def _stack(self, frame) -> Optional[list]:
+        labels = []
+        while frame is not None:
+            labels.append(_label(frame.f_code))
+            if frame is self.root:
+                break
+            frame = frame.f_back
+        else:
+            # 不在指定的呼叫鏈內（例如事件迴圈正在處理其他請求）
+            if self.root is not None:
+                return None
+        labels.reverse()
+        return labels
+
+    def _record(self, stack: Optional[list], thread_name: Optional[str] = None):
+        if stack is None:
+            return
+        if thread_name is not None:
+            stack.insert(0, thread_name)
+        key = tuple(stack)
+        self.stacks[key] = self.stacks.get(key, 0) + 1
+
+    def collapsed(self) -> str:
+        """collapsed stack 格式，次數多的在前"""
+        lines = [
+            f"{';'.join(stack)} {count}"
+            for stack, count in sorted(self.stacks.items(), key=lambda item: item[1], reverse=True)
+        ]
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+def try_acquire_session() -> bool:
+    """取得取樣工作的執行權；已有進行中的取樣時回傳 False"""
+    return _session_lock.acquire(blocking=False)
+
+
+def release_session():
+    _session_lock.release()
+
+
+async def sample_process(seconds: float, interval: float) -> StackSampler:
+    """取樣本 worker 所有執行緒指定秒數（呼叫前須取得 try_acquire_session）"""
+    sampler = StackSampler(interval).start()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        sampler.stop()
+    return sampler
+
+
+def profile_path(profile_id: str) -> Optional[Path]:
+    """單一請求分析結果的檔案路徑；ID 含不安全字元時回傳 None"""
+    if not _PROFILE_ID.match(profile_id):
+        return None
+    return Path(settings.PROFILING_OUTPUT_DIR) / f"{profile_id}{PROFILE_FILE_SUFFIX}"
+
+
+def _write_profile(path: Path, content: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content, encoding="utf-8")
+
+
+class ProfilingMiddleware:
+    """
+    單一請求效能分析的 ASGI 中介軟體
+
+    須為最內層的中介軟體：路由與 async 端點在同一個任務內執行，呼叫鏈會經過本中介軟體的框架。
+    交給執行緒池的同步工作（同步端點與依賴）不在事件迴圈執行緒上，不會被記錄。
+    回應標頭 X-Profile-Id 為結果的 ID，由管理員端點取回。
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = None
+        for key, value in scope["headers"]:
+            if key == PROFILE_TOKEN_HEADER:
+                token = value.decode("latin-1")
+                break
+        if token is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not verify_profiling_token(token):
+            logger.warning(f"無效的效能分析權杖: {scope['method']} {scope['path']}")
+            await self.app(scope, receive, send)
+            return
+
+        if not try_acquire_session():
+            logger.warning(f"已有進行中的效能分析，略過: {scope['method']} {scope['path']}")
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = request_id_context.get() or ""
+        if not _PROFILE_ID.match(profile_id):
+            profile_id = str(uuid.uuid4())
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []), (b"x-profile-id", profile_id.encode())]}
+            await send(message)
+
+        sampler = StackSampler(
+            settings.PROFILING_INTERVAL_MS / 1000,
+            thread_id=threading.get_ident(),
+            root=sys._getframe(),
+        ).start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            sampler.stop()
+            release_session()
+            await asyncio.to_thread(_write_profile, profile_path(profile_id), sampler.collapsed())
+            logger.info(
+                f"請求效能分析完成: {scope['method']} {scope['path']} - "
+                f"ID: {profile_id}, 取樣 {sampler.samples} 次, 行程 {os.getpid()}"
+            )
@@ -0,0 +1,188 @@
+"""
+查詢監控：慢查詢日誌與 N+1 偵測
+
+- 每個請求累計 SQL 語句數與執行時間（SQLAlchemy before / after_cursor_execute 事件）
+- 超過 SLOW_QUERY_THRESHOLD_MS 的語句記錄警告，參數只保留名稱與型別，不寫入實際值
+- N+1：同一請求中同一關聯延遲載入（如 Workflow.user、WorkflowExecution.payment_records，
+  由 do_orm_execute 事件辨識）或相同語句重複達 N_PLUS_ONE_THRESHOLD 次時記錄警告
+- 除錯模式下於回應標頭附上統計；啟用監控指標時記錄每個請求的查詢數、時間與 N+1 次數
+"""
+
+import logging
+import re
+import time
+from contextvars import ContextVar
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.core.metrics import DB_QUERIES_PER_REQUEST, DB_TIME_PER_REQUEST, N_PLUS_ONE_DETECTIONS, buffered_observer
+
+logger = logging.getLogger("app.core.query_monitor")
+
+# 日誌中 SQL 語句的最大長度
+STATEMENT_LOG_MAX_LENGTH = 1000
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class QueryStats:
+    """單一請求的查詢統計"""
+
+    __slots__ = ("count", "duration", "statements", "lazy_loads")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = {}
+        self.lazy_loads = {}
+
+    def record(self, statement: str, elapsed: float):
+        self.count += 1
+        self.duration += elapsed
+        self.statements[statement] = self.statements.get(statement, 0) + 1
+
+    def n_plus_one(self) -> List[Tuple[str, int, Optional[str]]]:
+        """
+        回傳疑似 N+1 的 (模式, 次數, 語句)
+
+        延遲載入可指出關聯名稱，優先回報；沒有延遲載入達到門檻時才以重複語句判斷
+        （例如迴圈中逐筆查詢），此時模式為 repeated_statement 並附上語句。
+        """
+        threshold = settings.N_PLUS_ONE_THRESHOLD
+        patterns = [
+            (relationship, count, None)
+            for relationship, count in self.lazy_loads.items()
+            if count >= threshold
+        ]
+        if patterns:
+            return patterns
+        return [
+            ("repeated_statement", count, statement)
+            for statement, count in self.statements.items()
+            if count >= threshold
+        ]
+
+
+# 目前請求的統計（請求之外的查詢，例如排程與背景工作，只檢查慢查詢）
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def _format_statement(statement: str) -> str:
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    if len(statement) > STATEMENT_LOG_MAX_LENGTH:
+        return statement[:STATEMENT_LOG_MAX_LENGTH] + "..."
+    return statement
+
+
+def redact_parameters(parameters: Any, executemany: bool = False) -> Any:
+    """以型別名稱取代綁定參數的值"""
+    if executemany:
+        return f"<{len(parameters)} 組參數>"
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+def instrument(engine, session_factory):
+    """註冊引擎的語句計時事件與 Session 的延遲載入事件"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_monitor_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_monitor_started"].pop()
+
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.record(statement, elapsed)
+
+        if elapsed * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS:
+            logger.warning(
+                f"慢查詢 {elapsed * 1000:.1f}ms: {_format_statement(statement)} "
+                f"參數: {redact_parameters(parameters, executemany)}"
+            )
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_monitor_started"):
+            connection.info["query_monitor_started"].pop()
+
+    @event.listens_for(session_factory, "do_orm_execute")
+    def do_orm_execute(orm_execute_state):
+        # lazy_loaded_from 讀取載入選項，只有 SELECT 才有（ORM 的 UPDATE / DELETE 會引發例外）
+        if not orm_execute_state.is_select or orm_execute_state.lazy_loaded_from is None:
+            return
+        stats = _current_stats.get()
+        if stats is None:
+            return
+        # 載入路徑的最後一段為關聯屬性，例如 Workflow.user
+        relationship = str(orm_execute_state.loader_strategy_path[-1])
+        stats.lazy_loads[relationship] = stats.lazy_loads.get(relationship, 0) + 1
+
+
+class QueryMonitorMiddleware:
+    """
+    為每個請求建立查詢統計的 ASGI 中介軟體
+
+    除錯模式下於回應標頭附上 X-DB-Query-Count / X-DB-Query-Time（毫秒）與 X-DB-N-Plus-One；
+    請求結束後記錄 N+1 警告，啟用監控指標時依路由樣板記錄查詢數與時間。
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.children = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == settings.METRICS_PATH:
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+
+        async def send_with_stats(message):
+            if message["type"] == "http.response.start" and settings.DEBUG:
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-query-count", str(stats.count).encode()))
+                headers.append((b"x-db-query-time", f"{stats.duration * 1000:.2f}".encode()))
+                patterns = stats.n_plus_one()
+                if patterns:
+                    summary = ", ".join(f"{pattern}={count}" for pattern, count, _ in patterns)
+                    headers.append((b"x-db-n-plus-one", summary.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            _current_stats.reset(token)
+            self._report(scope, stats)
+
+    def _report(self, scope, stats: QueryStats):
+        route = getattr(scope.get("route"), "path", "unmatched")
+
+        patterns = stats.n_plus_one()
+        for pattern, count, statement in patterns:
+            detail = f": {_format_statement(statement)}" if statement else ""
+            logger.warning(
+                f"可能的 N+1 查詢: {scope['method']} {route} 中 {pattern} 執行 {count} 次{detail}"
+            )
+
+        if not settings.METRICS_ENABLED or stats.count == 0:
+            return
+        children = self.children.get(route)
+        if children is None:
+            children = self.children[route] = (
+                buffered_observer(DB_QUERIES_PER_REQUEST.labels(route)), buffered_observer(DB_TIME_PER_REQUEST.labels(route))
+            )
+        children[0](stats.count)
+        children[1](stats.duration)
+        for pattern, _, _ in patterns:
+            N_PLUS_ONE_DETECTIONS.labels(route, pattern).inc()
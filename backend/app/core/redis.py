@@ -9,6 +9,8 @@ from typing import Any, Optional, Union
 from datetime import timedelta
 
 from app.core.config import settings
+from app.core.metrics import REDIS_OPERATION_DURATION, instrument_methods
+from app.core.tracing import traced_methods
 
 logger = logging.getLogger(__name__)
 
@@ -62,6 +64,8 @@ def get_redis() -> redis.Redis:
     return redis.Redis(connection_pool=redis_pool)
 
 
+@traced_methods("RedisCache")
+@instrument_methods(REDIS_OPERATION_DURATION)
 class RedisCache:
     """
     Redis 快取管理類別
@@ -3,7 +3,9 @@
 """
 
 import hashlib
+import hmac
 import secrets
+import time
 from datetime import datetime, timedelta
 from typing import Any, Optional, Union
 
@@ -20,6 +22,8 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 # JWT Bearer 認證
 security = HTTPBearer()
+# 允許改以其他方式（例如查詢參數）認證的端點使用，缺少標頭時不直接拒絕
+optional_security = HTTPBearer(auto_error=False)
 
 
 def create_access_token(
@@ -72,6 +76,46 @@ def create_refresh_token(subject: Union[str, Any]) -> str:
     return encoded_jwt
 
 
+def create_stream_token(subject: Union[str, Any], workflow_id: Union[str, Any]) -> str:
+    """
+    建立訂閱單一工作流執行狀態的短效權杖（放在查詢參數，只能用於該工作流的推播連線）
+    """
+    expire = datetime.utcnow() + timedelta(
+        seconds=settings.EXECUTION_STREAM_TOKEN_TTL_SECONDS
+    )
+
+    to_encode = {
+        "exp": expire,
+        "sub": str(subject),
+        "wid": str(workflow_id),
+        "type": "execution_stream"
+    }
+
+    return jwt.encode(
+        to_encode,
+        settings.JWT_SECRET_KEY,
+        algorithm=settings.JWT_ALGORITHM
+    )
+
+
+def verify_stream_token(token: str, workflow_id: str) -> Optional[str]:
+    """
+    驗證執行狀態推播權杖並返回主體（權杖須為同一工作流簽發）
+    """
+    try:
+        payload = jwt.decode(
+            token,
+            settings.JWT_SECRET_KEY,
+            algorithms=[settings.JWT_ALGORITHM]
+        )
+    except JWTError:
+        return None
+
+    if payload.get("type") != "execution_stream" or payload.get("wid") != workflow_id:
+        return None
+    return payload.get("sub")
+
+
 def verify_token(token: str) -> Optional[str]:
     """
     驗證 JWT 權杖並返回主體
@@ -213,6 +257,30 @@ def verify_webhook_signature(
     return secrets.compare_digest(signature, expected_signature)
 
 
+def _profiling_signature(expires: int) -> str:
+    return hmac.new(
+        settings.JWT_SECRET_KEY.encode(), f"profile:{expires}".encode(), hashlib.sha256
+    ).hexdigest()
+
+
+def create_profiling_token(ttl_seconds: int) -> str:
+    """
+    產生單一請求效能分析的簽章權杖（X-Profile-Token 標頭，格式為「到期時間.簽章」）
+    """
+    expires = int(time.time()) + ttl_seconds
+    return f"{expires}.{_profiling_signature(expires)}"
+
+
+def verify_profiling_token(token: str) -> bool:
+    """
+    驗證效能分析權杖的簽章與到期時間
+    """
+    expires, _, signature = token.partition(".")
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    return secrets.compare_digest(signature, _profiling_signature(int(expires)))
+
+
 class RateLimiter:
     """
     簡單的記憶體內速率限制器
@@ -286,6 +354,7 @@ async def get_current_user(
     from app.core.database import get_db
     from app.models.user import User
     from app.core.exceptions import AuthenticationError
+    from app.core.logging import bind_log_context
     import uuid
 
     # 獲取資料庫連接
@@ -309,6 +378,7 @@ async def get_current_user(
         if not user.is_active:
             raise AuthenticationError("帳號已被停用")
 
+        bind_log_context(user_id=user.id)
         return user
 
     except AuthenticationError:
@@ -0,0 +1,223 @@
+"""
+OpenTelemetry 分散式追蹤
+
+- 端點：ASGI 中介軟體由 W3C traceparent 標頭接續上游追蹤，span 名稱為「方法 路由樣板」
+- 服務：WorkflowService / RedisCache / N8nService 的每個公開方法各一個 span（traced_methods）
+- SQL：每個語句一個 span（SQLAlchemy cursor 事件）
+- n8n：每個 HTTP 呼叫一個 CLIENT span，並以 traceparent / X-Request-ID 標頭傳遞追蹤內容
+
+取樣以 ParentBased(TraceIdRatioBased) 進行：根追蹤依 TRACING_SAMPLE_RATIO 取樣，下游跟隨上游的決定。
+匯出至本機 OTLP/HTTP collector 或 JSON Lines 檔案。TRACING_ENABLED 關閉時不包裝任何方法、不註冊事件，
+未設定 TracerProvider 的 tracer 為 no-op。
+"""
+
+import functools
+import logging
+import time
+from typing import Optional
+
+import httpx
+from opentelemetry import propagate, trace
+from opentelemetry.sdk.resources import SERVICE_NAME, SERVICE_VERSION, Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.core.logging import request_id_context
+from app.core.metrics import wrap_async_methods
+
+logger = logging.getLogger("app.core.tracing")
+
+tracer = trace.get_tracer("app")
+
+_provider: Optional[TracerProvider] = None
+_trace_file = None
+
+
+def _build_exporter():
+    global _trace_file
+    exporter = settings.TRACING_EXPORTER.lower()
+    if exporter == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter(endpoint=settings.TRACING_OTLP_ENDPOINT)
+    if exporter == "file":
+        _trace_file = open(settings.TRACING_FILE_PATH, "a", encoding="utf-8")
+        return ConsoleSpanExporter(out=_trace_file, formatter=lambda span: span.to_json(indent=None) + "\n")
+    if exporter == "console":
+        return ConsoleSpanExporter()
+    raise ValueError(f"不支援的追蹤匯出方式: {settings.TRACING_EXPORTER}")
+
+
+def init_tracing():
+    """設定 TracerProvider（取樣與批次匯出）"""
+    global _provider
+    if not settings.TRACING_ENABLED or _provider is not None:
+        return
+
+    _provider = TracerProvider(
+        resource=Resource.create({
+            SERVICE_NAME: settings.TRACING_SERVICE_NAME,
+            SERVICE_VERSION: settings.APP_VERSION,
+            "deployment.environment": settings.ENVIRONMENT,
+        }),
+        sampler=ParentBased(TraceIdRatioBased(settings.TRACING_SAMPLE_RATIO)),
+    )
+    _provider.add_span_processor(BatchSpanProcessor(_build_exporter()))
+    trace.set_tracer_provider(_provider)
+    logger.info(
+        f"追蹤已啟用: 匯出={settings.TRACING_EXPORTER}, 取樣比例={settings.TRACING_SAMPLE_RATIO}"
+    )
+
+
+def shutdown_tracing():
+    """送出尚未匯出的 span 並關閉匯出器"""
+    global _trace_file
+    if _provider is not None:
+        _provider.shutdown()
+    if _trace_file is not None:
+        _trace_file.close()
+        _trace_file = None
+
+
+def _traced(span_name: str, func):
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        with tracer.start_as_current_span(span_name):
+            return await func(*args, **kwargs)
+
+    return wrapper
+
+
+def traced_methods(prefix: str):
+    """類別裝飾器：每個公開的 async 方法各建立一個 span（名稱為「前綴.方法」）"""
+    def decorate(cls):
+        if not settings.TRACING_ENABLED:
+            return cls
+        return wrap_async_methods(cls, lambda name, func: _traced(f"{prefix}.{name}", func))
+
+    return decorate
+
+
+def instrument_engine(engine):
+    """每個 SQL 語句一個 span，掛在目前的服務方法 span 之下"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "SQL"
+        span = tracer.start_span(
+            f"SQL {operation}",
+            kind=SpanKind.CLIENT,
+            attributes={
+                "db.system": engine.dialect.name,
+                "db.operation": operation,
+                "db.statement": statement[:settings.TRACING_SQL_STATEMENT_MAX_LENGTH],
+                "db.executemany": executemany,
+            },
+        )
+        conn.info.setdefault("tracing_spans", []).append(span)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        span = conn.info["tracing_spans"].pop()
+        if cursor.rowcount is not None and cursor.rowcount >= 0:
+            span.set_attribute("db.rowcount", cursor.rowcount)
+        span.end()
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        connection = exception_context.connection
+        if connection is None or not connection.info.get("tracing_spans"):
+            return
+        span = connection.info["tracing_spans"].pop()
+        span.record_exception(exception_context.original_exception)
+        span.set_status(Status(StatusCode.ERROR))
+        span.end()
+
+
+class TracingTransport(httpx.AsyncBaseTransport):
+    """
+    為每個對外 HTTP 呼叫建立 CLIENT span，並注入 W3C traceparent 與 X-Request-ID 標頭
+    """
+
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        with tracer.start_as_current_span(
+            f"HTTP {request.method}",
+            kind=SpanKind.CLIENT,
+            attributes={
+                "http.method": request.method,
+                "http.url": str(request.url.copy_with(query=None)),
+                "net.peer.name": request.url.host,
+            },
+        ) as span:
+            propagate.inject(request.headers)
+            request_id = request_id_context.get()
+            if request_id:
+                request.headers["X-Request-ID"] = request_id
+
+            response = await self.transport.handle_async_request(request)
+            span.set_attribute("http.status_code", response.status_code)
+            if response.status_code >= 500:
+                span.set_status(Status(StatusCode.ERROR))
+            return response
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+def http_transport() -> Optional[httpx.AsyncBaseTransport]:
+    """對外 HTTP 客戶端使用的傳輸層；未啟用追蹤時為 httpx 預設"""
+    return TracingTransport() if settings.TRACING_ENABLED else None
+
+
+class TracingMiddleware:
+    """
+    每個請求一個 SERVER span 的 ASGI 中介軟體
+
+    由請求標頭接續上游的追蹤內容；路由於處理完成後才知道，span 名稱在結束前更新為路由樣板。
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == settings.METRICS_PATH:
+            await self.app(scope, receive, send)
+            return
+
+        carrier = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope["headers"]}
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        with tracer.start_as_current_span(
+            scope["method"],
+            context=propagate.extract(carrier),
+            kind=SpanKind.SERVER,
+            attributes={
+                "http.method": scope["method"],
+                "http.target": scope["path"],
+                "http.scheme": scope.get("scheme", "http"),
+            },
+        ) as span:
+            started = time.perf_counter()
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                route = scope.get("route")
+                if route is not None:
+                    span.update_name(f"{scope['method']} {route.path}")
+                    span.set_attribute("http.route", route.path)
+                span.set_attribute("http.status_code", status_code)
+                span.set_attribute("http.server_duration_ms", (time.perf_counter() - started) * 1000)
+                if status_code >= 500:
+                    span.set_status(Status(StatusCode.ERROR))
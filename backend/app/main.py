@@ -3,17 +3,35 @@
 """
 
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 import logging
 
 from app.core.config import settings
 from app.core.logging import setup_logging
-from app.core.database import init_db, close_db
+from app.core.database import init_db, close_db, SessionLocal
 from app.core.redis import init_redis, close_redis
+from app.core.metrics import (
+    MetricsMiddleware,
+    mark_process_dead,
+    render_metrics,
+    start_observation_flush,
+    stop_observation_flush,
+)
+from app.core.tracing import TracingMiddleware, init_tracing, shutdown_tracing
+from app.core.query_monitor import QueryMonitorMiddleware
+from app.core.profiler import ProfilingMiddleware
+from app.services.scheduler_service import workflow_scheduler
+from app.services.execution_events import execution_event_hub
+from app.services.node_catalog import node_catalog
+from app.services.import_service import shutdown_executor
+from app.services.template_leaderboard import template_leaderboard
+from app.services.batch_sweeper import batch_execution_sweeper
+from app.services.version_store import blob_collector
+from app.services.workflow_service import WorkflowService
 from app.core.exceptions import (
     TaiwanZapierException,
     taiwan_zapier_exception_handler,
@@ -38,6 +56,7 @@ async def lifespan(app: FastAPI):
     """
     # 啟動時執行
     setup_logging()
+    init_tracing()
     logger = logging.getLogger("app.main")
 
     try:
@@ -51,6 +70,35 @@ async def lifespan(app: FastAPI):
         await init_redis()
         logger.info("Redis 初始化完成")
 
+        # 載入節點類型目錄（失敗時於第一次使用時再載入）
+        db = SessionLocal()
+        try:
+            node_catalog.load(db)
+        except Exception as e:
+            logger.warning(f"節點類型目錄載入失敗: {e}")
+        finally:
+            db.close()
+
+        # 啟動排程觸發引擎
+        if settings.SCHEDULER_ENABLED:
+            await workflow_scheduler.start()
+            logger.info("排程觸發引擎啟動完成")
+
+        # 啟動模板計數寫回與排行榜重建
+        if settings.TEMPLATE_LEADERBOARD_ENABLED:
+            await template_leaderboard.start()
+
+        # 啟動中斷批次執行的回收
+        await batch_execution_sweeper.start()
+
+        # 啟動未引用內容 blob 的回收
+        if settings.VERSION_BLOB_GC_ENABLED:
+            await blob_collector.start()
+
+        # 啟動指標觀測值的背景寫入
+        if settings.METRICS_ENABLED:
+            start_observation_flush()
+
         logger.info("應用程式啟動完成")
 
     except Exception as e:
@@ -63,6 +111,31 @@ async def lifespan(app: FastAPI):
     try:
         logger.info("正在關閉應用程式...")
 
+        # 停止排程觸發引擎
+        if settings.SCHEDULER_ENABLED:
+            await workflow_scheduler.stop()
+            logger.info("排程觸發引擎已停止")
+
+        # 停止模板排行榜
+        if settings.TEMPLATE_LEADERBOARD_ENABLED:
+            await template_leaderboard.stop()
+
+        # 停止中斷批次執行的回收
+        await batch_execution_sweeper.stop()
+
+        # 停止內容 blob 回收
+        if settings.VERSION_BLOB_GC_ENABLED:
+            await blob_collector.stop()
+
+        # 補建去抖動視窗內尚未建立的自動版本快照（須在關閉資料庫前）
+        await WorkflowService.flush_pending_auto_versions()
+
+        # 關閉執行事件推播連線
+        await execution_event_hub.close()
+
+        # 關閉批次匯入子行程池
+        shutdown_executor()
+
         # 關閉 Redis 連線
         await close_redis()
         logger.info("Redis 連線已關閉")
@@ -71,6 +144,14 @@ async def lifespan(app: FastAPI):
         await close_db()
         logger.info("資料庫連線已關閉")
 
+        # 寫入剩餘的指標觀測值並移除本行程的多行程指標檔案
+        if settings.METRICS_ENABLED:
+            await stop_observation_flush()
+        mark_process_dead()
+
+        # 送出尚未匯出的追蹤資料
+        shutdown_tracing()
+
         logger.info("應用程式關閉完成")
 
     except Exception as e:
@@ -85,6 +166,7 @@ app = FastAPI(
     docs_url="/docs" if settings.DEBUG else None,
     redoc_url="/redoc" if settings.DEBUG else None,
     openapi_url="/openapi.json" if settings.DEBUG else None,
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -95,6 +177,10 @@ app.add_exception_handler(RequestValidationError, validation_exception_handler)
 app.add_exception_handler(Exception, general_exception_handler)
 
 # 添加中介軟體（順序很重要）
+# 單一請求效能分析（最內層，async 端點的呼叫鏈才會經過其框架）
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
 app.add_middleware(RequestLoggingMiddleware)
 app.add_middleware(SecurityHeadersMiddleware)
 app.add_middleware(CacheControlMiddleware)
@@ -114,8 +200,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
+# 每個請求的查詢統計與 N+1 偵測
+if settings.QUERY_MONITOR_ENABLED:
+    app.add_middleware(QueryMonitorMiddleware)
+
+# 請求延遲指標（最外層，涵蓋所有中介軟體）
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# 請求追蹤 span（最外層，接續上游的 traceparent）
+if settings.TRACING_ENABLED:
+    app.add_middleware(TracingMiddleware)
+
 # 包含 API 路由
 app.include_router(api_router, prefix="/api/v1")
 
@@ -159,6 +258,16 @@ async def basic_health():
     )
 
 
+if settings.METRICS_ENABLED:
+    @app.get(settings.METRICS_PATH, include_in_schema=False)
+    async def metrics():
+        """
+        Prometheus 指標端點
+        """
+        content, content_type = render_metrics()
+        return Response(content=content, headers={"Content-Type": content_type})
+
+
 if __name__ == "__main__":
     import uvicorn
 
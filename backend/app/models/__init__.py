@@ -16,8 +16,10 @@ from .user import (
 from .workflow import (
     Workflow,
     WorkflowVersion,
+    WorkflowBlob,
     WorkflowExecution,
     WorkflowTemplate,
+    WorkflowTemplateRating,
     WebhookEndpoint
 )
 
@@ -50,8 +52,10 @@ __all__ = [
     # 工作流相關
     "Workflow",
     "WorkflowVersion",
+    "WorkflowBlob",
     "WorkflowExecution",
     "WorkflowTemplate",
+    "WorkflowTemplateRating",
     "WebhookEndpoint",
 
     # 節點相關
@@ -2,9 +2,10 @@
 工作流相關的 SQLAlchemy 模型
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Float, Enum, TypeDecorator
-from sqlalchemy.dialects.postgresql import UUID, JSONB, ARRAY
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Computed, DDL, Integer, String, Boolean, DateTime, Text, ForeignKey, Float, Enum, Index, TypeDecorator, UniqueConstraint, event, false, literal_column, select, text
+from sqlalchemy.dialects.postgresql import UUID, JSONB, ARRAY, TSVECTOR
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.sql import func
 import uuid
 import enum
@@ -34,6 +35,72 @@ class FormattedJSONB(TypeDecorator):
         return value
 
 
+# 全文檢索設定：安裝 zhparser 時以中文斷詞，否則為 simple 的複本（由遷移建立）
+SEARCH_TEXT_CONFIG = "twzapier_zh"
+
+# 節點類型陣列（jsonb），與 GIN 運算式索引的運算式一致
+NODE_TYPES_PATH = "'$[*].type'::jsonpath"
+
+# create_all 建立資料表前先準備擴充套件與檢索設定（遷移會在可用時改用 zhparser）
+SEARCH_SETUP_DDL = DDL(f"""
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+DO $$ BEGIN
+    CREATE TEXT SEARCH CONFIGURATION {SEARCH_TEXT_CONFIG} (COPY = simple);
+EXCEPTION WHEN unique_violation OR duplicate_object THEN NULL;
+END $$;
+""")
+
+
+def search_vector_expression(*weighted_columns) -> str:
+    """加權 tsvector 計算欄位的運算式，例如 (("name", "A"), ("description", "B"))"""
+    return " || ".join(
+        f"setweight(to_tsvector('{SEARCH_TEXT_CONFIG}'::regconfig, coalesce({column}, '')), '{weight}')"
+        for column, weight in weighted_columns
+    )
+
+
+def node_types_expression(nodes_column):
+    """節點 JSON 中所有節點的 type（jsonb 陣列），可用 @> 篩選並走 GIN 運算式索引"""
+    return func.jsonb_path_query_array(nodes_column, literal_column(NODE_TYPES_PATH), type_=JSONB)
+
+
+def template_graph_property(name: str) -> hybrid_property:
+    """
+    寫入時複製（copy-on-write）的工作流圖形欄位
+
+    由模板建立的工作流不複製模板的 nodes / edges，stored_<name> 為 NULL 時沿用來源模板的內容；
+    第一次寫入時才將內容存到工作流本身。SQL 運算式以 coalesce 取得實際內容，UPDATE 一律寫入工作流自身的欄位。
+    """
+    stored = f"stored_{name}"
+
+    def getter(self):
+        value = getattr(self, stored)
+        if value is None and self.source_template is not None:
+            return getattr(self.source_template, name)
+        return value if value is not None else []
+
+    def setter(self, value):
+        # 明確寫入 None 視為清空，不會改回沿用模板
+        setattr(self, stored, value if value is not None else [])
+
+    def expression(cls):
+        # 明確關聯外層的 workflows：巢狀在其他子查詢內（例如 jsonb_array_elements）時不會自動關聯，
+        # 否則會變成與整個 workflows 資料表的交叉連接
+        template_value = select(getattr(WorkflowTemplate, name)).where(
+            WorkflowTemplate.id == cls.source_template_id
+        ).correlate_except(WorkflowTemplate).scalar_subquery()
+        # 標記為屬性名稱，select(Workflow.nodes, ...) 的結果鍵才會是 nodes 而非 coalesce_1
+        return func.coalesce(getattr(cls, stored), template_value, type_=JSONB).label(name)
+
+    def update_expression(cls, value):
+        return [(getattr(cls, stored), value)]
+
+    # hybrid_property 以 getter 的名稱作為屬性鍵；名稱不一致時 update(Workflow).values({Workflow.nodes: ...})
+    # 找不到對應的屬性，無法套用 update_expression
+    getter.__name__ = name
+    return hybrid_property(getter, setter, expr=expression, update_expr=update_expression)
+
+
 class WorkflowStatus(enum.Enum):
     """工作流狀態枚舉"""
     DRAFT = "draft"
@@ -57,6 +124,13 @@ class Workflow(Base):
     工作流模型
     """
     __tablename__ = "workflows"
+    __table_args__ = (
+        # 搜尋：全文檢索、名稱模糊比對、標籤與節點類型篩選
+        Index("ix_workflows_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_workflows_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        Index("ix_workflows_tags_gin", "tags", postgresql_using="gin"),
+        Index("ix_workflows_node_types", text(f"jsonb_path_query_array(nodes, {NODE_TYPES_PATH})"), postgresql_using="gin"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
@@ -71,13 +145,26 @@ class Workflow(Base):
     category = Column(String(50), nullable=True, index=True)
     tags = Column(ARRAY(String), nullable=True)
     
-    # 工作流定義（使用格式化 JSONB）
-    nodes = Column(FormattedJSONB, nullable=False, default=list)
-    edges = Column(FormattedJSONB, nullable=False, default=list)
+    # 全文檢索（資料庫計算欄位，只在查詢條件中使用，不隨模型載入）
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed(search_vector_expression(("name", "A"), ("description", "B"), ("category", "C")), persisted=True)
+    ))
+    
+    # 工作流定義（使用格式化 JSONB）；由模板建立時 nodes / edges 欄位為 NULL，
+    # 沿用 source_template_id 指向的模板內容，第一次編輯時才寫入（見 template_graph_property）。
+    # 模板的 nodes / edges 建立後即不再修改，被引用的模板不可刪除（外鍵）
+    source_template_id = Column(UUID(as_uuid=True), ForeignKey("workflow_templates.id"), nullable=True, index=True)
+    stored_nodes = Column("nodes", FormattedJSONB, nullable=True, default=list)
+    stored_edges = Column("edges", FormattedJSONB, nullable=True, default=list)
+    nodes = template_graph_property("nodes")
+    edges = template_graph_property("edges")
     settings = Column(FormattedJSONB, nullable=True, default=dict)
     
-    # 版本控制
+    # 版本控制：version 為編輯修訂號（增量儲存的衝突偵測），
+    # last_version_number 為版本快照編號計數器（以 UPDATE ... RETURNING 原子配置）
     version = Column(Integer, default=1, nullable=False)
+    last_version_number = Column(Integer, default=0, nullable=False)
     
     # 執行統計
     execution_count = Column(Integer, default=0, nullable=False)
@@ -95,6 +182,7 @@ class Workflow(Base):
     
     # 關聯
     user = relationship("User", back_populates="workflows")
+    source_template = relationship("WorkflowTemplate")
     versions = relationship("WorkflowVersion", back_populates="workflow", cascade="all, delete-orphan")
     executions = relationship("WorkflowExecution", back_populates="workflow", cascade="all, delete-orphan")
     webhook_endpoints = relationship("WebhookEndpoint", back_populates="workflow", cascade="all, delete-orphan")
@@ -108,6 +196,9 @@ class WorkflowVersion(Base):
     工作流版本模型
     """
     __tablename__ = "workflow_versions"
+    __table_args__ = (
+        UniqueConstraint("workflow_id", "version_number", name="uq_workflow_versions_workflow_id_version_number"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
     workflow_id = Column(UUID(as_uuid=True), ForeignKey("workflows.id"), nullable=False, index=True)
@@ -117,13 +208,19 @@ class WorkflowVersion(Base):
     version_name = Column(String(100), nullable=True)
     changelog = Column(Text, nullable=True)
     
-    # 版本內容（使用格式化 JSONB）
-    nodes = Column(FormattedJSONB, nullable=False)
-    edges = Column(FormattedJSONB, nullable=False)
+    description = Column(Text, nullable=True)
+    
+    # 版本內容：新版本只儲存內容定址清單 (manifest)，實際內容存於 workflow_blobs；
+    # nodes / edges / settings 僅保留給舊版完整複本
+    manifest = Column(JSONB, nullable=True)
+    nodes = Column(FormattedJSONB, nullable=True)
+    edges = Column(FormattedJSONB, nullable=True)
     settings = Column(FormattedJSONB, nullable=True)
     
     # 版本狀態
     is_current = Column(Boolean, default=False, nullable=False)
+    is_published = Column(Boolean, default=False, nullable=False)
+    is_auto = Column(Boolean, default=False, nullable=False)
     
     # 時間戳
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
@@ -137,11 +234,35 @@ class WorkflowVersion(Base):
         return f"<WorkflowVersion(id={self.id}, workflow_id={self.workflow_id}, version={self.version_number})>"
 
 
+class WorkflowBlob(Base):
+    """
+    內容定址的工作流內容區塊（節點、連線、設定與清單分段）
+
+    以內容雜湊為主鍵，相同內容只儲存一次，由所有版本共用。
+    last_used_at 為最後一次被快照寫入引用的時間，回收未被任何版本引用的 blob 時用來保留寫入中的內容。
+    """
+    __tablename__ = "workflow_blobs"
+
+    hash = Column(String(32), primary_key=True)
+    content = Column(JSONB, nullable=False)
+    size = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    last_used_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<WorkflowBlob(hash={self.hash}, size={self.size})>"
+
+
 class WorkflowExecution(Base):
     """
     工作流執行記錄模型
     """
     __tablename__ = "workflow_executions"
+    __table_args__ = (
+        UniqueConstraint("workflow_id", "idempotency_key", name="uq_workflow_executions_workflow_id_idempotency_key"),
+        # 匯出執行歷史時的 keyset 分頁
+        Index("ix_workflow_executions_workflow_id_started_at_id", "workflow_id", "started_at", "id"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
     workflow_id = Column(UUID(as_uuid=True), ForeignKey("workflows.id"), nullable=False, index=True)
@@ -154,6 +275,8 @@ class WorkflowExecution(Base):
     # 觸發資訊
     trigger_type = Column(String(50), nullable=True, index=True)  # manual, webhook, schedule, api
     trigger_data = Column(JSONB, nullable=True)
+    idempotency_key = Column(String(255), nullable=True)  # Idempotency-Key 標頭或金流交易 ID
+    batch_id = Column(String(36), nullable=True, index=True)  # 批次執行 ID
     
     # 執行結果
     result_data = Column(JSONB, nullable=True)
@@ -187,6 +310,13 @@ class WorkflowTemplate(Base):
     工作流模板模型
     """
     __tablename__ = "workflow_templates"
+    __table_args__ = (
+        # 搜尋：全文檢索、名稱模糊比對、標籤與節點類型篩選
+        Index("ix_workflow_templates_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_workflow_templates_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        Index("ix_workflow_templates_tags_gin", "tags", postgresql_using="gin"),
+        Index("ix_workflow_templates_node_types", text(f"jsonb_path_query_array(nodes, {NODE_TYPES_PATH})"), postgresql_using="gin"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
     
@@ -196,6 +326,12 @@ class WorkflowTemplate(Base):
     category = Column(String(50), nullable=False, index=True)
     tags = Column(ARRAY(String), nullable=True)
     
+    # 全文檢索（資料庫計算欄位，只在查詢條件中使用，不隨模型載入）
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed(search_vector_expression(("name", "A"), ("description", "B"), ("category", "C")), persisted=True)
+    ))
+    
     # 模板內容（使用格式化 JSONB）
     thumbnail_url = Column(String(500), nullable=True)
     nodes = Column(FormattedJSONB, nullable=False)
@@ -206,6 +342,7 @@ class WorkflowTemplate(Base):
     author_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
     is_official = Column(Boolean, default=False, nullable=False)
     is_public = Column(Boolean, default=True, nullable=False)
+    is_taiwan_featured = Column(Boolean, default=False, server_default=false(), nullable=False, index=True)
     
     # 統計資訊
     usage_count = Column(Integer, default=0, nullable=False)
@@ -227,6 +364,24 @@ class WorkflowTemplate(Base):
         return f"<WorkflowTemplate(id={self.id}, name='{self.name}', category='{self.category}')>"
 
 
+class WorkflowTemplateRating(Base):
+    """
+    模板評分記錄
+
+    每位使用者對同一模板只有一筆（以主鍵保證），是「只能評分一次」的依據；
+    模板的 rating / rating_count 由排行榜緩衝後定期寫回。
+    """
+    __tablename__ = "workflow_template_ratings"
+
+    template_id = Column(UUID(as_uuid=True), ForeignKey("workflow_templates.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True, index=True)
+    rating = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<WorkflowTemplateRating(template_id={self.template_id}, user_id={self.user_id}, rating={self.rating})>"
+
+
 class WebhookEndpoint(Base):
     """
     Webhook 端點模型
@@ -264,3 +419,6 @@ class WebhookEndpoint(Base):
 
     def __repr__(self):
         return f"<WebhookEndpoint(id={self.id}, workflow_id={self.workflow_id}, endpoint_id='{self.endpoint_id}')>"
+
+
+event.listen(Base.metadata, "before_create", SEARCH_SETUP_DDL.execute_if(dialect="postgresql"))
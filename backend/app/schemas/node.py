@@ -0,0 +1,42 @@
+"""
+節點類型相關的 Pydantic 模型
+"""
+
+from typing import Any, Dict, List, Literal, Optional
+from pydantic import BaseModel, Field
+
+
+class NodeTypeResponse(BaseModel):
+    """節點類型回應模型"""
+    id: str = Field(..., description="節點類型 ID")
+    name: str = Field(..., description="內部名稱")
+    display_name: str = Field(..., description="顯示名稱")
+    category: str = Field(..., description="分類")
+    description: Optional[str] = Field(None, description="描述")
+    documentation_url: Optional[str] = Field(None, description="文件連結")
+    icon_url: Optional[str] = Field(None, description="圖示")
+    color: Optional[str] = Field(None, description="顏色")
+    version: str = Field(..., description="版本")
+    is_beta: bool = Field(False, description="是否為測試版")
+    input_schema: Optional[Dict[str, Any]] = Field(None, description="輸入參數 JSON Schema")
+    output_schema: Optional[Dict[str, Any]] = Field(None, description="輸出參數 JSON Schema")
+    settings_schema: Optional[Dict[str, Any]] = Field(None, description="設定參數 JSON Schema")
+    supports_webhook: bool = Field(False, description="支援 Webhook")
+    supports_polling: bool = Field(False, description="支援輪詢")
+    supports_batch: bool = Field(False, description="支援批次")
+    is_taiwan_service: bool = Field(False, description="是否為台灣在地服務")
+    service_provider: Optional[str] = Field(None, description="服務提供者")
+    updated_at: Optional[str] = Field(None, description="最後更新時間")
+
+
+class NodeParametersValidate(BaseModel):
+    """節點參數驗證請求模型"""
+    parameters: Dict[str, Any] = Field(default_factory=dict, description="節點參數")
+    kind: Literal["input", "settings", "output"] = Field("input", description="驗證的 schema 種類")
+
+
+class NodeParametersValidationResponse(BaseModel):
+    """節點參數驗證回應模型"""
+    node_type: str = Field(..., description="節點類型")
+    valid: bool = Field(..., description="是否通過")
+    errors: List[str] = Field(default_factory=list, description="驗證錯誤")
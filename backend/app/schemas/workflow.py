@@ -4,11 +4,39 @@
 
 from datetime import datetime
 from enum import Enum
-from pydantic import BaseModel, Field, validator
-from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, BeforeValidator, Field, TypeAdapter, ValidationInfo, field_validator
+from typing import Any, Dict, List, Literal, Optional
+from typing_extensions import Annotated
 import uuid
 
 
+def _uuid_to_str(value: Any) -> Any:
+    """將UUID轉換為字串格式"""
+    return str(value) if isinstance(value, uuid.UUID) else value
+
+
+def _datetime_to_iso(value: Any) -> Any:
+    """將datetime轉換為ISO字串格式"""
+    return value.isoformat() + "Z" if isinstance(value, datetime) else value
+
+
+def _none_to_list(value: Any) -> Any:
+    """資料庫中為 NULL 的列表欄位轉為空列表"""
+    return [] if value is None else value
+
+
+def _none_to_dict(value: Any) -> Any:
+    """資料庫中為 NULL 的物件欄位轉為空物件"""
+    return {} if value is None else value
+
+
+# pydantic v2 原生的型別層級轉換（由 pydantic-core 直接呼叫，不經 v1 @validator 相容層）
+UUIDStr = Annotated[str, BeforeValidator(_uuid_to_str)]
+ISODateTimeStr = Annotated[str, BeforeValidator(_datetime_to_iso)]
+NullableList = Annotated[List[str], BeforeValidator(_none_to_list)]
+NullableDict = Annotated[Dict[str, Any], BeforeValidator(_none_to_dict)]
+
+
 class WorkflowStatus(str, Enum):
     """工作流狀態枚舉"""
     DRAFT = "draft"
@@ -65,10 +93,87 @@ class WorkflowSave(BaseModel):
     viewport: Optional[Dict[str, Any]] = Field(None, description="視窗狀態")
 
 
+class WorkflowGraphOperation(BaseModel):
+    """
+    工作流圖形增量操作
+
+    - add_node / add_edge: 以 node / edge 提供完整內容
+    - move_node: 以 position 提供新座標
+    - update_node / update_edge: 以 changes 提供要取代的頂層欄位
+    - remove_node / remove_edge: 只需 id（刪除節點時一併刪除相連的連線）
+    """
+    op: Literal[
+        "add_node", "move_node", "update_node", "remove_node",
+        "add_edge", "update_edge", "remove_edge"
+    ] = Field(..., description="操作類型")
+    id: Optional[str] = Field(None, description="節點或連線 ID")
+    node: Optional[Dict[str, Any]] = Field(None, description="新增的節點")
+    edge: Optional[Dict[str, Any]] = Field(None, description="新增的連線")
+    position: Optional[Dict[str, float]] = Field(None, description="節點座標")
+    changes: Optional[Dict[str, Any]] = Field(None, validate_default=True, description="要更新的欄位")
+
+    @field_validator('changes')
+    @classmethod
+    def validate_operation_fields(cls, v, info: ValidationInfo):
+        values = info.data
+        op = values.get('op')
+        required = {
+            "add_node": ("node", values.get('node')),
+            "add_edge": ("edge", values.get('edge')),
+            "move_node": ("position", values.get('position')),
+            "update_node": ("changes", v),
+            "update_edge": ("changes", v),
+        }
+        if op in required and required[op][1] is None:
+            raise ValueError(f"{op} 操作必須提供 {required[op][0]}")
+        if op in ("add_node", "add_edge"):
+            item = values.get('node') if op == "add_node" else values.get('edge')
+            if not item.get('id'):
+                raise ValueError(f"{op} 操作的內容必須包含 id")
+        elif not values.get('id'):
+            raise ValueError(f"{op} 操作必須提供 id")
+        if v and 'id' in v:
+            raise ValueError("不可透過 changes 修改 id")
+        return v
+
+
+class WorkflowGraphPatch(BaseModel):
+    """工作流圖形增量儲存模型"""
+    base_version: int = Field(..., description="客戶端目前的工作流版本（用於衝突偵測）")
+    operations: List[WorkflowGraphOperation] = Field(..., description="依序套用的操作")
+    viewport: Optional[Dict[str, Any]] = Field(None, description="視窗狀態")
+
+
+class WorkflowGraphPatchResponse(BaseModel):
+    """工作流圖形增量儲存回應模型"""
+    workflow_id: str = Field(..., description="工作流 ID (UUID字串格式)")
+    version: int = Field(..., description="套用後的工作流版本")
+    applied: int = Field(..., description="套用的操作數")
+
+
+class WorkflowGraphValidate(BaseModel):
+    """工作流圖形驗證請求模型"""
+    nodes: List[Dict[str, Any]] = Field(default_factory=list, description="節點列表")
+    edges: List[Dict[str, Any]] = Field(default_factory=list, description="連線列表")
+
+
+class WorkflowGraphValidationResponse(BaseModel):
+    """工作流圖形驗證回應模型"""
+    valid: bool = Field(..., description="是否沒有錯誤")
+    node_count: int = Field(..., description="節點數")
+    edge_count: int = Field(..., description="有效連線數")
+    topological_order: Optional[List[str]] = Field(None, description="拓撲排序（有環路時為空）")
+    cycles: List[List[str]] = Field(default_factory=list, description="環路中的節點")
+    unreachable: List[str] = Field(default_factory=list, description="無法從觸發節點到達的節點")
+    errors: List[Dict[str, Any]] = Field(default_factory=list, description="錯誤")
+    warnings: List[Dict[str, Any]] = Field(default_factory=list, description="警告")
+
+
 class WorkflowResponse(WorkflowBase):
     """工作流回應模型 - 使用UUID格式符合前端需求"""
-    id: str = Field(..., description="工作流 ID (UUID字串格式)")
-    user_id: str = Field(..., description="使用者 ID (UUID字串格式)")
+    id: UUIDStr = Field(..., description="工作流 ID (UUID字串格式)")
+    user_id: UUIDStr = Field(..., description="使用者 ID (UUID字串格式)")
+    source_template_id: Optional[UUIDStr] = Field(None, description="來源模板 ID（由模板建立時）")
     status: str = Field(..., description="狀態")
     version: int = Field(..., description="版本")
     nodes: List[Dict[str, Any]] = Field(..., description="節點列表")
@@ -77,25 +182,26 @@ class WorkflowResponse(WorkflowBase):
     execution_count: int = Field(..., description="執行次數")
     success_count: int = Field(..., description="成功次數")
     failure_count: int = Field(..., description="失敗次數")
-    created_at: str = Field(..., description="建立時間 (ISO字串格式)")
-    updated_at: str = Field(..., description="更新時間 (ISO字串格式)")
-    last_executed_at: Optional[str] = Field(None, description="最後執行時間 (ISO字串格式)")
+    created_at: ISODateTimeStr = Field(..., description="建立時間 (ISO字串格式)")
+    updated_at: ISODateTimeStr = Field(..., description="更新時間 (ISO字串格式)")
+    last_executed_at: Optional[ISODateTimeStr] = Field(None, description="最後執行時間 (ISO字串格式)")
 
     model_config = {"from_attributes": True}
 
-    @validator('id', 'user_id', pre=True)
-    def convert_uuid_to_string(cls, v):
-        """將UUID轉換為字串格式"""
-        if isinstance(v, uuid.UUID):
-            return str(v)
-        return v
 
-    @validator('created_at', 'updated_at', 'last_executed_at', pre=True)
-    def convert_datetime_to_iso_string(cls, v):
-        """將datetime轉換為ISO字串格式"""
-        if isinstance(v, datetime):
-            return v.isoformat() + "Z"
-        return v
+# 工作流回應：ORM 物件直接驗證一次，再由 pydantic-core 序列化為 JSON
+workflow_adapter = TypeAdapter(WorkflowResponse)
+workflow_list_adapter = TypeAdapter(List[WorkflowResponse])
+
+
+def dump_workflow(workflow: Any) -> bytes:
+    """將工作流 ORM 物件序列化為 JSON（不經 response_model 二次驗證）"""
+    return workflow_adapter.dump_json(workflow_adapter.validate_python(workflow, from_attributes=True))
+
+
+def dump_workflow_list(workflows: List[Any]) -> bytes:
+    """將工作流 ORM 物件列表序列化為 JSON（不經 response_model 二次驗證）"""
+    return workflow_list_adapter.dump_json(workflow_list_adapter.validate_python(workflows, from_attributes=True))
 
 
 class WorkflowExecutionBase(BaseModel):
@@ -111,9 +217,9 @@ class WorkflowExecutionCreate(WorkflowExecutionBase):
 
 class WorkflowExecutionResponse(WorkflowExecutionBase):
     """工作流執行回應模型 - 使用UUID格式符合前端需求"""
-    id: str = Field(..., description="執行 ID (UUID字串格式)")
-    workflow_id: str = Field(..., description="工作流 ID (UUID字串格式)")
-    user_id: str = Field(..., description="使用者 ID (UUID字串格式)")
+    id: UUIDStr = Field(..., description="執行 ID (UUID字串格式)")
+    workflow_id: UUIDStr = Field(..., description="工作流 ID (UUID字串格式)")
+    user_id: UUIDStr = Field(..., description="使用者 ID (UUID字串格式)")
     execution_id: str = Field(..., description="執行識別碼")
     status: str = Field(..., description="執行狀態")
     result_data: Optional[Dict[str, Any]] = Field(None, description="執行結果")
@@ -121,124 +227,266 @@ class WorkflowExecutionResponse(WorkflowExecutionBase):
     nodes_executed: int = Field(..., description="已執行節點數")
     nodes_successful: int = Field(..., description="成功節點數")
     nodes_failed: int = Field(..., description="失敗節點數")
-    started_at: str = Field(..., description="開始時間 (ISO字串格式)")
-    finished_at: Optional[str] = Field(None, description="結束時間 (ISO字串格式)")
+    started_at: ISODateTimeStr = Field(..., description="開始時間 (ISO字串格式)")
+    finished_at: Optional[ISODateTimeStr] = Field(None, description="結束時間 (ISO字串格式)")
     duration: Optional[float] = Field(None, description="執行時長（秒）")
 
     model_config = {"from_attributes": True}
 
-    @validator('id', 'workflow_id', 'user_id', pre=True)
-    def convert_uuid_to_string(cls, v):
-        """將UUID轉換為字串格式"""
-        if isinstance(v, uuid.UUID):
-            return str(v)
-        return v
 
-    @validator('started_at', 'finished_at', pre=True)
-    def convert_datetime_to_iso_string(cls, v):
-        """將datetime轉換為ISO字串格式"""
-        if isinstance(v, datetime):
-            return v.isoformat() + "Z"
-        return v
+# 執行記錄回應：ORM 物件直接驗證一次，再由 pydantic-core 序列化為 JSON
+execution_list_adapter = TypeAdapter(List[WorkflowExecutionResponse])
+
+
+def dump_execution_list(executions: List[Any]) -> bytes:
+    """將執行記錄 ORM 物件列表序列化為 JSON（不經 response_model 二次驗證）"""
+    return execution_list_adapter.dump_json(execution_list_adapter.validate_python(executions, from_attributes=True))
+
+
+class WorkflowBatchExecutionResponse(BaseModel):
+    """批次執行回應模型（彙總進度）"""
+    batch_id: str = Field(..., description="批次 ID")
+    workflow_id: str = Field(..., description="工作流 ID (UUID字串格式)")
+    status: str = Field(..., description="批次狀態 (running / completed)")
+    total: int = Field(..., description="總筆數")
+    pending: int = Field(..., description="尚未完成筆數")
+    success: int = Field(..., description="成功筆數")
+    failed: int = Field(..., description="失敗筆數")
+    created_at: Optional[str] = Field(None, description="建立時間 (ISO字串格式)")
 
 
 # 工作流版本管理相關schemas
+class WorkflowBulkAction(str, Enum):
+    """批次操作類型"""
+    ACTIVATE = "activate"
+    DEACTIVATE = "deactivate"
+    DELETE = "delete"
+    ADD_TAGS = "add_tags"
+    REMOVE_TAGS = "remove_tags"
+    SET_TAGS = "set_tags"
+
+
+class WorkflowBulkOperation(BaseModel):
+    """工作流批次操作請求模型"""
+    action: WorkflowBulkAction = Field(..., description="操作類型")
+    workflow_ids: List[str] = Field(..., min_length=1, description="工作流 ID 清單 (UUID字串格式)")
+    tags: Optional[List[str]] = Field(None, validate_default=True, description="標籤（標籤操作時使用）")
+
+    @field_validator('workflow_ids')
+    @classmethod
+    def validate_workflow_ids(cls, v):
+        ids = []
+        for value in v:
+            try:
+                ids.append(str(uuid.UUID(str(value))))
+            except ValueError:
+                raise ValueError(f"無效的工作流ID格式: {value}")
+        # 去除重複並保留原始順序
+        return list(dict.fromkeys(ids))
+
+    @field_validator('tags')
+    @classmethod
+    def validate_tags(cls, v, info: ValidationInfo):
+        action = info.data.get('action')
+        if action in (WorkflowBulkAction.ADD_TAGS, WorkflowBulkAction.REMOVE_TAGS, WorkflowBulkAction.SET_TAGS):
+            if v is None:
+                raise ValueError("標籤操作必須提供 tags")
+            return list(dict.fromkeys(tag.strip() for tag in v if tag and tag.strip()))
+        return v
+
+
 class WorkflowVersionCreate(BaseModel):
-    """建立工作流版本模型"""
-    workflow_id: str = Field(..., description="工作流 ID (UUID字串格式)")
+    """建立工作流版本模型（未提供 nodes / edges 時以工作流目前內容建立快照）"""
+    workflow_id: Optional[str] = Field(None, description="工作流 ID (UUID字串格式)")
     version_name: Optional[str] = Field(None, description="版本名稱")
     description: Optional[str] = Field(None, description="版本描述")
-    nodes: List[Dict[str, Any]] = Field(..., description="節點列表")
-    edges: List[Dict[str, Any]] = Field(..., description="連線列表")
-    settings: Optional[Dict[str, Any]] = Field(default={}, description="設定")
+    nodes: Optional[List[Dict[str, Any]]] = Field(None, description="節點列表")
+    edges: Optional[List[Dict[str, Any]]] = Field(None, description="連線列表")
+    settings: Optional[Dict[str, Any]] = Field(None, description="設定")
+
+
+class WorkflowVersionSummary(BaseModel):
+    """工作流版本摘要模型（列表用，不含內容）"""
+    id: UUIDStr = Field(..., description="版本 ID (UUID字串格式)")
+    workflow_id: UUIDStr = Field(..., description="工作流 ID (UUID字串格式)")
+    version_number: int = Field(..., description="版本號")
+    version_name: Optional[str] = Field(None, description="版本名稱")
+    description: Optional[str] = Field(None, description="版本描述")
+    is_published: bool = Field(False, description="是否已發布")
+    is_auto: bool = Field(False, description="是否為儲存時自動建立的快照")
+    created_at: ISODateTimeStr = Field(..., description="建立時間 (ISO字串格式)")
+    created_by: UUIDStr = Field(..., description="建立者 ID (UUID字串格式)")
+
+    model_config = {"from_attributes": True}
+
+
+class WorkflowVersionDiffSection(BaseModel):
+    """版本差異（節點或連線）"""
+    added: List[Dict[str, Any]] = Field(default=[], description="新增項目")
+    removed: List[str] = Field(default=[], description="刪除項目 ID")
+    changed: List[Dict[str, Any]] = Field(default=[], description="變更項目 (id / before / after)")
+
+
+class WorkflowVersionDiffResponse(BaseModel):
+    """工作流版本差異回應模型"""
+    base_version_id: str = Field(..., description="比對基準版本 ID")
+    target_version_id: str = Field(..., description="比對目標版本 ID")
+    nodes: WorkflowVersionDiffSection = Field(..., description="節點差異")
+    edges: WorkflowVersionDiffSection = Field(..., description="連線差異")
+    settings: Optional[Dict[str, Any]] = Field(None, description="設定差異 (before / after)，無變更時為 null")
 
 
 class WorkflowVersionResponse(BaseModel):
     """工作流版本回應模型"""
-    id: str = Field(..., description="版本 ID (UUID字串格式)")
-    workflow_id: str = Field(..., description="工作流 ID (UUID字串格式)")
+    id: UUIDStr = Field(..., description="版本 ID (UUID字串格式)")
+    workflow_id: UUIDStr = Field(..., description="工作流 ID (UUID字串格式)")
     version_number: int = Field(..., description="版本號")
     version_name: Optional[str] = Field(None, description="版本名稱")
     description: Optional[str] = Field(None, description="版本描述")
     nodes: List[Dict[str, Any]] = Field(..., description="節點列表")
     edges: List[Dict[str, Any]] = Field(..., description="連線列表")
-    settings: Dict[str, Any] = Field(..., description="設定")
-    is_published: bool = Field(..., description="是否已發布")
-    created_at: str = Field(..., description="建立時間 (ISO字串格式)")
-    created_by: str = Field(..., description="建立者 ID (UUID字串格式)")
+    settings: Dict[str, Any] = Field(default={}, description="設定")
+    is_published: bool = Field(False, description="是否已發布")
+    is_auto: bool = Field(False, description="是否為儲存時自動建立的快照")
+    created_at: ISODateTimeStr = Field(..., description="建立時間 (ISO字串格式)")
+    created_by: UUIDStr = Field(..., description="建立者 ID (UUID字串格式)")
 
     model_config = {"from_attributes": True}
 
-    @validator('id', 'workflow_id', 'created_by', pre=True)
-    def convert_uuid_to_string(cls, v):
-        """將UUID轉換為字串格式"""
-        if isinstance(v, uuid.UUID):
-            return str(v)
-        return v
 
-    @validator('created_at', pre=True)
-    def convert_datetime_to_iso_string(cls, v):
-        """將datetime轉換為ISO字串格式"""
-        if isinstance(v, datetime):
-            return v.isoformat() + "Z"
-        return v
+# 版本回應：列表與單一版本都只驗證一次，再由 pydantic-core 序列化為 JSON
+version_summary_list_adapter = TypeAdapter(List[WorkflowVersionSummary])
+
+
+def dump_version_summary_list(versions: List[Any]) -> bytes:
+    """將版本 ORM 物件列表序列化為摘要 JSON（不經 response_model 二次驗證）"""
+    return version_summary_list_adapter.dump_json(
+        version_summary_list_adapter.validate_python(versions, from_attributes=True)
+    )
+
+
+def dump_version(version: Any, content: Dict[str, Any]) -> bytes:
+    """組合版本資訊與重建後的內容並序列化為 JSON"""
+    fields = {name: getattr(version, name) for name in WorkflowVersionSummary.model_fields}
+    return WorkflowVersionResponse.model_validate({**fields, **content}).model_dump_json().encode("utf-8")
+
+
+# 搜尋相關schemas
+class WorkflowSearchHit(BaseModel):
+    """工作流搜尋結果（不含節點與連線）"""
+    id: UUIDStr = Field(..., description="工作流 ID (UUID字串格式)")
+    name: str = Field(..., description="工作流名稱")
+    description: Optional[str] = Field(None, description="工作流描述")
+    category: Optional[str] = Field(None, description="分類")
+    tags: List[str] = Field(default=[], description="標籤")
+    status: str = Field(..., description="狀態")
+    is_active: bool = Field(..., description="是否啟用")
+    updated_at: ISODateTimeStr = Field(..., description="更新時間 (ISO字串格式)")
+    rank: float = Field(..., description="相關性分數")
+
+
+class WorkflowSearchResponse(BaseModel):
+    """工作流搜尋回應"""
+    items: List[WorkflowSearchHit] = Field(..., description="搜尋結果")
+    has_more: bool = Field(..., description="是否還有下一頁")
+
+
+class WorkflowTemplateSearchHit(BaseModel):
+    """模板搜尋結果（不含節點與連線）"""
+    id: UUIDStr = Field(..., description="模板 ID (UUID字串格式)")
+    name: str = Field(..., description="模板名稱")
+    description: str = Field(..., description="模板描述")
+    category: str = Field(..., description="模板分類")
+    tags: List[str] = Field(default=[], description="標籤")
+    thumbnail_url: Optional[str] = Field(None, description="縮圖 URL")
+    is_official: bool = Field(..., description="是否為官方模板")
+    usage_count: int = Field(..., description="使用次數")
+    rating: float = Field(..., description="評分")
+    updated_at: ISODateTimeStr = Field(..., description="更新時間 (ISO字串格式)")
+    rank: float = Field(..., description="相關性分數")
+
+
+class WorkflowTemplateSearchResponse(BaseModel):
+    """模板搜尋回應"""
+    items: List[WorkflowTemplateSearchHit] = Field(..., description="搜尋結果")
+    has_more: bool = Field(..., description="是否還有下一頁")
 
 
 # 工作流模板相關schemas
+class WorkflowTemplateImport(BaseModel):
+    """匯入工作流模板模型（批次匯入每行一個）"""
+    name: str = Field(..., min_length=1, max_length=200, description="模板名稱")
+    description: str = Field(default="", description="模板描述")
+    category: str = Field(..., min_length=1, max_length=50, description="模板分類")
+    tags: Optional[List[str]] = Field(default=[], description="標籤")
+    thumbnail_url: Optional[str] = Field(None, max_length=500, description="縮圖 URL")
+    nodes: List[Dict[str, Any]] = Field(default=[], description="節點列表")
+    edges: List[Dict[str, Any]] = Field(default=[], description="連線列表")
+    settings: Optional[Dict[str, Any]] = Field(default={}, description="設定")
+    is_official: bool = Field(default=False, description="是否為官方模板")
+    is_public: bool = Field(default=True, description="是否公開")
+    is_taiwan_featured: bool = Field(default=False, description="是否為台灣特色模板")
+    version: str = Field(default="1.0.0", max_length=20, description="模板版本")
+    min_platform_version: Optional[str] = Field(None, max_length=20, description="最低平台版本")
+
+
+class WorkflowImportResponse(BaseModel):
+    """批次匯入結果"""
+    target: str = Field(..., description="匯入對象 (workflows / templates)")
+    imported: int = Field(..., description="成功匯入筆數")
+    failed: int = Field(..., description="驗證失敗而略過的筆數")
+    skipped: int = Field(default=0, description="略過的非資料行（例如匯出檔的完成標記）")
+    errors: List[Dict[str, Any]] = Field(default=[], description="失敗明細（最多 100 筆）")
+    duration_ms: float = Field(..., description="匯入耗時(毫秒)")
+    rows_per_second: float = Field(..., description="每秒匯入筆數")
+    n8n_sync: str = Field(..., description="n8n 同步狀態 (scheduled / skipped)")
+
+
 class WorkflowTemplateResponse(BaseModel):
     """工作流模板回應模型"""
-    id: str = Field(..., description="模板 ID (UUID字串格式)")
+    id: UUIDStr = Field(..., description="模板 ID (UUID字串格式)")
     name: str = Field(..., description="模板名稱")
     description: str = Field(..., description="模板描述")
     category: str = Field(..., description="模板分類")
-    tags: List[str] = Field(..., description="標籤")
+    tags: NullableList = Field(..., description="標籤")
     thumbnail_url: Optional[str] = Field(None, description="縮圖 URL")
     nodes: List[Dict[str, Any]] = Field(..., description="節點列表")
     edges: List[Dict[str, Any]] = Field(..., description="連線列表")
-    settings: Dict[str, Any] = Field(..., description="設定")
+    settings: NullableDict = Field(..., description="設定")
     usage_count: int = Field(default=0, description="使用次數")
     rating: float = Field(default=0.0, description="評分")
     is_taiwan_featured: bool = Field(default=False, description="是否為台灣特色模板")
-    created_at: str = Field(..., description="建立時間 (ISO字串格式)")
+    created_at: ISODateTimeStr = Field(..., description="建立時間 (ISO字串格式)")
 
     model_config = {"from_attributes": True}
 
-    @validator('id', pre=True)
-    def convert_uuid_to_string(cls, v):
-        """將UUID轉換為字串格式"""
-        if isinstance(v, uuid.UUID):
-            return str(v)
-        return v
 
-    @validator('created_at', pre=True)
-    def convert_datetime_to_iso_string(cls, v):
-        """將datetime轉換為ISO字串格式"""
-        if isinstance(v, datetime):
-            return v.isoformat() + "Z"
-        return v
+# 模板列表回應：與工作流列表相同，ORM 物件只驗證一次後直接序列化
+template_list_adapter = TypeAdapter(List[WorkflowTemplateResponse])
+
+
+def dump_template_list(templates: List[Any]) -> bytes:
+    """將模板 ORM 物件列表序列化為 JSON（不經 response_model 二次驗證）"""
+    return template_list_adapter.dump_json(template_list_adapter.validate_python(templates, from_attributes=True))
+
+
+class WorkflowTemplateRating(BaseModel):
+    """模板評分"""
+    rating: int = Field(..., ge=1, le=5, description="評分 (1-5)")
+
+
+class WorkflowCopyCreate(BaseModel):
+    """由模板建立或複製工作流"""
+    name: Optional[str] = Field(None, min_length=1, max_length=200, description="新工作流名稱（預設為「原名稱 - 副本」）")
 
 
 # 工作流統計相關schemas
 class WorkflowStatsResponse(BaseModel):
     """工作流統計回應模型"""
-    workflow_id: str = Field(..., description="工作流 ID (UUID字串格式)")
+    workflow_id: UUIDStr = Field(..., description="工作流 ID (UUID字串格式)")
     total_executions: int = Field(..., description="總執行次數")
     successful_executions: int = Field(..., description="成功執行次數")
     failed_executions: int = Field(..., description="失敗執行次數")
     average_duration: Optional[float] = Field(None, description="平均執行時長（秒）")
-    last_execution_at: Optional[str] = Field(None, description="最後執行時間 (ISO字串格式)")
+    last_execution_at: Optional[ISODateTimeStr] = Field(None, description="最後執行時間 (ISO字串格式)")
     success_rate: float = Field(..., description="成功率（百分比）")
-
-    @validator('workflow_id', pre=True)
-    def convert_uuid_to_string(cls, v):
-        """將UUID轉換為字串格式"""
-        if isinstance(v, uuid.UUID):
-            return str(v)
-        return v
-
-    @validator('last_execution_at', pre=True)
-    def convert_datetime_to_iso_string(cls, v):
-        """將datetime轉換為ISO字串格式"""
-        if isinstance(v, datetime):
-            return v.isoformat() + "Z"
-        return v
\ No newline at end of file
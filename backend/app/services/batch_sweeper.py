@@ -0,0 +1,167 @@
+"""
+中斷批次執行的回收 - 找出派送 worker 已中斷的批次，將剩餘項目標記為失敗
+
+批次執行以 BackgroundTasks 在單一 worker 內派送，派送期間定期續約 Redis 租約
+（execution_batch:{batch_id}:lease）。租約過期但仍有 pending / running 項目的批次，
+代表 worker 已重新啟動或當機：剩餘項目一律標記為失敗並更新進度與工作流統計，
+同時發布執行事件。已送出但尚未寫回的項目可能已在 n8n 執行過，
+重新派送會讓付款、通知等副作用重複發生，因此不自動重跑，由使用者重新提交。
+"""
+
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.redis import get_redis
+from app.models.workflow import Workflow, WorkflowExecution
+from app.models.workflow import ExecutionStatus as ExecutionStatusEnum
+from app.services.execution_events import build_batch_execution_event, publish_execution_events
+from app.services.workflow_service import WorkflowService
+
+logger = logging.getLogger("app.services.batch_sweeper")
+
+SWEEP_LOCK_KEY = "execution_batch:sweep:lock"
+
+# 派送中斷時的錯誤訊息
+INTERRUPTED_MESSAGE = "批次執行中斷（處理的 worker 已停止），請重新提交"
+
+UNFINISHED_STATUSES = (ExecutionStatusEnum.PENDING, ExecutionStatusEnum.RUNNING)
+
+
+class BatchExecutionSweeper:
+    """
+    定期回收租約過期的批次執行
+    """
+
+    def __init__(self, sweep_seconds: Optional[int] = None):
+        self.sweep_seconds = sweep_seconds or settings.BATCH_EXECUTION_SWEEP_SECONDS
+        self.instance_id = str(uuid.uuid4())
+        self._task: Optional[asyncio.Task] = None
+        self._running = False
+
+    async def sweep(self) -> Optional[int]:
+        """
+        取得本週期的回收鎖後處理中斷的批次，回傳標記為失敗的項目數（未取得鎖時回傳 None）
+        """
+        client = get_redis()
+        acquired = await client.set(SWEEP_LOCK_KEY, self.instance_id, nx=True, ex=self.sweep_seconds)
+        if not acquired:
+            return None
+
+        # 建立時間超過一個租約週期仍未完成的批次才列入檢查（started_at 在寫回前即為建立時間）
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.BATCH_EXECUTION_LEASE_SECONDS)
+        db = SessionLocal()
+        try:
+            candidates = db.query(WorkflowExecution.batch_id, WorkflowExecution.workflow_id).filter(
+                WorkflowExecution.batch_id.isnot(None),
+                WorkflowExecution.status.in_(UNFINISHED_STATUSES),
+                WorkflowExecution.started_at < cutoff
+            ).distinct().all()
+
+            failed = 0
+            for batch_id, workflow_id in candidates:
+                if await client.exists(WorkflowService._batch_lease_key(batch_id)):
+                    continue
+                failed += await self.fail_batch(db, batch_id, str(workflow_id))
+            return failed
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def fail_batch(self, db: Session, batch_id: str, workflow_id: str) -> int:
+        """
+        將批次中未完成的項目標記為失敗，並更新工作流統計、Redis 進度與執行事件
+        """
+        finished_at = datetime.utcnow()
+        rows = db.execute(
+            update(WorkflowExecution)
+            .where(
+                WorkflowExecution.batch_id == batch_id,
+                WorkflowExecution.status.in_(UNFINISHED_STATUSES)
+            )
+            .values(
+                status=ExecutionStatusEnum.FAILED,
+                error_message=INTERRUPTED_MESSAGE,
+                finished_at=finished_at
+            )
+            .returning(WorkflowExecution.id, WorkflowExecution.started_at)
+            .execution_options(synchronize_session=False)
+        ).all()
+        if not rows:
+            db.commit()
+            return 0
+
+        db.execute(
+            update(Workflow)
+            .where(Workflow.id == uuid.UUID(workflow_id))
+            .values(
+                execution_count=Workflow.execution_count + len(rows),
+                failure_count=Workflow.failure_count + len(rows)
+            )
+        )
+        db.commit()
+
+        batch_key = WorkflowService._batch_key(batch_id)
+        try:
+            client = get_redis()
+            if await client.exists(batch_key):
+                async with client.pipeline(transaction=False) as pipe:
+                    pipe.hincrby(batch_key, "failed", len(rows))
+                    pipe.hset(batch_key, mapping={"pending": 0, "status": "completed"})
+                    await pipe.execute()
+        except Exception as e:
+            logger.warning(f"更新中斷批次進度失敗: batch_id={batch_id}, error={e}")
+
+        await publish_execution_events(workflow_id, [
+            build_batch_execution_event(workflow_id, batch_id, {
+                "id": execution_pk,
+                "status": ExecutionStatusEnum.FAILED,
+                "started_at": started_at.astimezone(timezone.utc).replace(tzinfo=None) if started_at else None,
+                "finished_at": finished_at,
+            })
+            for execution_pk, started_at in rows
+        ])
+
+        logger.warning(f"批次執行中斷，剩餘項目標記為失敗: workflow_id={workflow_id}, batch_id={batch_id}, 筆數={len(rows)}")
+        return len(rows)
+
+    async def _run(self):
+        while self._running:
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.error(f"中斷批次回收失敗: {e}")
+            await asyncio.sleep(self.sweep_seconds)
+
+    async def start(self):
+        """啟動背景回收"""
+        if self._running:
+            return
+        self._running = True
+        self._task = asyncio.create_task(self._run())
+        logger.info("中斷批次回收已啟動")
+
+    async def stop(self):
+        """停止背景回收"""
+        self._running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        logger.info("中斷批次回收已停止")
+
+
+# 全域中斷批次回收
+batch_execution_sweeper = BatchExecutionSweeper()
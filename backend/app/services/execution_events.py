@@ -0,0 +1,233 @@
+"""
+工作流執行事件推播 - 透過 Redis pub/sub 將執行狀態變化推送給 SSE / WebSocket 客戶端
+"""
+
+import asyncio
+import json
+import logging
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Set
+
+from app.core.redis import get_redis
+
+logger = logging.getLogger("app.services.execution_events")
+
+# Redis 頻道前綴（每個工作流一個頻道）
+CHANNEL_PREFIX = "executions:"
+
+# 每個連線的事件佇列上限，慢速客戶端超過時丟棄最舊的事件
+SUBSCRIBER_QUEUE_SIZE = 256
+
+
+def execution_channel(workflow_id: str) -> str:
+    """取得工作流的執行事件頻道名稱"""
+    return f"{CHANNEL_PREFIX}{workflow_id}"
+
+
+def _utc_isoformat(value: Optional[datetime]) -> Optional[str]:
+    """將時間轉為 UTC ISO 8601 字串，只帶一個 Z 時區標記（無時區的值視為 UTC）"""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def build_execution_event(execution, event_type: str = "status", **extra) -> Dict[str, Any]:
+    """
+    建立執行事件內容（只包含狀態資訊，不含完整 result_data）
+    """
+    status = execution.status.value if hasattr(execution.status, "value") else execution.status
+    event = {
+        "type": event_type,
+        "workflow_id": str(execution.workflow_id),
+        "execution_id": str(execution.id),
+        "status": status,
+        "started_at": _utc_isoformat(execution.started_at),
+        "finished_at": _utc_isoformat(execution.finished_at),
+        "duration": execution.duration,
+        "timestamp": _utc_isoformat(datetime.now(timezone.utc)),
+    }
+    event.update(extra)
+    return event
+
+
+def build_batch_execution_event(workflow_id: str, batch_id: str, values: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    建立批次執行項目的事件（批次項目以欄位字典批次寫回，沒有 ORM 物件）
+    """
+    execution = SimpleNamespace(**{"workflow_id": workflow_id, "finished_at": None, "duration": None, **values})
+    return build_execution_event(execution, batch_id=batch_id)
+
+
+async def publish_execution_event(workflow_id: str, event: Dict[str, Any]) -> bool:
+    """
+    發布執行事件，Redis 無法使用時只記錄警告，不影響執行流程
+    """
+    try:
+        client = get_redis()
+        await client.publish(execution_channel(workflow_id), json.dumps(event, ensure_ascii=False, default=str))
+        return True
+    except Exception as e:
+        logger.warning(f"發布執行事件失敗 - workflow_id: {workflow_id}, error: {e}")
+        return False
+
+
+async def publish_execution_events(workflow_id: str, events: List[Dict[str, Any]]) -> bool:
+    """
+    以單一 pipeline 發布多筆執行事件（批次執行寫回時使用），Redis 無法使用時只記錄警告
+    """
+    if not events:
+        return True
+    try:
+        channel = execution_channel(workflow_id)
+        async with get_redis().pipeline(transaction=False) as pipe:
+            for event in events:
+                pipe.publish(channel, json.dumps(event, ensure_ascii=False, default=str))
+            await pipe.execute()
+        return True
+    except Exception as e:
+        logger.warning(f"發布執行事件失敗 - workflow_id: {workflow_id}, 筆數: {len(events)}, error: {e}")
+        return False
+
+
+async def publish_node_progress(execution, result: Optional[Dict[str, Any]]) -> int:
+    """
+    從 n8n 執行結果的 runData 發布各節點進度事件
+    """
+    run_data = (((result or {}).get("data") or {}).get("resultData") or {}).get("runData") or {}
+    published = 0
+    for node_name, runs in run_data.items():
+        for run in runs or []:
+            node_status = "failed" if run.get("error") else "success"
+            event = build_execution_event(
+                execution,
+                event_type="node",
+                node=node_name,
+                node_status=node_status,
+                node_duration=(run.get("executionTime") or 0) / 1000,
+            )
+            if await publish_execution_event(str(execution.workflow_id), event):
+                published += 1
+    return published
+
+
+class ExecutionEventHub:
+    """
+    每個 worker 共用一條 Redis pub/sub 連線的事件分發中心
+
+    同一工作流在此 worker 上不論有多少觀看者，都只訂閱一次頻道；
+    收到的訊息以原始 JSON 字串分發到各連線的佇列，不需逐一重新序列化。
+    """
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._pubsub = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def channel_count(self) -> int:
+        """目前訂閱的頻道數"""
+        return len(self._subscribers)
+
+    @property
+    def subscriber_count(self) -> int:
+        """目前的觀看連線數"""
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    async def subscribe(self, workflow_id: str) -> asyncio.Queue:
+        """
+        訂閱工作流的執行事件，回傳此連線專用的事件佇列
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        async with self._lock:
+            if self._pubsub is None:
+                self._pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+                self._reader_task = asyncio.create_task(self._reader())
+
+            queues = self._subscribers.get(workflow_id)
+            if queues is None:
+                await self._pubsub.subscribe(execution_channel(workflow_id))
+                queues = self._subscribers[workflow_id] = set()
+            queues.add(queue)
+        return queue
+
+    async def unsubscribe(self, workflow_id: str, queue: asyncio.Queue):
+        """
+        取消訂閱，最後一個觀看者離開時取消 Redis 頻道訂閱
+        """
+        async with self._lock:
+            queues = self._subscribers.get(workflow_id)
+            if not queues:
+                return
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[workflow_id]
+                try:
+                    await self._pubsub.unsubscribe(execution_channel(workflow_id))
+                except Exception as e:
+                    logger.warning(f"取消訂閱執行事件頻道失敗 - workflow_id: {workflow_id}, error: {e}")
+
+    def _dispatch(self, workflow_id: str, data: str):
+        """將訊息分發給此工作流的所有本地觀看者"""
+        for queue in self._subscribers.get(workflow_id, ()):
+            if queue.full():
+                # 慢速客戶端：丟棄最舊的事件，保留最新狀態
+                try:
+                    queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    pass
+            queue.put_nowait(data)
+
+    async def _reader(self):
+        """
+        讀取 Redis pub/sub 訊息並分發
+        """
+        while True:
+            try:
+                if not self._subscribers:
+                    await asyncio.sleep(0.1)
+                    continue
+
+                message = await self._pubsub.get_message(timeout=1.0)
+                if not message or message.get("type") != "message":
+                    continue
+
+                channel = message["channel"]
+                if isinstance(channel, bytes):
+                    channel = channel.decode()
+                data = message["data"]
+                if isinstance(data, bytes):
+                    data = data.decode()
+                self._dispatch(channel[len(CHANNEL_PREFIX):], data)
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"讀取執行事件失敗: {e}")
+                await asyncio.sleep(1)
+
+    async def close(self):
+        """
+        關閉 pub/sub 連線
+        """
+        if self._reader_task:
+            self._reader_task.cancel()
+            # 讀取中的 get_message 可能延遲回應取消，最多等待一個讀取逾時
+            await asyncio.wait([self._reader_task], timeout=2.0)
+            self._reader_task = None
+
+        if self._pubsub is not None:
+            try:
+                await self._pubsub.close()
+            except Exception as e:
+                logger.warning(f"關閉執行事件連線失敗: {e}")
+            self._pubsub = None
+        self._subscribers.clear()
+
+
+# 全域事件分發中心（每個 worker 一個）
+execution_event_hub = ExecutionEventHub()
@@ -0,0 +1,133 @@
+"""
+串流匯出 - 工作流與執行歷史以 NDJSON / gzip JSONL 輸出
+
+以伺服器端游標 (stream_results + yield_per) 分批讀取，每批序列化後立即送出，
+記憶體用量與資料筆數無關；每一行附帶 _cursor，中斷後可由最後一行的游標續傳。
+"""
+
+import base64
+import logging
+import uuid
+import zlib
+from datetime import datetime
+from typing import Any, Iterable, Iterator, List, Optional
+
+import orjson
+from sqlalchemy import select, tuple_
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.exceptions import ValidationError
+from app.models.workflow import Workflow, WorkflowExecution
+
+logger = logging.getLogger("app.services.export")
+
+# 匯出格式：(Content-Type, 副檔名)
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "jsonl.gz": ("application/gzip", "jsonl.gz"),
+}
+
+WORKFLOW_EXPORT_COLUMNS = (
+    Workflow.id, Workflow.name, Workflow.description, Workflow.category, Workflow.tags,
+    Workflow.status, Workflow.is_active, Workflow.version, Workflow.nodes, Workflow.edges,
+    Workflow.settings, Workflow.created_at, Workflow.updated_at,
+)
+
+EXECUTION_EXPORT_COLUMNS = (
+    WorkflowExecution.id, WorkflowExecution.workflow_id, WorkflowExecution.execution_id,
+    WorkflowExecution.status, WorkflowExecution.trigger_type, WorkflowExecution.trigger_data,
+    WorkflowExecution.batch_id, WorkflowExecution.result_data, WorkflowExecution.error_message,
+    WorkflowExecution.error_details, WorkflowExecution.nodes_executed, WorkflowExecution.nodes_successful,
+    WorkflowExecution.nodes_failed, WorkflowExecution.started_at, WorkflowExecution.finished_at,
+    WorkflowExecution.duration, WorkflowExecution.n8n_execution_id,
+)
+
+
+def encode_cursor(*values: Any) -> str:
+    """將排序鍵編碼為不透明的游標字串"""
+    raw = orjson.dumps([value.isoformat() if isinstance(value, datetime) else str(value) for value in values])
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[str]:
+    """解碼游標；格式錯誤時拋出 ValidationError"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = orjson.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception:
+        raise ValidationError("無效的匯出游標", field="after")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValidationError("無效的匯出游標", field="after")
+    return values
+
+
+def _stream(stmt, cursor_columns: tuple, batch_size: Optional[int]) -> Iterator[bytes]:
+    """
+    以伺服器端游標逐批讀取並輸出 NDJSON；結尾附上完成標記，
+    缺少完成標記代表匯出中斷，可由最後一行的 _cursor 續傳
+    """
+    db = SessionLocal()
+    count = 0
+    last_cursor = None
+    try:
+        result = db.execute(stmt.execution_options(stream_results=True, yield_per=batch_size or settings.EXPORT_BATCH_SIZE))
+        for partition in result.partitions():
+            lines = []
+            for row in partition:
+                record = dict(row._mapping)
+                last_cursor = encode_cursor(*(record[name] for name in cursor_columns))
+                record["_cursor"] = last_cursor
+                lines.append(orjson.dumps(record))
+            count += len(lines)
+            lines.append(b"")
+            yield b"\n".join(lines)
+        yield orjson.dumps({"_type": "end", "count": count, "next_cursor": last_cursor}) + b"\n"
+    finally:
+        db.close()
+        logger.info(f"串流匯出結束: {count} 筆")
+
+
+def gzip_stream(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """將串流逐段壓縮為 gzip（每批各自輸出，不累積整份內容）"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_workflows(user_id: uuid.UUID, after: Optional[str] = None, batch_size: Optional[int] = None) -> Iterator[bytes]:
+    """
+    匯出使用者的所有工作流（依 ID 排序）；游標在呼叫時即驗證，串流開始後不會再出現參數錯誤
+    """
+    stmt = select(*WORKFLOW_EXPORT_COLUMNS).where(Workflow.user_id == user_id).order_by(Workflow.id)
+    if after:
+        (after_id,) = decode_cursor(after, 1)
+        try:
+            stmt = stmt.where(Workflow.id > uuid.UUID(after_id))
+        except ValueError:
+            raise ValidationError("無效的匯出游標", field="after")
+    return _stream(stmt, ("id",), batch_size)
+
+
+def export_executions(
+    workflow_id: uuid.UUID,
+    after: Optional[str] = None,
+    batch_size: Optional[int] = None
+) -> Iterator[bytes]:
+    """
+    匯出工作流的完整執行歷史（依開始時間與 ID 排序，使用 workflow_id, started_at, id 索引做 keyset 分頁）
+    """
+    stmt = select(*EXECUTION_EXPORT_COLUMNS).where(
+        WorkflowExecution.workflow_id == workflow_id
+    ).order_by(WorkflowExecution.started_at, WorkflowExecution.id)
+    if after:
+        started_at, execution_id = decode_cursor(after, 2)
+        try:
+            key = (datetime.fromisoformat(started_at), uuid.UUID(execution_id))
+        except ValueError:
+            raise ValidationError("無效的匯出游標", field="after")
+        stmt = stmt.where(tuple_(WorkflowExecution.started_at, WorkflowExecution.id) > key)
+    return _stream(stmt, ("started_at", "id"), batch_size)
@@ -0,0 +1,381 @@
+"""
+工作流圖形分析引擎 - 拓撲排序、環路與可到達性檢查、節點參數驗證
+
+節點以整數索引表示，連線以每個節點的後繼索引陣列（successors）儲存，
+所有檢查皆為 O(V + E)。
+"""
+
+import logging
+import re
+from typing import Any, Dict, List, Optional
+
+from app.core.json_schema import CompiledSchema
+
+logger = logging.getLogger("app.services.graph_analyzer")
+
+# 編輯器節點類型對應的 n8n 節點類型（已含套件前綴者直接使用）
+NODE_TYPE_MAP = {
+    "manualTrigger": "n8n-nodes-base.manualTrigger",
+    "webhookTrigger": "n8n-nodes-base.webhook",
+    "scheduleTrigger": "n8n-nodes-base.scheduleTrigger",
+    "httpRequest": "n8n-nodes-base.httpRequest",
+    "setData": "n8n-nodes-base.set",
+    "condition": "n8n-nodes-base.if",
+    "loop": "n8n-nodes-base.splitInBatches",
+    "email": "n8n-nodes-base.emailSend",
+    "slack": "n8n-nodes-base.slack",
+}
+
+# 由平台排程器觸發的編輯器節點類型（scheduler_service）
+SCHEDULE_TRIGGER_TYPE = "scheduleTrigger"
+
+# 具名輸出端口的節點（端口名稱依序對應輸出索引）
+NAMED_OUTPUTS = {
+    "n8n-nodes-base.if": ("true", "false"),
+    "n8n-nodes-base.splitInBatches": ("done", "loop"),
+}
+
+# 預設端口名稱（皆對應索引 0）
+DEFAULT_HANDLES = frozenset({"", "main", "output", "input", "source", "target"})
+
+# 端口名稱中的索引，例如 output-1、output_2、main-0
+HANDLE_INDEX_PATTERN = re.compile(r"^(?:[a-z]+)?[-_]?(\d+)$", re.IGNORECASE)
+
+
+def editor_type(node: Dict[str, Any]) -> str:
+    """取得節點在編輯器中的類型（對應 NodeType.name）"""
+    return node.get("type") or (node.get("data") or {}).get("type") or ""
+
+
+def resolve_n8n_type(node: Dict[str, Any]) -> str:
+    """取得節點的 n8n 類型"""
+    return _resolve_raw_type((node.get("data") or {}).get("n8nType") or editor_type(node))
+
+
+def resolve_handle_index(handle: Optional[str], n8n_type: str) -> int:
+    """
+    將編輯器端口名稱解析為 n8n 輸出/輸入索引
+    """
+    if handle is None:
+        return 0
+    handle = str(handle).strip().lower()
+    if handle in DEFAULT_HANDLES:
+        return 0
+
+    named = NAMED_OUTPUTS.get(n8n_type)
+    if named and handle in named:
+        return named.index(handle)
+
+    match = HANDLE_INDEX_PATTERN.match(handle)
+    if match:
+        return int(match.group(1))
+
+    raise ValueError(f"無法解析的端口: {handle}")
+
+
+def is_trigger_type(n8n_type: str) -> bool:
+    """判斷是否為觸發節點"""
+    short_type = n8n_type.rsplit(".", 1)[-1].lower()
+    return short_type.endswith("trigger") or short_type in ("webhook", "cron")
+
+
+def node_parameters(node: Dict[str, Any]) -> Dict[str, Any]:
+    """取得節點參數（編輯器存於 data.settings，匯入的 n8n 節點為 data.parameters）"""
+    data = node.get("data") or {}
+    return data.get("parameters") or data.get("settings") or {}
+
+
+class GraphAnalysis:
+    """
+    圖形分析結果
+
+    已解析的連線以平行的整數陣列儲存（edge_sources / edge_targets / edge_outputs / edge_inputs，
+    不為每條連線配置 tuple），edges 屬性再組合成 (來源索引, 目標索引, 輸出索引, 輸入索引)；
+    successors 為依來源索引排列的鄰接陣列：節點 i 的後繼為 successors[i]。
+    """
+
+    __slots__ = (
+        "nodes", "node_ids", "n8n_types", "edge_sources", "edge_targets", "edge_outputs", "edge_inputs",
+        "successors", "topological_order", "cycles", "unreachable", "errors", "warnings"
+    )
+
+    def __init__(self):
+        self.nodes: List[Dict[str, Any]] = []
+        self.node_ids: List[str] = []
+        self.n8n_types: List[str] = []
+        self.edge_sources: List[int] = []
+        self.edge_targets: List[int] = []
+        self.edge_outputs: List[int] = []
+        self.edge_inputs: List[int] = []
+        self.successors: List[List[int]] = []
+        self.topological_order: Optional[List[str]] = None
+        self.cycles: List[List[str]] = []
+        self.unreachable: List[str] = []
+        self.errors: List[Dict[str, Any]] = []
+        self.warnings: List[Dict[str, Any]] = []
+
+    @property
+    def edges(self) -> List[tuple]:
+        return list(zip(self.edge_sources, self.edge_targets, self.edge_outputs, self.edge_inputs))
+
+    @property
+    def is_valid(self) -> bool:
+        return not self.errors
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "valid": self.is_valid,
+            "node_count": len(self.node_ids),
+            "edge_count": len(self.edge_sources),
+            "topological_order": self.topological_order,
+            "cycles": self.cycles,
+            "unreachable": self.unreachable,
+            "errors": self.errors,
+            "warnings": self.warnings,
+        }
+
+
+def analyze_graph(
+    nodes: List[Dict[str, Any]],
+    edges: List[Dict[str, Any]],
+    schemas: Optional[Dict[str, CompiledSchema]] = None,
+    structure_only: bool = False
+) -> GraphAnalysis:
+    """
+    分析圖形：結構錯誤（重複/缺少節點 ID、懸空連線、無法解析的端口、參數不符 schema）列於 errors，
+    環路、無觸發節點與無法到達的節點列於 warnings
+
+    structure_only 時只檢查結構錯誤（儲存與匯入只需要 errors），略過拓撲排序、環路與可到達性，
+    沒有端口需要解析時也不解析節點類型（此時只有 errors 有意義）。
+    常見的乾淨圖形（ID 皆為不重複字串、沒有懸空連線與端口）以 map / zip 整批建立索引，
+    有異常時才逐一檢查並產生錯誤訊息。
+    """
+    analysis = GraphAnalysis()
+    errors = analysis.errors
+    warnings = analysis.warnings
+    nodes = nodes or []
+    edges = edges or []
+
+    # 節點索引
+    ids = [node.get("id") for node in nodes]
+    index_of: Dict[str, int] = {}
+    if not ids or set(map(type, ids)) == {str}:
+        index_of = dict(zip(ids, range(len(ids))))
+    if len(index_of) == len(ids) and "" not in index_of:
+        analysis.node_ids = node_ids = ids
+        analysis.nodes = kept_nodes = list(nodes)
+    else:
+        index_of = {}
+        node_ids = analysis.node_ids
+        kept_nodes = analysis.nodes
+        for node, node_id in zip(nodes, ids):
+            if node_id is None or node_id == "":
+                errors.append({"code": "missing_node_id", "message": "節點缺少 id"})
+                continue
+            node_id = str(node_id)
+            if node_id in index_of:
+                errors.append({"code": "duplicate_node", "node_id": node_id, "message": f"節點 ID 重複: {node_id}"})
+                continue
+            index_of[node_id] = len(node_ids)
+            node_ids.append(node_id)
+            kept_nodes.append(node)
+    node_count = len(node_ids)
+
+    # 連線端點（節點 ID 幾乎都是字串，只有其他型別才轉型）
+    edge_count = len(edges)
+    source_ids = [edge.get("source") for edge in edges]
+    target_ids = [edge.get("target") for edge in edges]
+    if edges and set(map(type, source_ids)) != {str}:
+        source_ids = [value if value.__class__ is str else str(value) for value in source_ids]
+    if edges and set(map(type, target_ids)) != {str}:
+        target_ids = [value if value.__class__ is str else str(value) for value in target_ids]
+    sources = list(map(index_of.get, source_ids))
+    targets = list(map(index_of.get, target_ids))
+    source_handles = [edge.get("sourceHandle") for edge in edges]
+    target_handles = [edge.get("targetHandle") for edge in edges]
+    has_handles = source_handles.count(None) != edge_count or target_handles.count(None) != edge_count
+
+    # 節點類型（依原始類型字串解析，同類型節點只解析一次）
+    triggers: List[int] = []
+    if not structure_only or has_handles or schemas:
+        datas = [node.get("data") or {} for node in kept_nodes]
+        editor_types = [node.get("type") or data.get("type") or "" for node, data in zip(kept_nodes, datas)]
+        raw_types = [data.get("n8nType") or editor for data, editor in zip(datas, editor_types)]
+        type_map = {raw_type: _resolve_raw_type(raw_type) for raw_type in set(raw_types)}
+        analysis.n8n_types = n8n_types = list(map(type_map.__getitem__, raw_types))
+        trigger_types = {n8n_type for n8n_type in type_map.values() if is_trigger_type(n8n_type)}
+        if trigger_types:
+            triggers = [index for index, n8n_type in enumerate(n8n_types) if n8n_type in trigger_types]
+
+        if schemas:
+            for node_id, editor, data in zip(node_ids, editor_types, datas):
+                schema = schemas.get(editor)
+                if schema is not None:
+                    for message in schema.errors(data.get("parameters") or data.get("settings") or {}):
+                        errors.append({"code": "invalid_parameters", "node_id": node_id, "message": f"節點 {node_id}: {message}"})
+
+    # 連線解析
+    if None not in sources and None not in targets and not has_handles:
+        analysis.edge_sources = sources
+        analysis.edge_targets = targets
+        analysis.edge_outputs = analysis.edge_inputs = [0] * edge_count
+    else:
+        resolved_sources = analysis.edge_sources
+        resolved_targets = analysis.edge_targets
+        outputs = analysis.edge_outputs
+        inputs = analysis.edge_inputs
+        handle_cache: Dict[tuple, int] = {}
+        for edge, source, target, source_handle, target_handle in zip(edges, sources, targets, source_handles, target_handles):
+            if source is None or target is None:
+                errors.append({
+                    "code": "dangling_edge",
+                    "edge_id": edge.get("id"),
+                    "message": f"連線 {edge.get('id')} 指向不存在的節點: {edge.get('source')} -> {edge.get('target')}"
+                })
+                continue
+            try:
+                output_index = 0 if source_handle is None else _handle_index(handle_cache, source_handle, n8n_types[source])
+                input_index = 0 if target_handle is None else _handle_index(handle_cache, target_handle, n8n_types[target])
+            except ValueError as e:
+                errors.append({"code": "invalid_handle", "edge_id": edge.get("id"), "message": f"連線 {edge.get('id')}: {e}"})
+                continue
+            resolved_sources.append(source)
+            resolved_targets.append(target)
+            outputs.append(output_index)
+            inputs.append(input_index)
+
+    if structure_only:
+        return analysis
+
+    # 鄰接陣列與入度
+    successors: List[List[int]] = [[] for _ in range(node_count)]
+    analysis.successors = successors
+    in_degree = [0] * node_count
+    for source, target in zip(analysis.edge_sources, analysis.edge_targets):
+        successors[source].append(target)
+        in_degree[target] += 1
+
+    # 拓撲排序（Kahn）
+    roots = [index for index, degree in enumerate(in_degree) if not degree]
+    order = roots[:]
+    append = order.append
+    for current in order:
+        for target in successors[current]:
+            in_degree[target] -= 1
+            if not in_degree[target]:
+                append(target)
+
+    is_dag = len(order) == node_count
+    if is_dag:
+        analysis.topological_order = list(map(node_ids.__getitem__, order))
+    else:
+        # 拓撲排序剩餘的節點包含環路及其下游，以強連通分量找出真正的環路
+        analysis.cycles = [[node_ids[index] for index in component] for component in _cycles(node_count, successors)]
+        warnings.append({
+            "code": "cycle",
+            "node_ids": [node_id for cycle in analysis.cycles for node_id in cycle],
+            "message": f"圖形包含 {len(analysis.cycles)} 個環路"
+        })
+
+    # 可到達性（自觸發節點出發）
+    if node_count and not triggers:
+        warnings.append({"code": "no_trigger", "message": "工作流沒有觸發節點"})
+    elif triggers and not (is_dag and set(roots) <= set(triggers)):
+        # 無環圖的每個節點都能由某個入度為 0 的節點到達，入度為 0 的都是觸發節點時不需走訪
+        reached = bytearray(node_count)
+        for index in triggers:
+            reached[index] = 1
+        stack = triggers[:]
+        push = stack.append
+        pop = stack.pop
+        while stack:
+            for target in successors[pop()]:
+                if not reached[target]:
+                    reached[target] = 1
+                    push(target)
+        if reached.count(1) != node_count:
+            analysis.unreachable = [node_ids[index] for index in range(node_count) if not reached[index]]
+            warnings.append({
+                "code": "unreachable",
+                "node_ids": analysis.unreachable,
+                "message": f"{len(analysis.unreachable)} 個節點無法從觸發節點到達"
+            })
+
+    return analysis
+
+
+def _resolve_raw_type(raw_type: str) -> str:
+    """原始類型字串（data.n8nType 或編輯器類型）對應的 n8n 類型"""
+    if "." in raw_type:
+        return raw_type
+    return NODE_TYPE_MAP.get(raw_type, raw_type)
+
+
+def _handle_index(cache: Dict[tuple, int], handle: str, n8n_type: str) -> int:
+    """端口解析結果依 (端口, 節點類型) 快取"""
+    key = (handle, n8n_type)
+    index = cache.get(key)
+    if index is None:
+        index = cache[key] = resolve_handle_index(handle, n8n_type)
+    return index
+
+
+def _cycles(node_count: int, successors: List[List[int]]) -> List[List[int]]:
+    """
+    以迭代式 Tarjan 演算法找出環路（大小大於 1 或含自我迴圈的強連通分量）
+
+    每個節點以迭代器保存走訪到的後繼位置，不在每一步重建工作項目
+    """
+    index_counter = 0
+    indexes = [-1] * node_count
+    lowlinks = [0] * node_count
+    on_stack = bytearray(node_count)
+    stack: List[int] = []
+    components: List[List[int]] = []
+
+    for root in range(node_count):
+        if indexes[root] != -1:
+            continue
+        indexes[root] = lowlinks[root] = index_counter
+        index_counter += 1
+        stack.append(root)
+        on_stack[root] = 1
+        work = [(root, iter(successors[root]))]
+
+        while work:
+            node, children = work[-1]
+            for target in children:
+                if indexes[target] == -1:
+                    indexes[target] = lowlinks[target] = index_counter
+                    index_counter += 1
+                    stack.append(target)
+                    on_stack[target] = 1
+                    work.append((target, iter(successors[target])))
+                    break
+                if on_stack[target] and indexes[target] < lowlinks[node]:
+                    lowlinks[node] = indexes[target]
+            else:
+                # 後繼走訪完畢
+                work.pop()
+                lowlink = lowlinks[node]
+                if work:
+                    parent = work[-1][0]
+                    if lowlink < lowlinks[parent]:
+                        lowlinks[parent] = lowlink
+
+                if lowlink == indexes[node]:
+                    member = stack.pop()
+                    on_stack[member] = 0
+                    if member == node:
+                        # 單一節點只有自我迴圈時才算環路
+                        if node in successors[node]:
+                            components.append([node])
+                        continue
+                    component = [member]
+                    while member != node:
+                        member = stack.pop()
+                        on_stack[member] = 0
+                        component.append(member)
+                    components.append(component)
+
+    return components
@@ -0,0 +1,167 @@
+"""
+工作流圖形編譯器 - 將編輯器的 nodes / edges 轉換為 n8n 工作流 JSON
+
+編譯結果以工作流版本（或內容雜湊）為鍵快取，同一版本只編譯一次。
+"""
+
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.graph_analyzer import SCHEDULE_TRIGGER_TYPE, analyze_graph, editor_type, node_parameters
+from app.services.version_store import content_hash
+
+logger = logging.getLogger("app.services.graph_compiler")
+
+# 排程由平台的排程器觸發（建立執行記錄後以 n8n API 執行），排程觸發節點在 n8n 中改為手動觸發節點；
+# 保留 n8n 的 scheduleTrigger 會讓啟用中的工作流在 n8n 依自己的規則再觸發一次
+PLATFORM_SCHEDULED_N8N_TYPE = "n8n-nodes-base.manualTrigger"
+
+
+class GraphCompileError(Exception):
+    """圖形無法編譯（含所有錯誤訊息）"""
+
+    def __init__(self, errors: List[Dict[str, Any]]):
+        self.errors = errors
+        super().__init__("; ".join(error["message"] for error in errors))
+
+
+class CompiledWorkflow:
+    """
+    編譯後的工作流（n8n 節點、連線與驗證警告）
+    """
+
+    __slots__ = ("cache_key", "nodes", "connections", "warnings")
+
+    def __init__(self, cache_key: str, nodes: List[Dict[str, Any]], connections: Dict[str, Any], warnings: List[Dict[str, Any]]):
+        self.cache_key = cache_key
+        self.nodes = nodes
+        self.connections = connections
+        self.warnings = warnings
+
+    def to_n8n(self, name: str, active: Optional[bool] = None, workflow_settings: Optional[Dict[str, Any]] = None, **extra) -> Dict[str, Any]:
+        """產生送往 n8n API 的工作流 JSON"""
+        payload = {"name": name, "nodes": self.nodes, "connections": self.connections}
+        if active is not None:
+            payload["active"] = active
+        if workflow_settings is not None:
+            payload["settings"] = workflow_settings
+        payload.update(extra)
+        return payload
+
+
+def _node_name(node: Dict[str, Any], used: set) -> str:
+    """n8n 以名稱作為連線鍵，名稱必須唯一"""
+    data = node.get("data") or {}
+    base = str(data.get("label") or data.get("name") or node.get("id"))
+    name, suffix = base, 1
+    while name in used:
+        name = f"{base} {suffix}"
+        suffix += 1
+    used.add(name)
+    return name
+
+
+def _position(node: Dict[str, Any]) -> List[float]:
+    position = node.get("position") or {}
+    if isinstance(position, (list, tuple)):
+        return list(position[:2])
+    return [position.get("x", 0), position.get("y", 0)]
+
+
+def compile_graph(nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]], cache_key: str = "") -> CompiledWorkflow:
+    """
+    編譯編輯器圖形；有結構錯誤（重複節點、懸空連線、無法解析的端口）時拋出 GraphCompileError，
+    環路與無法到達的節點以警告回報
+    """
+    analysis = analyze_graph(nodes, edges)
+    if analysis.errors:
+        raise GraphCompileError(analysis.errors)
+
+    n8n_nodes: List[Dict[str, Any]] = []
+    used_names: set = set()
+    for node, node_id, n8n_type in zip(analysis.nodes, analysis.node_ids, analysis.n8n_types):
+        if editor_type(node) == SCHEDULE_TRIGGER_TYPE:
+            n8n_nodes.append({
+                "id": node_id,
+                "name": _node_name(node, used_names),
+                "type": PLATFORM_SCHEDULED_N8N_TYPE,
+                "typeVersion": 1,
+                "position": _position(node),
+                "parameters": {},
+            })
+            continue
+        n8n_nodes.append({
+            "id": node_id,
+            "name": _node_name(node, used_names),
+            "type": n8n_type,
+            "typeVersion": (node.get("data") or {}).get("typeVersion", 1),
+            "position": _position(node),
+            "parameters": node_parameters(node),
+        })
+
+    # 連線：依來源節點與輸出索引分組
+    outputs: Dict[int, Dict[int, List[Tuple[int, int]]]] = {}
+    for source, target, output_index, input_index in analysis.edges:
+        outputs.setdefault(source, {}).setdefault(output_index, []).append((target, input_index))
+
+    connections: Dict[str, Any] = {}
+    for source, ports in outputs.items():
+        main = [[] for _ in range(max(ports) + 1)]
+        for output_index, targets in ports.items():
+            main[output_index] = [
+                {"node": n8n_nodes[target]["name"], "type": "main", "index": input_index}
+                for target, input_index in targets
+            ]
+        connections[n8n_nodes[source]["name"]] = {"main": main}
+
+    return CompiledWorkflow(cache_key, n8n_nodes, connections, analysis.warnings)
+
+
+class GraphCompiler:
+    """
+    帶 LRU 快取的圖形編譯器
+
+    快取鍵預設為「工作流 ID:修訂號」，未提供時以內容雜湊代替；
+    編譯結果不可變，呼叫端不應修改回傳的節點與連線。
+    """
+
+    def __init__(self, cache_size: Optional[int] = None):
+        self.cache_size = cache_size or settings.GRAPH_COMPILE_CACHE_SIZE
+        self._cache: "OrderedDict[str, CompiledWorkflow]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def compile(
+        self,
+        nodes: List[Dict[str, Any]],
+        edges: List[Dict[str, Any]],
+        cache_key: Optional[str] = None
+    ) -> CompiledWorkflow:
+        """編譯圖形（命中快取時直接回傳）"""
+        key = cache_key or content_hash({"nodes": nodes, "edges": edges})
+        compiled = self._cache.get(key)
+        if compiled is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return compiled
+
+        self.misses += 1
+        compiled = compile_graph(nodes or [], edges or [], key)
+        self._cache[key] = compiled
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return compiled
+
+    def compile_workflow(self, workflow) -> CompiledWorkflow:
+        """編譯工作流模型（以工作流 ID 與修訂號為快取鍵）"""
+        return self.compile(workflow.nodes, workflow.edges, f"{workflow.id}:{workflow.version}")
+
+    def clear(self):
+        """清除快取"""
+        self._cache.clear()
+
+
+# 全域圖形編譯器（每個 worker 一個）
+graph_compiler = GraphCompiler()
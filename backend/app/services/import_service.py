@@ -0,0 +1,435 @@
+"""
+批次匯入 - 以 NDJSON / gzip JSONL / zip 封存檔匯入工作流與模板
+
+請求內容先暫存到 SpooledTemporaryFile，逐行切成區塊後交由子行程平行解析、驗證並編碼成 CSV，
+主行程只負責以 COPY 寫入；全部區塊在同一個交易內完成，n8n 同步延後到回應後的背景批次處理。
+可直接匯入 /workflows/export 的輸出（完成標記與匯出專用欄位會被略過）。
+"""
+
+import gzip
+import io
+import logging
+import multiprocessing
+import tempfile
+import time
+import uuid
+import zipfile
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, AsyncIterator, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+import orjson
+from pydantic import ValidationError as PydanticValidationError
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.exceptions import ValidationError
+from app.models.workflow import Workflow, WorkflowStatus, WorkflowTemplate
+from app.schemas.workflow import WorkflowCreate, WorkflowTemplateImport
+from app.services.graph_analyzer import analyze_graph
+
+logger = logging.getLogger("app.services.import")
+
+# 匯入格式
+IMPORT_FORMATS = ("ndjson", "jsonl.gz", "zip")
+
+# 封存檔內可匯入的檔案：逐行 JSON 與單一 JSON 文件（物件或陣列）
+ARCHIVE_LINE_SUFFIXES = (".ndjson", ".jsonl")
+ARCHIVE_DOCUMENT_SUFFIXES = (".json",)
+
+# 回應中最多列出的失敗明細
+MAX_REPORTED_ERRORS = 100
+
+# 請求內容超過此大小才寫入暫存檔
+SPOOL_MEMORY_BYTES = 8 * 1024 * 1024
+
+WORKFLOW_COPY_COLUMNS = (
+    "id", "user_id", "name", "description", "status", "is_active", "category", "tags",
+    "nodes", "edges", "settings", "version", "last_version_number",
+    "execution_count", "success_count", "failure_count",
+)
+
+TEMPLATE_COPY_COLUMNS = (
+    "id", "name", "description", "category", "tags", "thumbnail_url", "nodes", "edges", "settings",
+    "author_id", "is_official", "is_public", "is_taiwan_featured", "usage_count", "rating", "rating_count",
+    "version", "min_platform_version",
+)
+
+# 匯入對象：(資料表, COPY 欄位)
+IMPORT_TARGETS = {
+    "workflows": (Workflow.__tablename__, WORKFLOW_COPY_COLUMNS),
+    "templates": (WorkflowTemplate.__tablename__, TEMPLATE_COPY_COLUMNS),
+}
+
+# Workflow.category 欄位長度（WorkflowCreate 未限制）
+WORKFLOW_CATEGORY_MAX_LENGTH = 50
+
+
+# ==================== 讀取 ====================
+
+async def spool_body(chunks: AsyncIterator[bytes]) -> BinaryIO:
+    """
+    將請求內容暫存（小於 SPOOL_MEMORY_BYTES 時留在記憶體），超過 IMPORT_MAX_BYTES 時拒絕
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES)
+    size = 0
+    try:
+        async for chunk in chunks:
+            size += len(chunk)
+            if size > settings.IMPORT_MAX_BYTES:
+                raise ValidationError(f"匯入內容不可超過 {settings.IMPORT_MAX_BYTES} 位元組", field="body")
+            spool.write(chunk)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
+
+
+def _iter_lines(source: BinaryIO, prefix: str) -> Iterator[Tuple[str, bytes]]:
+    """逐行讀取，略過空白行；位置標示為 行號 或 檔名:行號"""
+    for number, line in enumerate(source, 1):
+        line = line.strip()
+        if line:
+            yield (f"{prefix}:{number}" if prefix else f"line {number}"), line
+
+
+def _iter_archive(stream: BinaryIO) -> Iterator[Tuple[str, bytes]]:
+    """依檔名順序讀取 zip 封存檔內的 .ndjson / .jsonl / .json 檔案"""
+    try:
+        archive = zipfile.ZipFile(stream)
+    except zipfile.BadZipFile:
+        raise ValidationError("無效的 zip 封存檔", field="body")
+
+    with archive:
+        for info in sorted(archive.infolist(), key=lambda item: item.filename):
+            name = info.filename
+            lower = name.lower()
+            if info.is_dir():
+                continue
+            if info.file_size > settings.IMPORT_MAX_BYTES:
+                raise ValidationError(f"封存檔內的 {name} 超過 {settings.IMPORT_MAX_BYTES} 位元組", field="body")
+            if lower.endswith(ARCHIVE_LINE_SUFFIXES):
+                with archive.open(info) as member:
+                    yield from _iter_lines(member, name)
+            elif lower.endswith(ARCHIVE_DOCUMENT_SUFFIXES):
+                with archive.open(info) as member:
+                    raw = member.read()
+                try:
+                    document = orjson.loads(raw)
+                except orjson.JSONDecodeError:
+                    # 交由驗證階段回報 JSON 格式錯誤
+                    yield name, raw
+                    continue
+                if isinstance(document, list):
+                    for index, item in enumerate(document):
+                        yield f"{name}[{index}]", orjson.dumps(item)
+                else:
+                    yield name, raw
+
+
+def iter_records(stream: BinaryIO, import_format: str) -> Iterator[Tuple[str, bytes]]:
+    """
+    產生 (位置, 原始 JSON) 序列；JSON 解析留給子行程
+    """
+    if import_format == "zip":
+        yield from _iter_archive(stream)
+        return
+
+    source = gzip.GzipFile(fileobj=stream, mode="rb") if import_format == "jsonl.gz" else stream
+    try:
+        yield from _iter_lines(source, "")
+    except (OSError, EOFError):
+        raise ValidationError("無效的 gzip 內容", field="body")
+
+
+# ==================== 解析與 CSV 編碼（在子行程執行） ====================
+
+def _csv_field(value: Any) -> str:
+    """COPY CSV 欄位：字串一律加引號，未加引號的空值即為 NULL"""
+    if value is None:
+        return ""
+    if value is True:
+        return "t"
+    if value is False:
+        return "f"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    return '"' + value.replace('"', '""') + '"'
+
+
+def _pg_array(values: Optional[List[Any]]) -> Optional[str]:
+    """Postgres 陣列常值"""
+    if values is None:
+        return None
+    items = (str(value).replace("\\", "\\\\").replace('"', '\\"') for value in values)
+    return "{" + ",".join(f'"{item}"' for item in items) + "}"
+
+
+def _json(value: Any) -> str:
+    return orjson.dumps(value).decode("utf-8")
+
+
+def _workflow_row(record: Dict[str, Any], owner_id: str) -> Tuple[str, tuple, list, list]:
+    data = WorkflowCreate.model_validate(record)
+    if data.category and len(data.category) > WORKFLOW_CATEGORY_MAX_LENGTH:
+        raise ValueError(f"category 長度不可超過 {WORKFLOW_CATEGORY_MAX_LENGTH}")
+    nodes, edges = data.nodes or [], data.edges or []
+    row_id = str(uuid.uuid4())
+    row = (
+        row_id, owner_id, data.name, data.description, WorkflowStatus.DRAFT.name, data.is_active,
+        data.category, _pg_array(data.tags or []), _json(nodes), _json(edges), _json(data.settings or {}),
+        1, 0, 0, 0, 0,
+    )
+    return row_id, row, nodes, edges
+
+
+def _template_row(record: Dict[str, Any], owner_id: str) -> Tuple[str, tuple, list, list]:
+    data = WorkflowTemplateImport.model_validate(record)
+    nodes, edges = data.nodes or [], data.edges or []
+    row_id = str(uuid.uuid4())
+    row = (
+        row_id, data.name, data.description, data.category, _pg_array(data.tags or []), data.thumbnail_url,
+        _json(nodes), _json(edges), _json(data.settings or {}), owner_id, data.is_official, data.is_public,
+        data.is_taiwan_featured, 0, 0.0, 0, data.version, data.min_platform_version,
+    )
+    return row_id, row, nodes, edges
+
+
+_ROW_BUILDERS = {
+    "workflows": _workflow_row,
+    "templates": _template_row,
+}
+
+
+def _pydantic_message(error: PydanticValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc']) or '值'}: {item['msg']}"
+        for item in error.errors()[:3]
+    )
+
+
+def prepare_chunk(
+    target: str,
+    owner_id: str,
+    items: List[Tuple[str, bytes]],
+    validate_graph: bool = True
+) -> Tuple[str, List[str], List[Dict[str, Any]], int]:
+    """
+    解析並驗證一個區塊，回傳 (COPY 用 CSV, 新列 ID, 失敗明細, 略過筆數)；
+    只含基本型別，可直接在行程間傳遞
+    """
+    build_row = _ROW_BUILDERS[target]
+    lines: List[str] = []
+    row_ids: List[str] = []
+    errors: List[Dict[str, Any]] = []
+    skipped = 0
+
+    for location, raw in items:
+        # Postgres 的 text 與 JSONB 都不接受 NUL 字元，提前拒絕以免整批 COPY 失敗
+        if b"\\u0000" in raw:
+            errors.append({"location": location, "message": "內容不可包含 NUL 字元"})
+            continue
+        try:
+            record = orjson.loads(raw)
+        except orjson.JSONDecodeError as e:
+            errors.append({"location": location, "message": f"JSON 格式錯誤: {e}"})
+            continue
+        if not isinstance(record, dict):
+            errors.append({"location": location, "message": "每筆資料必須為 JSON 物件"})
+            continue
+        if record.get("_type") == "end":
+            skipped += 1
+            continue
+
+        try:
+            row_id, row, nodes, edges = build_row(record, owner_id)
+        except PydanticValidationError as e:
+            errors.append({"location": location, "message": _pydantic_message(e)})
+            continue
+        except ValueError as e:
+            errors.append({"location": location, "message": str(e)})
+            continue
+
+        if validate_graph:
+            analysis = analyze_graph(nodes, edges, structure_only=True)
+            if analysis.errors:
+                errors.append({
+                    "location": location,
+                    "message": f"工作流圖形有 {len(analysis.errors)} 個錯誤",
+                    "errors": analysis.errors[:10]
+                })
+                continue
+
+        row_ids.append(row_id)
+        lines.append(",".join(_csv_field(value) for value in row))
+
+    lines.append("")
+    return "\n".join(lines) if row_ids else "", row_ids, errors, skipped
+
+
+# ==================== 子行程池 ====================
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_executor() -> Optional[ProcessPoolExecutor]:
+    """
+    取得驗證用的子行程池（第一次使用時建立，IMPORT_VALIDATION_WORKERS 為 0 時不使用）；
+    以 spawn 建立子行程，不繼承父行程的資料庫與 Redis 連線
+    """
+    global _executor
+    if settings.IMPORT_VALIDATION_WORKERS <= 0:
+        return None
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.IMPORT_VALIDATION_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+
+def shutdown_executor():
+    """關閉子行程池"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _submit(executor: Optional[ProcessPoolExecutor], *args) -> Future:
+    if executor is not None:
+        return executor.submit(prepare_chunk, *args)
+    future: Future = Future()
+    future.set_result(prepare_chunk(*args))
+    return future
+
+
+# ==================== 匯入 ====================
+
+class ImportResult:
+    """
+    匯入結果
+    """
+
+    __slots__ = ("target", "imported", "failed", "skipped", "errors", "row_ids", "started_at", "duration")
+
+    def __init__(self, target: str):
+        self.target = target
+        self.imported = 0
+        self.failed = 0
+        self.skipped = 0
+        self.errors: List[Dict[str, Any]] = []
+        self.row_ids: List[str] = []
+        self.started_at = time.perf_counter()
+        self.duration = 0.0
+
+    def add(self, row_ids: List[str], errors: List[Dict[str, Any]], skipped: int):
+        self.imported += len(row_ids)
+        self.failed += len(errors)
+        self.skipped += skipped
+        self.row_ids.extend(row_ids)
+        room = MAX_REPORTED_ERRORS - len(self.errors)
+        if room > 0:
+            self.errors.extend(errors[:room])
+
+    def finish(self):
+        self.duration = time.perf_counter() - self.started_at
+
+    @property
+    def rows_per_second(self) -> float:
+        return round(self.imported / self.duration, 1) if self.duration else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "target": self.target,
+            "imported": self.imported,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "errors": self.errors,
+            "duration_ms": round(self.duration * 1000, 1),
+            "rows_per_second": self.rows_per_second,
+        }
+
+
+def _chunks(records: Iterator[Tuple[str, bytes]], size: int, max_items: int) -> Iterator[List[Tuple[str, bytes]]]:
+    chunk: List[Tuple[str, bytes]] = []
+    total = 0
+    for record in records:
+        total += 1
+        if total > max_items:
+            raise ValidationError(f"單次匯入最多 {max_items} 筆", field="body")
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def import_records(
+    target: str,
+    stream: BinaryIO,
+    import_format: str,
+    owner_id: uuid.UUID,
+    chunk_size: Optional[int] = None
+) -> ImportResult:
+    """
+    匯入工作流或模板（同步執行，呼叫端應放在執行緒池中）
+
+    讀取與 COPY 在目前執行緒進行，解析驗證在子行程進行，最多同時處理 2 倍子行程數的區塊，
+    COPY 第 N 區塊時後續區塊已在驗證；任何資料庫錯誤會回滾整次匯入。
+    """
+    if target not in IMPORT_TARGETS:
+        raise ValidationError(f"不支援的匯入對象: {target}", field="target")
+    if import_format not in IMPORT_FORMATS:
+        raise ValidationError(f"不支援的匯入格式: {import_format}", field="format")
+
+    table, columns = IMPORT_TARGETS[target]
+    copy_sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+    executor = get_executor()
+    in_flight = max(2, settings.IMPORT_VALIDATION_WORKERS * 2) if executor is not None else 1
+    validate_graph = settings.GRAPH_VALIDATE_ON_SAVE
+    owner = str(owner_id)
+
+    result = ImportResult(target)
+    pending: deque = deque()
+    db = SessionLocal()
+    try:
+        cursor = db.connection().connection.cursor()
+
+        def load(future: Future):
+            csv_text, row_ids, errors, skipped = future.result()
+            if csv_text:
+                cursor.copy_expert(copy_sql, io.StringIO(csv_text))
+            result.add(row_ids, errors, skipped)
+
+        chunks = _chunks(
+            iter_records(stream, import_format),
+            chunk_size or settings.IMPORT_CHUNK_SIZE,
+            settings.IMPORT_MAX_ITEMS
+        )
+        for chunk in chunks:
+            pending.append(_submit(executor, target, owner, chunk, validate_graph))
+            while len(pending) >= in_flight:
+                load(pending.popleft())
+        while pending:
+            load(pending.popleft())
+
+        db.commit()
+        result.finish()
+        logger.info(
+            f"批次匯入完成: target={target}, owner_id={owner}, 成功={result.imported}, "
+            f"失敗={result.failed}, 耗時={result.duration:.2f}s, {result.rows_per_second} 筆/秒"
+        )
+        return result
+
+    except Exception as e:
+        db.rollback()
+        if not isinstance(e, ValidationError):
+            logger.error(f"批次匯入失敗: target={target}, owner_id={owner}, error={str(e)}")
+        raise
+    finally:
+        for future in pending:
+            future.cancel()
+        db.close()
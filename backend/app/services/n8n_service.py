@@ -10,10 +10,14 @@ from datetime import datetime
 import logging
 
 from app.core.config import settings
+from app.core.metrics import N8N_REQUEST_DURATION, instrument_methods
+from app.core.tracing import http_transport, traced_methods
 
 logger = logging.getLogger(__name__)
 
 
+@traced_methods("N8nService")
+@instrument_methods(N8N_REQUEST_DURATION, with_outcome=True)
 class N8nService:
     """n8n 工作流引擎服務類別"""
     
@@ -23,8 +27,9 @@ class N8nService:
         if settings.N8N_BASIC_AUTH_ACTIVE:
             self.auth = (settings.N8N_BASIC_AUTH_USER, settings.N8N_BASIC_AUTH_PASSWORD)
         
-        # 設定 HTTP 客戶端
+        # 設定 HTTP 客戶端（啟用追蹤時每個呼叫建立 span 並傳遞 traceparent / X-Request-ID）
         self.client = httpx.AsyncClient(
+            transport=http_transport(),
             timeout=30.0,
             headers={
                 "Content-Type": "application/json",
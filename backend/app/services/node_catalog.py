@@ -0,0 +1,200 @@
+"""
+節點類型目錄 - 常駐記憶體的 NodeType 快取與預先編譯的參數驗證器
+
+啟動時載入所有節點類型並編譯 input / settings / output schema，
+之後依 updated_at 增量更新；列表回應預先序列化並附帶 ETag。
+"""
+
+import hashlib
+import json
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.json_schema import CompiledSchema, compile_schema
+from app.models.node import NodeType
+
+logger = logging.getLogger("app.services.node_catalog")
+
+# 對外公開的節點類型欄位
+PUBLIC_FIELDS = (
+    "name", "display_name", "category", "description", "documentation_url",
+    "icon_url", "color", "version", "is_beta",
+    "input_schema", "output_schema", "settings_schema",
+    "supports_webhook", "supports_polling", "supports_batch",
+    "is_taiwan_service", "service_provider",
+)
+
+# 可驗證的 schema 種類
+SCHEMA_KINDS = ("input", "settings", "output")
+
+
+def _compile(name: str, kind: str, schema: Optional[Dict[str, Any]]) -> Optional[CompiledSchema]:
+    """編譯 schema；schema 無效時記錄警告並略過驗證"""
+    if not schema:
+        return None
+    try:
+        return compile_schema(schema)
+    except Exception as e:
+        logger.warning(f"節點類型 schema 編譯失敗: name={name}, kind={kind}, error={e}")
+        return None
+
+
+class NodeCatalogEntry:
+    """
+    單一節點類型（公開欄位與編譯後的驗證器）
+    """
+
+    __slots__ = ("name", "data", "validators", "updated_at")
+
+    def __init__(self, node_type: NodeType):
+        self.name = node_type.name
+        self.updated_at = node_type.updated_at
+        self.data = {field: getattr(node_type, field) for field in PUBLIC_FIELDS}
+        self.data["id"] = str(node_type.id)
+        self.data["updated_at"] = node_type.updated_at.isoformat() if node_type.updated_at else None
+        self.validators = {
+            kind: _compile(node_type.name, kind, getattr(node_type, f"{kind}_schema"))
+            for kind in SCHEMA_KINDS
+        }
+
+
+class NodeCatalog:
+    """
+    節點類型目錄
+
+    只保留啟用中的節點類型；_known_ids 記錄資料表中所有列（含停用），
+    用來判斷是否有列被刪除而需要完整重新載入。
+    """
+
+    def __init__(self, refresh_seconds: Optional[float] = None):
+        self.refresh_seconds = refresh_seconds if refresh_seconds is not None else settings.NODE_CATALOG_REFRESH_SECONDS
+        self._entries: Dict[str, NodeCatalogEntry] = {}
+        self._known_ids: set = set()
+        self._watermark: Optional[datetime] = None
+        self._checked_at = 0.0
+        self._payload: bytes = b"[]"
+        self._etag = ""
+        self._validator_maps: Dict[str, Dict[str, CompiledSchema]] = {}
+        self.loaded = False
+
+    # ==================== 載入與更新 ====================
+
+    def load(self, db: Session) -> int:
+        """完整載入所有節點類型"""
+        rows = db.query(NodeType).all()
+        self._entries = {}
+        self._known_ids = set()
+        self._watermark = None
+        self._apply(rows)
+        self.loaded = True
+        self._checked_at = time.monotonic()
+        logger.info(f"節點類型目錄載入完成: {len(self._entries)} 個啟用中的節點類型")
+        return len(self._entries)
+
+    def refresh(self, db: Session) -> int:
+        """
+        增量更新：只讀取 updated_at 晚於上次載入的列；列數不符（有列被刪除）時完整重新載入，
+        回傳變更的節點類型數
+        """
+        if not self.loaded:
+            return self.load(db)
+
+        total, latest = db.query(func.count(NodeType.id), func.max(NodeType.updated_at)).one()
+        self._checked_at = time.monotonic()
+        changed = 0
+        if latest is not None and (self._watermark is None or latest > self._watermark):
+            query = db.query(NodeType)
+            if self._watermark is not None:
+                # 使用 >= 以免漏掉與水位時間相同、稍晚才提交的列
+                query = query.filter(NodeType.updated_at >= self._watermark)
+            rows = query.all()
+            self._apply(rows)
+            changed = len(rows)
+
+        if total != len(self._known_ids):
+            return self.load(db)
+        if changed:
+            logger.info(f"節點類型目錄增量更新: {changed} 個節點類型")
+        return changed
+
+    def ensure_fresh(self, db: Session):
+        """距離上次檢查超過 refresh_seconds 時增量更新"""
+        if not self.loaded or time.monotonic() - self._checked_at >= self.refresh_seconds:
+            self.refresh(db)
+
+    def _apply(self, rows: List[NodeType]):
+        """套用變更的列並重建序列化回應與 ETag"""
+        for node_type in rows:
+            self._known_ids.add(node_type.id)
+            if node_type.is_active:
+                self._entries[node_type.name] = NodeCatalogEntry(node_type)
+            else:
+                self._entries.pop(node_type.name, None)
+            if node_type.updated_at and (self._watermark is None or node_type.updated_at > self._watermark):
+                self._watermark = node_type.updated_at
+
+        # 名稱可能被改過，移除同 ID 的舊名稱
+        if rows:
+            latest_names = {str(node_type.id): node_type.name for node_type in rows}
+            for name, entry in list(self._entries.items()):
+                current = latest_names.get(entry.data["id"])
+                if current is not None and current != name:
+                    del self._entries[name]
+
+        ordered = sorted(self._entries.values(), key=lambda entry: (entry.data["category"], entry.name))
+        self._payload = json.dumps(
+            [entry.data for entry in ordered],
+            ensure_ascii=False,
+            separators=(",", ":"),
+            default=str
+        ).encode("utf-8")
+        self._etag = f'"{hashlib.blake2b(self._payload, digest_size=16).hexdigest()}"'
+        self._validator_maps = {}
+
+    # ==================== 查詢 ====================
+
+    @property
+    def etag(self) -> str:
+        return self._etag
+
+    @property
+    def payload(self) -> bytes:
+        """所有啟用中節點類型的 JSON（預先序列化）"""
+        return self._payload
+
+    def get(self, name: str) -> Optional[NodeCatalogEntry]:
+        return self._entries.get(name)
+
+    def validator(self, name: str, kind: str = "input") -> Optional[CompiledSchema]:
+        """取得節點類型的驗證器（沒有 schema 時為 None）"""
+        entry = self._entries.get(name)
+        return entry.validators.get(kind) if entry else None
+
+    def validators(self, kind: str = "input") -> Dict[str, CompiledSchema]:
+        """所有具有該種 schema 的節點類型驗證器（目錄變更前重複使用同一份對照表）"""
+        mapping = self._validator_maps.get(kind)
+        if mapping is None:
+            mapping = self._validator_maps[kind] = {
+                name: entry.validators[kind]
+                for name, entry in self._entries.items()
+                if entry.validators.get(kind) is not None
+            }
+        return mapping
+
+    def validate(self, name: str, parameters: Any, kind: str = "input") -> List[str]:
+        """驗證節點參數；未知或沒有 schema 的節點類型視為通過"""
+        validator = self.validator(name, kind)
+        return validator.errors(parameters) if validator else []
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# 全域節點類型目錄（每個 worker 一個）
+node_catalog = NodeCatalog()
@@ -0,0 +1,449 @@
+"""
+排程觸發引擎 - 以最小堆積管理所有排程工作流，透過 Redis 選出單一領導者負責觸發
+"""
+
+import asyncio
+import functools
+import hashlib
+import heapq
+import itertools
+import logging
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from app.core.config import settings
+from app.core.cron import CronExpression
+from app.core.database import SessionLocal
+from app.core.redis import get_redis
+from app.models.workflow import Workflow
+from app.services.graph_analyzer import SCHEDULE_TRIGGER_TYPE
+from app.services.workflow_service import WorkflowService
+
+logger = logging.getLogger("app.services.scheduler")
+
+# 間隔模式的時間單位（秒）
+INTERVAL_UNIT_SECONDS = {
+    "minutes": 60,
+    "hours": 3600,
+    "days": 86400,
+    "weeks": 604800,
+}
+
+# Redis 鍵
+LEADER_KEY = "scheduler:leader"
+LAST_FIRED_KEY = "scheduler:last_fired"
+
+# 僅在仍為領導者時延長租約
+_RENEW_LEADER_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("expire", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+def node_schedule(node: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    取得單一排程觸發節點的排程設定；已停用（編輯器的「啟用排程」關閉）或尚未設定時回傳 None，
+    間隔不是正整數時拋出 ValueError
+    """
+    data = node.get("data") or {}
+    node_settings = data.get("settings") or {}
+    if node_settings.get("enabled") is False:
+        return None
+
+    timezone_name = node_settings.get("timezone") or settings.SCHEDULER_DEFAULT_TIMEZONE
+    mode = node_settings.get("mode") or "cron"
+
+    if mode == "interval":
+        value = node_settings.get("intervalValue")
+        unit_seconds = INTERVAL_UNIT_SECONDS.get(node_settings.get("intervalUnit", "minutes"))
+        if not value or not unit_seconds:
+            return None
+        try:
+            interval = int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"無效的間隔值: {value}")
+        if interval <= 0:
+            raise ValueError(f"間隔值必須大於 0: {value}")
+        return {"interval": interval * unit_seconds, "timezone": timezone_name}
+
+    cron_expression = node_settings.get("cronExpression") or data.get("schedule")
+    if cron_expression:
+        return {"cron": cron_expression, "timezone": timezone_name}
+    return None
+
+
+def extract_schedule(nodes: Optional[List[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+    """
+    從工作流節點中取得排程設定（第一個已啟用且有設定的排程觸發節點）
+    """
+    for node in nodes or []:
+        if not isinstance(node, dict) or node.get("type") != SCHEDULE_TRIGGER_TYPE:
+            continue
+        schedule = node_schedule(node)
+        if schedule:
+            return schedule
+    return None
+
+
+def schedule_errors(nodes: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    檢查已啟用的排程觸發節點能否觸發（cron 語法、間隔與時區），回傳錯誤列表（格式同圖形分析的 errors）
+    """
+    errors = []
+    for node in nodes or []:
+        if not isinstance(node, dict) or node.get("type") != SCHEDULE_TRIGGER_TYPE:
+            continue
+        try:
+            schedule = node_schedule(node)
+            if schedule:
+                ScheduleEntry(str(node.get("id")), schedule, 0, 0)
+        except (ValueError, KeyError) as e:
+            # 未知時區為 ZoneInfoNotFoundError（KeyError 的子類別）
+            message = e.args[0] if isinstance(e, KeyError) and e.args else e
+            errors.append({
+                "code": "invalid_schedule",
+                "node_id": node.get("id"),
+                "message": f"節點 {node.get('id')}: 排程設定無效: {message}"
+            })
+    return errors
+
+
+def compute_jitter(workflow_id: str, max_jitter: float) -> float:
+    """
+    依工作流 ID 計算固定的抖動秒數，分散整點同時觸發的尖峰
+    """
+    if max_jitter <= 0:
+        return 0.0
+    digest = hashlib.sha1(workflow_id.encode()).digest()
+    return (int.from_bytes(digest[:4], "big") / 0xFFFFFFFF) * max_jitter
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_cron(expression: str) -> CronExpression:
+    """解析並快取 cron 表達式（大量工作流通常共用少數幾種表達式）"""
+    return CronExpression(expression)
+
+
+@functools.lru_cache(maxsize=512)
+def _get_timezone(name: str) -> ZoneInfo:
+    """取得並快取時區物件"""
+    return ZoneInfo(name)
+
+
+class ScheduleEntry:
+    """
+    單一工作流的排程項目
+    """
+
+    __slots__ = ("workflow_id", "cron", "interval", "tz", "jitter", "generation", "signature")
+
+    def __init__(self, workflow_id: str, schedule: Dict[str, Any], max_jitter: float, generation: int):
+        self.workflow_id = workflow_id
+        self.cron = _parse_cron(schedule["cron"]) if schedule.get("cron") else None
+        self.interval = schedule.get("interval")
+        self.tz = _get_timezone(schedule.get("timezone") or settings.SCHEDULER_DEFAULT_TIMEZONE)
+        self.generation = generation
+        self.signature = (schedule.get("cron"), self.interval, str(self.tz))
+
+        if not self.cron and not self.interval:
+            raise ValueError(f"排程設定缺少 cron 或 interval: {schedule}")
+
+        # 抖動不超過週期的一半，避免越過下一次觸發
+        period = _schedule_period(self)
+        self.jitter = compute_jitter(workflow_id, min(max_jitter, period / 2))
+
+    def next_after(self, ts: float) -> float:
+        """
+        取得 ts 之後的下一個名目觸發時間（不含抖動，Unix 時間戳）
+        """
+        if self.interval:
+            return ts + self.interval
+        local = datetime.fromtimestamp(ts, self.tz).replace(tzinfo=None)
+        return self.cron.next_after(local).replace(tzinfo=self.tz).timestamp()
+
+
+_PERIOD_CACHE: Dict[Tuple[Any, ...], float] = {}
+
+
+def _schedule_period(entry: ScheduleEntry) -> float:
+    """
+    估算排程週期（兩次連續觸發的間隔），依排程設定快取
+    """
+    period = _PERIOD_CACHE.get(entry.signature)
+    if period is None:
+        first = entry.next_after(time.time())
+        period = entry.next_after(first) - first
+        if len(_PERIOD_CACHE) < 4096:
+            _PERIOD_CACHE[entry.signature] = period
+    return period
+
+
+class WorkflowScheduler:
+    """
+    工作流排程器
+
+    所有排程存放於以觸發時間排序的最小堆積，每個 tick 只處理到期的項目；
+    移除或更新排程時以 generation 標記舊項目失效（延遲刪除）。
+    """
+
+    def __init__(
+        self,
+        fire_callback: Optional[Callable[[str, float], Awaitable[Any]]] = None,
+        clock: Callable[[], float] = time.time,
+        max_jitter: Optional[float] = None,
+        catchup_window: Optional[float] = None
+    ):
+        self.fire_callback = fire_callback or self._execute_scheduled_workflow
+        self.clock = clock
+        self.max_jitter = settings.SCHEDULER_MAX_JITTER_SECONDS if max_jitter is None else max_jitter
+        self.catchup_window = (
+            settings.SCHEDULER_CATCHUP_WINDOW_SECONDS if catchup_window is None else catchup_window
+        )
+        self.instance_id = str(uuid.uuid4())
+        self.is_leader = False
+
+        self._heap: List[Tuple[float, int, float, str, int]] = []
+        self._entries: Dict[str, ScheduleEntry] = {}
+        self._seq = itertools.count()
+        self._generation = itertools.count(1)
+        self._task: Optional[asyncio.Task] = None
+        self._running = False
+        self._semaphore = asyncio.Semaphore(settings.SCHEDULER_MAX_CONCURRENCY)
+        self._inflight: set = set()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ==================== 排程管理 ====================
+
+    def upsert(
+        self,
+        workflow_id: str,
+        schedule: Dict[str, Any],
+        last_fired_at: Optional[float] = None
+    ) -> Optional[ScheduleEntry]:
+        """
+        新增或更新工作流排程，設定未變更時保留原本的觸發時間
+        """
+        existing = self._entries.get(workflow_id)
+        entry = ScheduleEntry(workflow_id, schedule, self.max_jitter, next(self._generation))
+        if existing and existing.signature == entry.signature:
+            return existing
+
+        now = self.clock()
+        nominal = entry.next_after(last_fired_at if last_fired_at else now)
+        fire_at = nominal + entry.jitter
+
+        if nominal <= now:
+            if now - nominal <= self.catchup_window:
+                # 補觸發錯過的排程（多次錯過合併為一次）
+                fire_at = now
+            else:
+                nominal = entry.next_after(now)
+                fire_at = nominal + entry.jitter
+
+        self._entries[workflow_id] = entry
+        heapq.heappush(self._heap, (fire_at, next(self._seq), nominal, workflow_id, entry.generation))
+        return entry
+
+    def remove(self, workflow_id: str) -> bool:
+        """
+        移除工作流排程（堆積中的舊項目於彈出時略過）
+        """
+        return self._entries.pop(workflow_id, None) is not None
+
+    def pop_due(self, now: float) -> List[Tuple[ScheduleEntry, float, float]]:
+        """
+        彈出所有到期的排程並排入下一次觸發
+
+        回傳 (排程項目, 名目觸發時間, 預定觸發時間) 列表
+        """
+        due = []
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            fire_at, _, nominal, workflow_id, generation = heapq.heappop(heap)
+            entry = self._entries.get(workflow_id)
+            if entry is None or entry.generation != generation:
+                continue
+
+            due.append((entry, nominal, fire_at))
+
+            next_nominal = entry.next_after(nominal)
+            if next_nominal + entry.jitter <= now:
+                # 落後超過一個週期時不逐一補觸發，直接跳到下一個未來時間
+                next_nominal = entry.next_after(now)
+            heapq.heappush(
+                heap,
+                (next_nominal + entry.jitter, next(self._seq), next_nominal, workflow_id, generation)
+            )
+        return due
+
+    def next_wakeup(self) -> Optional[float]:
+        """取得下一個排程的預定觸發時間"""
+        return self._heap[0][0] if self._heap else None
+
+    # ==================== 領導者選舉 ====================
+
+    async def _refresh_leadership(self) -> bool:
+        """
+        取得或延長領導者租約，只有領導者會觸發排程
+        """
+        ttl = settings.SCHEDULER_LEADER_TTL_SECONDS
+        try:
+            client = get_redis()
+            if self.is_leader:
+                renewed = await client.eval(_RENEW_LEADER_SCRIPT, 1, LEADER_KEY, self.instance_id, ttl)
+                self.is_leader = bool(renewed)
+            if not self.is_leader:
+                acquired = await client.set(LEADER_KEY, self.instance_id, nx=True, ex=ttl)
+                if acquired:
+                    logger.info(f"排程器取得領導權: instance_id={self.instance_id}")
+                self.is_leader = bool(acquired)
+        except Exception as e:
+            logger.warning(f"排程器領導者選舉失敗: {e}")
+            self.is_leader = False
+        return self.is_leader
+
+    async def _release_leadership(self):
+        """釋放領導者租約，讓其他副本立即接手"""
+        if not self.is_leader:
+            return
+        try:
+            client = get_redis()
+            if await client.get(LEADER_KEY) == self.instance_id:
+                await client.delete(LEADER_KEY)
+        except Exception as e:
+            logger.warning(f"釋放排程器領導權失敗: {e}")
+        self.is_leader = False
+
+    # ==================== 排程載入 ====================
+
+    async def load_schedules(self) -> int:
+        """
+        從資料庫載入所有啟用中的排程工作流
+        """
+        db = SessionLocal()
+        try:
+            rows = db.query(Workflow.id, Workflow.nodes).filter(
+                Workflow.is_active == True,
+                Workflow.nodes.contains([{"type": SCHEDULE_TRIGGER_TYPE}])
+            ).all()
+        finally:
+            db.close()
+
+        try:
+            last_fired = await get_redis().hgetall(LAST_FIRED_KEY)
+        except Exception as e:
+            logger.warning(f"取得排程最後觸發時間失敗: {e}")
+            last_fired = {}
+
+        seen = set()
+        for workflow_id, nodes in rows:
+            workflow_id = str(workflow_id)
+            try:
+                schedule = extract_schedule(nodes)
+                if not schedule:
+                    continue
+                fired_at = last_fired.get(workflow_id)
+                self.upsert(workflow_id, schedule, float(fired_at) if fired_at else None)
+                seen.add(workflow_id)
+            except (ValueError, KeyError) as e:
+                logger.warning(f"略過無效的排程設定: workflow_id={workflow_id}, error={e}")
+
+        for workflow_id in list(self._entries):
+            if workflow_id not in seen:
+                self.remove(workflow_id)
+
+        logger.info(f"排程載入完成: {len(self._entries)} 個排程工作流")
+        return len(self._entries)
+
+    # ==================== 觸發 ====================
+
+    async def _fire(self, entry: ScheduleEntry, nominal: float):
+        """
+        記錄觸發時間並以有限並行度執行工作流
+        """
+        try:
+            await get_redis().hset(LAST_FIRED_KEY, entry.workflow_id, nominal)
+        except Exception as e:
+            logger.warning(f"記錄排程觸發時間失敗: workflow_id={entry.workflow_id}, error={e}")
+
+        async with self._semaphore:
+            try:
+                await self.fire_callback(entry.workflow_id, nominal)
+            except Exception as e:
+                logger.error(f"排程工作流執行失敗: workflow_id={entry.workflow_id}, error={e}")
+
+    async def _execute_scheduled_workflow(self, workflow_id: str, nominal: float):
+        """
+        透過一般執行流程觸發工作流，以名目觸發時間作為冪等鍵避免重複執行
+        """
+        scheduled_at = datetime.fromtimestamp(nominal, timezone.utc)
+        db = SessionLocal()
+        try:
+            workflow_service = WorkflowService(db)
+            await workflow_service.execute_workflow(
+                workflow_id=workflow_id,
+                trigger_data={"scheduledAt": scheduled_at.isoformat()},
+                trigger_type="schedule",
+                idempotency_key=f"schedule:{int(nominal)}"
+            )
+        finally:
+            db.close()
+
+    # ==================== 主迴圈 ====================
+
+    async def _run(self):
+        """
+        排程主迴圈
+        """
+        last_reload = 0.0
+        while self._running:
+            try:
+                if await self._refresh_leadership():
+                    now = self.clock()
+                    if now - last_reload >= settings.SCHEDULER_RELOAD_SECONDS:
+                        await self.load_schedules()
+                        last_reload = now
+
+                    for entry, nominal, _ in self.pop_due(now):
+                        task = asyncio.create_task(self._fire(entry, nominal))
+                        self._inflight.add(task)
+                        task.add_done_callback(self._inflight.discard)
+                else:
+                    # 重新成為領導者時需重新載入，以補觸發期間錯過的排程
+                    last_reload = 0.0
+            except Exception as e:
+                logger.error(f"排程器迴圈錯誤: {e}")
+
+            await asyncio.sleep(settings.SCHEDULER_TICK_SECONDS)
+
+    async def start(self):
+        """啟動排程器"""
+        if self._running:
+            return
+        self._running = True
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"排程器已啟動: instance_id={self.instance_id}")
+
+    async def stop(self):
+        """停止排程器並釋放領導權"""
+        self._running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._release_leadership()
+        logger.info("排程器已停止")
+
+
+# 全域排程器實例
+workflow_scheduler = WorkflowScheduler()
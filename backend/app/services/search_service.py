@@ -0,0 +1,153 @@
+"""
+搜尋服務 - 工作流與模板的全文檢索、名稱模糊比對與標籤 / 節點類型篩選
+
+- 全文檢索：search_vector（name A、description B、category C 加權）配合 websearch_to_tsquery
+- 模糊比對：pg_trgm 的 word_similarity（<% 運算子）與 ILIKE 子字串，皆走名稱的 trigram GIN 索引，
+  未安裝 zhparser 時中文詞無法斷開，名稱中的中文片段由此比對
+- 篩選：tags 與節點類型以 @> 走 GIN 索引（沿用模板圖形的工作流比對來源模板的節點類型）
+排序分數 = ts_rank_cd × 2 + word_similarity，分數相同時依更新時間（模板依使用次數）排序。
+"""
+
+import logging
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import Float, and_, cast, func, literal, literal_column, or_, select
+from sqlalchemy.orm import Session
+
+from app.models.workflow import SEARCH_TEXT_CONFIG, Workflow, WorkflowTemplate, node_types_expression
+
+logger = logging.getLogger("app.services.search")
+
+WORKFLOW_SEARCH_COLUMNS = (
+    Workflow.id, Workflow.name, Workflow.description, Workflow.category, Workflow.tags,
+    Workflow.status, Workflow.is_active, Workflow.updated_at,
+)
+
+TEMPLATE_SEARCH_COLUMNS = (
+    WorkflowTemplate.id, WorkflowTemplate.name, WorkflowTemplate.description, WorkflowTemplate.category,
+    WorkflowTemplate.tags, WorkflowTemplate.thumbnail_url, WorkflowTemplate.is_official,
+    WorkflowTemplate.usage_count, WorkflowTemplate.rating, WorkflowTemplate.updated_at,
+)
+
+
+def _escape_like(value: str) -> str:
+    """跳脫 LIKE 萬用字元（PostgreSQL 預設以反斜線跳脫）"""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class SearchService:
+    """
+    搜尋服務
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    @staticmethod
+    def _node_types_condition(model, node_types: List[str]):
+        """
+        節點類型篩選；沿用模板圖形的工作流（nodes 為 NULL）改比對來源模板，兩邊都走節點類型的 GIN 索引
+        """
+        if model is not Workflow:
+            return node_types_expression(model.nodes).contains(node_types)
+        matching_templates = select(WorkflowTemplate.id).where(
+            node_types_expression(WorkflowTemplate.nodes).contains(node_types)
+        )
+        return or_(
+            node_types_expression(Workflow.stored_nodes).contains(node_types),
+            and_(Workflow.stored_nodes.is_(None), Workflow.source_template_id.in_(matching_templates))
+        )
+
+    def _search(
+        self,
+        model,
+        columns: tuple,
+        conditions: list,
+        query: Optional[str],
+        tags: Optional[List[str]],
+        node_types: Optional[List[str]],
+        category: Optional[str],
+        tie_breakers: tuple,
+        limit: int,
+        offset: int
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        組合查詢條件並排序；多取一筆判斷是否還有下一頁，不另外計算總數
+        """
+        conditions = list(conditions)
+        if category:
+            conditions.append(model.category == category)
+        if tags:
+            conditions.append(model.tags.contains(tags))
+        if node_types:
+            conditions.append(self._node_types_condition(model, node_types))
+
+        query = (query or "").strip()
+        if query:
+            ts_query = func.websearch_to_tsquery(literal_column(f"'{SEARCH_TEXT_CONFIG}'::regconfig"), query)
+            conditions.append(or_(
+                model.search_vector.op("@@")(ts_query),
+                model.name.ilike(f"%{_escape_like(query)}%"),
+                literal(query).op("<%")(model.name),
+            ))
+            rank = func.ts_rank_cd(model.search_vector, ts_query) * 2 + func.word_similarity(query, model.name)
+        else:
+            rank = literal(0.0)
+
+        rank = cast(rank, Float).label("rank")
+        stmt = (
+            select(*columns, rank)
+            .where(*conditions)
+            .order_by(rank.desc(), *tie_breakers, model.id)
+            .offset(offset)
+            .limit(limit + 1)
+        )
+        rows = [dict(row._mapping) for row in self.db.execute(stmt)]
+        return rows[:limit], len(rows) > limit
+
+    async def search_workflows(
+        self,
+        user_id: uuid.UUID,
+        query: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        node_types: Optional[List[str]] = None,
+        category: Optional[str] = None,
+        limit: int = 20,
+        offset: int = 0
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        搜尋使用者自己的工作流，回傳 (結果, 是否還有下一頁)
+        """
+        items, has_more = self._search(
+            Workflow, WORKFLOW_SEARCH_COLUMNS, [Workflow.user_id == user_id],
+            query, tags, node_types, category,
+            (Workflow.updated_at.desc(),), limit, offset
+        )
+        for item in items:
+            item["status"] = item["status"].value
+            item["tags"] = item["tags"] or []
+        logger.debug(f"搜尋工作流: user_id={user_id}, query={query!r}, 結果={len(items)}")
+        return items, has_more
+
+    async def search_templates(
+        self,
+        query: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        node_types: Optional[List[str]] = None,
+        category: Optional[str] = None,
+        limit: int = 20,
+        offset: int = 0
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        搜尋公開模板，回傳 (結果, 是否還有下一頁)
+        """
+        items, has_more = self._search(
+            WorkflowTemplate, TEMPLATE_SEARCH_COLUMNS, [WorkflowTemplate.is_public.is_(True)],
+            query, tags, node_types, category,
+            (WorkflowTemplate.usage_count.desc(),), limit, offset
+        )
+        for item in items:
+            item["tags"] = item["tags"] or []
+        logger.debug(f"搜尋模板: query={query!r}, 結果={len(items)}")
+        return items, has_more
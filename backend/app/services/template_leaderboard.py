@@ -0,0 +1,352 @@
+"""
+模板排行榜 - 使用次數與評分以 Redis 有序集合緩衝，定期寫回資料庫並重建排行榜
+
+- 計數：record_usage / record_rating 只寫 Redis（ZINCRBY），建立工作流時不再鎖定模板列；
+  每位使用者只能評分一次由資料庫的 workflow_template_ratings 保證，Redis 只緩衝累計值；
+  寫回時以 Lua 原子地把累積值移到 flushing 鍵，單一 UPDATE ... FROM (VALUES ...) 寫回後才刪除，
+  資料庫失敗時累積值保留到下一輪
+- 排行榜：每個 (分類, 台灣特色) 範圍一個 ZSET，分數為 使用次數 + 評分 / 10；
+  列表以 ZREVRANGE 取出一頁 ID 再以主鍵讀取，成本只與頁面大小有關
+- 熱門：以小時為單位的 ZSET 記錄近期使用量；排行榜與熱門列表的回應 JSON 於重建時預先序列化
+多個 worker 以 Redis 鎖確保每個週期只有一個負責寫回與重建。
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import Float, Integer, column, func, update, values
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.redis import get_redis
+from app.models.workflow import WorkflowTemplate
+from app.schemas.workflow import dump_template_list
+
+logger = logging.getLogger("app.services.template_leaderboard")
+
+# Redis 鍵
+USAGE_PENDING_KEY = "templates:usage:pending"
+RATING_SUM_PENDING_KEY = "templates:rating_sum:pending"
+RATING_COUNT_PENDING_KEY = "templates:rating_count:pending"
+PENDING_KEYS = (USAGE_PENDING_KEY, RATING_SUM_PENDING_KEY, RATING_COUNT_PENDING_KEY)
+FLUSHING_KEYS = tuple(f"{key}:flushing" for key in PENDING_KEYS)
+LEADERBOARD_KEY_PREFIX = "templates:leaderboard:"
+LEADERBOARD_SCOPES_KEY = "templates:leaderboard:scopes"
+LEADERBOARD_VERSION_KEY = "templates:leaderboard:version"
+TEMPLATES_CHANGED_KEY = "templates:changed"
+REFRESH_LOCK_KEY = "templates:leaderboard:lock"
+TRENDING_KEY_PREFIX = "templates:trending:"
+TOP_PAYLOAD_KEY = "templates:payload:top"
+TRENDING_PAYLOAD_KEY = "templates:payload:trending"
+
+# 台灣特色篩選：None 為不限
+FEATURED_FLAGS = {None: "any", True: "1", False: "0"}
+
+# 把待寫回的累積值併入 flushing 鍵（上一輪寫回失敗時一併重試）
+_MOVE_PENDING_SCRIPT = """
+local moved = 0
+for i = 1, #KEYS / 2 do
+    local pending = KEYS[i]
+    local flushing = KEYS[i + #KEYS / 2]
+    if redis.call("exists", pending) == 1 then
+        redis.call("zunionstore", flushing, 2, flushing, pending)
+        redis.call("del", pending)
+        moved = moved + 1
+    end
+end
+return moved
+"""
+
+
+def leaderboard_key(category: Optional[str], taiwan_featured: Optional[bool]) -> str:
+    """排行榜範圍的 Redis 鍵"""
+    return f"{LEADERBOARD_KEY_PREFIX}{category or '*'}:{FEATURED_FLAGS[taiwan_featured]}"
+
+
+def leaderboard_score(usage_count: int, rating: float) -> float:
+    """排行分數：依使用次數排序，評分（0 - 5）只作為同次數時的次序"""
+    return float(usage_count) + float(rating or 0.0) / 10
+
+
+def trending_key(moment: datetime) -> str:
+    return f"{TRENDING_KEY_PREFIX}{moment.strftime('%Y%m%d%H')}"
+
+
+def serialize_templates(templates: List[WorkflowTemplate]) -> str:
+    """以回應格式預先序列化模板列表"""
+    return dump_template_list(templates).decode("utf-8")
+
+
+class TemplateLeaderboard:
+    """
+    模板排行榜與計數緩衝
+    """
+
+    def __init__(self, refresh_seconds: Optional[int] = None):
+        self.refresh_seconds = refresh_seconds or settings.TEMPLATE_LEADERBOARD_REFRESH_SECONDS
+        self.instance_id = str(uuid.uuid4())
+        self._task: Optional[asyncio.Task] = None
+        self._running = False
+
+    # ==================== 計數緩衝 ====================
+
+    async def record_usage(self, template_id: str):
+        """記錄一次模板使用（累積到下一次寫回，並計入當小時的熱門統計）"""
+        bucket = trending_key(datetime.now(timezone.utc))
+        ttl = (settings.TEMPLATE_TRENDING_WINDOW_HOURS + 1) * 3600
+        async with get_redis().pipeline(transaction=False) as pipe:
+            pipe.zincrby(USAGE_PENDING_KEY, 1, template_id)
+            pipe.zincrby(bucket, 1, template_id)
+            pipe.expire(bucket, ttl)
+            await pipe.execute()
+
+    async def record_rating(self, template_id: str, rating: int, count: int = 1):
+        """
+        累積評分總和與筆數（兩者於同一個 MULTI 中寫入，不會只記到一半）；
+        每位使用者只能評分一次由資料庫的評分記錄保證，撤銷時以負值呼叫
+        """
+        async with get_redis().pipeline(transaction=True) as pipe:
+            pipe.zincrby(RATING_SUM_PENDING_KEY, rating, template_id)
+            pipe.zincrby(RATING_COUNT_PENDING_KEY, count, template_id)
+            await pipe.execute()
+
+    async def flush_counters(self, db: Session) -> int:
+        """
+        將累積的使用次數與評分以單一 UPDATE 寫回資料庫，回傳更新的模板數
+        """
+        client = get_redis()
+        await client.eval(_MOVE_PENDING_SCRIPT, len(PENDING_KEYS) * 2, *PENDING_KEYS, *FLUSHING_KEYS)
+
+        async with client.pipeline(transaction=False) as pipe:
+            for key in FLUSHING_KEYS:
+                pipe.zrange(key, 0, -1, withscores=True)
+            usage, rating_sum, rating_count = [dict(items) for items in await pipe.execute()]
+
+        deltas: List[Tuple[uuid.UUID, int, float, int]] = []
+        for template_id in set(usage) | set(rating_sum) | set(rating_count):
+            try:
+                key = uuid.UUID(template_id)
+            except ValueError:
+                continue
+            deltas.append((
+                key,
+                int(usage.get(template_id, 0)),
+                float(rating_sum.get(template_id, 0.0)),
+                int(rating_count.get(template_id, 0)),
+            ))
+
+        if deltas:
+            delta = values(
+                column("id", UUID(as_uuid=True)),
+                column("usage", Integer),
+                column("rating_sum", Float),
+                column("rating_count", Integer),
+                name="delta"
+            ).data(deltas)
+            new_count = WorkflowTemplate.rating_count + delta.c.rating_count
+            db.execute(
+                update(WorkflowTemplate)
+                .where(WorkflowTemplate.id == delta.c.id)
+                .values(
+                    usage_count=WorkflowTemplate.usage_count + delta.c.usage,
+                    rating=(WorkflowTemplate.rating * WorkflowTemplate.rating_count + delta.c.rating_sum)
+                    / func.greatest(new_count, 1),
+                    rating_count=new_count,
+                    # 計數變更不算內容修改
+                    updated_at=WorkflowTemplate.updated_at
+                )
+            )
+            db.commit()
+
+        await client.delete(*FLUSHING_KEYS)
+        if deltas:
+            logger.info(f"模板計數寫回完成: {len(deltas)} 個模板")
+        return len(deltas)
+
+    # ==================== 排行榜 ====================
+
+    async def rebuild(self, db: Session) -> int:
+        """
+        依資料庫重建所有範圍的排行榜與預先序列化的列表，回傳範圍數
+        """
+        rows = db.query(
+            WorkflowTemplate.id,
+            WorkflowTemplate.category,
+            WorkflowTemplate.is_taiwan_featured,
+            WorkflowTemplate.usage_count,
+            WorkflowTemplate.rating
+        ).filter(WorkflowTemplate.is_public == True).all()
+
+        scopes: Dict[str, Dict[str, float]] = {}
+        for template_id, category, featured, usage_count, rating in rows:
+            member, score = str(template_id), leaderboard_score(usage_count, rating)
+            for scope_category in (None, category):
+                for flag in (None, bool(featured)):
+                    scopes.setdefault(leaderboard_key(scope_category, flag), {})[member] = score
+
+        client = get_redis()
+        previous = await client.smembers(LEADERBOARD_SCOPES_KEY)
+        async with client.pipeline(transaction=True) as pipe:
+            for key, mapping in scopes.items():
+                # 先寫入暫存鍵再 RENAME，讀取端不會看到建到一半的排行榜
+                building = f"{key}:building"
+                pipe.delete(building)
+                pipe.zadd(building, mapping)
+                pipe.rename(building, key)
+            stale = [key for key in previous if key not in scopes]
+            if stale:
+                pipe.delete(*stale)
+            pipe.delete(LEADERBOARD_SCOPES_KEY)
+            if scopes:
+                pipe.sadd(LEADERBOARD_SCOPES_KEY, *scopes)
+            pipe.set(LEADERBOARD_VERSION_KEY, f"{time.time():.6f}")
+            await pipe.execute()
+
+        await self._cache_payloads(db)
+        return len(scopes)
+
+    async def _cache_payloads(self, db: Session):
+        """預先序列化排行榜前段與熱門模板"""
+        limit = settings.TEMPLATE_TOP_LIMIT
+        ttl = self.refresh_seconds * 3
+        top_ids = await self.page(None, None, 0, limit) or []
+        trending_ids = await self._trending_ids(limit)
+
+        templates = self._load(db, set(top_ids) | set(trending_ids))
+        async with get_redis().pipeline(transaction=False) as pipe:
+            pipe.set(TOP_PAYLOAD_KEY, serialize_templates([templates[i] for i in top_ids if i in templates]), ex=ttl)
+            pipe.set(TRENDING_PAYLOAD_KEY, serialize_templates([templates[i] for i in trending_ids if i in templates]), ex=ttl)
+            await pipe.execute()
+
+    async def _trending_ids(self, limit: int) -> List[str]:
+        """近 TEMPLATE_TRENDING_WINDOW_HOURS 小時使用次數最多的模板"""
+        now = datetime.now(timezone.utc)
+        buckets = [trending_key(now - timedelta(hours=hours)) for hours in range(settings.TEMPLATE_TRENDING_WINDOW_HOURS)]
+        client = get_redis()
+        window_key = f"{TRENDING_KEY_PREFIX}window"
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.zunionstore(window_key, buckets)
+            pipe.zrevrange(window_key, 0, limit - 1)
+            pipe.delete(window_key)
+            _, ids, _ = await pipe.execute()
+        return list(ids)
+
+    @staticmethod
+    def _load(db: Session, template_ids) -> Dict[str, WorkflowTemplate]:
+        keys = [uuid.UUID(template_id) for template_id in template_ids]
+        if not keys:
+            return {}
+        return {
+            str(template.id): template
+            for template in db.query(WorkflowTemplate).filter(WorkflowTemplate.id.in_(keys)).all()
+        }
+
+    async def page(
+        self,
+        category: Optional[str],
+        taiwan_featured: Optional[bool],
+        skip: int,
+        limit: int
+    ) -> Optional[List[str]]:
+        """
+        取得排行榜的一頁模板 ID；排行榜尚未建立時回傳 None（呼叫端改查資料庫）
+        """
+        client = get_redis()
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.exists(LEADERBOARD_VERSION_KEY)
+            pipe.zrevrange(leaderboard_key(category, taiwan_featured), skip, skip + limit - 1)
+            built, ids = await pipe.execute()
+        return list(ids) if built else None
+
+    async def load_page(
+        self,
+        db: Session,
+        category: Optional[str],
+        taiwan_featured: Optional[bool],
+        skip: int,
+        limit: int
+    ) -> Optional[List[WorkflowTemplate]]:
+        """依排行榜順序取得一頁模板（以主鍵讀取）；排行榜不可用時回傳 None"""
+        ids = await self.page(category, taiwan_featured, skip, limit)
+        if ids is None:
+            return None
+        templates = self._load(db, ids)
+        return [templates[template_id] for template_id in ids if template_id in templates]
+
+    async def collection_version(self) -> Optional[Tuple[str, Optional[str]]]:
+        """
+        模板列表的集合版本：(排行榜版本, 模板異動標記)；排行榜每次重建更新版本（涵蓋計數器寫回），
+        異動標記涵蓋兩次重建之間新增的模板。排行榜尚未建立時回傳 None
+        """
+        version, changed = await get_redis().mget(LEADERBOARD_VERSION_KEY, TEMPLATES_CHANGED_KEY)
+        return (version, changed) if version is not None else None
+
+    async def mark_changed(self):
+        """模板新增或修改後更新異動標記，讓列表的 ETag 在下次重建前就失效"""
+        await get_redis().set(TEMPLATES_CHANGED_KEY, f"{time.time():.6f}")
+
+    async def top_payload(self) -> Optional[str]:
+        return await get_redis().get(TOP_PAYLOAD_KEY)
+
+    async def trending_payload(self) -> Optional[str]:
+        return await get_redis().get(TRENDING_PAYLOAD_KEY)
+
+    # ==================== 背景重建 ====================
+
+    async def refresh(self) -> bool:
+        """
+        取得本週期的重建鎖後寫回計數並重建排行榜，回傳是否由本 worker 執行
+        """
+        acquired = await get_redis().set(REFRESH_LOCK_KEY, self.instance_id, nx=True, ex=self.refresh_seconds)
+        if not acquired:
+            return False
+
+        db = SessionLocal()
+        try:
+            await self.flush_counters(db)
+            scopes = await self.rebuild(db)
+            logger.debug(f"模板排行榜重建完成: {scopes} 個範圍")
+            return True
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def _run(self):
+        while self._running:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"模板排行榜重建失敗: {e}")
+            await asyncio.sleep(self.refresh_seconds)
+
+    async def start(self):
+        """啟動背景重建"""
+        if self._running:
+            return
+        self._running = True
+        self._task = asyncio.create_task(self._run())
+        logger.info("模板排行榜已啟動")
+
+    async def stop(self):
+        """停止背景重建"""
+        self._running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        logger.info("模板排行榜已停止")
+
+
+# 全域模板排行榜
+template_leaderboard = TemplateLeaderboard()
@@ -0,0 +1,421 @@
+"""
+工作流版本內容儲存 - 內容定址 (content-addressed) 與結構共用
+
+每個節點、連線與設定各自以內容雜湊存為一個 blob；版本只記錄一份 manifest：
+
+    {"format": 1, "nodes": [分段雜湊...], "edges": [分段雜湊...], "settings": 設定雜湊}
+
+分段 (chunk) 內容為 [[id, 雜湊], ...]，分段邊界由項目雜湊決定 (content-defined chunking)，
+插入或刪除一個節點只會影響所在的分段，其餘分段與所有未變更的節點 blob 由各版本共用。
+
+刪除工作流或版本後不再被任何 manifest 引用的 blob 由 BlobCollector 定期回收：
+每輪先把所有 manifest 引用的雜湊標記到暫存資料表（只展開一次），再分批刪除未標記的 blob。
+寫入快照時沿用的 blob 會更新 last_used_at（超過半個保留時間才更新），
+回收只刪除超過保留時間未被引用的 blob，因此寫入中尚未 commit 的版本所沿用的內容不會被刪除。
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Column, MetaData, String, Table, exists, func, select, union, union_all, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session, aliased
+
+from app.core.config import settings as app_settings
+from app.core.database import SessionLocal, engine
+from app.core.redis import get_redis
+from app.models.workflow import WorkflowBlob, WorkflowVersion
+
+logger = logging.getLogger("app.services.version_store")
+
+MANIFEST_FORMAT = 1
+
+# 分段平均大小（項目數）與上限
+CHUNK_TARGET_SIZE = 32
+CHUNK_MAX_SIZE = 128
+
+GRAPH_SECTIONS = ("nodes", "edges")
+
+
+def content_hash(content: Any) -> str:
+    """以標準化 JSON 計算內容雜湊（128 位元 BLAKE2b）"""
+    canonical = json.dumps(content, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _item_key(item: Dict[str, Any], index: int) -> str:
+    """節點/連線的識別鍵，缺少 id 時以位置代替"""
+    item_id = item.get("id") if isinstance(item, dict) else None
+    return str(item_id) if item_id is not None else f"#{index}"
+
+
+def _chunk_entries(entries: List[List[str]]) -> List[List[List[str]]]:
+    """依項目雜湊切分段落，邊界只取決於內容，與位置無關"""
+    chunks: List[List[List[str]]] = []
+    current: List[List[str]] = []
+    for entry in entries:
+        current.append(entry)
+        if int(entry[1][-4:], 16) % CHUNK_TARGET_SIZE == 0 or len(current) >= CHUNK_MAX_SIZE:
+            chunks.append(current)
+            current = []
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def build_snapshot(
+    nodes: Optional[List[Dict[str, Any]]],
+    edges: Optional[List[Dict[str, Any]]],
+    settings: Optional[Dict[str, Any]]
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    將工作流內容拆解為 blob，回傳 (manifest, {雜湊: 內容})
+    """
+    blobs: Dict[str, Any] = {}
+    manifest: Dict[str, Any] = {"format": MANIFEST_FORMAT}
+
+    for section, items in (("nodes", nodes or []), ("edges", edges or [])):
+        entries = []
+        for index, item in enumerate(items):
+            item_hash = content_hash(item)
+            blobs[item_hash] = item
+            entries.append([_item_key(item, index), item_hash])
+
+        chunk_hashes = []
+        for chunk in _chunk_entries(entries):
+            chunk_hash = content_hash(chunk)
+            blobs[chunk_hash] = chunk
+            chunk_hashes.append(chunk_hash)
+        manifest[section] = chunk_hashes
+
+    settings_hash = content_hash(settings or {})
+    blobs[settings_hash] = settings or {}
+    manifest["settings"] = settings_hash
+
+    return manifest, blobs
+
+
+class VersionStore:
+    """
+    工作流版本內容的讀寫與比對
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    # ==================== 寫入 ====================
+
+    def write_snapshot(
+        self,
+        nodes: Optional[List[Dict[str, Any]]],
+        edges: Optional[List[Dict[str, Any]]],
+        settings: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        寫入快照所需的 blob（已存在者略過），回傳 manifest；呼叫端負責 commit
+        """
+        manifest, blobs = build_snapshot(nodes, edges, settings)
+        hashes = list(blobs)
+        batch_size = app_settings.VERSION_BLOB_WRITE_BATCH_SIZE
+
+        # 大型圖形的 blob 數可能超過單一語句的參數上限（65535），查詢與新增都分批進行
+        existing = set()
+        for start in range(0, len(hashes), batch_size):
+            existing.update(self._existing_blobs(hashes[start:start + batch_size]))
+
+        missing = [
+            {
+                "hash": blob_hash,
+                "content": content,
+                "size": len(json.dumps(content, separators=(",", ":"), ensure_ascii=False, default=str)),
+            }
+            for blob_hash, content in blobs.items() if blob_hash not in existing
+        ]
+        for start in range(0, len(missing), batch_size):
+            # 併發寫入相同內容時以 ON CONFLICT 略過
+            self.db.execute(
+                insert(WorkflowBlob).values(missing[start:start + batch_size]).on_conflict_do_nothing(index_elements=["hash"])
+            )
+
+        logger.debug(f"寫入版本快照: blob 總數={len(blobs)}, 新增={len(missing)}")
+        return manifest
+
+    def _existing_blobs(self, hashes: List[str]) -> List[str]:
+        """
+        最近引用過的 blob 直接沿用；較久未引用的先更新 last_used_at，
+        只有成功更新（未被回收）的才算已存在，其餘重新寫入
+        """
+        stale_before = func.now() - timedelta(seconds=app_settings.VERSION_BLOB_GC_GRACE_SECONDS / 2)
+        touched = (
+            update(WorkflowBlob)
+            .where(WorkflowBlob.hash.in_(hashes), WorkflowBlob.last_used_at < stale_before)
+            .values(last_used_at=func.now())
+            .returning(WorkflowBlob.hash)
+            .cte("touched")
+        )
+        return list(self.db.execute(
+            union_all(
+                select(WorkflowBlob.hash).where(WorkflowBlob.hash.in_(hashes), WorkflowBlob.last_used_at >= stale_before),
+                select(touched.c.hash)
+            )
+        ).scalars())
+
+    # ==================== 讀取 ====================
+
+    def load_blobs(self, hashes: Iterable[str], cache: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """批次載入 blob（單一查詢），cache 中已有的略過"""
+        cache = cache if cache is not None else {}
+        wanted = [blob_hash for blob_hash in set(hashes) if blob_hash not in cache]
+        if wanted:
+            rows = self.db.execute(
+                select(WorkflowBlob.hash, WorkflowBlob.content).where(WorkflowBlob.hash.in_(wanted))
+            )
+            cache.update({blob_hash: content for blob_hash, content in rows})
+        return cache
+
+    def read_snapshot(self, manifest: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        由 manifest 重建 nodes / edges / settings（固定兩次查詢：分段與設定、項目內容）
+        """
+        chunk_hashes = [chunk for section in GRAPH_SECTIONS for chunk in manifest.get(section, [])]
+        blobs = self.load_blobs(chunk_hashes + [manifest["settings"]])
+
+        entries = {
+            section: [entry for chunk in manifest.get(section, []) for entry in blobs[chunk]]
+            for section in GRAPH_SECTIONS
+        }
+        self.load_blobs((entry[1] for section in GRAPH_SECTIONS for entry in entries[section]), blobs)
+
+        snapshot = {
+            section: [blobs[entry[1]] for entry in entries[section]]
+            for section in GRAPH_SECTIONS
+        }
+        snapshot["settings"] = blobs[manifest["settings"]]
+        return snapshot
+
+    def read_version(self, version) -> Dict[str, Any]:
+        """讀取版本內容（相容舊版完整複本）"""
+        if version.manifest:
+            return self.read_snapshot(version.manifest)
+        return {
+            "nodes": version.nodes or [],
+            "edges": version.edges or [],
+            "settings": version.settings or {},
+        }
+
+    # ==================== 比對 ====================
+
+    def diff_versions(self, base_version, target_version) -> Dict[str, Any]:
+        """
+        比對兩個版本：相同的分段直接略過，只載入有差異的分段與變更項目的內容
+        """
+        blobs: Dict[str, Any] = {}
+        base_manifest = self._manifest_for(base_version, blobs)
+        target_manifest = self._manifest_for(target_version, blobs)
+
+        result: Dict[str, Any] = {}
+        for section in GRAPH_SECTIONS:
+            base_chunks = base_manifest.get(section, [])
+            target_chunks = target_manifest.get(section, [])
+            shared = set(base_chunks) & set(target_chunks)
+            base_only = [chunk for chunk in base_chunks if chunk not in shared]
+            target_only = [chunk for chunk in target_chunks if chunk not in shared]
+            self.load_blobs(base_only + target_only, blobs)
+
+            base_entries = {key: item_hash for chunk in base_only for key, item_hash in blobs[chunk]}
+            target_entries = {key: item_hash for chunk in target_only for key, item_hash in blobs[chunk]}
+
+            added = [key for key in target_entries if key not in base_entries]
+            removed = [key for key in base_entries if key not in target_entries]
+            changed = [
+                key for key in target_entries
+                if key in base_entries and base_entries[key] != target_entries[key]
+            ]
+
+            self.load_blobs(
+                [target_entries[key] for key in added + changed] + [base_entries[key] for key in changed],
+                blobs
+            )
+            result[section] = {
+                "added": [blobs[target_entries[key]] for key in added],
+                "removed": removed,
+                "changed": [
+                    {"id": key, "before": blobs[base_entries[key]], "after": blobs[target_entries[key]]}
+                    for key in changed
+                ],
+            }
+
+        if base_manifest["settings"] != target_manifest["settings"]:
+            self.load_blobs([base_manifest["settings"], target_manifest["settings"]], blobs)
+            result["settings"] = {
+                "before": blobs[base_manifest["settings"]],
+                "after": blobs[target_manifest["settings"]],
+            }
+        else:
+            result["settings"] = None
+
+        return result
+
+    @staticmethod
+    def _manifest_for(version, blobs: Dict[str, Any]) -> Dict[str, Any]:
+        """取得版本 manifest，舊版完整複本在記憶體中轉換"""
+        if version.manifest:
+            return version.manifest
+        manifest, version_blobs = build_snapshot(version.nodes, version.edges, version.settings)
+        blobs.update(version_blobs)
+        return manifest
+
+    # ==================== 回收 ====================
+
+    def mark_referenced_blobs(self, grace_seconds: int) -> datetime:
+        """
+        標記階段：把所有版本 manifest 引用的 blob 雜湊寫入暫存資料表（每輪回收只展開一次），
+        回傳本輪的回收截止時間；呼叫端負責 commit，且整輪回收必須使用同一個連線
+
+        引用包含 manifest 的分段與設定雜湊，以及分段內容中各節點/連線的雜湊。
+        標記之後才寫入的版本所引用的 blob，last_used_at 都晚於截止時間，不會被刪除。
+        """
+        manifest = WorkflowVersion.manifest
+        has_manifest = manifest.isnot(None)
+        chunk_refs = union_all(
+            select(func.jsonb_array_elements_text(manifest["nodes"]).label("hash")).where(has_manifest),
+            select(func.jsonb_array_elements_text(manifest["edges"]).label("hash")).where(has_manifest),
+        ).cte("chunk_refs")
+        chunk = aliased(WorkflowBlob)
+        refs = union(
+            select(chunk_refs.c.hash),
+            select(manifest["settings"].astext).where(has_manifest),
+            select(func.jsonb_array_elements(chunk.content).op("->>")(1))
+            .join(chunk_refs, chunk.hash == chunk_refs.c.hash),
+        )
+
+        connection = self.db.connection()
+        blob_gc_refs.drop(connection, checkfirst=True)
+        blob_gc_refs.create(connection)
+        cutoff = self.db.execute(select(func.now() - timedelta(seconds=grace_seconds))).scalar_one()
+        self.db.execute(insert(blob_gc_refs).from_select(["hash"], refs))
+        return cutoff
+
+    def delete_unreferenced_blobs(self, cutoff: datetime, limit: int) -> int:
+        """
+        刪除截止時間前最後引用、且不在標記集合中的 blob（最多 limit 筆），回傳刪除筆數；
+        需先在同一個連線呼叫 mark_referenced_blobs，呼叫端負責 commit
+        """
+        doomed = (
+            select(WorkflowBlob.hash)
+            .where(
+                WorkflowBlob.last_used_at < cutoff,
+                ~exists().where(blob_gc_refs.c.hash == WorkflowBlob.hash)
+            )
+            .limit(limit)
+        )
+        result = self.db.execute(
+            WorkflowBlob.__table__.delete().where(WorkflowBlob.hash.in_(doomed.scalar_subquery()))
+        )
+        return result.rowcount
+
+    def clear_marks(self):
+        """移除標記集合（連線會回到連線池，暫存資料表不會自動消失）"""
+        blob_gc_refs.drop(self.db.connection(), checkfirst=True)
+
+
+# 回收標記階段的引用集合（暫存資料表，只存在於回收所用的連線）
+blob_gc_refs = Table(
+    "workflow_blob_gc_refs",
+    MetaData(),
+    Column("hash", String(32), primary_key=True),
+    prefixes=["TEMPORARY"],
+)
+
+
+# 回收週期的 Redis 鎖（多個 worker 只由一個執行）
+BLOB_GC_LOCK_KEY = "workflow_blobs:gc:lock"
+
+
+class BlobCollector:
+    """
+    定期回收未被任何版本引用的內容 blob
+    """
+
+    def __init__(self, interval_seconds: Optional[int] = None):
+        self.interval_seconds = interval_seconds or app_settings.VERSION_BLOB_GC_INTERVAL_SECONDS
+        self.instance_id = str(uuid.uuid4())
+        self._task: Optional[asyncio.Task] = None
+        self._running = False
+
+    async def collect(self) -> Optional[int]:
+        """
+        取得本週期的回收鎖後分批刪除未引用的 blob，回傳刪除筆數（未取得鎖時回傳 None）
+        """
+        acquired = await get_redis().set(BLOB_GC_LOCK_KEY, self.instance_id, nx=True, ex=self.interval_seconds)
+        if not acquired:
+            return None
+
+        batch_size = app_settings.VERSION_BLOB_GC_BATCH_SIZE
+        deleted = 0
+        # 標記集合是暫存資料表，整輪回收固定使用同一個連線
+        connection = engine.connect()
+        db = SessionLocal(bind=connection)
+        store = VersionStore(db)
+        try:
+            cutoff = store.mark_referenced_blobs(app_settings.VERSION_BLOB_GC_GRACE_SECONDS)
+            db.commit()
+            while True:
+                count = store.delete_unreferenced_blobs(cutoff, batch_size)
+                db.commit()
+                deleted += count
+                if count < batch_size:
+                    break
+                await asyncio.sleep(0)
+            if deleted:
+                logger.info(f"內容 blob 回收完成: 刪除 {deleted} 筆")
+            return deleted
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            try:
+                store.clear_marks()
+                db.commit()
+            except Exception as e:
+                logger.warning(f"移除內容 blob 回收標記失敗: {e}")
+                connection.invalidate()
+            db.close()
+            connection.close()
+
+    async def _run(self):
+        while self._running:
+            try:
+                await self.collect()
+            except Exception as e:
+                logger.error(f"內容 blob 回收失敗: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    async def start(self):
+        """啟動背景回收"""
+        if self._running:
+            return
+        self._running = True
+        self._task = asyncio.create_task(self._run())
+        logger.info("內容 blob 回收已啟動")
+
+    async def stop(self):
+        """停止背景回收"""
+        self._running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        logger.info("內容 blob 回收已停止")
+
+
+# 全域內容 blob 回收
+blob_collector = BlobCollector()
@@ -2,21 +2,122 @@
 工作流服務層 - 支援UUID格式和完整功能
 """
 
-from typing import List, Optional, Dict, Any
-from sqlalchemy.orm import Session
+from typing import AsyncIterator, List, Optional, Dict, Any
+from sqlalchemy import String, Text, case, cast, column, delete, func, literal, null, or_, select, true, update
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, aggregate_order_by, insert
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime
+import asyncio
 import logging
 import uuid
 
-from app.core.exceptions import ResourceNotFoundError, WorkflowExecutionError
-from app.models.workflow import Workflow, WorkflowExecution, WorkflowTemplate
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.etag import check_if_match, make_etag
+from app.core.exceptions import (
+    PreconditionFailedError,
+    ResourceConflictError,
+    ResourceNotFoundError,
+    ValidationError,
+    WorkflowExecutionError
+)
+from app.core.json_schema import CompiledSchema
+from app.core.metrics import EXECUTION_QUEUE_DEPTH, instrument_methods
+from app.core.redis import get_redis
+from app.core.tracing import traced_methods
+from app.models.workflow import Workflow, WorkflowExecution, WorkflowTemplate, WorkflowTemplateRating, WorkflowVersion, WebhookEndpoint
+from app.models.workflow import ExecutionStatus as ExecutionStatusEnum
+from app.models.workflow import WorkflowStatus as WorkflowStatusEnum
 from app.models.user import User
-from app.schemas.workflow import WorkflowCreate, WorkflowUpdate, WorkflowSave, ExecutionStatus
+from app.models.node import PaymentRecord
+from app.models.taiwan import TaiwanPaymentTransaction
+from app.schemas.workflow import (
+    WorkflowCreate,
+    WorkflowUpdate,
+    WorkflowSave,
+    WorkflowGraphPatch,
+    WorkflowBulkAction
+)
+from app.services.graph_analyzer import SCHEDULE_TRIGGER_TYPE, GraphAnalysis, analyze_graph
+from app.services.graph_compiler import graph_compiler
 from app.services.n8n_service import N8nService
+from app.services.node_catalog import node_catalog
+from app.services.template_leaderboard import template_leaderboard
+from app.services.version_store import VersionStore
+from app.services.execution_events import (
+    build_batch_execution_event,
+    build_execution_event,
+    publish_execution_event,
+    publish_execution_events,
+    publish_node_progress
+)
 
 logger = logging.getLogger("app.services.workflow")
 
+# 等待去抖動視窗結束後補建自動快照的工作流（本行程內）：workflow_id -> 最後儲存的使用者 ID
+_trailing_auto_versions: Dict[str, str] = {}
+_trailing_auto_version_tasks: set = set()
 
+# 以 INSERT ... SELECT 複製工作流時寫入的欄位（與 SELECT 的欄位順序一致），
+# 其餘欄位（狀態、修訂號與統計）使用模型預設值
+WORKFLOW_COPY_COLUMNS = (
+    Workflow.id, Workflow.user_id, Workflow.source_template_id, Workflow.name, Workflow.description,
+    Workflow.category, Workflow.tags, Workflow.stored_nodes, Workflow.stored_edges, Workflow.settings,
+    Workflow.is_active,
+)
+
+
+class _GraphCollection:
+    """
+    增量儲存時追蹤單一集合（節點或連線）的變更
+
+    原有項目的欄位更新累積在 patches，新增項目直接在記憶體中套用後續更新。
+    """
+
+    def __init__(self, label: str, existing_ids):
+        self.label = label
+        self.existing = set(existing_ids)
+        self.patches: Dict[str, Dict[str, Any]] = {}
+        self.added: Dict[str, Dict[str, Any]] = {}
+        self.removed: set = set()
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.patches or self.added or self.removed)
+
+    def current_ids(self) -> List[str]:
+        return [item_id for item_id in self.existing if item_id not in self.removed] + list(self.added)
+
+    def _contains(self, item_id: str) -> bool:
+        return item_id in self.added or (item_id in self.existing and item_id not in self.removed)
+
+    def add(self, item: Dict[str, Any]):
+        item_id = str(item["id"])
+        if self._contains(item_id):
+            raise ValidationError(f"{self.label}已存在: {item_id}", field="operations")
+        self.added[item_id] = dict(item)
+
+    def update(self, item_id: str, changes: Dict[str, Any]):
+        if not self._contains(item_id):
+            raise ValidationError(f"{self.label}不存在: {item_id}", field="operations")
+        if item_id in self.added:
+            self.added[item_id].update(changes)
+        else:
+            self.patches.setdefault(item_id, {}).update(changes)
+
+    def remove(self, item_id: str):
+        if not self._contains(item_id):
+            raise ValidationError(f"{self.label}不存在: {item_id}", field="operations")
+        if item_id in self.added:
+            del self.added[item_id]
+        else:
+            self.removed.add(item_id)
+            self.patches.pop(item_id, None)
+
+
+@traced_methods("WorkflowService")
+@instrument_methods(track_operation=True)
 class WorkflowService:
     """
     工作流服務類別 - 支援UUID格式和完整CRUD操作
@@ -39,6 +140,48 @@ class WorkflowService:
         except (ValueError, Exception) as e:
             logger.error(f"取得工作流失敗 (ID: {workflow_id}): {str(e)}")
             return None
+
+    # ==================== ETag ====================
+
+    @staticmethod
+    def workflow_etag(workflow_id, version: Optional[int], updated_at: Optional[datetime]) -> str:
+        """單一工作流的 ETag（修訂號涵蓋圖形變更，updated_at 涵蓋其他欄位）"""
+        return make_etag("workflow", workflow_id, version, updated_at.isoformat() if updated_at else None)
+
+    def get_workflow_etag(self, workflow_id: str) -> Optional[tuple]:
+        """只讀取 ETag 所需欄位，回傳 (擁有者 ID, ETag)；不載入 nodes / edges"""
+        row = self.db.query(Workflow.id, Workflow.user_id, Workflow.version, Workflow.updated_at).filter(
+            Workflow.id == uuid.UUID(workflow_id)
+        ).first()
+        if not row:
+            return None
+        return row.user_id, self.workflow_etag(row.id, row.version, row.updated_at)
+
+    def get_workflows_collection_etag(self, user_id: uuid.UUID, *params: Any) -> str:
+        """
+        使用者工作流列表的 ETag：集合版本（列數與最後更新時間）加上查詢參數，
+        新增、修改、刪除任一工作流都會改變
+        """
+        count, latest = self.db.query(func.count(Workflow.id), func.max(Workflow.updated_at)).filter(
+            Workflow.user_id == user_id
+        ).one()
+        return make_etag("workflows", user_id, count, latest.isoformat() if latest else None, *params)
+
+    async def get_templates_collection_etag(self, *params: Any) -> str:
+        """
+        模板列表的 ETag：排行榜版本與模板異動標記（只讀 Redis）加上查詢參數；
+        排行榜尚未建立或 Redis 無法使用時才彙總資料表
+        """
+        try:
+            collection_version = await template_leaderboard.collection_version()
+        except Exception as e:
+            logger.warning(f"讀取模板排行榜版本失敗，改由資料庫計算 ETag: {e}")
+            collection_version = None
+        if collection_version:
+            return make_etag("templates", *collection_version, *params)
+
+        count, latest = self.db.query(func.count(WorkflowTemplate.id), func.max(WorkflowTemplate.updated_at)).one()
+        return make_etag("templates", count, latest.isoformat() if latest else None, *params)
     
     async def get_user_workflows(
         self, 
@@ -52,7 +195,10 @@ class WorkflowService:
         取得使用者的工作流列表
         """
         try:
-            query = self.db.query(Workflow).filter(Workflow.user_id == user_id)
+            # 沿用模板圖形的工作流一次載入所需模板，避免逐筆查詢
+            query = self.db.query(Workflow).options(selectinload(Workflow.source_template)).filter(
+                Workflow.user_id == user_id
+            )
             
             if category:
                 query = query.filter(Workflow.category == category)
@@ -70,6 +216,8 @@ class WorkflowService:
         建立新工作流
         """
         try:
+            self._check_graph_on_save(workflow_data.nodes, workflow_data.edges)
+
             # 建立工作流記錄
             db_workflow = Workflow(
                 name=workflow_data.name,
@@ -89,64 +237,92 @@ class WorkflowService:
             
             # 同步到 n8n
             try:
-                await self.n8n_service.create_workflow({
-                    "id": str(db_workflow.id),
-                    "name": db_workflow.name,
-                    "nodes": db_workflow.nodes,
-                    "connections": self._convert_edges_to_connections(db_workflow.edges),
-                    "active": db_workflow.is_active
-                })
+                compiled = graph_compiler.compile_workflow(db_workflow)
+                await self.n8n_service.create_workflow(compiled.to_n8n(
+                    db_workflow.name,
+                    active=db_workflow.is_active,
+                    id=str(db_workflow.id)
+                ))
             except Exception as e:
                 logger.warning(f"同步工作流到 n8n 失敗: {str(e)}")
             
             logger.info(f"工作流建立成功: workflow_id={db_workflow.id}, user_id={user_id}")
             return db_workflow
             
+        except ValidationError:
+            raise
         except Exception as e:
             self.db.rollback()
             logger.error(f"建立工作流失敗: {str(e)}")
             raise
     
-    async def update_workflow(self, workflow_id: str, workflow_data: WorkflowUpdate) -> Workflow:
+    async def update_workflow(
+        self,
+        workflow_id: str,
+        workflow_data: WorkflowUpdate,
+        if_match: Optional[str] = None
+    ) -> Workflow:
         """
         更新工作流
         """
         try:
-            db_workflow = await self.get_workflow_by_id(workflow_id)
+            if if_match:
+                db_workflow = self.db.query(Workflow).filter(
+                    Workflow.id == uuid.UUID(workflow_id)
+                ).with_for_update().first()
+            else:
+                db_workflow = await self.get_workflow_by_id(workflow_id)
             if not db_workflow:
                 raise ResourceNotFoundError("工作流", workflow_id)
+
+            check_if_match(if_match, self.workflow_etag(db_workflow.id, db_workflow.version, db_workflow.updated_at))
             
             # 更新工作流資訊
             update_data = workflow_data.dict(exclude_unset=True)
+            if "nodes" in update_data or "edges" in update_data:
+                # 只更新其中一邊時，與既有的另一邊合併後檢查
+                self._check_graph_on_save(
+                    update_data.get("nodes", db_workflow.nodes),
+                    update_data.get("edges", db_workflow.edges)
+                )
             for field, value in update_data.items():
                 setattr(db_workflow, field, value)
             
+            # 圖形內容變更時遞增修訂號（亦作為編譯快取鍵）
+            if "nodes" in update_data or "edges" in update_data:
+                db_workflow.version = (db_workflow.version or 0) + 1
             db_workflow.updated_at = datetime.utcnow()
             self.db.commit()
             self.db.refresh(db_workflow)
             
             # 同步到 n8n
             try:
-                await self.n8n_service.update_workflow(workflow_id, {
-                    "name": db_workflow.name,
-                    "nodes": db_workflow.nodes,
-                    "connections": self._convert_edges_to_connections(db_workflow.edges),
-                    "active": db_workflow.is_active
-                })
+                compiled = graph_compiler.compile_workflow(db_workflow)
+                await self.n8n_service.update_workflow(
+                    workflow_id,
+                    compiled.to_n8n(db_workflow.name, active=db_workflow.is_active)
+                )
             except Exception as e:
                 logger.warning(f"同步工作流更新到 n8n 失敗: {str(e)}")
             
             logger.info(f"工作流更新成功: workflow_id={workflow_id}")
             return db_workflow
             
-        except ResourceNotFoundError:
+        except (ResourceNotFoundError, PreconditionFailedError, ValidationError):
+            self.db.rollback()
             raise
         except Exception as e:
             self.db.rollback()
             logger.error(f"更新工作流失敗: {str(e)}")
             raise
 
-    async def save_workflow(self, workflow_id: str, user_id: str, workflow_data: WorkflowSave) -> Workflow:
+    async def save_workflow(
+        self,
+        workflow_id: str,
+        user_id: str,
+        workflow_data: WorkflowSave,
+        if_match: Optional[str] = None
+    ) -> Workflow:
         """
         儲存工作流（專門用於編輯器儲存）
         """
@@ -155,14 +331,21 @@ class WorkflowService:
             uuid_workflow_id = uuid.UUID(workflow_id)
             uuid_user_id = uuid.UUID(user_id)
 
-            db_workflow = self.db.query(Workflow).filter(
+            query = self.db.query(Workflow).filter(
                 Workflow.id == uuid_workflow_id,
                 Workflow.user_id == uuid_user_id
-            ).first()
+            )
+            if if_match:
+                # 鎖定資料列，讓 If-Match 比對與寫入之間不會被其他儲存插隊
+                query = query.with_for_update()
+            db_workflow = query.first()
 
             if not db_workflow:
                 raise ResourceNotFoundError("工作流", workflow_id)
 
+            check_if_match(if_match, self.workflow_etag(db_workflow.id, db_workflow.version, db_workflow.updated_at))
+            self._check_graph_on_save(workflow_data.nodes, workflow_data.edges)
+
             # 更新工作流內容
             db_workflow.nodes = workflow_data.nodes
             db_workflow.edges = workflow_data.edges
@@ -183,20 +366,270 @@ class WorkflowService:
                 (workflow_data.nodes or workflow_data.edges)):
                 db_workflow.status = "active"
 
+            # 版本號作為增量儲存的衝突偵測依據
+            db_workflow.version = (db_workflow.version or 0) + 1
             db_workflow.updated_at = datetime.utcnow()
             self.db.commit()
             self.db.refresh(db_workflow)
 
             logger.info(f"儲存工作流成功: {workflow_id}, 節點數: {len(workflow_data.nodes)}, 連線數: {len(workflow_data.edges)}")
+
+            await self.create_auto_version(workflow_id, user_id)
             return db_workflow
 
-        except ResourceNotFoundError:
+        except (ResourceNotFoundError, PreconditionFailedError, ValidationError):
+            self.db.rollback()
             raise
         except Exception as e:
             self.db.rollback()
             logger.error(f"儲存工作流失敗: {str(e)}")
             raise
 
+    async def patch_workflow_graph(
+        self,
+        workflow_id: str,
+        user_id: str,
+        patch: WorkflowGraphPatch,
+        if_match: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        增量儲存工作流圖形（編輯器自動儲存使用）
+
+        只讀取節點/連線 ID 進行驗證，變更以單一 UPDATE 在資料庫端合併，
+        不需將整份 nodes / edges 載入並重新序列化。
+        """
+        try:
+            if len(patch.operations) > settings.WORKFLOW_PATCH_MAX_OPERATIONS:
+                raise ValidationError(
+                    f"單次增量儲存最多 {settings.WORKFLOW_PATCH_MAX_OPERATIONS} 個操作",
+                    field="operations"
+                )
+
+            uuid_workflow_id = uuid.UUID(workflow_id)
+            uuid_user_id = uuid.UUID(user_id)
+
+            # 鎖定資料列並讀取版本與 ID 清單
+            row = self.db.execute(
+                select(
+                    Workflow.version,
+                    Workflow.updated_at,
+                    self._graph_refs(Workflow.nodes, "id", "type"),
+                    self._graph_refs(Workflow.edges, "id", "source", "target")
+                ).where(
+                    Workflow.id == uuid_workflow_id,
+                    Workflow.user_id == uuid_user_id
+                ).with_for_update(of=Workflow)
+            ).first()
+
+            if not row:
+                raise ResourceNotFoundError("工作流", workflow_id)
+
+            current_version, updated_at, node_refs, edge_refs = row
+            check_if_match(if_match, self.workflow_etag(uuid_workflow_id, current_version, updated_at))
+            if current_version != patch.base_version:
+                raise ResourceConflictError(
+                    f"工作流已被其他編輯更新（目前版本 {current_version}），請重新載入後再儲存",
+                    resource="工作流"
+                )
+
+            nodes = _GraphCollection("節點", (str(ref[0]) for ref in node_refs if ref[0] is not None))
+            node_types = {str(ref[0]): ref[1] for ref in node_refs if ref[0] is not None}
+            edges = _GraphCollection("連線", (str(ref[0]) for ref in edge_refs if ref[0] is not None))
+            edge_endpoints = {
+                str(ref[0]): (str(ref[1]), str(ref[2]))
+                for ref in edge_refs if ref[0] is not None
+            }
+
+            for operation in patch.operations:
+                if operation.op == "add_node":
+                    nodes.add(operation.node)
+                elif operation.op == "move_node":
+                    nodes.update(operation.id, {"position": operation.position})
+                elif operation.op == "update_node":
+                    nodes.update(operation.id, operation.changes)
+                elif operation.op == "remove_node":
+                    nodes.remove(operation.id)
+                    # 一併刪除相連的連線
+                    for edge_id in edges.current_ids():
+                        if operation.id in edge_endpoints.get(edge_id, ()):
+                            edges.remove(edge_id)
+                elif operation.op == "add_edge":
+                    edges.add(operation.edge)
+                    edge_endpoints[str(operation.edge["id"])] = (
+                        str(operation.edge.get("source")),
+                        str(operation.edge.get("target"))
+                    )
+                elif operation.op == "update_edge":
+                    edges.update(operation.id, operation.changes)
+                    if "source" in operation.changes or "target" in operation.changes:
+                        source, target = edge_endpoints.get(operation.id, (None, None))
+                        edge_endpoints[operation.id] = (
+                            str(operation.changes.get("source", source)),
+                            str(operation.changes.get("target", target))
+                        )
+                elif operation.op == "remove_edge":
+                    edges.remove(operation.id)
+
+            self._check_graph_patch(uuid_workflow_id, nodes, node_types, edges, edge_endpoints)
+
+            values: Dict[str, Any] = {
+                "version": Workflow.version + 1,
+                "updated_at": func.now(),
+            }
+            if nodes.changed:
+                values["nodes"] = self._patched_graph_array(Workflow.nodes, nodes)
+            if edges.changed:
+                values["edges"] = self._patched_graph_array(Workflow.edges, edges)
+            if patch.viewport is not None:
+                values["settings"] = func.jsonb_set(
+                    func.coalesce(Workflow.settings, literal({}, JSONB)),
+                    literal(["viewport"], ARRAY(Text)),
+                    literal(patch.viewport, JSONB),
+                    type_=JSONB
+                )
+            if patch.operations:
+                # 與完整儲存一致：草稿有內容後轉為啟用狀態
+                values["status"] = case(
+                    (Workflow.status == WorkflowStatusEnum.DRAFT, literal(WorkflowStatusEnum.ACTIVE, Workflow.status.type)),
+                    else_=Workflow.status
+                )
+
+            new_version, new_updated_at = self.db.execute(
+                update(Workflow)
+                .where(Workflow.id == uuid_workflow_id, Workflow.version == patch.base_version)
+                .values(**values)
+                .returning(Workflow.version, Workflow.updated_at),
+                execution_options={"synchronize_session": False}
+            ).one()
+            self.db.commit()
+
+            logger.info(
+                f"增量儲存工作流成功: {workflow_id}, 操作數: {len(patch.operations)}, 版本: {new_version}"
+            )
+
+            if nodes.changed or edges.changed:
+                await self.create_auto_version(workflow_id, user_id)
+            return {
+                "workflow_id": workflow_id,
+                "version": new_version,
+                "applied": len(patch.operations),
+                "etag": self.workflow_etag(uuid_workflow_id, new_version, new_updated_at)
+            }
+
+        except (ResourceNotFoundError, ResourceConflictError, PreconditionFailedError, ValidationError):
+            self.db.rollback()
+            raise
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"增量儲存工作流失敗: {str(e)}")
+            raise
+
+    def _check_graph_patch(
+        self,
+        workflow_uuid: uuid.UUID,
+        nodes: "_GraphCollection",
+        node_types: Dict[str, Any],
+        edges: "_GraphCollection",
+        edge_endpoints: Dict[str, tuple]
+    ):
+        """
+        增量儲存的檢查，與完整儲存（_check_graph_on_save）一致：
+        新增或改變端點的連線須指向套用後仍存在的節點（刪除節點時相連的連線已一併刪除），
+        新增或變更的排程觸發節點檢查排程設定
+        """
+        from app.services.scheduler_service import schedule_errors
+
+        errors = []
+        if settings.GRAPH_VALIDATE_ON_SAVE:
+            node_ids = set(nodes.current_ids())
+            changed_edges = [
+                edge_id for edge_id in edges.current_ids()
+                if edge_id in edges.added or "source" in edges.patches.get(edge_id, ()) or "target" in edges.patches.get(edge_id, ())
+            ]
+            for edge_id in changed_edges:
+                source, target = edge_endpoints.get(edge_id, (None, None))
+                if source not in node_ids or target not in node_ids:
+                    errors.append({
+                        "code": "dangling_edge",
+                        "edge_id": edge_id,
+                        "message": f"連線 {edge_id} 指向不存在的節點: {source} -> {target}"
+                    })
+
+        schedule_nodes = [node for node in nodes.added.values() if node.get("type") == SCHEDULE_TRIGGER_TYPE]
+        patched_ids = [
+            node_id for node_id, changes in nodes.patches.items()
+            if changes.get("type", node_types.get(node_id)) == SCHEDULE_TRIGGER_TYPE
+        ]
+        if patched_ids:
+            # 只讀取被變更的排程觸發節點，與欄位更新淺層合併（與資料庫端的 || 一致）
+            stored = self._load_graph_nodes(workflow_uuid, patched_ids)
+            schedule_nodes += [{**stored.get(node_id, {}), **nodes.patches[node_id]} for node_id in patched_ids]
+        errors += schedule_errors(schedule_nodes)
+
+        if errors:
+            raise ValidationError(
+                f"工作流圖形有 {len(errors)} 個錯誤",
+                field="operations",
+                details={"errors": errors}
+            )
+
+    def _load_graph_nodes(self, workflow_uuid: uuid.UUID, node_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """讀取工作流中指定 ID 的完整節點內容"""
+        elements = func.jsonb_array_elements(Workflow.nodes).table_valued(
+            column("value", JSONB)
+        ).render_derived().lateral()
+        rows = self.db.execute(
+            select(elements.c.value)
+            .select_from(Workflow)
+            .join(elements, true())
+            .where(Workflow.id == workflow_uuid, elements.c.value["id"].astext.in_(node_ids))
+        ).scalars()
+        return {str(node["id"]): node for node in rows}
+
+    @staticmethod
+    def _graph_refs(graph_column, *keys: str):
+        """依原始順序取出節點/連線的指定欄位（只回傳 ID 等小型欄位）"""
+        elements = func.jsonb_array_elements(graph_column).table_valued(
+            column("value", JSONB), with_ordinality="ordinality"
+        ).render_derived()
+        refs = func.jsonb_build_array(*(elements.c.value[key] for key in keys))
+        return select(
+            func.coalesce(
+                func.jsonb_agg(aggregate_order_by(refs, elements.c.ordinality)),
+                literal([], JSONB)
+            )
+        ).scalar_subquery()
+
+    @staticmethod
+    def _patched_graph_array(graph_column, collection: "_GraphCollection"):
+        """
+        在資料庫端重建節點/連線陣列：過濾刪除項目、以 || 合併欄位更新、附加新增項目
+        """
+        elements = func.jsonb_array_elements(graph_column).table_valued(
+            column("value", JSONB), with_ordinality="ordinality"
+        ).render_derived()
+        element_id = func.coalesce(elements.c.value["id"].astext, "")
+
+        merged = elements.c.value
+        if collection.patches:
+            merged = merged.op("||", return_type=JSONB)(
+                func.coalesce(cast(literal(collection.patches, JSONB), JSONB)[element_id], literal({}, JSONB))
+            )
+
+        kept = select(
+            func.coalesce(
+                func.jsonb_agg(aggregate_order_by(merged, elements.c.ordinality)),
+                literal([], JSONB)
+            )
+        )
+        if collection.removed:
+            kept = kept.where(element_id.notin_(collection.removed))
+
+        expression = kept.scalar_subquery()
+        if collection.added:
+            expression = expression.op("||", return_type=JSONB)(literal(list(collection.added.values()), JSONB))
+        return expression
+
     async def delete_workflow(self, workflow_id: str) -> bool:
         """
         刪除工作流
@@ -231,6 +664,44 @@ class WorkflowService:
             self.db.rollback()
             logger.error(f"刪除工作流失敗: {str(e)}")
             raise
+
+    # ==================== 圖形驗證 ====================
+
+    async def validate_graph(
+        self,
+        nodes: List[Dict[str, Any]],
+        edges: List[Dict[str, Any]],
+        check_parameters: bool = True
+    ) -> GraphAnalysis:
+        """
+        分析工作流圖形（結構、環路、可到達性，以及節點參數是否符合 NodeType.input_schema）
+        """
+        schemas = self._node_parameter_schemas() if check_parameters else None
+        return analyze_graph(nodes or [], edges or [], schemas)
+
+    def _node_parameter_schemas(self) -> Dict[str, CompiledSchema]:
+        """節點類型的輸入參數驗證器（由節點類型目錄提供，已預先編譯）"""
+        node_catalog.ensure_fresh(self.db)
+        return node_catalog.validators("input")
+
+    def _check_graph_on_save(self, nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]]):
+        """
+        儲存前的結構檢查：重複/缺少節點 ID、懸空連線與無法解析的端口直接拒絕，
+        避免壞掉的圖形送到 n8n 才在執行時失敗；編輯中的節點參數可能尚未填完，不在此檢查。
+        已啟用的排程觸發節點另檢查 cron 表達式、間隔與時區
+        """
+        # 排程設定無效時排程器只會略過並記錄警告，使用者看不到，因此一律在儲存時拒絕
+        from app.services.scheduler_service import schedule_errors
+
+        errors = schedule_errors(nodes)
+        if settings.GRAPH_VALIDATE_ON_SAVE:
+            errors = analyze_graph(nodes or [], edges or [], structure_only=True).errors + errors
+        if errors:
+            raise ValidationError(
+                f"工作流圖形有 {len(errors)} 個錯誤",
+                field="nodes",
+                details={"errors": errors}
+            )
     
     # ==================== 工作流執行相關 ====================
     
@@ -238,10 +709,15 @@ class WorkflowService:
         self, 
         workflow_id: str, 
         trigger_data: Optional[Dict[str, Any]] = None,
-        user_id: Optional[uuid.UUID] = None
+        user_id: Optional[uuid.UUID] = None,
+        trigger_type: Optional[str] = None,
+        idempotency_key: Optional[str] = None
     ) -> WorkflowExecution:
         """
         執行工作流
+
+        提供 idempotency_key 時，相同工作流與冪等鍵只會建立一筆執行記錄，
+        重複的請求直接回傳第一次的執行記錄；執行失敗時清除冪等鍵，重試會重新執行。
         """
         try:
             db_workflow = await self.get_workflow_by_id(workflow_id)
@@ -254,30 +730,57 @@ class WorkflowService:
                     message="工作流已停用"
                 )
             
+            if idempotency_key:
+                existing = self._get_execution_by_idempotency_key(db_workflow.id, idempotency_key)
+                if existing and existing.status == ExecutionStatusEnum.FAILED:
+                    # 失敗的執行允許重試：釋放冪等鍵後建立新的執行記錄
+                    existing.idempotency_key = None
+                    self.db.commit()
+                    logger.info(f"重試失敗的執行: workflow_id={workflow_id}, failed_execution_id={existing.id}")
+                elif existing:
+                    logger.info(f"重複的執行請求，回傳既有執行記錄: workflow_id={workflow_id}, execution_id={existing.id}")
+                    return existing
+            
             # 建立執行記錄
+            # 執行時長以本地的開始時間計算（重新載入後的 started_at 帶時區，不能與 utcnow() 相減）
+            started_at = datetime.utcnow()
             execution = WorkflowExecution(
                 workflow_id=uuid.UUID(workflow_id),
                 user_id=user_id or db_workflow.user_id,
-                status=ExecutionStatus.PENDING,
+                status=ExecutionStatusEnum.PENDING,
+                trigger_type=trigger_type,
                 trigger_data=trigger_data,
-                started_at=datetime.utcnow()
+                idempotency_key=idempotency_key,
+                started_at=started_at
             )
             
             self.db.add(execution)
-            self.db.commit()
+            try:
+                self.db.commit()
+            except IntegrityError:
+                # 並行的重複請求已先寫入，由唯一約束保證只保留一筆
+                self.db.rollback()
+                existing = self._get_execution_by_idempotency_key(db_workflow.id, idempotency_key)
+                if idempotency_key and existing:
+                    logger.info(f"並行重複執行請求已合併: workflow_id={workflow_id}, execution_id={existing.id}")
+                    return existing
+                raise
             self.db.refresh(execution)
+            await publish_execution_event(workflow_id, build_execution_event(execution))
             
             # 透過 n8n 執行工作流
+            result = None
             try:
-                execution.status = ExecutionStatus.RUNNING
+                execution.status = ExecutionStatusEnum.RUNNING
                 self.db.commit()
+                await publish_execution_event(workflow_id, build_execution_event(execution))
                 
                 result = await self.n8n_service.execute_workflow(workflow_id, trigger_data)
                 
-                execution.status = ExecutionStatus.SUCCESS
+                execution.status = ExecutionStatusEnum.SUCCESS
                 execution.result_data = result
                 execution.finished_at = datetime.utcnow()
-                execution.duration = (execution.finished_at - execution.started_at).total_seconds()
+                execution.duration = (execution.finished_at - started_at).total_seconds()
                 
                 # 更新工作流統計
                 db_workflow.execution_count += 1
@@ -294,10 +797,12 @@ class WorkflowService:
                     db_workflow.average_duration = execution.duration
                 
             except Exception as e:
-                execution.status = ExecutionStatus.FAILED
+                execution.status = ExecutionStatusEnum.FAILED
                 execution.error_message = str(e)
+                # 清除冪等鍵，供應商重試同一筆交易時會重新執行
+                execution.idempotency_key = None
                 execution.finished_at = datetime.utcnow()
-                execution.duration = (execution.finished_at - execution.started_at).total_seconds()
+                execution.duration = (execution.finished_at - started_at).total_seconds()
                 
                 # 更新失敗統計
                 db_workflow.execution_count += 1
@@ -308,6 +813,10 @@ class WorkflowService:
             self.db.commit()
             self.db.refresh(execution)
             
+            # 推播各節點進度與最終狀態
+            await publish_node_progress(execution, result)
+            await publish_execution_event(workflow_id, build_execution_event(execution))
+            
             logger.info(f"工作流執行完成: workflow_id={workflow_id}, execution_id={execution.id}, status={execution.status}")
             return execution
             
@@ -349,7 +858,7 @@ class WorkflowService:
             if not execution:
                 raise ResourceNotFoundError("執行記錄", execution_id)
             
-            if execution.status not in [ExecutionStatus.PENDING, ExecutionStatus.RUNNING]:
+            if execution.status not in [ExecutionStatusEnum.PENDING, ExecutionStatusEnum.RUNNING]:
                 return False  # 已經完成或失敗，無法停止
             
             # 在 n8n 中停止執行
@@ -359,11 +868,13 @@ class WorkflowService:
                 logger.warning(f"在 n8n 中停止執行失敗: {str(e)}")
             
             # 更新執行狀態
-            execution.status = ExecutionStatus.CANCELLED
-            execution.finished_at = datetime.utcnow()
-            execution.duration = (execution.finished_at - execution.started_at).total_seconds()
+            execution.status = ExecutionStatusEnum.CANCELLED
+            started_at = execution.started_at
+            execution.finished_at = datetime.now(started_at.tzinfo) if started_at.tzinfo else datetime.utcnow()
+            execution.duration = (execution.finished_at - started_at).total_seconds()
             
             self.db.commit()
+            await publish_execution_event(str(execution.workflow_id), build_execution_event(execution))
             
             logger.info(f"工作流執行停止成功: execution_id={execution_id}")
             return True
@@ -375,6 +886,266 @@ class WorkflowService:
             logger.error(f"停止工作流執行失敗: {str(e)}")
             raise
 
+    # ==================== 批次執行 ====================
+
+    async def create_execution_batch(
+        self,
+        workflow_id: str,
+        trigger_payloads: List[Optional[Dict[str, Any]]],
+        user_id: Optional[uuid.UUID] = None,
+        trigger_type: Optional[str] = "api"
+    ) -> Dict[str, Any]:
+        """
+        建立批次執行：以單一 INSERT 寫入所有執行記錄，實際執行由 dispatch_execution_batch 處理
+        """
+        try:
+            db_workflow = await self.get_workflow_by_id(workflow_id)
+            if not db_workflow:
+                raise ResourceNotFoundError("工作流", workflow_id)
+
+            if not db_workflow.is_active:
+                raise WorkflowExecutionError(
+                    workflow_id=workflow_id,
+                    message="工作流已停用"
+                )
+
+            batch_id = str(uuid.uuid4())
+            created_at = datetime.utcnow()
+            owner_id = user_id or db_workflow.user_id
+
+            rows = [
+                {
+                    "id": uuid.uuid4(),
+                    "workflow_id": db_workflow.id,
+                    "user_id": owner_id,
+                    "execution_id": str(uuid.uuid4()),
+                    "batch_id": batch_id,
+                    "status": ExecutionStatusEnum.PENDING,
+                    "trigger_type": trigger_type,
+                    "trigger_data": payload,
+                    "nodes_executed": 0,
+                    "nodes_successful": 0,
+                    "nodes_failed": 0,
+                    "started_at": created_at,
+                }
+                for payload in trigger_payloads
+            ]
+
+            # 多筆 VALUES 的批次 INSERT，取代逐筆 add/commit
+            self.db.execute(insert(WorkflowExecution), rows)
+            self.db.commit()
+
+            progress = {
+                "batch_id": batch_id,
+                "workflow_id": workflow_id,
+                "status": "running",
+                "total": len(rows),
+                "pending": len(rows),
+                "success": 0,
+                "failed": 0,
+                "created_at": created_at.isoformat() + "Z",
+            }
+            try:
+                async with get_redis().pipeline(transaction=False) as pipe:
+                    pipe.hset(self._batch_key(batch_id), mapping=progress)
+                    pipe.expire(self._batch_key(batch_id), settings.BATCH_EXECUTION_PROGRESS_TTL_SECONDS)
+                    # 租約在派送前即存在，避免背景任務尚未開始時被視為中斷
+                    pipe.set(self._batch_lease_key(batch_id), workflow_id, ex=settings.BATCH_EXECUTION_LEASE_SECONDS)
+                    await pipe.execute()
+            except Exception as e:
+                logger.warning(f"寫入批次進度失敗，改由資料庫彙總: batch_id={batch_id}, error={e}")
+
+            logger.info(f"批次執行建立成功: workflow_id={workflow_id}, batch_id={batch_id}, total={len(rows)}")
+            return {
+                "batch_id": batch_id,
+                "items": [(row["id"], row["trigger_data"]) for row in rows],
+                "progress": progress
+            }
+
+        except (ResourceNotFoundError, WorkflowExecutionError):
+            raise
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"建立批次執行失敗: {str(e)}")
+            raise
+
+    @staticmethod
+    async def dispatch_execution_batch(
+        workflow_id: str,
+        batch_id: str,
+        items: List[Any],
+        concurrency: Optional[int] = None
+    ) -> Dict[str, int]:
+        """
+        以有限並行度將批次項目送至 n8n 執行，並分段批次更新執行狀態
+
+        在背景執行，使用獨立的資料庫 session 與 n8n 客戶端。每個項目開始時發布 running 事件，
+        狀態寫回後以 pipeline 發布最終狀態事件；執行期間定期續約批次租約，
+        行程中斷後由 batch_execution_sweeper 接手處理剩餘的項目。
+        """
+        concurrency = concurrency or settings.BATCH_EXECUTION_CONCURRENCY
+        flush_size = settings.BATCH_EXECUTION_FLUSH_SIZE
+        semaphore = asyncio.Semaphore(concurrency)
+        pending_updates: List[Dict[str, Any]] = []
+        totals = {"success": 0, "failed": 0, "duration": 0.0}
+        batch_key = WorkflowService._batch_key(batch_id)
+        lease_key = WorkflowService._batch_lease_key(batch_id)
+        db = SessionLocal()
+        n8n_service = N8nService()
+
+        async def flush():
+            if not pending_updates:
+                return
+            updates = list(pending_updates)
+            pending_updates.clear()
+            # 依主鍵批次 UPDATE，取代逐筆 commit
+            db.execute(update(WorkflowExecution), updates)
+            db.commit()
+            await publish_execution_events(
+                workflow_id, [build_batch_execution_event(workflow_id, batch_id, item) for item in updates]
+            )
+
+            success = sum(1 for item in updates if item["status"] == ExecutionStatusEnum.SUCCESS)
+            failed = len(updates) - success
+            try:
+                client = get_redis()
+                async with client.pipeline(transaction=False) as pipe:
+                    pipe.hincrby(batch_key, "success", success)
+                    pipe.hincrby(batch_key, "failed", failed)
+                    pipe.hincrby(batch_key, "pending", -len(updates))
+                    await pipe.execute()
+            except Exception as e:
+                logger.warning(f"更新批次進度失敗: batch_id={batch_id}, error={e}")
+
+        async def run_item(execution_pk: uuid.UUID, trigger_data: Optional[Dict[str, Any]]):
+            async with semaphore:
+                queued["count"] -= 1
+                EXECUTION_QUEUE_DEPTH.dec()
+                started_at = datetime.utcnow()
+                values: Dict[str, Any] = {"id": execution_pk, "started_at": started_at}
+                await publish_execution_event(
+                    workflow_id,
+                    build_batch_execution_event(
+                        workflow_id, batch_id, {**values, "status": ExecutionStatusEnum.RUNNING}
+                    )
+                )
+                try:
+                    result = await n8n_service.execute_workflow(workflow_id, trigger_data)
+                    values.update(status=ExecutionStatusEnum.SUCCESS, result_data=result)
+                    totals["success"] += 1
+                except Exception as e:
+                    values.update(status=ExecutionStatusEnum.FAILED, error_message=str(e))
+                    totals["failed"] += 1
+                values["finished_at"] = datetime.utcnow()
+                values["duration"] = (values["finished_at"] - started_at).total_seconds()
+                totals["duration"] += values["duration"]
+
+            pending_updates.append(values)
+            if len(pending_updates) >= flush_size:
+                await flush()
+
+        async def renew_lease():
+            while True:
+                await asyncio.sleep(settings.BATCH_EXECUTION_LEASE_SECONDS / 3)
+                try:
+                    await get_redis().set(lease_key, workflow_id, ex=settings.BATCH_EXECUTION_LEASE_SECONDS)
+                except Exception as e:
+                    logger.warning(f"續約批次租約失敗: batch_id={batch_id}, error={e}")
+
+        # 等待並行名額的項目數；中途取消時於 finally 扣回尚未送出的項目
+        queued = {"count": len(items)}
+        EXECUTION_QUEUE_DEPTH.inc(len(items))
+        lease_task = asyncio.create_task(renew_lease())
+        try:
+            await asyncio.gather(*(run_item(pk, data) for pk, data in items))
+            await flush()
+
+            # 以單一 UPDATE 累加工作流統計
+            executed = totals["success"] + totals["failed"]
+            if executed:
+                db.execute(
+                    update(Workflow)
+                    .where(Workflow.id == uuid.UUID(workflow_id))
+                    .values(
+                        execution_count=Workflow.execution_count + executed,
+                        success_count=Workflow.success_count + totals["success"],
+                        failure_count=Workflow.failure_count + totals["failed"],
+                        average_duration=(
+                            func.coalesce(Workflow.average_duration, 0) * Workflow.execution_count
+                            + totals["duration"]
+                        ) / (Workflow.execution_count + executed),
+                        last_executed_at=datetime.utcnow()
+                    )
+                )
+                db.commit()
+
+            try:
+                async with get_redis().pipeline(transaction=False) as pipe:
+                    pipe.hset(batch_key, "status", "completed")
+                    pipe.delete(lease_key)
+                    await pipe.execute()
+            except Exception as e:
+                logger.warning(f"更新批次狀態失敗: batch_id={batch_id}, error={e}")
+
+            logger.info(
+                f"批次執行完成: workflow_id={workflow_id}, batch_id={batch_id}, "
+                f"成功={totals['success']}, 失敗={totals['failed']}"
+            )
+            return {"success": totals["success"], "failed": totals["failed"]}
+
+        except Exception as e:
+            db.rollback()
+            logger.error(f"批次執行失敗: batch_id={batch_id}, error={str(e)}")
+            raise
+        finally:
+            lease_task.cancel()
+            EXECUTION_QUEUE_DEPTH.dec(queued["count"])
+            db.close()
+            await n8n_service.client.aclose()
+
+    async def get_execution_batch_progress(self, workflow_id: str, batch_id: str) -> Optional[Dict[str, Any]]:
+        """
+        取得批次執行進度（優先讀取 Redis，過期後由資料庫彙總）
+        """
+        try:
+            progress = await get_redis().hgetall(self._batch_key(batch_id))
+            if progress and progress.get("workflow_id") == workflow_id:
+                for field in ("total", "pending", "success", "failed"):
+                    progress[field] = int(progress.get(field, 0))
+                return progress
+        except Exception as e:
+            logger.warning(f"讀取批次進度失敗，改由資料庫彙總: batch_id={batch_id}, error={e}")
+
+        rows = self.db.query(WorkflowExecution.status, func.count()).filter(
+            WorkflowExecution.workflow_id == uuid.UUID(workflow_id),
+            WorkflowExecution.batch_id == batch_id
+        ).group_by(WorkflowExecution.status).all()
+        if not rows:
+            return None
+
+        counts = {(status.value if hasattr(status, "value") else status): count for status, count in rows}
+        total = sum(counts.values())
+        pending = counts.get("pending", 0) + counts.get("running", 0)
+        return {
+            "batch_id": batch_id,
+            "workflow_id": workflow_id,
+            "status": "running" if pending else "completed",
+            "total": total,
+            "pending": pending,
+            "success": counts.get("success", 0),
+            "failed": counts.get("failed", 0),
+        }
+
+    @staticmethod
+    def _batch_key(batch_id: str) -> str:
+        """批次進度的 Redis 鍵"""
+        return f"execution_batch:{batch_id}"
+
+    @staticmethod
+    def _batch_lease_key(batch_id: str) -> str:
+        """批次派送租約的 Redis 鍵（派送中的 worker 定期續約）"""
+        return f"execution_batch:{batch_id}:lease"
+
     # ==================== 工作流狀態管理 ====================
 
     async def activate_workflow(self, workflow_id: str) -> bool:
@@ -433,6 +1204,171 @@ class WorkflowService:
             logger.error(f"停用工作流失敗: {str(e)}")
             raise
 
+    # ==================== 批次操作 ====================
+
+    async def bulk_update_workflows(
+        self,
+        user_id: uuid.UUID,
+        action: WorkflowBulkAction,
+        workflow_ids: List[str],
+        tags: Optional[List[str]] = None
+    ) -> Dict[str, List[str]]:
+        """
+        以單一 SQL 語句對多個工作流套用操作，只影響使用者自己的工作流
+
+        回傳 {"updated": [...], "missing": [...]}，missing 為不存在或無權限的 ID。
+        """
+        try:
+            uuid_objs = [uuid.UUID(workflow_id) for workflow_id in workflow_ids]
+            owned = (Workflow.id.in_(uuid_objs), Workflow.user_id == user_id)
+
+            if action == WorkflowBulkAction.DELETE:
+                owned_ids = select(Workflow.id).where(*owned)
+                execution_ids = select(WorkflowExecution.id).where(WorkflowExecution.workflow_id.in_(owned_ids))
+                # 關聯資料與單筆刪除時的 ORM cascade 一致：執行紀錄的金流記錄先刪除，
+                # 台灣金流交易保留作為帳務紀錄，只解除與執行紀錄的關聯
+                self.db.execute(
+                    delete(PaymentRecord).where(PaymentRecord.workflow_execution_id.in_(execution_ids)),
+                    execution_options={"synchronize_session": False}
+                )
+                self.db.execute(
+                    update(TaiwanPaymentTransaction)
+                    .where(TaiwanPaymentTransaction.workflow_execution_id.in_(execution_ids))
+                    .values(workflow_execution_id=None),
+                    execution_options={"synchronize_session": False}
+                )
+                for model in (WorkflowExecution, WorkflowVersion, WebhookEndpoint):
+                    self.db.execute(
+                        delete(model).where(model.workflow_id.in_(owned_ids)),
+                        execution_options={"synchronize_session": False}
+                    )
+                statement = delete(Workflow).where(*owned)
+            else:
+                statement = update(Workflow).where(*owned).values(
+                    **self._bulk_update_values(action, tags or []),
+                    updated_at=func.now()
+                )
+
+            result = self.db.execute(
+                statement.returning(Workflow.id),
+                execution_options={"synchronize_session": False}
+            )
+            affected = {str(row[0]) for row in result}
+            self.db.commit()
+
+            updated = [workflow_id for workflow_id in workflow_ids if workflow_id in affected]
+            missing = [workflow_id for workflow_id in workflow_ids if workflow_id not in affected]
+            logger.info(f"批次操作完成: action={action.value}, 成功={len(updated)}, 略過={len(missing)}")
+            return {"updated": updated, "missing": missing}
+
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"批次操作失敗: action={action.value}, error={str(e)}")
+            raise
+
+    async def sync_bulk_operation_to_n8n(
+        self,
+        action: WorkflowBulkAction,
+        workflow_ids: List[str],
+        concurrency: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        以有限並行度將批次操作同步到 n8n，依完成順序逐筆產生結果
+        """
+        if action == WorkflowBulkAction.ACTIVATE:
+            sync = lambda workflow_id: self.n8n_service.activate_workflow(workflow_id, True)
+        elif action == WorkflowBulkAction.DEACTIVATE:
+            sync = lambda workflow_id: self.n8n_service.activate_workflow(workflow_id, False)
+        elif action == WorkflowBulkAction.DELETE:
+            sync = self.n8n_service.delete_workflow
+        else:
+            # 標籤只存在於本地資料庫，不需同步
+            for workflow_id in workflow_ids:
+                yield {"workflow_id": workflow_id, "status": "ok"}
+            return
+
+        semaphore = asyncio.Semaphore(concurrency or settings.BULK_OPERATION_N8N_CONCURRENCY)
+
+        async def run(workflow_id: str) -> Dict[str, Any]:
+            async with semaphore:
+                try:
+                    await sync(workflow_id)
+                    return {"workflow_id": workflow_id, "status": "ok"}
+                except Exception as e:
+                    # 與單筆操作一致：n8n 同步失敗不回滾資料庫變更
+                    logger.warning(f"批次操作同步 n8n 失敗: workflow_id={workflow_id}, error={str(e)}")
+                    return {"workflow_id": workflow_id, "status": "ok", "n8n_synced": False, "error": str(e)}
+
+        tasks = [asyncio.ensure_future(run(workflow_id)) for workflow_id in workflow_ids]
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                yield await next_result
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    @staticmethod
+    async def sync_imported_workflows_to_n8n(
+        workflow_ids: List[str],
+        concurrency: Optional[int] = None
+    ) -> Dict[str, int]:
+        """
+        批次匯入或複製工作流後的 n8n 同步：依 IMPORT_N8N_SYNC_BATCH_SIZE 分批讀取工作流，以有限並行度建立到 n8n
+
+        在背景執行，使用獨立的資料庫 session 與 n8n 客戶端；同步失敗只記錄，不影響已匯入的資料。
+        """
+        semaphore = asyncio.Semaphore(concurrency or settings.BULK_OPERATION_N8N_CONCURRENCY)
+        totals = {"synced": 0, "failed": 0}
+        batch_size = settings.IMPORT_N8N_SYNC_BATCH_SIZE
+        db = SessionLocal()
+        n8n_service = N8nService()
+
+        async def sync(workflow: Workflow):
+            async with semaphore:
+                try:
+                    compiled = graph_compiler.compile_workflow(workflow)
+                    await n8n_service.create_workflow(compiled.to_n8n(
+                        workflow.name,
+                        active=workflow.is_active,
+                        id=str(workflow.id)
+                    ))
+                    totals["synced"] += 1
+                except Exception as e:
+                    totals["failed"] += 1
+                    logger.warning(f"匯入後同步 n8n 失敗: workflow_id={workflow.id}, error={str(e)}")
+
+        try:
+            for start in range(0, len(workflow_ids), batch_size):
+                batch = [uuid.UUID(workflow_id) for workflow_id in workflow_ids[start:start + batch_size]]
+                workflows = db.query(Workflow).filter(Workflow.id.in_(batch)).all()
+                await asyncio.gather(*(sync(workflow) for workflow in workflows))
+                # 每批同步後釋放 ORM 物件，記憶體用量與匯入筆數無關
+                db.expunge_all()
+
+            logger.info(f"匯入後同步 n8n 完成: 成功={totals['synced']}, 失敗={totals['failed']}")
+            return totals
+        finally:
+            db.close()
+            await n8n_service.client.aclose()
+
+    @staticmethod
+    def _bulk_update_values(action: WorkflowBulkAction, tags: List[str]) -> Dict[str, Any]:
+        """依操作類型產生 UPDATE 的欄位值"""
+        if action == WorkflowBulkAction.ACTIVATE:
+            return {"is_active": True}
+        if action == WorkflowBulkAction.DEACTIVATE:
+            return {"is_active": False}
+        if action == WorkflowBulkAction.SET_TAGS:
+            return {"tags": tags}
+
+        # 新增/移除標籤：以 array_remove 逐一移除後再串接，避免重複標籤
+        expression = func.coalesce(Workflow.tags, cast([], ARRAY(String)))
+        for tag in tags:
+            expression = func.array_remove(expression, tag)
+        if action == WorkflowBulkAction.ADD_TAGS and tags:
+            expression = func.array_cat(expression, cast(tags, ARRAY(String)))
+        return {"tags": expression}
+
     # ==================== 工作流統計 ====================
 
     async def get_workflow_stats(self, workflow_id: str) -> Dict[str, Any]:
@@ -475,10 +1411,17 @@ class WorkflowService:
         taiwan_featured: Optional[bool] = None
     ) -> List[WorkflowTemplate]:
         """
-        取得工作流模板列表
+        取得工作流模板列表（優先依預先建立的排行榜分頁，排行榜不可用時查詢資料庫）
         """
         try:
-            query = self.db.query(WorkflowTemplate).filter(WorkflowTemplate.is_active == True)
+            try:
+                templates = await template_leaderboard.load_page(self.db, category, taiwan_featured, skip, limit)
+                if templates is not None:
+                    return templates
+            except Exception as e:
+                logger.warning(f"讀取模板排行榜失敗，改查資料庫: {e}")
+
+            query = self.db.query(WorkflowTemplate).filter(WorkflowTemplate.is_public == True)
 
             if category:
                 query = query.filter(WorkflowTemplate.category == category)
@@ -486,7 +1429,9 @@ class WorkflowService:
             if taiwan_featured is not None:
                 query = query.filter(WorkflowTemplate.is_taiwan_featured == taiwan_featured)
 
-            return query.order_by(WorkflowTemplate.usage_count.desc()).offset(skip).limit(limit).all()
+            return query.order_by(
+                WorkflowTemplate.usage_count.desc(), WorkflowTemplate.rating.desc(), WorkflowTemplate.id
+            ).offset(skip).limit(limit).all()
 
         except Exception as e:
             logger.error(f"取得工作流模板失敗: {str(e)}")
@@ -499,46 +1444,123 @@ class WorkflowService:
         workflow_name: Optional[str] = None
     ) -> Workflow:
         """
-        從模板建立工作流
+        從模板建立工作流（寫入時複製）
+
+        以單一 INSERT ... SELECT 建立，不複製模板的 nodes / edges、也不重新驗證圖形；
+        工作流第一次編輯圖形時才寫入自己的內容。n8n 同步由呼叫端於背景進行。
         """
         try:
-            # 取得模板
             template_uuid = uuid.UUID(template_id)
-            template = self.db.query(WorkflowTemplate).filter(
-                WorkflowTemplate.id == template_uuid
+            workflow_uuid = uuid.uuid4()
+
+            source = select(
+                literal(workflow_uuid, Workflow.id.type),
+                literal(user_id, Workflow.user_id.type),
+                WorkflowTemplate.id,
+                self._copy_name(WorkflowTemplate.name, workflow_name),
+                WorkflowTemplate.description,
+                WorkflowTemplate.category,
+                func.coalesce(WorkflowTemplate.tags, literal([], ARRAY(String))),
+                null(),
+                null(),
+                func.coalesce(WorkflowTemplate.settings, literal({}, JSONB)),
+                literal(False)  # 預設為停用，讓使用者手動啟用
+            ).where(
+                WorkflowTemplate.id == template_uuid,
+                or_(WorkflowTemplate.is_public.is_(True), WorkflowTemplate.author_id == user_id)
+            )
+            created = self.db.execute(
+                insert(Workflow).from_select(WORKFLOW_COPY_COLUMNS, source).returning(Workflow.id)
             ).first()
-
-            if not template:
+            if not created:
                 raise ResourceNotFoundError("工作流模板", template_id)
-
-            # 建立工作流
-            workflow_data = WorkflowCreate(
-                name=workflow_name or f"{template.name} - 副本",
-                description=template.description,
-                category=template.category,
-                tags=template.tags,
-                nodes=template.nodes,
-                edges=template.edges,
-                settings=template.settings,
-                is_active=False  # 預設為停用，讓使用者手動啟用
-            )
-
-            workflow = await self.create_workflow(workflow_data, user_id)
-
-            # 更新模板使用次數
-            template.usage_count += 1
             self.db.commit()
 
-            logger.info(f"從模板建立工作流成功: template_id={template_id}, workflow_id={workflow.id}")
-            return workflow
+            # 使用次數累積在 Redis，由排行榜定期寫回，不鎖定模板列
+            await self.record_template_usage(template_id)
+
+            logger.info(f"從模板建立工作流成功: template_id={template_id}, workflow_id={workflow_uuid}")
+            return self.db.get(Workflow, workflow_uuid)
 
         except ResourceNotFoundError:
+            self.db.rollback()
             raise
         except Exception as e:
             self.db.rollback()
             logger.error(f"從模板建立工作流失敗: {str(e)}")
             raise
 
+    async def record_template_usage(self, template_id: str):
+        """
+        記錄模板使用次數；Redis 無法使用時直接以原子 UPDATE 累加
+        """
+        try:
+            await template_leaderboard.record_usage(template_id)
+        except Exception as e:
+            logger.warning(f"緩衝模板使用次數失敗，直接寫入資料庫: template_id={template_id}, error={e}")
+            self.db.execute(
+                update(WorkflowTemplate)
+                .where(WorkflowTemplate.id == uuid.UUID(template_id))
+                .values(usage_count=WorkflowTemplate.usage_count + 1, updated_at=WorkflowTemplate.updated_at)
+            )
+            self.db.commit()
+
+    async def rate_template(self, template_id: str, user_id: uuid.UUID, rating: int) -> bool:
+        """
+        為模板評分，回傳是否為新評分
+
+        評分記錄寫入資料庫（主鍵為模板與使用者，重複評分不會寫入），累計值緩衝在 Redis 由排行榜定期寫回；
+        Redis 無法使用時於同一交易直接以原子 UPDATE 更新平均評分
+        """
+        template_uuid = uuid.UUID(template_id)
+        exists = self.db.query(WorkflowTemplate.id).filter(
+            WorkflowTemplate.id == template_uuid,
+            WorkflowTemplate.is_public == True
+        ).first()
+        if not exists:
+            raise ResourceNotFoundError("工作流模板", template_id)
+
+        try:
+            inserted = self.db.execute(
+                insert(WorkflowTemplateRating)
+                .values(template_id=template_uuid, user_id=user_id, rating=rating)
+                .on_conflict_do_nothing()
+                .returning(WorkflowTemplateRating.template_id)
+            ).first()
+            if not inserted:
+                self.db.rollback()
+                return False
+
+            buffered = True
+            try:
+                await template_leaderboard.record_rating(template_id, rating)
+            except Exception as e:
+                logger.warning(f"緩衝模板評分失敗，直接寫入資料庫: template_id={template_id}, error={e}")
+                buffered = False
+                new_count = WorkflowTemplate.rating_count + 1
+                self.db.execute(
+                    update(WorkflowTemplate)
+                    .where(WorkflowTemplate.id == template_uuid)
+                    .values(
+                        rating=(WorkflowTemplate.rating * WorkflowTemplate.rating_count + rating) / new_count,
+                        rating_count=new_count,
+                        updated_at=WorkflowTemplate.updated_at
+                    )
+                )
+
+            try:
+                self.db.commit()
+            except Exception:
+                if buffered:
+                    # 評分記錄沒有寫入，撤銷已緩衝的累計值，讓使用者可以重試
+                    await template_leaderboard.record_rating(template_id, -rating, count=-1)
+                raise
+            return True
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"模板評分失敗: template_id={template_id}, error={e}")
+            raise
+
     # ==================== 工作流複製和分享 ====================
 
     async def duplicate_workflow(
@@ -549,66 +1571,68 @@ class WorkflowService:
     ) -> Workflow:
         """
         複製工作流
+
+        以單一 INSERT ... SELECT 在資料庫端複製；仍沿用模板圖形的工作流，複本同樣沿用模板，不複製內容。
+        n8n 同步由呼叫端於背景進行。
         """
         try:
-            original_workflow = await self.get_workflow_by_id(workflow_id)
-            if not original_workflow:
+            original_uuid = uuid.UUID(workflow_id)
+            workflow_uuid = uuid.uuid4()
+
+            source = select(
+                literal(workflow_uuid, Workflow.id.type),
+                literal(user_id, Workflow.user_id.type) if user_id else Workflow.user_id,
+                Workflow.source_template_id,
+                self._copy_name(Workflow.name, new_name),
+                Workflow.description,
+                Workflow.category,
+                Workflow.tags,
+                Workflow.stored_nodes,
+                Workflow.stored_edges,
+                func.coalesce(Workflow.settings, literal({}, JSONB)),
+                literal(False)  # 預設為停用
+            ).where(Workflow.id == original_uuid)
+            created = self.db.execute(
+                insert(Workflow).from_select(WORKFLOW_COPY_COLUMNS, source).returning(Workflow.id)
+            ).first()
+            if not created:
                 raise ResourceNotFoundError("工作流", workflow_id)
+            self.db.commit()
 
-            # 建立複製的工作流
-            workflow_data = WorkflowCreate(
-                name=new_name or f"{original_workflow.name} - 副本",
-                description=original_workflow.description,
-                category=original_workflow.category,
-                tags=original_workflow.tags,
-                nodes=original_workflow.nodes,
-                edges=original_workflow.edges,
-                settings=original_workflow.settings,
-                is_active=False  # 預設為停用
-            )
-
-            duplicated_workflow = await self.create_workflow(
-                workflow_data,
-                user_id or original_workflow.user_id
-            )
-
-            logger.info(f"工作流複製成功: original_id={workflow_id}, new_id={duplicated_workflow.id}")
-            return duplicated_workflow
+            logger.info(f"工作流複製成功: original_id={workflow_id}, new_id={workflow_uuid}")
+            return self.db.get(Workflow, workflow_uuid)
 
         except ResourceNotFoundError:
+            self.db.rollback()
             raise
         except Exception as e:
+            self.db.rollback()
             logger.error(f"複製工作流失敗: {str(e)}")
             raise
 
+    @staticmethod
+    def _copy_name(source_name, name: Optional[str]):
+        """複本名稱：未指定時為「原名稱 - 副本」（截斷至欄位長度）"""
+        if name:
+            return literal(name, String)
+        return func.left(source_name + " - 副本", Workflow.name.type.length)
+
     # ==================== 輔助方法 ====================
 
-    def _convert_edges_to_connections(self, edges: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _get_execution_by_idempotency_key(
+        self,
+        workflow_id: uuid.UUID,
+        idempotency_key: Optional[str]
+    ) -> Optional[WorkflowExecution]:
         """
-        將邊線格式轉換為 n8n 連接格式
+        根據冪等鍵取得既有的執行記錄
         """
-        connections = {}
-
-        for edge in edges:
-            source = edge.get("source")
-            target = edge.get("target")
-            source_handle = edge.get("sourceHandle", "main")
-            target_handle = edge.get("targetHandle", "main")
-
-            if source and target:
-                if source not in connections:
-                    connections[source] = {}
-
-                if source_handle not in connections[source]:
-                    connections[source][source_handle] = []
-
-                connections[source][source_handle].append({
-                    "node": target,
-                    "type": target_handle,
-                    "index": 0
-                })
-
-        return connections
+        if not idempotency_key:
+            return None
+        return self.db.query(WorkflowExecution).filter(
+            WorkflowExecution.workflow_id == workflow_id,
+            WorkflowExecution.idempotency_key == idempotency_key
+        ).first()
 
     # ==================== 工作流版本管理 ====================
 
@@ -622,7 +1646,6 @@ class WorkflowService:
         取得工作流版本列表
         """
         try:
-            from app.models.workflow import WorkflowVersion
             uuid_obj = uuid.UUID(workflow_id)
             return self.db.query(WorkflowVersion).filter(
                 WorkflowVersion.workflow_id == uuid_obj
@@ -631,6 +1654,24 @@ class WorkflowService:
             logger.error(f"取得工作流版本列表失敗: {str(e)}")
             return []
 
+    async def get_workflow_version(self, workflow_id: str, version_id: str) -> Optional[WorkflowVersion]:
+        """
+        取得工作流的指定版本
+        """
+        try:
+            return self.db.query(WorkflowVersion).filter(
+                WorkflowVersion.id == uuid.UUID(version_id),
+                WorkflowVersion.workflow_id == uuid.UUID(workflow_id)
+            ).first()
+        except ValueError:
+            return None
+
+    def get_version_content(self, version: WorkflowVersion) -> Dict[str, Any]:
+        """
+        重建版本內容（nodes / edges / settings）
+        """
+        return VersionStore(self.db).read_version(version)
+
     async def create_workflow_version(
         self,
         workflow_id: str,
@@ -638,18 +1679,23 @@ class WorkflowService:
         created_by: uuid.UUID
     ):
         """
-        建立工作流新版本
+        建立工作流新版本（內容以內容定址方式儲存，未變更的節點與連線由各版本共用）
         """
         try:
-            from app.models.workflow import WorkflowVersion
-
-            # 取得當前最大版本號
             uuid_obj = uuid.UUID(workflow_id)
-            max_version = self.db.query(WorkflowVersion).filter(
-                WorkflowVersion.workflow_id == uuid_obj
-            ).order_by(WorkflowVersion.version_number.desc()).first()
 
-            next_version = (max_version.version_number + 1) if max_version else 1
+            # 未提供內容時以工作流目前內容建立快照
+            nodes, edges, settings = version_data.nodes, version_data.edges, version_data.settings
+            if nodes is None or edges is None:
+                workflow = await self.get_workflow_by_id(workflow_id)
+                if not workflow:
+                    raise ResourceNotFoundError("工作流", workflow_id)
+                nodes = workflow.nodes if nodes is None else nodes
+                edges = workflow.edges if edges is None else edges
+                settings = workflow.settings if settings is None else settings
+
+            manifest = VersionStore(self.db).write_snapshot(nodes, edges, settings or {})
+            next_version = self._allocate_version_number(uuid_obj)
 
             # 建立新版本
             version = WorkflowVersion(
@@ -657,9 +1703,7 @@ class WorkflowService:
                 version_number=next_version,
                 version_name=version_data.version_name,
                 description=version_data.description,
-                nodes=version_data.nodes,
-                edges=version_data.edges,
-                settings=version_data.settings or {},
+                manifest=manifest,
                 created_by=created_by
             )
 
@@ -670,18 +1714,186 @@ class WorkflowService:
             logger.info(f"工作流版本建立成功: workflow_id={workflow_id}, version={next_version}")
             return version
 
+        except ResourceNotFoundError:
+            raise
         except Exception as e:
             self.db.rollback()
             logger.error(f"建立工作流版本失敗: {str(e)}")
             raise
 
+    async def create_auto_version(self, workflow_id: str, user_id: str) -> Optional[WorkflowVersion]:
+        """
+        儲存後自動建立版本快照（去抖動與合併）
+
+        - 去抖動：同一工作流在 AUTO_VERSION_DEBOUNCE_SECONDS 內最多快照一次（Redis SET NX）；
+          視窗內的後續儲存不立即快照，改在視窗結束時補建一次（trailing edge），
+          讓一連串編輯的最終內容一定會留下版本
+        - 合併：最新版本為同一使用者在 AUTO_VERSION_COALESCE_SECONDS 內建立的自動快照時，
+          直接更新該版本內容，連續自動儲存只會留下一個版本
+        快照失敗只記錄警告，不影響儲存結果。
+        """
+        if not settings.AUTO_VERSION_ENABLED:
+            return None
+
+        try:
+            redis = get_redis()
+            debounce_key = f"auto_version:{workflow_id}"
+            acquired = await redis.set(debounce_key, 1, nx=True, ex=settings.AUTO_VERSION_DEBOUNCE_SECONDS)
+            if not acquired:
+                self._schedule_trailing_auto_version(workflow_id, str(user_id), await redis.pttl(debounce_key))
+                return None
+        except Exception as e:
+            logger.warning(f"自動快照去抖動失敗，直接建立快照: workflow_id={workflow_id}, error={e}")
+
+        return self._snapshot_auto_version(workflow_id, user_id)
+
+    @staticmethod
+    def _schedule_trailing_auto_version(workflow_id: str, user_id: str, remaining_ms: Optional[int]):
+        """
+        去抖動視窗結束時補建快照；同一工作流在本行程只排程一次，快照時讀取當下最新內容並歸屬最後儲存的使用者
+
+        多個 worker 各自排程時，後執行者內容未變更或併入同一個自動版本，不會產生重複版本。
+        """
+        pending = workflow_id in _trailing_auto_versions
+        _trailing_auto_versions[workflow_id] = user_id
+        if pending:
+            return
+
+        delay = remaining_ms / 1000 if remaining_ms and remaining_ms > 0 else settings.AUTO_VERSION_DEBOUNCE_SECONDS
+        task = asyncio.create_task(WorkflowService._flush_trailing_auto_version(workflow_id, delay))
+        _trailing_auto_version_tasks.add(task)
+        task.add_done_callback(_trailing_auto_version_tasks.discard)
+
+    @staticmethod
+    async def _flush_trailing_auto_version(workflow_id: str, delay: float):
+        """等待去抖動視窗結束後補建快照"""
+        await asyncio.sleep(delay)
+        WorkflowService._take_trailing_auto_version(workflow_id)
+
+    @staticmethod
+    def _take_trailing_auto_version(workflow_id: str):
+        """以獨立的資料庫 session 建立等待中的自動快照"""
+        user_id = _trailing_auto_versions.pop(workflow_id, None)
+        if user_id is None:
+            return
+        db = SessionLocal()
+        try:
+            WorkflowService(db)._snapshot_auto_version(workflow_id, user_id)
+        finally:
+            db.close()
+
+    @staticmethod
+    async def flush_pending_auto_versions():
+        """應用程式關閉時立即補建所有等待中的自動快照，不遺失視窗內最後的編輯"""
+        for task in list(_trailing_auto_version_tasks):
+            task.cancel()
+        for workflow_id in list(_trailing_auto_versions):
+            WorkflowService._take_trailing_auto_version(workflow_id)
+
+    def _snapshot_auto_version(self, workflow_id: str, user_id: str) -> Optional[WorkflowVersion]:
+        """
+        以工作流目前的內容建立自動快照，或併入合併視窗內的自動版本
+
+        先鎖定工作流資料列再讀取內容：併發的快照依序執行，後執行者一定讀到較新的內容，
+        不會以較舊的內容覆寫合併後的自動版本（沒有任何版本時也同樣序列化）
+        """
+        try:
+            uuid_obj = uuid.UUID(workflow_id)
+            uuid_user_id = uuid.UUID(str(user_id))
+            workflow = self.db.query(Workflow.nodes, Workflow.edges, Workflow.settings).filter(
+                Workflow.id == uuid_obj
+            ).with_for_update(of=Workflow).first()
+            if not workflow:
+                return None
+
+            manifest = VersionStore(self.db).write_snapshot(workflow.nodes, workflow.edges, workflow.settings or {})
+
+            latest = self.db.query(WorkflowVersion).filter(
+                WorkflowVersion.workflow_id == uuid_obj
+            ).order_by(WorkflowVersion.version_number.desc()).with_for_update().first()
+
+            if latest and latest.manifest == manifest:
+                # 內容未變更
+                self.db.commit()
+                return latest
+
+            if (latest and latest.is_auto and latest.created_by == uuid_user_id and
+                    self._within_coalesce_window(latest.created_at)):
+                latest.manifest = manifest
+                self.db.commit()
+                logger.debug(f"合併自動快照: workflow_id={workflow_id}, version={latest.version_number}")
+                return latest
+
+            version = WorkflowVersion(
+                workflow_id=uuid_obj,
+                version_number=self._allocate_version_number(uuid_obj),
+                version_name="自動儲存",
+                manifest=manifest,
+                is_auto=True,
+                created_by=uuid_user_id
+            )
+            self.db.add(version)
+            self.db.commit()
+
+            logger.info(f"自動快照建立成功: workflow_id={workflow_id}, version={version.version_number}")
+            return version
+
+        except Exception as e:
+            self.db.rollback()
+            logger.warning(f"自動快照建立失敗: workflow_id={workflow_id}, error={str(e)}")
+            return None
+
+    def _allocate_version_number(self, workflow_uuid: uuid.UUID) -> int:
+        """
+        以 UPDATE ... RETURNING 原子配置下一個版本號
+
+        資料列鎖會持有到交易結束，併發建立的版本依序取得號碼；
+        (workflow_id, version_number) 唯一約束作為最後防線。
+        """
+        next_version = self.db.execute(
+            update(Workflow)
+            .where(Workflow.id == workflow_uuid)
+            .values(last_version_number=Workflow.last_version_number + 1)
+            .returning(Workflow.last_version_number),
+            execution_options={"synchronize_session": False}
+        ).scalar()
+        if next_version is None:
+            raise ResourceNotFoundError("工作流", str(workflow_uuid))
+        return next_version
+
+    @staticmethod
+    def _within_coalesce_window(created_at: Optional[datetime]) -> bool:
+        """檢查版本建立時間是否仍在自動快照合併視窗內"""
+        if not created_at:
+            return False
+        now = datetime.now(created_at.tzinfo) if created_at.tzinfo else datetime.utcnow()
+        return (now - created_at).total_seconds() < settings.AUTO_VERSION_COALESCE_SECONDS
+
+    async def diff_workflow_versions(
+        self,
+        workflow_id: str,
+        base_version_id: str,
+        target_version_id: str
+    ) -> Dict[str, Any]:
+        """
+        比對兩個版本的節點、連線與設定差異
+        """
+        base_version = await self.get_workflow_version(workflow_id, base_version_id)
+        if not base_version:
+            raise ResourceNotFoundError("工作流版本", base_version_id)
+        target_version = await self.get_workflow_version(workflow_id, target_version_id)
+        if not target_version:
+            raise ResourceNotFoundError("工作流版本", target_version_id)
+
+        diff = VersionStore(self.db).diff_versions(base_version, target_version)
+        diff.update(base_version_id=base_version_id, target_version_id=target_version_id)
+        return diff
+
     async def publish_workflow_version(self, version_id: str) -> bool:
         """
         發布工作流版本
         """
         try:
-            from app.models.workflow import WorkflowVersion
-
             uuid_obj = uuid.UUID(version_id)
             version = self.db.query(WorkflowVersion).filter(
                 WorkflowVersion.id == uuid_obj
@@ -708,14 +1920,8 @@ class WorkflowService:
         回滾到指定工作流版本
         """
         try:
-            from app.models.workflow import WorkflowVersion
-
             # 取得指定版本
-            version_uuid = uuid.UUID(version_id)
-            version = self.db.query(WorkflowVersion).filter(
-                WorkflowVersion.id == version_uuid
-            ).first()
-
+            version = await self.get_workflow_version(workflow_id, version_id)
             if not version:
                 raise ResourceNotFoundError("工作流版本", version_id)
 
@@ -725,9 +1931,11 @@ class WorkflowService:
                 raise ResourceNotFoundError("工作流", workflow_id)
 
             # 更新工作流為指定版本的內容
-            workflow.nodes = version.nodes
-            workflow.edges = version.edges
-            workflow.settings = version.settings
+            content = self.get_version_content(version)
+            workflow.nodes = content["nodes"]
+            workflow.edges = content["edges"]
+            workflow.settings = content["settings"]
+            workflow.version = (workflow.version or 0) + 1
             workflow.updated_at = datetime.utcnow()
 
             self.db.commit()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+批次執行端到端基準測試
+以單一請求送出 10,000 筆觸發資料（JSON 陣列或 NDJSON），輪詢批次進度直到全部派送完成，
+回報受理延遲、完成時間、吞吐量，以及 50% / 95% / 99% 項目完成時的經過時間
+需要執行中的 API 服務（含 PostgreSQL、Redis 與 n8n 或 scripts/loadtest/stub_n8n.py）與有效的存取權杖
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+# 添加專案根目錄到 Python 路徑
+sys.path.append(str(Path(__file__).parent.parent))
+
+
+def build_payloads(count: int):
+    """模擬金流通知的觸發資料"""
+    return [
+        {
+            "MerchantTradeNo": f"BATCH{index:08d}",
+            "RtnCode": "1",
+            "TradeAmt": str(100 + index % 900),
+            "PaymentType": "Credit_CreditCard",
+        }
+        for index in range(count)
+    ]
+
+
+async def create_workflow(client: httpx.AsyncClient) -> str:
+    """建立測試用工作流"""
+    response = await client.post("/api/v1/workflows/", json={
+        "name": "批次執行基準測試",
+        "tags": ["benchmark"],
+        "is_active": True,
+        "nodes": [{"id": "trigger", "type": "manualTrigger", "position": {"x": 0, "y": 0}, "data": {}}],
+        "edges": [],
+    })
+    response.raise_for_status()
+    return response.json()["id"]
+
+
+async def submit_batch(client: httpx.AsyncClient, workflow_id: str, payloads, ndjson: bool):
+    """送出批次執行請求，回傳批次進度與受理耗時"""
+    if ndjson:
+        body = "\n".join(json.dumps(payload) for payload in payloads).encode()
+        headers = {"Content-Type": "application/x-ndjson"}
+    else:
+        body = json.dumps({"items": payloads}).encode()
+        headers = {"Content-Type": "application/json"}
+
+    start = time.perf_counter()
+    response = await client.post(f"/api/v1/workflows/{workflow_id}/execute/batch", content=body, headers=headers)
+    response.raise_for_status()
+    return response.json(), time.perf_counter() - start
+
+
+async def wait_for_completion(client: httpx.AsyncClient, workflow_id: str, batch_id: str, interval: float, timeout: float):
+    """
+    輪詢批次進度直到完成，回傳進度快照 [(經過秒數, 已完成筆數)] 與最後一次的進度
+    """
+    start = time.perf_counter()
+    snapshots = []
+    while True:
+        response = await client.get(f"/api/v1/workflows/{workflow_id}/execute/batch/{batch_id}")
+        response.raise_for_status()
+        progress = response.json()
+        elapsed = time.perf_counter() - start
+        snapshots.append((elapsed, progress["total"] - progress["pending"]))
+        if progress["status"] == "completed":
+            return snapshots, progress
+        if elapsed > timeout:
+            raise TimeoutError(f"批次在 {timeout:.0f}s 內未完成: {progress}")
+        await asyncio.sleep(interval)
+
+
+def completion_time(snapshots, total: int, ratio: float) -> float:
+    """已完成筆數第一次達到指定比例時的經過時間（精度為輪詢間隔）"""
+    target = total * ratio
+    for elapsed, done in snapshots:
+        if done >= target:
+            return elapsed
+    return snapshots[-1][0]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="批次執行端到端基準測試")
+    parser.add_argument("--base-url", default="http://localhost:8000", help="API 服務位址")
+    parser.add_argument("--token", required=True, help="存取權杖")
+    parser.add_argument("--count", type=int, default=10_000, help="批次筆數")
+    parser.add_argument("--ndjson", action="store_true", help="以 NDJSON 串流送出觸發資料")
+    parser.add_argument("--poll-interval", type=float, default=0.2, help="輪詢進度間隔秒數")
+    parser.add_argument("--timeout", type=float, default=600, help="等待批次完成的最長秒數")
+    parser.add_argument("--workflow-id", help="使用既有工作流（未指定時建立後刪除）")
+    args = parser.parse_args()
+
+    headers = {"Authorization": f"Bearer {args.token}"}
+    async with httpx.AsyncClient(base_url=args.base_url, headers=headers, timeout=300) as client:
+        workflow_id = args.workflow_id or await create_workflow(client)
+        payloads = build_payloads(args.count)
+
+        try:
+            print(f"🔍 送出 {args.count:,} 筆批次執行（{'NDJSON' if args.ndjson else 'JSON 陣列'}）...")
+            start = time.perf_counter()
+            batch, accept_elapsed = await submit_batch(client, workflow_id, payloads, args.ndjson)
+            print(f"✅ 已受理 batch_id={batch['batch_id']}，耗時 {accept_elapsed * 1000:.1f}ms")
+
+            print("🔍 等待派送完成...")
+            snapshots, progress = await wait_for_completion(
+                client, workflow_id, batch["batch_id"], args.poll_interval, args.timeout
+            )
+            total_elapsed = time.perf_counter() - start
+            dispatch_elapsed = snapshots[-1][0]
+
+            print("\n📊 結果:")
+            print(f"  總筆數: {progress['total']:,}（成功 {progress['success']:,}，失敗 {progress['failed']:,}）")
+            print(f"  受理延遲: {accept_elapsed * 1000:.1f}ms（每筆 {accept_elapsed / args.count * 1e6:.1f}µs）")
+            print(f"  派送耗時: {dispatch_elapsed:.2f}s，端到端耗時: {total_elapsed:.2f}s")
+            print(f"  吞吐量: {args.count / total_elapsed:,.0f} 筆/秒（端到端）")
+            for ratio in (0.5, 0.95, 0.99):
+                print(f"  {ratio:.0%} 完成: {(accept_elapsed + completion_time(snapshots, args.count, ratio)):.2f}s")
+        finally:
+            if not args.workflow_id:
+                print("\n🧹 刪除測試工作流...")
+                await client.delete(f"/api/v1/workflows/{workflow_id}")
+                print("✅ 清除完成")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+批次匯入基準測試
+產生 N 筆工作流 NDJSON（預設 10 萬筆），完整走過匯入管線（子行程平行驗證 + COPY 寫入），
+回報每秒匯入筆數；可另外以逐筆 ORM INSERT + commit（原本 create_workflow 的寫入方式，不含 n8n）作為對照
+需要可連線的 PostgreSQL 與一個既有的使用者；--dry-run 只測解析、驗證與 CSV 編碼，不需資料庫
+"""
+
+import argparse
+import gzip
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import orjson
+from sqlalchemy import text
+
+# 添加專案根目錄到 Python 路徑
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.workflow import Workflow
+from app.services import import_service
+
+
+def build_workflow(index: int, node_count: int, marker: str) -> dict:
+    """觸發節點 + HTTP 請求串成一條鏈"""
+    nodes = [{
+        "id": "trigger",
+        "type": "manualTrigger",
+        "position": {"x": 0, "y": 0},
+        "data": {"label": "手動觸發"}
+    }]
+    edges = []
+    previous = "trigger"
+    for position in range(1, node_count):
+        node_id = f"http-{position}"
+        nodes.append({
+            "id": node_id,
+            "type": "httpRequest",
+            "position": {"x": position * 200, "y": 0},
+            "data": {"label": f"請求 {position}", "settings": {"method": "GET", "url": f"https://example.com/{index}/{position}"}}
+        })
+        edges.append({"id": f"e-{previous}-{node_id}", "source": previous, "target": node_id})
+        previous = node_id
+    return {
+        "name": f"匯入基準 {index}",
+        "description": "批次匯入基準測試",
+        "category": marker,
+        "tags": ["benchmark", "import"],
+        "is_active": False,
+        "nodes": nodes,
+        "edges": edges,
+        "settings": {"timezone": "Asia/Taipei"},
+    }
+
+
+def write_payload(rows: int, node_count: int, marker: str, compress: bool):
+    """寫出測試用 NDJSON（或 gzip JSONL）到暫存檔"""
+    payload = tempfile.TemporaryFile()
+    target = gzip.GzipFile(fileobj=payload, mode="wb") if compress else payload
+    for index in range(rows):
+        target.write(orjson.dumps(build_workflow(index, node_count, marker)) + b"\n")
+    if compress:
+        target.close()
+    size = payload.tell()
+    payload.seek(0)
+    return payload, size
+
+
+def dry_run(payload, import_format: str, chunk_size: int) -> tuple:
+    """只執行讀取、解析、驗證與 CSV 編碼（單一行程）"""
+    imported = failed = 0
+    records = import_service.iter_records(payload, import_format)
+    for chunk in import_service._chunks(records, chunk_size, settings.IMPORT_MAX_ITEMS):
+        _, row_ids, errors, _ = import_service.prepare_chunk("workflows", str(uuid.uuid4()), chunk)
+        imported += len(row_ids)
+        failed += len(errors)
+    return imported, failed
+
+
+def orm_baseline(user_id: uuid.UUID, rows: int, node_count: int, marker: str) -> float:
+    """逐筆 ORM INSERT + commit 的寫入速度（筆/秒）"""
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        for index in range(rows):
+            data = build_workflow(index, node_count, marker)
+            db.add(Workflow(user_id=user_id, **data))
+            db.commit()
+        return rows / (time.perf_counter() - started)
+    finally:
+        db.close()
+
+
+def cleanup(marker: str) -> int:
+    db = SessionLocal()
+    try:
+        result = db.execute(text("DELETE FROM workflows WHERE category = :marker"), {"marker": marker})
+        db.commit()
+        return result.rowcount
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批次匯入基準測試")
+    parser.add_argument("--user-id", help="匯入工作流的擁有者（使用者 ID）")
+    parser.add_argument("--rows", type=int, default=100_000, help="匯入的工作流數")
+    parser.add_argument("--nodes", type=int, default=8, help="每個工作流的節點數")
+    parser.add_argument("--workers", type=int, default=settings.IMPORT_VALIDATION_WORKERS, help="驗證子行程數（0 為不使用子行程）")
+    parser.add_argument("--chunk-size", type=int, default=settings.IMPORT_CHUNK_SIZE, help="每區塊筆數")
+    parser.add_argument("--gzip", action="store_true", help="以 gzip JSONL 格式匯入")
+    parser.add_argument("--baseline", type=int, default=0, help="另以逐筆 ORM INSERT 寫入 N 筆作為對照（0 為略過）")
+    parser.add_argument("--dry-run", action="store_true", help="只測解析、驗證與 CSV 編碼，不寫入資料庫")
+    parser.add_argument("--keep", action="store_true", help="保留匯入的工作流（預設結束後刪除）")
+    args = parser.parse_args()
+
+    if not args.dry_run and not args.user_id:
+        parser.error("寫入資料庫時需要 --user-id")
+
+    settings.IMPORT_VALIDATION_WORKERS = args.workers
+    settings.IMPORT_MAX_ITEMS = max(settings.IMPORT_MAX_ITEMS, args.rows)
+    import_format = "jsonl.gz" if args.gzip else "ndjson"
+    marker = f"bench-import-{uuid.uuid4().hex[:12]}"
+
+    print("🚀 批次匯入基準測試")
+    print(f"   工作流數: {args.rows:,}，每個 {args.nodes} 個節點，格式: {import_format}")
+    print(f"   子行程數: {args.workers}，每區塊 {args.chunk_size} 筆")
+
+    started = time.perf_counter()
+    payload, size = write_payload(args.rows, args.nodes, marker, args.gzip)
+    print(f"📦 產生測試資料: {size / 1024 / 1024:.1f} MB（{time.perf_counter() - started:.1f}s）")
+
+    try:
+        if args.dry_run:
+            started = time.perf_counter()
+            imported, failed = dry_run(payload, import_format, args.chunk_size)
+            elapsed = time.perf_counter() - started
+            print(f"✅ 解析與驗證: {imported:,} 筆通過, {failed} 筆失敗, {elapsed:.2f}s, {imported / elapsed:,.0f} 筆/秒（單一行程）")
+            return
+
+        user_id = uuid.UUID(args.user_id)
+        try:
+            result = import_service.import_records("workflows", payload, import_format, user_id, chunk_size=args.chunk_size)
+        finally:
+            import_service.shutdown_executor()
+        print(
+            f"✅ COPY 匯入: {result.imported:,} 筆, 失敗 {result.failed} 筆, "
+            f"{result.duration:.2f}s, {result.rows_per_second:,.0f} 筆/秒"
+        )
+
+        if args.baseline:
+            rate = orm_baseline(user_id, args.baseline, args.nodes, marker)
+            print(f"🐢 逐筆 ORM INSERT: {args.baseline:,} 筆, {rate:,.0f} 筆/秒（約 {result.rows_per_second / rate:.1f}x）")
+    finally:
+        payload.close()
+        if not args.dry_run and not args.keep:
+            removed = cleanup(marker)
+            print(f"🧹 已刪除 {removed:,} 筆測試工作流")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+工作流批次操作基準測試
+比較逐筆呼叫 /workflows/{id}/deactivate 與單次呼叫 /workflows/bulk 的耗時
+需要執行中的 API 服務（含 PostgreSQL）與有效的存取權杖
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+# 添加專案根目錄到 Python 路徑
+sys.path.append(str(Path(__file__).parent.parent))
+
+
+async def create_workflows(client: httpx.AsyncClient, count: int, concurrency: int):
+    """建立測試用工作流"""
+    print(f"🔍 建立 {count:,} 個測試工作流...")
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def create(index: int) -> str:
+        async with semaphore:
+            response = await client.post("/api/v1/workflows/", json={
+                "name": f"批次操作基準測試 {index}",
+                "tags": ["benchmark"],
+            })
+            response.raise_for_status()
+            return response.json()["id"]
+
+    workflow_ids = await asyncio.gather(*(create(index) for index in range(count)))
+    print(f"✅ 已建立 {len(workflow_ids):,} 個工作流")
+    return list(workflow_ids)
+
+
+async def run_single_calls(client: httpx.AsyncClient, workflow_ids):
+    """逐筆停用工作流"""
+    start = time.perf_counter()
+    for workflow_id in workflow_ids:
+        response = await client.post(f"/api/v1/workflows/{workflow_id}/deactivate")
+        response.raise_for_status()
+    return time.perf_counter() - start
+
+
+async def run_bulk_call(client: httpx.AsyncClient, action: str, workflow_ids):
+    """單次批次操作，讀取完整 NDJSON 串流"""
+    start = time.perf_counter()
+    first_item_at = None
+    summary = None
+    async with client.stream("POST", "/api/v1/workflows/bulk", json={
+        "action": action,
+        "workflow_ids": workflow_ids,
+    }) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if not line:
+                continue
+            item = json.loads(line)
+            if first_item_at is None:
+                first_item_at = time.perf_counter() - start
+            if item.get("type") == "summary":
+                summary = item
+    return time.perf_counter() - start, first_item_at or 0.0, summary
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="工作流批次操作基準測試")
+    parser.add_argument("--base-url", default="http://localhost:8000", help="API 服務位址")
+    parser.add_argument("--token", required=True, help="存取權杖")
+    parser.add_argument("--count", type=int, default=1000, help="工作流數量")
+    parser.add_argument("--concurrency", type=int, default=20, help="建立測試資料的並行數")
+    args = parser.parse_args()
+
+    headers = {"Authorization": f"Bearer {args.token}"}
+    async with httpx.AsyncClient(base_url=args.base_url, headers=headers, timeout=300) as client:
+        workflow_ids = await create_workflows(client, args.count, args.concurrency)
+
+        try:
+            print(f"\n🔍 逐筆停用 {len(workflow_ids):,} 個工作流...")
+            single_elapsed = await run_single_calls(client, workflow_ids)
+            print(f"✅ 逐筆呼叫耗時: {single_elapsed:.2f}s（每筆 {single_elapsed / len(workflow_ids) * 1000:.1f}ms）")
+
+            print(f"\n🔍 批次啟用 {len(workflow_ids):,} 個工作流...")
+            bulk_elapsed, first_item, summary = await run_bulk_call(client, "activate", workflow_ids)
+            print(f"✅ 批次呼叫耗時: {bulk_elapsed:.2f}s（首筆結果 {first_item * 1000:.1f}ms）")
+            print(f"  彙總: {summary}")
+
+            print(f"\n📊 加速倍數: {single_elapsed / bulk_elapsed:.1f}x")
+        finally:
+            print("\n🧹 清除測試工作流...")
+            await run_bulk_call(client, "delete", workflow_ids)
+            print("✅ 清除完成")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
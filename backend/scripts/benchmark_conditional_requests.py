@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+條件式請求頻寬測試
+重播一段編輯器操作（切換頁面、開啟工作流、儲存），比較帶與不帶 If-None-Match 時下載的位元組數，
+並驗證過期的 If-Match 會被拒絕 (412)
+需要執行中的 API 服務與有效的存取權杖
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+from pathlib import Path
+
+import httpx
+
+# 添加專案根目錄到 Python 路徑
+sys.path.append(str(Path(__file__).parent.parent))
+
+
+class ReplayClient:
+    """記錄下載量的客戶端；conditional=True 時如同瀏覽器快取，以 ETag 重新驗證"""
+
+    def __init__(self, client: httpx.AsyncClient, conditional: bool):
+        self.client = client
+        self.conditional = conditional
+        self.etags = {}
+        self.bytes = 0
+        self.requests = 0
+        self.not_modified = 0
+
+    async def get(self, url: str):
+        headers = {}
+        if self.conditional and url in self.etags:
+            headers["If-None-Match"] = self.etags[url]
+        response = await self.client.get(url, headers=headers)
+        self.requests += 1
+        self.bytes += len(response.content)
+        if response.status_code == 304:
+            self.not_modified += 1
+        elif response.status_code < 400 and response.headers.get("etag"):
+            self.etags[url] = response.headers["etag"]
+        return response
+
+
+def build_graph(node_count: int, seed: int):
+    """建立測試用的線性圖形"""
+    rng = random.Random(seed)
+    nodes = [{"id": "trigger", "type": "manualTrigger", "position": {"x": 0, "y": 0}, "data": {"label": "開始"}}]
+    edges = []
+    for index in range(1, node_count):
+        nodes.append({
+            "id": f"node-{index}",
+            "type": "httpRequest",
+            "position": {"x": index * 200, "y": rng.randint(0, 600)},
+            "data": {"label": f"節點 {index}", "settings": {"url": f"https://example.com/{index}", "method": "GET"}},
+        })
+        edges.append({"id": f"edge-{index}", "source": nodes[index - 1]["id"], "target": f"node-{index}"})
+    return nodes, edges
+
+
+async def replay(client: ReplayClient, workflow_id: str, nodes, edges, navigations: int, save_every: int):
+    """重播編輯器操作：每次切換頁面載入個人資料、列表、模板、節點目錄與工作流，定期儲存一次"""
+    for step in range(navigations):
+        await client.get("/api/v1/auth/me")
+        await client.get("/api/v1/workflows/")
+        await client.get("/api/v1/workflows/templates/")
+        await client.get("/api/v1/node-types/")
+        await client.get(f"/api/v1/workflows/{workflow_id}")
+        if save_every and step % save_every == save_every - 1:
+            nodes[-1]["position"]["y"] = step
+            response = await client.client.post(
+                f"/api/v1/workflows/{workflow_id}/save",
+                json={"nodes": nodes, "edges": edges}
+            )
+            response.raise_for_status()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="條件式請求頻寬測試")
+    parser.add_argument("--base-url", default="http://localhost:8000", help="API 服務位址")
+    parser.add_argument("--token", required=True, help="存取權杖")
+    parser.add_argument("--nodes", type=int, default=200, help="測試工作流節點數")
+    parser.add_argument("--navigations", type=int, default=50, help="切換頁面次數")
+    parser.add_argument("--save-every", type=int, default=5, help="每幾次切換儲存一次（0 為不儲存）")
+    args = parser.parse_args()
+
+    headers = {"Authorization": f"Bearer {args.token}"}
+    nodes, edges = build_graph(args.nodes, 42)
+    passed = True
+
+    async with httpx.AsyncClient(base_url=args.base_url, headers=headers, timeout=60) as client:
+        response = await client.post("/api/v1/workflows/", json={"name": "條件式請求測試", "nodes": nodes, "edges": edges})
+        response.raise_for_status()
+        workflow_id = response.json()["id"]
+        print(f"✅ 測試工作流已建立: {workflow_id}（{len(nodes)} 個節點）")
+
+        try:
+            results = {}
+            for conditional in (False, True):
+                replay_client = ReplayClient(client, conditional)
+                await replay(replay_client, workflow_id, nodes, edges, args.navigations, args.save_every)
+                results[conditional] = replay_client
+
+            baseline, revalidated = results[False], results[True]
+            saved = 1 - revalidated.bytes / baseline.bytes if baseline.bytes else 0
+            print(f"\n📊 重播 {args.navigations} 次切換頁面（{baseline.requests} 個 GET）")
+            print(f"  無條件式請求: {baseline.bytes / 1024:,.1f} KB")
+            print(f"  If-None-Match: {revalidated.bytes / 1024:,.1f} KB（304 回應 {revalidated.not_modified} 個）")
+            print(f"  節省頻寬: {saved:.1%}")
+
+            # 過期的 If-Match 應被拒絕
+            current = await client.get(f"/api/v1/workflows/{workflow_id}")
+            stale_etag = current.headers.get("etag")
+            await client.post(f"/api/v1/workflows/{workflow_id}/save", json={"nodes": nodes, "edges": edges})
+            response = await client.post(
+                f"/api/v1/workflows/{workflow_id}/save",
+                json={"nodes": nodes, "edges": edges},
+                headers={"If-Match": stale_etag}
+            )
+            if response.status_code == 412:
+                print("\n✅ 過期的 If-Match 被拒絕 (412)")
+            else:
+                passed = False
+                print(f"\n❌ 過期的 If-Match 應回應 412，實際為 {response.status_code}")
+        finally:
+            await client.delete(f"/api/v1/workflows/{workflow_id}")
+
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
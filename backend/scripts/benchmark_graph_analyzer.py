@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+圖形分析引擎基準測試
+量測大型工作流圖形（預設 10,000 個節點）的拓撲排序、環路/可到達性檢查與參數驗證耗時
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# 添加專案根目錄到 Python 路徑
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.json_schema import compile_schema
+from app.services.graph_analyzer import analyze_graph
+
+# 測試用的節點參數 schema
+SCHEMAS = {
+    "httpRequest": {
+        "type": "object",
+        "required": ["url"],
+        "properties": {
+            "url": {"type": "string", "minLength": 1},
+            "method": {"enum": ["GET", "POST", "PUT", "DELETE"]},
+            "timeout": {"type": "integer", "minimum": 0},
+        },
+    },
+    "setData": {"type": "object", "properties": {"value": {"type": "integer"}}},
+}
+
+
+def build_graph(node_count: int, fan_out: int, cycles: int, seed: int):
+    """建立 DAG 測試圖形：每個節點連向之後的 1..fan_out 個節點，可選擇加入回邊形成環路"""
+    rng = random.Random(seed)
+    nodes = [{"id": "trigger", "type": "manualTrigger", "data": {}}]
+    for index in range(1, node_count):
+        node_type = rng.choice(["httpRequest", "setData", "email"])
+        settings = {"url": f"https://example.com/{index}", "method": "GET"} if node_type == "httpRequest" else {"value": index}
+        nodes.append({"id": f"node-{index}", "type": node_type, "data": {"settings": settings}})
+
+    ids = [node["id"] for node in nodes]
+    edges = []
+    for index in range(node_count - 1):
+        for offset in range(1, rng.randint(1, fan_out) + 1):
+            if index + offset < node_count:
+                edges.append({"id": f"edge-{len(edges)}", "source": ids[index], "target": ids[index + offset]})
+    for _ in range(cycles):
+        source = rng.randrange(node_count // 2, node_count)
+        edges.append({"id": f"edge-{len(edges)}", "source": ids[source], "target": ids[rng.randrange(1, source)]})
+    return nodes, edges
+
+
+def time_calls(func, iterations: int):
+    """重複呼叫並回傳每次耗時（秒）"""
+    durations = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def report(label: str, durations):
+    print(f"  {label}: p50 {statistics.median(durations) * 1000:.2f}ms / max {max(durations) * 1000:.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="圖形分析引擎基準測試")
+    parser.add_argument("--nodes", type=int, default=10000, help="節點數量")
+    parser.add_argument("--fan-out", type=int, default=2, help="每個節點最多連出的連線數")
+    parser.add_argument("--iterations", type=int, default=20, help="重複次數")
+    parser.add_argument("--seed", type=int, default=42, help="隨機種子")
+    args = parser.parse_args()
+
+    schemas = {name: compile_schema(schema) for name, schema in SCHEMAS.items()}
+    dag_nodes, dag_edges = build_graph(args.nodes, args.fan_out, 0, args.seed)
+    cyclic_nodes, cyclic_edges = build_graph(args.nodes, args.fan_out, 10, args.seed)
+    print(f"🔍 分析 {len(dag_nodes):,} 個節點、{len(dag_edges):,} 條連線的圖形...")
+
+    analysis = analyze_graph(dag_nodes, dag_edges, schemas)
+    print(f"✅ DAG：錯誤 {len(analysis.errors)}，警告 {len(analysis.warnings)}，拓撲排序 {len(analysis.topological_order or []):,} 個節點")
+    analysis = analyze_graph(cyclic_nodes, cyclic_edges, schemas)
+    print(f"✅ 含回邊：找到 {len(analysis.cycles)} 個環路（{sum(len(cycle) for cycle in analysis.cycles):,} 個節點）")
+
+    print(f"\n📊 {args.iterations} 次")
+    report("結構檢查（儲存/匯入時）", time_calls(lambda: analyze_graph(dag_nodes, dag_edges, structure_only=True), args.iterations))
+    report("完整分析（拓撲排序、可到達性）", time_calls(lambda: analyze_graph(dag_nodes, dag_edges), args.iterations))
+    report("完整分析 + 參數驗證", time_calls(lambda: analyze_graph(dag_nodes, dag_edges, schemas), args.iterations))
+    report("含環路（Tarjan 強連通分量）", time_calls(lambda: analyze_graph(cyclic_nodes, cyclic_edges, schemas), args.iterations))
+
+    # 線性檢查：節點數加倍時耗時應約略加倍
+    big_nodes, big_edges = build_graph(args.nodes * 2, args.fan_out, 0, args.seed)
+    small = statistics.median(time_calls(lambda: analyze_graph(dag_nodes, dag_edges, schemas), args.iterations))
+    big = statistics.median(time_calls(lambda: analyze_graph(big_nodes, big_edges, schemas), args.iterations))
+    print(f"\n📈 節點數加倍耗時比例: {big / small:.2f}x（線性約為 2x）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+工作流增量儲存基準測試
+比較編輯器完整儲存（POST /save）與增量儲存（PATCH /graph）的請求大小、延遲與 WAL 寫入量
+需要執行中的 API 服務（含 PostgreSQL）與有效的存取權杖
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import httpx
+from sqlalchemy import text
+
+# 添加專案根目錄到 Python 路徑
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.database import SessionLocal
+
+
+def build_graph(node_count: int):
+    """建立線性串接的測試圖形"""
+    nodes = [
+        {
+            "id": f"node-{index}",
+            "type": "httpRequest",
+            "position": {"x": index * 220, "y": 300},
+            "data": {"label": f"節點 {index}", "settings": {"url": "https://example.com", "method": "GET"}},
+        }
+        for index in range(node_count)
+    ]
+    edges = [
+        {"id": f"edge-{index}", "source": f"node-{index}", "target": f"node-{index + 1}"}
+        for index in range(node_count - 1)
+    ]
+    return nodes, edges
+
+
+def current_wal_lsn():
+    """取得目前 WAL 位置"""
+    db = SessionLocal()
+    try:
+        return db.execute(text("SELECT pg_current_wal_lsn()")).scalar()
+    finally:
+        db.close()
+
+
+def wal_bytes_since(start_lsn):
+    """計算自 start_lsn 起寫入的 WAL 位元組數（包含其他連線的寫入）"""
+    db = SessionLocal()
+    try:
+        return db.execute(
+            text("SELECT pg_wal_lsn_diff(pg_current_wal_lsn(), :start)"),
+            {"start": start_lsn}
+        ).scalar()
+    finally:
+        db.close()
+
+
+async def measure(label, send, iterations: int, measure_wal: bool):
+    """重複送出請求並統計延遲、請求大小與 WAL 寫入量"""
+    latencies = []
+    request_bytes = 0
+    start_lsn = current_wal_lsn() if measure_wal else None
+
+    for iteration in range(iterations):
+        body = send.build(iteration)
+        payload = json.dumps(body, ensure_ascii=False).encode()
+        request_bytes += len(payload)
+        start = time.perf_counter()
+        response = await send.request(payload)
+        latencies.append(time.perf_counter() - start)
+        response.raise_for_status()
+        send.after(response.json())
+
+    print(f"\n📊 {label}（{iterations} 次）")
+    print(f"  平均請求大小: {request_bytes / iterations:,.0f} bytes")
+    print(f"  延遲 p50/max: {statistics.median(latencies) * 1000:.1f}ms / {max(latencies) * 1000:.1f}ms")
+    if measure_wal:
+        print(f"  平均 WAL 寫入: {float(wal_bytes_since(start_lsn)) / iterations:,.0f} bytes")
+    return statistics.median(latencies)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="工作流增量儲存基準測試")
+    parser.add_argument("--base-url", default="http://localhost:8000", help="API 服務位址")
+    parser.add_argument("--token", required=True, help="存取權杖")
+    parser.add_argument("--nodes", type=int, default=500, help="節點數量")
+    parser.add_argument("--iterations", type=int, default=50, help="每種儲存方式的次數")
+    parser.add_argument("--measure-wal", action="store_true", help="量測 WAL 寫入量（需可連線至資料庫）")
+    args = parser.parse_args()
+
+    headers = {"Authorization": f"Bearer {args.token}", "Content-Type": "application/json"}
+    nodes, edges = build_graph(args.nodes)
+
+    async with httpx.AsyncClient(base_url=args.base_url, headers=headers, timeout=60) as client:
+        print(f"🔍 建立 {args.nodes} 個節點的測試工作流...")
+        response = await client.post("/api/v1/workflows/", json={
+            "name": "增量儲存基準測試",
+            "nodes": nodes,
+            "edges": edges,
+        })
+        response.raise_for_status()
+        workflow = response.json()
+        workflow_id = workflow["id"]
+        print(f"✅ 工作流已建立: {workflow_id}")
+
+        state = {"version": workflow["version"]}
+
+        class FullSave:
+            """模擬拖曳一個節點後送出完整圖形"""
+
+            def build(self, iteration):
+                nodes[0]["position"] = {"x": iteration, "y": 300}
+                return {"nodes": nodes, "edges": edges}
+
+            async def request(self, payload):
+                return await client.post(f"/api/v1/workflows/{workflow_id}/save", content=payload)
+
+            def after(self, body):
+                state["version"] = body["version"]
+
+        class PatchSave:
+            """模擬拖曳一個節點後只送出移動操作"""
+
+            def build(self, iteration):
+                return {
+                    "base_version": state["version"],
+                    "operations": [{"op": "move_node", "id": "node-0", "position": {"x": iteration, "y": 300}}],
+                }
+
+            async def request(self, payload):
+                return await client.patch(f"/api/v1/workflows/{workflow_id}/graph", content=payload)
+
+            def after(self, body):
+                state["version"] = body["version"]
+
+        try:
+            full = await measure("完整儲存 POST /save", FullSave(), args.iterations, args.measure_wal)
+            patch = await measure("增量儲存 PATCH /graph", PatchSave(), args.iterations, args.measure_wal)
+            print(f"\n📊 延遲改善: {full / patch:.1f}x")
+        finally:
+            print("\n🧹 清除測試工作流...")
+            await client.delete(f"/api/v1/workflows/{workflow_id}")
+            print("✅ 清除完成")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
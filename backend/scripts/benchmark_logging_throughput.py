@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+日誌吞吐量基準測試
+以同一個 FastAPI 應用程式（RequestLoggingMiddleware + 端點內一筆服務層日誌）比較四種設定的每秒請求數：
+關閉請求日誌（LOG_LEVEL=WARNING）、同步寫入、佇列（背景執行緒寫入）、佇列 + 成功請求取樣
+日誌以 JSON 寫入暫存檔，控制台輸出導向 /dev/null；不需要 PostgreSQL / Redis
+"""
+
+import argparse
+import asyncio
+import contextlib
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI
+
+# 添加專案根目錄到 Python 路徑
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.core.logging import setup_logging, shutdown_logging
+from app.core.middleware import RequestLoggingMiddleware
+
+
+def build_app() -> FastAPI:
+    import logging
+    logger = logging.getLogger("app.services.benchmark")
+    app = FastAPI()
+
+    @app.get("/workflows/{workflow_id}")
+    async def workflow(workflow_id: str):
+        logger.info(f"載入工作流 {workflow_id}")
+        return {"id": workflow_id}
+
+    app.add_middleware(RequestLoggingMiddleware)
+    return app
+
+
+MODES = {
+    "關閉": {"LOG_LEVEL": "WARNING", "LOG_QUEUE_ENABLED": False, "LOG_REQUEST_SAMPLE_RATE": 1.0},
+    "同步寫入": {"LOG_LEVEL": "INFO", "LOG_QUEUE_ENABLED": False, "LOG_REQUEST_SAMPLE_RATE": 1.0},
+    "佇列": {"LOG_LEVEL": "INFO", "LOG_QUEUE_ENABLED": True, "LOG_REQUEST_SAMPLE_RATE": 1.0},
+    "佇列 + 取樣": {"LOG_LEVEL": "INFO", "LOG_QUEUE_ENABLED": True, "LOG_REQUEST_SAMPLE_RATE": None},
+}
+
+
+def configure(mode: dict, sample_rate: float, log_file: str, console):
+    for name, value in mode.items():
+        setattr(settings, name, sample_rate if value is None else value)
+    settings.LOG_FORMAT = "json"
+    settings.LOG_FILE_PATH = log_file
+    with contextlib.redirect_stdout(console):
+        setup_logging()
+
+
+async def run_round(app: FastAPI, requests: int, concurrency: int) -> float:
+    """回傳每秒請求數（concurrency 個請求同時進行）"""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker(offset: int):
+            for index in range(offset, requests, concurrency):
+                response = await client.get(f"/workflows/{index}")
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(offset) for offset in range(concurrency)))
+        return requests / (time.perf_counter() - started)
+
+
+async def main_async(args):
+    app = build_app()
+    print("🚀 日誌吞吐量基準測試")
+    print(f"   {args.rounds} 回合 x {args.requests} 個請求，並行 {args.concurrency}，取樣比例 {args.sample_rate}")
+
+    results = {name: [] for name in MODES}
+    with tempfile.TemporaryDirectory() as directory, open(os.devnull, "w") as console:
+        log_file = str(Path(directory) / "bench.log")
+        for name, mode in MODES.items():
+            configure(mode, args.sample_rate, log_file, console)
+            await run_round(app, 200, args.concurrency)  # 暖機
+
+        # 每回合依序測所有設定，以中位數抵銷機器負載的起伏
+        for _ in range(args.rounds):
+            for name, mode in MODES.items():
+                configure(mode, args.sample_rate, log_file, console)
+                results[name].append(await run_round(app, args.requests, args.concurrency))
+                shutdown_logging()
+        log_size = Path(log_file).stat().st_size
+
+    baseline = statistics.median(results["關閉"])
+    print(f"\n{'設定':<14}{'請求/秒':>12}{'相對關閉':>12}")
+    for name, values in results.items():
+        throughput = statistics.median(values)
+        print(f"{name:<14}{throughput:>12,.0f}{throughput / baseline * 100:>11.1f}%")
+    print(f"\n📝 共寫入 {log_size / 1024 / 1024:.1f} MB 日誌")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="日誌吞吐量基準測試")
+    parser.add_argument("--rounds", type=int, default=5, help="回合數")
+    parser.add_argument("--requests", type=int, default=2000, help="每回合請求數")
+    parser.add_argument("--concurrency", type=int, default=20, help="同時進行的請求數")
+    parser.add_argument("--sample-rate", type=float, default=0.1, help="「佇列 + 取樣」的成功請求日誌取樣比例")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
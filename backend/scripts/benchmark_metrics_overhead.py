@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+監控指標額外負擔基準測試
+以兩個相同的 FastAPI 應用程式比較：一個未加指標，一個加上 MetricsMiddleware、
+instrument_methods 包裝的服務類別與 instrument_engine 的查詢 / 連線池事件。
+每個請求驗證一份工作流圖形、執行數個查詢並呼叫數個服務方法（接近實際端點的熱路徑），
+另測一個不做任何事的端點作為最差情況，兩者以小區塊交錯執行多回合後比較請求處理時間
+預設查詢記憶體內 SQLite（SELECT 1，不需要 PostgreSQL / Redis）；--database-url 指定 PostgreSQL 時改如
+GET /workflows/{id} 以 ORM 讀取使用者與工作流（建立暫時的測試使用者與工作流，結束時刪除），
+以 PROMETHEUS_MULTIPROC_DIR=<目錄> 執行可測多行程模式
+"""
+
+import argparse
+import asyncio
+import gc
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+# 添加專案根目錄到 Python 路徑
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.metrics import (
+    MULTIPROCESS,
+    REDIS_OPERATION_DURATION,
+    MetricsMiddleware,
+    flush_observations,
+    instrument_engine,
+    instrument_methods,
+)
+from app.models.user import User
+from app.models.workflow import Workflow
+from app.services.graph_analyzer import analyze_graph
+
+
+def build_graph(node_count: int) -> tuple:
+    nodes = [{"id": "trigger", "type": "manualTrigger", "data": {}}]
+    edges = []
+    for index in range(1, node_count):
+        nodes.append({"id": f"n{index}", "type": "httpRequest", "data": {"settings": {"url": f"https://example.com/{index}"}}})
+        edges.append({"id": f"e{index}", "source": nodes[index - 1]["id"], "target": f"n{index}"})
+    return nodes, edges
+
+
+def create_fixture(database_url: str, graph: tuple) -> tuple:
+    """在 PostgreSQL 建立測試使用者與工作流，回傳 (使用者 ID, 工作流 ID)"""
+    nodes, edges = graph
+    with Session(create_engine(database_url)) as db:
+        user = User(name="metrics-bench", email=f"metrics-bench-{uuid.uuid4().hex[:12]}@example.com", password_hash="-")
+        db.add(user)
+        db.flush()
+        workflow = Workflow(user_id=user.id, name="監控指標基準測試", stored_nodes=nodes, stored_edges=edges)
+        db.add(workflow)
+        db.commit()
+        return user.id, workflow.id
+
+
+def delete_fixture(database_url: str, fixture: tuple):
+    user_id, workflow_id = fixture
+    with Session(create_engine(database_url)) as db:
+        db.execute(text("DELETE FROM workflows WHERE id = :id"), {"id": workflow_id})
+        db.execute(text("DELETE FROM users WHERE id = :id"), {"id": user_id})
+        db.commit()
+
+
+def build_app(instrumented: bool, graph: tuple, database_url: str, queries: int, fixture: tuple = None) -> FastAPI:
+    engine = create_engine(database_url)
+
+    class Service:
+        """模擬 WorkflowService：一個方法內執行查詢並回傳工作流圖形"""
+
+        async def load(self) -> tuple:
+            if fixture is None:
+                with engine.connect() as connection:
+                    for _ in range(queries):
+                        connection.execute(text("SELECT 1")).scalar()
+                return graph
+            # 同 get_current_user 與 get_workflow_by_id 的查詢
+            db = Session(engine)
+            try:
+                db.query(User).filter(User.id == fixture[0]).first()
+                workflow = db.query(Workflow).filter(Workflow.id == fixture[1]).first()
+                return workflow.stored_nodes, workflow.stored_edges
+            finally:
+                db.close()
+
+    class Cache:
+        """模擬 RedisCache：不做 I/O 的 async 方法"""
+
+        async def get(self, key: str):
+            return None
+
+        async def set(self, key: str, value) -> bool:
+            return True
+
+    if instrumented:
+        instrument_engine(engine)
+        Service = instrument_methods(track_operation=True)(Service)
+        Cache = instrument_methods(REDIS_OPERATION_DURATION)(Cache)
+
+    service = Service()
+    cache = Cache()
+    app = FastAPI()
+
+    @app.get("/noop")
+    async def noop():
+        return {}
+
+    @app.get("/workflows/{workflow_id}")
+    async def workflow(workflow_id: str):
+        await cache.get(workflow_id)
+        nodes, edges = await service.load()
+        analysis = analyze_graph(nodes, edges)
+        await cache.set(workflow_id, len(analysis.nodes))
+        return {"id": workflow_id, "nodes": len(analysis.nodes)}
+
+    if instrumented:
+        app.add_middleware(MetricsMiddleware)
+    return app
+
+
+async def timed_block(client: httpx.AsyncClient, path: str, start: int, requests: int, flush: bool = False) -> float:
+    """連續送出 requests 個請求，回傳總秒數；flush 時計入寫入緩衝觀測值的時間（實際服務由背景定期寫入）"""
+    started = time.perf_counter()
+    for index in range(start, start + requests):
+        response = await client.get(path.format(index=index))
+        response.raise_for_status()
+    if flush:
+        flush_observations()
+    return time.perf_counter() - started
+
+
+async def compare(label: str, path: str, apps: dict, args) -> tuple:
+    clients = {
+        name: httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+        for name, app in apps.items()
+    }
+    try:
+        # 暖機
+        for client in clients.values():
+            await timed_block(client, path, 0, 200, True)
+
+        # 每回合內兩個應用程式以小區塊交錯執行（區塊先後輪流交換），機器負載的起伏同時落在兩邊；
+        # 計時期間關閉 GC（同 timeit），避免回收停頓隨機落在其中一邊
+        results = {name: [] for name in apps}
+        ratios = []
+        gc_was_enabled = gc.isenabled()
+        for _ in range(args.rounds):
+            totals = {name: 0.0 for name in apps}
+            gc.collect()
+            gc.disable()
+            try:
+                for block_index, start in enumerate(range(0, args.requests, args.block)):
+                    size = min(args.block, args.requests - start)
+                    order = ["baseline", "instrumented"] if block_index % 2 == 0 else ["instrumented", "baseline"]
+                    for name in order:
+                        totals[name] += await timed_block(clients[name], path, start, size, name == "instrumented")
+            finally:
+                if gc_was_enabled:
+                    gc.enable()
+            for name, total in totals.items():
+                results[name].append(total / args.requests * 1_000_000)
+            ratios.append(totals["instrumented"] / totals["baseline"])
+    finally:
+        for client in clients.values():
+            await client.aclose()
+
+    baseline = statistics.median(results["baseline"])
+    instrumented = statistics.median(results["instrumented"])
+    overhead = (statistics.median(ratios) - 1) * 100
+    print(f"{label:<22}{baseline:>12.1f}{instrumented:>12.1f}{instrumented - baseline:>12.1f}{overhead:>10.2f}%")
+    return overhead, baseline * overhead / 100
+
+
+async def main_async(args):
+    graph = build_graph(args.nodes)
+    fixture = create_fixture(args.database_url, graph) if args.database_url.startswith("postgresql") else None
+    try:
+        await run_benchmark(args, graph, fixture)
+    finally:
+        if fixture:
+            delete_fixture(args.database_url, fixture)
+
+
+async def run_benchmark(args, graph: tuple, fixture: tuple):
+    apps = {
+        "baseline": build_app(False, graph, args.database_url, args.queries, fixture),
+        "instrumented": build_app(True, graph, args.database_url, args.queries, fixture),
+    }
+    if fixture:
+        workload = f"ORM 讀取使用者與 {args.nodes} 節點工作流（PostgreSQL）+ 圖形驗證"
+    else:
+        workload = f"{args.nodes} 節點圖形驗證 + {args.queries} 個查詢（{args.database_url.split(':')[0]}）"
+
+    print("🚀 監控指標額外負擔基準測試")
+    print(f"   模式: {'多行程 (mmap)' if MULTIPROCESS else '單一行程'}，{args.rounds} 回合 x {args.requests} 個請求")
+    print(f"   一般端點: {workload} + 2 次快取操作")
+    print(f"\n{'端點':<22}{'未加(µs)':>12}{'加上(µs)':>12}{'差距(µs)':>12}{'負擔':>11}")
+
+    overhead, cost = await compare("一般端點", "/workflows/{index}", apps, args)
+    await compare("空端點（最差情況）", "/noop", apps, args)
+
+    # 指標的成本是每個請求固定的微秒數，負擔比例取決於請求本身的時間（實際資料庫查詢有網路往返）
+    break_even = cost / (args.budget / 100)
+    if overhead < args.budget:
+        print(f"\n✅ 一般端點負擔 {overhead:.2f}% < {args.budget}%")
+    else:
+        print(f"\n⚠️ 一般端點負擔 {overhead:.2f}% 超過 {args.budget}%")
+    print(f"   每個請求約 {cost:.1f}µs，請求時間 ≥ {break_even / 1000:.2f}ms 時負擔低於 {args.budget}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="監控指標額外負擔基準測試")
+    parser.add_argument("--rounds", type=int, default=10, help="回合數（兩個應用程式輪流執行）")
+    parser.add_argument("--requests", type=int, default=1000, help="每回合請求數")
+    parser.add_argument("--block", type=int, default=20, help="交錯執行的區塊大小（請求數）")
+    parser.add_argument("--nodes", type=int, default=30, help="驗證的工作流節點數")
+    parser.add_argument("--queries", type=int, default=3, help="每個請求的 SELECT 1 查詢數（SQLite）")
+    parser.add_argument(
+        "--database-url", default="sqlite://",
+        help="查詢使用的資料庫（預設為記憶體內 SQLite，沒有網路往返，負擔比例最保守；PostgreSQL 時以 ORM 讀取工作流）"
+    )
+    parser.add_argument("--budget", type=float, default=2.0, help="可接受的負擔（%）")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
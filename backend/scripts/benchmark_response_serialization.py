@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+工作流列表序列化基準測試
+比較原本的 from_orm + response_model 二次驗證路徑與 TypeAdapter 單次驗證 + pydantic-core JSON 輸出的耗時
+預設序列化 1,000 個各含 200 個節點的工作流
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+import uuid
+import warnings
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from pydantic import Field, validator
+
+# 添加專案根目錄到 Python 路徑
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.models.workflow import WorkflowStatus
+from app.schemas.workflow import WorkflowBase, WorkflowResponse, dump_workflow_list
+
+
+# 舊模型使用 v1 風格 API，略過棄用警告
+warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+
+class LegacyWorkflowResponse(WorkflowBase):
+    """原本的回應模型（v1 風格 @validator）"""
+    id: str = Field(...)
+    user_id: str = Field(...)
+    status: str = Field(...)
+    version: int = Field(...)
+    nodes: List[Dict[str, Any]] = Field(...)
+    edges: List[Dict[str, Any]] = Field(...)
+    settings: Dict[str, Any] = Field(...)
+    execution_count: int = Field(...)
+    success_count: int = Field(...)
+    failure_count: int = Field(...)
+    created_at: str = Field(...)
+    updated_at: str = Field(...)
+    last_executed_at: Optional[str] = Field(None)
+
+    model_config = {"from_attributes": True}
+
+    @validator('id', 'user_id', pre=True)
+    def convert_uuid_to_string(cls, v):
+        if isinstance(v, uuid.UUID):
+            return str(v)
+        return v
+
+    @validator('created_at', 'updated_at', 'last_executed_at', pre=True)
+    def convert_datetime_to_iso_string(cls, v):
+        if isinstance(v, datetime):
+            return v.isoformat() + "Z"
+        return v
+
+
+def build_workflows(count: int, node_count: int):
+    """建立模擬 ORM 物件的工作流"""
+    now = datetime.utcnow()
+    workflows = []
+    for index in range(count):
+        nodes = [
+            {
+                "id": f"node-{n}",
+                "type": "httpRequest",
+                "position": {"x": n * 200, "y": 100},
+                "data": {"label": f"節點 {n}", "settings": {"url": f"https://example.com/{n}", "method": "GET"}},
+            }
+            for n in range(node_count)
+        ]
+        edges = [{"id": f"edge-{n}", "source": f"node-{n}", "target": f"node-{n + 1}"} for n in range(node_count - 1)]
+        workflows.append(SimpleNamespace(
+            id=uuid.uuid4(), user_id=uuid.uuid4(), name=f"工作流 {index}", description="測試", category="test",
+            tags=["a", "b"], is_active=True, status=WorkflowStatus.ACTIVE, version=index, nodes=nodes, edges=edges,
+            settings={"viewport": {"x": 0, "y": 0, "zoom": 1}}, execution_count=0, success_count=0, failure_count=0,
+            created_at=now, updated_at=now, last_executed_at=None,
+        ))
+    return workflows
+
+
+async def legacy_path(workflows, field) -> bytes:
+    """from_orm 後交由 FastAPI 依 response_model 驗證並序列化（原本的端點行為）"""
+    content = [LegacyWorkflowResponse.from_orm(workflow) for workflow in workflows]
+    value = await serialize_response(field=field, response_content=content, is_coroutine=True)
+    return JSONResponse(content=value).body
+
+
+async def orjson_model_path(workflows, field) -> bytes:
+    """回傳模型交由 FastAPI 處理，但預設回應類別為 ORJSONResponse（未改用快速路徑的端點）"""
+    content = [WorkflowResponse.model_validate(workflow, from_attributes=True) for workflow in workflows]
+    value = await serialize_response(field=field, response_content=content, is_coroutine=True)
+    return ORJSONResponse(content=value).body
+
+
+def fast_path(workflows) -> bytes:
+    """TypeAdapter 單次驗證，pydantic-core 直接輸出 JSON（目前的端點行為）"""
+    return dump_workflow_list(workflows)
+
+
+def time_calls(func, iterations: int):
+    """重複呼叫並回傳每次耗時（秒）"""
+    durations = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="工作流列表序列化基準測試")
+    parser.add_argument("--workflows", type=int, default=1000, help="工作流數量")
+    parser.add_argument("--nodes", type=int, default=200, help="每個工作流的節點數")
+    parser.add_argument("--iterations", type=int, default=3, help="重複次數")
+    args = parser.parse_args()
+
+    workflows = build_workflows(args.workflows, args.nodes)
+    legacy_field = create_response_field(name="legacy", type_=List[LegacyWorkflowResponse])
+    field = create_response_field(name="workflows", type_=List[WorkflowResponse])
+    print(f"🔍 序列化 {args.workflows:,} 個工作流（每個 {args.nodes} 個節點）...")
+
+    fast = fast_path(workflows)
+    if json.loads(asyncio.run(legacy_path(workflows, legacy_field))) != json.loads(fast):
+        print("❌ 新舊路徑的輸出不一致")
+        sys.exit(1)
+    print(f"✅ 新舊路徑輸出一致（{len(fast) / 1024 / 1024:.1f} MB）")
+
+    print(f"\n📊 {args.iterations} 次")
+    results = {
+        "原本（from_orm + response_model 再驗證）": time_calls(
+            lambda: asyncio.run(legacy_path(workflows, legacy_field)), args.iterations
+        ),
+        "模型 + ORJSONResponse 預設": time_calls(
+            lambda: asyncio.run(orjson_model_path(workflows, field)), args.iterations
+        ),
+        "TypeAdapter + pydantic-core JSON": time_calls(lambda: fast_path(workflows), args.iterations),
+    }
+    baseline = statistics.median(next(iter(results.values())))
+    for label, durations in results.items():
+        median = statistics.median(durations)
+        print(f"  {label}: p50 {median * 1000:.0f}ms（{baseline / median:.1f}x）")
+
+
+if __name__ == "__main__":
+    main()
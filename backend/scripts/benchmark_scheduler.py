@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+排程引擎模擬基準測試
+以虛擬時鐘模擬大量排程工作流，量測排程器 CPU 使用量與觸發偏移
+"""
+
+import argparse
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+# 添加專案根目錄到 Python 路徑
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.services.scheduler_service import WorkflowScheduler
+
+
+# 模擬用的排程組合
+SAMPLE_SCHEDULES = [
+    {"cron": "* * * * *"},
+    {"cron": "*/5 * * * *"},
+    {"cron": "0 * * * *"},
+    {"cron": "0 9 * * 1-5"},
+    {"cron": "30 */2 * * *"},
+    {"interval": 600},
+]
+
+
+def percentile(values, pct):
+    """計算百分位數"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(len(ordered) * pct / 100))
+    return ordered[index]
+
+
+def run_simulation(schedule_count: int, duration: int, tick: float):
+    """執行排程模擬"""
+    virtual_now = [1_700_000_000.0]
+    scheduler = WorkflowScheduler(clock=lambda: virtual_now[0])
+
+    print(f"🔍 建立 {schedule_count:,} 個排程...")
+    start = time.process_time()
+    for index in range(schedule_count):
+        schedule = dict(SAMPLE_SCHEDULES[index % len(SAMPLE_SCHEDULES)])
+        scheduler.upsert(str(uuid.uuid4()), schedule)
+    load_cpu = time.process_time() - start
+    print(f"✅ 排程載入完成，CPU 時間: {load_cpu:.3f}s")
+
+    skews = []
+    fires_per_second = {}
+    tick_cpu = []
+    end_time = virtual_now[0] + duration
+
+    while virtual_now[0] < end_time:
+        virtual_now[0] += tick
+        start = time.process_time()
+        due = scheduler.pop_due(virtual_now[0])
+        tick_cpu.append(time.process_time() - start)
+
+        for _, _, fire_at in due:
+            skews.append(virtual_now[0] - fire_at)
+            second = int(fire_at)
+            fires_per_second[second] = fires_per_second.get(second, 0) + 1
+
+    total_cpu = sum(tick_cpu)
+    print(f"\n📊 模擬 {duration}s（tick={tick}s）")
+    print(f"  觸發次數: {len(skews):,}")
+    print(f"  排程器 CPU 時間: {total_cpu:.3f}s ({total_cpu / duration * 100:.2f}% 單核)")
+    print(f"  每 tick CPU p50/p99: {percentile(tick_cpu, 50) * 1000:.3f}ms / {percentile(tick_cpu, 99) * 1000:.3f}ms")
+    print(f"  觸發偏移 p50/p99/max: {percentile(skews, 50):.3f}s / {percentile(skews, 99):.3f}s / {max(skews or [0]):.3f}s")
+    if fires_per_second:
+        print(f"  每秒觸發尖峰: {max(fires_per_second.values()):,}（平均 {statistics.mean(fires_per_second.values()):.1f}）")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="排程引擎模擬基準測試")
+    parser.add_argument("--schedules", type=int, default=100_000, help="排程數量")
+    parser.add_argument("--duration", type=int, default=3600, help="模擬時間（秒）")
+    parser.add_argument("--tick", type=float, default=1.0, help="排程器檢查間隔（秒）")
+    args = parser.parse_args()
+
+    run_simulation(args.schedules, args.duration, args.tick)
+
+
+if __name__ == "__main__":
+    main()
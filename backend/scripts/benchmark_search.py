@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+工作流搜尋基準測試
+以 generate_series 為指定使用者產生大量工作流（預設 100 萬筆），
+對全文檢索、名稱模糊比對、中文片段、標籤與節點類型篩選各跑數次，回報 p50 / p95，
+並在關閉索引掃描的情況下重跑一次作為沒有搜尋索引時的對照
+需要可連線的 PostgreSQL（已執行 add search indexes 遷移）與一個既有的使用者
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+from sqlalchemy import text
+
+# 添加專案根目錄到 Python 路徑
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.database import SessionLocal
+from app.services.search_service import SearchService
+
+# 搜尋情境：(說明, 參數)
+SCENARIOS = [
+    ("全文檢索 英文", {"query": "invoice notification"}),
+    ("全文檢索 片語", {"query": '"line pay"'}),
+    ("模糊名稱 拼錯", {"query": "invoce"}),
+    ("中文片段", {"query": "電子發票"}),
+    ("標籤篩選", {"tags": ["finance"]}),
+    ("節點類型篩選", {"node_types": ["slack"]}),
+    ("全文 + 標籤 + 節點類型", {"query": "order", "tags": ["ecommerce"], "node_types": ["httpRequest"]}),
+]
+
+
+def seed_workflows(user_id: uuid.UUID, rows: int, marker: str):
+    """以單一 INSERT ... SELECT generate_series 產生測試工作流（以 category 標記，便於清除）"""
+    db = SessionLocal()
+    try:
+        db.execute(text("""
+            INSERT INTO workflows (
+                id, user_id, name, description, status, is_active, category, tags,
+                nodes, edges, settings, version, last_version_number,
+                execution_count, success_count, failure_count
+            )
+            SELECT gen_random_uuid(), :user_id,
+                   (ARRAY['LINE Pay 訂單', 'Invoice 電子發票', 'Slack 通知', '綠界金流', 'Order sync', '桃機航班'])[1 + n % 6]
+                       || ' ' || (ARRAY['自動化', 'notification', '每日報表', 'webhook', '同步'])[1 + n % 5] || ' #' || n,
+                   (ARRAY['當訂單成立時送出通知', 'Send invoice notification to finance team', '每天早上彙整報表', 'Sync orders to the warehouse'])[1 + n % 4],
+                   'DRAFT', false, :marker,
+                   ARRAY[(ARRAY['finance', 'ecommerce', 'ops', 'marketing'])[1 + n % 4], 'benchmark'],
+                   jsonb_build_array(
+                       jsonb_build_object('id', 'trigger', 'type', (ARRAY['manualTrigger', 'webhookTrigger', 'scheduleTrigger'])[1 + n % 3]),
+                       jsonb_build_object('id', 'action', 'type', (ARRAY['httpRequest', 'slack', 'email', 'setData', 'linePay'])[1 + n % 5])
+                   ),
+                   jsonb_build_array(jsonb_build_object('id', 'e1', 'source', 'trigger', 'target', 'action')),
+                   '{}'::jsonb, 1, 0, 0, 0, 0
+            FROM generate_series(1, :rows) AS n
+        """), {"user_id": user_id, "marker": marker, "rows": rows})
+        db.commit()
+        db.execute(text("ANALYZE workflows"))
+        db.commit()
+    finally:
+        db.close()
+
+
+def cleanup(marker: str) -> int:
+    db = SessionLocal()
+    try:
+        result = db.execute(text("DELETE FROM workflows WHERE category = :marker"), {"marker": marker})
+        db.commit()
+        return result.rowcount
+    finally:
+        db.close()
+
+
+async def run_scenario(user_id: uuid.UUID, params: dict, repeat: int, without_indexes: bool) -> tuple:
+    """執行情境數次，回傳 (各次毫秒, 結果筆數)"""
+    db = SessionLocal()
+    try:
+        if without_indexes:
+            # 只關閉本交易的點陣圖 / 索引掃描，模擬沒有搜尋索引時的循序掃描
+            db.execute(text("SET LOCAL enable_bitmapscan = off"))
+            db.execute(text("SET LOCAL enable_indexscan = off"))
+        service = SearchService(db)
+        timings = []
+        count = 0
+        for _ in range(repeat):
+            started = time.perf_counter()
+            items, _ = await service.search_workflows(user_id, limit=20, **params)
+            timings.append((time.perf_counter() - started) * 1000)
+            count = len(items)
+        return timings, count
+    finally:
+        db.rollback()
+        db.close()
+
+
+def percentile(values: list, ratio: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * ratio))]
+
+
+async def main_async(args):
+    user_id = uuid.UUID(args.user_id)
+    marker = f"bench-search-{uuid.uuid4().hex[:12]}"
+
+    print("🚀 工作流搜尋基準測試")
+    print(f"   工作流數: {args.rows:,}，每個情境 {args.repeat} 次")
+
+    started = time.perf_counter()
+    seed_workflows(user_id, args.rows, marker)
+    print(f"📦 產生測試資料並 ANALYZE: {time.perf_counter() - started:.1f}s")
+
+    try:
+        print(f"\n{'情境':<24}{'筆數':>6}{'p50(ms)':>10}{'p95(ms)':>10}{'無索引 p50(ms)':>18}")
+        for label, params in SCENARIOS:
+            timings, count = await run_scenario(user_id, params, args.repeat, without_indexes=False)
+            baseline = ""
+            if args.baseline:
+                baseline_timings, _ = await run_scenario(user_id, params, max(1, args.repeat // 5), without_indexes=True)
+                baseline = f"{statistics.median(baseline_timings):.1f}"
+            print(
+                f"{label:<24}{count:>6}{statistics.median(timings):>10.1f}"
+                f"{percentile(timings, 0.95):>10.1f}{baseline:>18}"
+            )
+    finally:
+        if not args.keep:
+            removed = cleanup(marker)
+            print(f"\n🧹 已刪除 {removed:,} 筆測試工作流")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="工作流搜尋基準測試")
+    parser.add_argument("--user-id", required=True, help="測試工作流的擁有者（使用者 ID）")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="產生的工作流數")
+    parser.add_argument("--repeat", type=int, default=20, help="每個情境的執行次數")
+    parser.add_argument("--baseline", action="store_true", help="另外以關閉索引掃描的方式重跑作為對照")
+    parser.add_argument("--keep", action="store_true", help="保留測試工作流（預設結束後刪除）")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
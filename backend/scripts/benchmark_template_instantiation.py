@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+模板建立工作流基準測試
+建立一個測試模板（預設 40 個節點），分別以寫入時複製（單一 INSERT ... SELECT，沿用模板圖形）
+與完整複製（原本的 WorkflowCreate 驗證 + ORM INSERT 完整 nodes / edges，不含 n8n 同步）各建立 N 個工作流，
+回報每次建立的 p50 / p95 延遲、每個工作流的圖形儲存量與 workflows 資料表（含 TOAST）的成長量
+需要可連線的 PostgreSQL（已執行 add workflow source template 遷移）與一個既有的使用者
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+from sqlalchemy import text
+
+# 添加專案根目錄到 Python 路徑
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.database import SessionLocal
+from app.models.workflow import Workflow, WorkflowTemplate
+from app.schemas.workflow import WorkflowCreate
+from app.services.workflow_service import WorkflowService
+
+
+def build_template(node_count: int, marker: str) -> WorkflowTemplate:
+    """觸發節點 + HTTP 請求串成一條鏈"""
+    nodes = [{"id": "trigger", "type": "manualTrigger", "position": {"x": 0, "y": 0}, "data": {"label": "手動觸發"}}]
+    edges = []
+    previous = "trigger"
+    for position in range(1, node_count):
+        node_id = f"http-{position}"
+        nodes.append({
+            "id": node_id,
+            "type": "httpRequest",
+            "position": {"x": position * 200, "y": 0},
+            "data": {
+                "label": f"請求 {position}",
+                "settings": {"method": "POST", "url": f"https://example.com/hooks/{position}", "body": "{}" * 20}
+            }
+        })
+        edges.append({"id": f"e-{previous}-{node_id}", "source": previous, "target": node_id})
+        previous = node_id
+    return WorkflowTemplate(
+        name=f"實例化基準 {marker}",
+        description="模板建立工作流基準測試",
+        category=marker,
+        tags=["benchmark"],
+        nodes=nodes,
+        edges=edges,
+        settings={"timezone": "Asia/Taipei"},
+        is_public=True,
+    )
+
+
+def legacy_instantiate(db, template: WorkflowTemplate, user_id: uuid.UUID):
+    """原本的建立方式：WorkflowCreate 重新驗證整份圖形後以 ORM 寫入完整複本"""
+    data = WorkflowCreate(
+        name=f"{template.name} - 副本",
+        description=template.description,
+        category=template.category,
+        tags=template.tags,
+        nodes=template.nodes,
+        edges=template.edges,
+        settings=template.settings,
+        is_active=False
+    )
+    db.add(Workflow(
+        name=data.name, description=data.description, category=data.category, user_id=user_id,
+        is_active=data.is_active, tags=data.tags or [], nodes=data.nodes, edges=data.edges,
+        settings=data.settings or {}
+    ))
+    db.commit()
+
+
+def table_size(db) -> int:
+    return db.execute(text("SELECT pg_total_relation_size('workflows')")).scalar()
+
+
+def graph_bytes(db, marker: str, shared: bool) -> float:
+    """每個工作流 nodes / edges 欄位的平均儲存量（位元組，pg_column_size 為壓縮後大小）"""
+    value = db.execute(text(f"""
+        SELECT avg(coalesce(pg_column_size(nodes), 0) + coalesce(pg_column_size(edges), 0))
+        FROM workflows
+        WHERE category = :marker AND source_template_id IS {'NOT NULL' if shared else 'NULL'}
+    """), {"marker": marker}).scalar()
+    return float(value or 0)
+
+
+def cleanup(marker: str) -> int:
+    db = SessionLocal()
+    try:
+        removed = db.execute(text("DELETE FROM workflows WHERE category = :marker"), {"marker": marker}).rowcount
+        db.execute(text("DELETE FROM workflow_templates WHERE category = :marker"), {"marker": marker})
+        db.commit()
+        return removed
+    finally:
+        db.close()
+
+
+def percentile(values: list, ratio: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * ratio))]
+
+
+def report(label: str, timings: list, per_workflow: float, growth: int, count: int):
+    print(
+        f"{label:<12}{statistics.median(timings):>10.2f}{percentile(timings, 0.95):>10.2f}"
+        f"{per_workflow:>14,.0f}{growth / 1024 / 1024:>14.1f}{growth / count:>12,.0f}"
+    )
+
+
+async def main_async(args):
+    user_id = uuid.UUID(args.user_id)
+    marker = f"bench-cow-{uuid.uuid4().hex[:12]}"
+
+    print("🚀 模板建立工作流基準測試")
+    print(f"   模板節點數: {args.nodes}，每種方式建立 {args.count:,} 個工作流")
+
+    db = SessionLocal()
+    try:
+        template = build_template(args.nodes, marker)
+        db.add(template)
+        db.commit()
+        template_id = str(template.id)
+
+        # 寫入時複製：服務層的單一 INSERT ... SELECT（使用次數在 Redis 無法使用時改為直接 UPDATE）
+        service = WorkflowService(db)
+        size_before = table_size(db)
+        cow_timings = []
+        for _ in range(args.count):
+            started = time.perf_counter()
+            await service.create_workflow_from_template(template_id, user_id)
+            cow_timings.append((time.perf_counter() - started) * 1000)
+        db.expunge_all()
+        cow_growth = table_size(db) - size_before
+
+        # 完整複製：原本的建立方式（不含 n8n 同步）
+        template = db.get(WorkflowTemplate, uuid.UUID(template_id))
+        size_before = table_size(db)
+        full_timings = []
+        for _ in range(args.count):
+            started = time.perf_counter()
+            legacy_instantiate(db, template, user_id)
+            full_timings.append((time.perf_counter() - started) * 1000)
+        db.expunge_all()
+        full_growth = table_size(db) - size_before
+
+        print(f"\n{'方式':<12}{'p50(ms)':>10}{'p95(ms)':>10}{'圖形(B/筆)':>14}{'表成長(MB)':>14}{'B/筆':>12}")
+        report("寫入時複製", cow_timings, graph_bytes(db, marker, shared=True), cow_growth, args.count)
+        report("完整複製", full_timings, graph_bytes(db, marker, shared=False), full_growth, args.count)
+    finally:
+        db.close()
+        if not args.keep:
+            removed = cleanup(marker)
+            print(f"\n🧹 已刪除 {removed:,} 筆測試工作流與測試模板")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="模板建立工作流基準測試")
+    parser.add_argument("--user-id", required=True, help="測試工作流的擁有者（使用者 ID）")
+    parser.add_argument("--count", type=int, default=1000, help="每種方式建立的工作流數")
+    parser.add_argument("--nodes", type=int, default=40, help="測試模板的節點數")
+    parser.add_argument("--keep", action="store_true", help="保留測試資料（預設結束後刪除）")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+工作流版本儲存基準測試
+模擬編輯器反覆建立版本快照，比較完整複本與內容定址儲存的空間用量、重建與比對耗時
+blob 以記憶體字典代替 workflow_blobs 資料表，量測的是儲存量與 CPU 成本（不含資料庫往返）
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+# 添加專案根目錄到 Python 路徑
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.services.version_store import VersionStore, build_snapshot
+
+
+class InMemoryVersionStore(VersionStore):
+    """以字典保存 blob 的版本儲存"""
+
+    def __init__(self):
+        super().__init__(db=None)
+        self.blobs = {}
+
+    def write_snapshot(self, nodes, edges, settings):
+        manifest, blobs = build_snapshot(nodes, edges, settings)
+        new_bytes = 0
+        for blob_hash, content in blobs.items():
+            if blob_hash not in self.blobs:
+                self.blobs[blob_hash] = json.loads(json.dumps(content))
+                new_bytes += len(json.dumps(content, separators=(",", ":"), ensure_ascii=False))
+        return manifest, new_bytes
+
+    def load_blobs(self, hashes, cache=None):
+        cache = cache if cache is not None else {}
+        for blob_hash in set(hashes):
+            if blob_hash not in cache:
+                cache[blob_hash] = self.blobs[blob_hash]
+        return cache
+
+
+def build_graph(node_count: int):
+    """建立測試圖形"""
+    nodes = [
+        {
+            "id": f"node-{index}",
+            "type": "httpRequest",
+            "position": {"x": index * 220, "y": 300},
+            "data": {"label": f"節點 {index}", "settings": {"url": f"https://example.com/{index}", "method": "GET"}},
+        }
+        for index in range(node_count)
+    ]
+    edges = [
+        {"id": f"edge-{index}", "source": f"node-{index}", "target": f"node-{index + 1}"}
+        for index in range(node_count - 1)
+    ]
+    return nodes, edges
+
+
+def mutate(nodes, edges, rng: random.Random, counter):
+    """模擬一次編輯：移動、修改、新增或刪除節點"""
+    action = rng.random()
+    if action < 0.6 or len(nodes) < 2:
+        node = rng.choice(nodes)
+        node["position"] = {"x": node["position"]["x"] + rng.randint(-50, 50), "y": node["position"]["y"]}
+    elif action < 0.85:
+        node = rng.choice(nodes)
+        node["data"] = dict(node["data"], label=f"{node['data']['label']}*")
+    elif action < 0.95:
+        counter[0] += 1
+        new_id = f"node-new-{counter[0]}"
+        source = rng.choice(nodes)["id"]
+        nodes.insert(rng.randrange(len(nodes)), {
+            "id": new_id, "type": "set", "position": {"x": 0, "y": 0}, "data": {"label": new_id},
+        })
+        edges.append({"id": f"edge-{new_id}", "source": source, "target": new_id})
+    else:
+        removed = nodes.pop(rng.randrange(len(nodes)))
+        edges[:] = [edge for edge in edges if removed["id"] not in (edge["source"], edge["target"])]
+
+
+def percentile(values, pct):
+    """計算百分位數"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="工作流版本儲存基準測試")
+    parser.add_argument("--nodes", type=int, default=500, help="節點數量")
+    parser.add_argument("--versions", type=int, default=1000, help="版本數量")
+    parser.add_argument("--edits", type=int, default=3, help="每個版本之間的編輯次數")
+    parser.add_argument("--seed", type=int, default=42, help="隨機種子")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    counter = [0]
+    nodes, edges = build_graph(args.nodes)
+    settings = {"timezone": "Asia/Taipei"}
+    store = InMemoryVersionStore()
+
+    full_copy_bytes = 0
+    content_addressed_bytes = 0
+    versions = []
+
+    print(f"🔍 建立 {args.versions:,} 個版本（{args.nodes} 個節點，每版 {args.edits} 次編輯）...")
+    write_times = []
+    for _ in range(args.versions):
+        for _ in range(args.edits):
+            mutate(nodes, edges, rng, counter)
+
+        full_copy_bytes += len(json.dumps({"nodes": nodes, "edges": edges, "settings": settings},
+                                          separators=(",", ":"), ensure_ascii=False))
+
+        start = time.perf_counter()
+        manifest, new_bytes = store.write_snapshot(nodes, edges, settings)
+        write_times.append(time.perf_counter() - start)
+        content_addressed_bytes += new_bytes + len(json.dumps(manifest, separators=(",", ":")))
+        versions.append(SimpleNamespace(manifest=manifest, nodes=None, edges=None, settings=None))
+
+    print(f"\n📊 每 {args.versions:,} 個版本的儲存量")
+    print(f"  完整複本: {full_copy_bytes / 1024 / 1024:,.2f} MB")
+    print(f"  內容定址: {content_addressed_bytes / 1024 / 1024:,.2f} MB（blob 數 {len(store.blobs):,}）")
+    print(f"  節省: {(1 - content_addressed_bytes / full_copy_bytes) * 100:.1f}%")
+    print(f"  建立快照 p50/p99: {percentile(write_times, 50) * 1000:.2f}ms / {percentile(write_times, 99) * 1000:.2f}ms")
+
+    read_times = []
+    for version in rng.sample(versions, min(200, len(versions))):
+        start = time.perf_counter()
+        store.read_version(version)
+        read_times.append(time.perf_counter() - start)
+    print(f"\n📊 重建版本內容 p50/p99: {percentile(read_times, 50) * 1000:.2f}ms / {percentile(read_times, 99) * 1000:.2f}ms")
+
+    diff_times = []
+    changed_items = []
+    for index in rng.sample(range(1, len(versions)), min(200, len(versions) - 1)):
+        start = time.perf_counter()
+        diff = store.diff_versions(versions[index - 1], versions[index])
+        diff_times.append(time.perf_counter() - start)
+        changed_items.append(sum(len(diff["nodes"][key]) for key in ("added", "removed", "changed")))
+    print(f"📊 相鄰版本比對 p50/p99: {percentile(diff_times, 50) * 1000:.2f}ms / {percentile(diff_times, 99) * 1000:.2f}ms"
+          f"（平均變更節點 {statistics.mean(changed_items):.1f}）")
+
+    # 驗證重建內容與最後一版一致
+    assert store.read_version(versions[-1])["nodes"] == nodes, "重建內容不一致"
+    print("\n✅ 重建內容驗證通過")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""
+負載測試情境
+
+每個情境先以 setup 準備資料（使用者、工作流），之後由多個 worker 反覆呼叫 request，
+每次呼叫送出一個 HTTP 請求並回傳回應，由執行器計時與判斷成敗。
+"""
+
+import random
+import uuid
+from typing import Dict, List, Optional
+
+import httpx
+
+API = "/api/v1"
+PASSWORD = "loadtest-password"
+
+
+def build_graph(node_count: int) -> Dict[str, list]:
+    """觸發節點 + HTTP 請求串成一條鏈"""
+    nodes = [{"id": "trigger", "type": "manualTrigger", "position": {"x": 0, "y": 0}, "data": {"label": "手動觸發"}}]
+    edges = []
+    for index in range(1, node_count):
+        nodes.append({
+            "id": f"n{index}",
+            "type": "httpRequest",
+            "position": {"x": index * 200, "y": 0},
+            "data": {"label": f"請求 {index}", "settings": {"method": "POST", "url": f"https://example.com/{index}"}},
+        })
+        edges.append({"id": f"e{index}", "source": nodes[index - 1]["id"], "target": f"n{index}"})
+    return {"nodes": nodes, "edges": edges}
+
+
+class LoadContext:
+    """所有情境共用的測試資料"""
+
+    __slots__ = ("run_id", "users", "workflows", "node_count")
+
+    def __init__(self, node_count: int):
+        self.run_id = uuid.uuid4().hex[:8]
+        # (電子郵件, 存取權杖)
+        self.users: List[tuple] = []
+        # 使用者索引 -> 工作流 ID 列表
+        self.workflows: Dict[int, List[str]] = {}
+        self.node_count = node_count
+
+    def headers(self, user_index: int) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.users[user_index % len(self.users)][1]}"}
+
+
+async def prepare(client: httpx.AsyncClient, ctx: LoadContext, users: int, workflows_per_user: int):
+    """註冊並登入測試使用者，每人建立數個工作流"""
+    graph = build_graph(ctx.node_count)
+    for user_index in range(users):
+        email = f"loadtest-{ctx.run_id}-{user_index}@example.com"
+        response = await client.post(f"{API}/auth/register", json={
+            "email": email, "password": PASSWORD, "full_name": f"負載測試 {user_index}"
+        })
+        response.raise_for_status()
+        response = await client.post(f"{API}/auth/login", json={"username": email, "password": PASSWORD})
+        response.raise_for_status()
+        ctx.users.append((email, response.json()["access_token"]))
+
+        ctx.workflows[user_index] = []
+        for workflow_index in range(workflows_per_user):
+            response = await client.post(f"{API}/workflows/", headers=ctx.headers(user_index), json={
+                "name": f"負載測試工作流 {user_index}-{workflow_index}",
+                "description": "訂單建立後通知 Line 並開立電子發票",
+                "category": "loadtest",
+                "tags": ["loadtest", f"user-{user_index}"],
+                "is_active": True,
+                **graph,
+            })
+            response.raise_for_status()
+            ctx.workflows[user_index].append(response.json()["id"])
+
+
+class Scenario:
+    """負載測試情境：request 送出一個請求；success_statuses 以外的狀態碼計為錯誤"""
+
+    name = ""
+    description = ""
+    success_statuses = frozenset({200, 201, 304})
+
+    def __init__(self, ctx: LoadContext):
+        self.ctx = ctx
+
+    async def setup(self, client: httpx.AsyncClient, concurrency: int):
+        pass
+
+    async def request(self, client: httpx.AsyncClient, worker: int, iteration: int) -> httpx.Response:
+        raise NotImplementedError
+
+
+class LoginBurst(Scenario):
+    """大量使用者同時登入（bcrypt 驗證 + 權杖簽發）"""
+
+    name = "login_burst"
+    description = "POST /auth/login"
+
+    async def request(self, client, worker, iteration):
+        email = self.ctx.users[(worker + iteration) % len(self.ctx.users)][0]
+        return await client.post(f"{API}/auth/login", json={"username": email, "password": PASSWORD})
+
+
+class EditorAutosave(Scenario):
+    """編輯器拖曳節點後的增量自動儲存（每個 worker 編輯自己的工作流，不互相衝突）"""
+
+    name = "editor_autosave"
+    description = "PATCH /workflows/{id}/graph（move_node / update_node）"
+
+    async def setup(self, client, concurrency):
+        self.targets = []
+        for worker in range(concurrency):
+            user_index = worker % len(self.ctx.users)
+            workflows = self.ctx.workflows[user_index]
+            workflow_id = workflows[(worker // len(self.ctx.users)) % len(workflows)]
+            response = await client.get(f"{API}/workflows/{workflow_id}", headers=self.ctx.headers(user_index))
+            response.raise_for_status()
+            self.targets.append([user_index, workflow_id, response.json()["version"]])
+
+    async def request(self, client, worker, iteration):
+        target = self.targets[worker]
+        user_index, workflow_id, version = target
+        node_id = f"n{1 + iteration % (self.ctx.node_count - 1)}"
+        if iteration % 5 == 4:
+            operation = {"op": "update_node", "id": node_id, "changes": {"data": {"label": f"請求 {iteration}"}}}
+        else:
+            operation = {"op": "move_node", "id": node_id, "position": {"x": iteration % 1000, "y": iteration % 300}}
+
+        response = await client.patch(
+            f"{API}/workflows/{workflow_id}/graph",
+            headers=self.ctx.headers(user_index),
+            json={"base_version": version, "operations": [operation]},
+        )
+        if response.status_code == 200:
+            target[2] = response.json()["version"]
+        elif response.status_code in (409, 412):
+            # 其他請求修改過（例如重試），重新取得版本
+            latest = await client.get(f"{API}/workflows/{workflow_id}", headers=self.ctx.headers(user_index))
+            if latest.status_code == 200:
+                target[2] = latest.json()["version"]
+        return response
+
+
+class ListBrowsing(Scenario):
+    """瀏覽工作流列表、模板與搜尋（帶上次的 ETag 重新驗證，同瀏覽器行為）"""
+
+    name = "list_browsing"
+    description = "GET /workflows、/workflows/templates/、/workflows/search"
+
+    PATHS = (
+        f"{API}/workflows/?limit=20",
+        f"{API}/workflows/?limit=20&skip=20",
+        f"{API}/workflows/templates/?limit=50",
+        f"{API}/workflows/search?q=通知&limit=20",
+    )
+
+    async def setup(self, client, concurrency):
+        # worker -> 路徑 -> ETag
+        self.etags: List[Dict[str, str]] = [{} for _ in range(concurrency)]
+
+    async def request(self, client, worker, iteration):
+        path = self.PATHS[iteration % len(self.PATHS)]
+        headers = self.ctx.headers(worker)
+        etag = self.etags[worker].get(path)
+        if etag and iteration % 2:
+            headers["If-None-Match"] = etag
+        response = await client.get(path, headers=headers)
+        if response.headers.get("ETag"):
+            self.etags[worker][path] = response.headers["ETag"]
+        return response
+
+
+class ExecuteWorkflow(Scenario):
+    """手動執行工作流（建立執行紀錄、呼叫 n8n、更新統計）"""
+
+    name = "execute"
+    description = "POST /workflows/{id}/execute"
+
+    async def request(self, client, worker, iteration):
+        user_index = worker % len(self.ctx.users)
+        workflows = self.ctx.workflows[user_index]
+        workflow_id = workflows[iteration % len(workflows)]
+        return await client.post(
+            f"{API}/workflows/{workflow_id}/execute",
+            headers=self.ctx.headers(user_index),
+            json={"workflow_id": workflow_id, "trigger_type": "manual", "trigger_data": {"iteration": iteration}},
+        )
+
+
+class WebhookIngestion(Scenario):
+    """
+    金流 webhook 觸發執行：以綠界付款通知的欄位為觸發資料，MerchantTradeNo 作為冪等鍵；
+    約一成請求重送先前的交易（金流供應商的重試），應由冪等機制直接回傳第一次的回應
+    """
+
+    name = "webhook_ingestion"
+    description = "POST /workflows/{id}/execute（webhook 觸發，含一成重送）"
+    success_statuses = frozenset({200, 201, 409})
+
+    async def setup(self, client, concurrency):
+        self.delivered: List[Optional[dict]] = [None] * concurrency
+        self.random = random.Random(0)
+
+    async def request(self, client, worker, iteration):
+        user_index = worker % len(self.ctx.users)
+        workflows = self.ctx.workflows[user_index]
+        workflow_id = workflows[(worker + iteration) % len(workflows)]
+
+        previous = self.delivered[worker]
+        if previous is not None and self.random.random() < 0.1:
+            workflow_id, trigger_data = previous
+        else:
+            trigger_data = {
+                "MerchantID": "3002607",
+                "MerchantTradeNo": f"LT{self.ctx.run_id}{worker:03d}{iteration:08d}",
+                "RtnCode": "1",
+                "RtnMsg": "交易成功",
+                "TradeAmt": str(100 + iteration % 900),
+                "PaymentType": "Credit_CreditCard",
+                "CheckMacValue": uuid.uuid4().hex.upper(),
+            }
+            self.delivered[worker] = (workflow_id, trigger_data)
+
+        return await client.post(
+            f"{API}/workflows/{workflow_id}/execute",
+            headers=self.ctx.headers(user_index),
+            json={"workflow_id": workflow_id, "trigger_type": "webhook", "trigger_data": trigger_data},
+        )
+
+
+class BatchExecution(Scenario):
+    """批次執行：單一請求送出多筆觸發資料（只計受理延遲，派送在背景進行）"""
+
+    name = "batch_execute"
+    description = "POST /workflows/{id}/execute/batch（每批 100 筆）"
+    success_statuses = frozenset({202})
+
+    BATCH_SIZE = 100
+
+    async def request(self, client, worker, iteration):
+        user_index = worker % len(self.ctx.users)
+        workflows = self.ctx.workflows[user_index]
+        workflow_id = workflows[iteration % len(workflows)]
+        return await client.post(
+            f"{API}/workflows/{workflow_id}/execute/batch",
+            headers=self.ctx.headers(user_index),
+            json={"items": [
+                {"MerchantTradeNo": f"LB{self.ctx.run_id}{worker:03d}{iteration:06d}{index:03d}", "RtnCode": "1"}
+                for index in range(self.BATCH_SIZE)
+            ]},
+        )
+
+
+SCENARIOS = {
+    scenario.name: scenario
+    for scenario in (LoginBurst, EditorAutosave, ListBrowsing, ExecuteWorkflow, WebhookIngestion, BatchExecution)
+}
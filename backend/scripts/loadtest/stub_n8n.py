@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+負載測試用的 n8n 模擬伺服器
+實作 N8nService 呼叫的 REST API（工作流建立 / 更新 / 啟用 / 刪除 / 執行、執行紀錄與健康檢查），
+每個回應前等待 --latency-ms 模擬 n8n 的處理時間，讓負載測試不受真實 n8n 的效能與狀態影響
+"""
+
+import argparse
+import asyncio
+import itertools
+
+import uvicorn
+from fastapi import FastAPI, Request
+
+
+def build_app(latency_ms: float) -> FastAPI:
+    app = FastAPI(docs_url=None, redoc_url=None, openapi_url=None)
+    execution_ids = itertools.count(1)
+    delay = latency_ms / 1000
+
+    async def simulated_latency():
+        if delay:
+            await asyncio.sleep(delay)
+
+    @app.get("/healthz")
+    async def healthz():
+        return {"status": "ok"}
+
+    @app.get("/api/v1/workflows")
+    async def list_workflows():
+        await simulated_latency()
+        return {"data": []}
+
+    @app.post("/api/v1/workflows")
+    async def create_workflow(request: Request):
+        await simulated_latency()
+        body = await request.json()
+        return {"id": body.get("id") or str(next(execution_ids)), "name": body.get("name"), "active": False}
+
+    @app.api_route("/api/v1/workflows/{workflow_id}", methods=["GET", "PUT", "PATCH"])
+    async def workflow(workflow_id: str, request: Request):
+        await simulated_latency()
+        body = await request.json() if request.method != "GET" else {}
+        return {"id": workflow_id, "active": body.get("active", False)}
+
+    @app.delete("/api/v1/workflows/{workflow_id}")
+    async def delete_workflow(workflow_id: str):
+        await simulated_latency()
+        return {"id": workflow_id}
+
+    @app.post("/api/v1/workflows/{workflow_id}/execute")
+    async def execute_workflow(workflow_id: str):
+        await simulated_latency()
+        return {"id": str(next(execution_ids)), "workflowId": workflow_id, "finished": True, "data": {}}
+
+    @app.get("/api/v1/executions")
+    async def list_executions():
+        await simulated_latency()
+        return {"data": []}
+
+    @app.get("/api/v1/executions/{execution_id}")
+    async def get_execution(execution_id: str):
+        await simulated_latency()
+        return {"id": execution_id, "finished": True, "status": "success", "data": {}}
+
+    @app.post("/api/v1/executions/{execution_id}/stop")
+    async def stop_execution(execution_id: str):
+        await simulated_latency()
+        return {"id": execution_id, "stopped": True}
+
+    @app.get("/api/v1/node-types")
+    async def node_types():
+        return {"data": []}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="負載測試用的 n8n 模擬伺服器")
+    parser.add_argument("--host", default="127.0.0.1", help="監聽位址")
+    parser.add_argument("--port", type=int, default=5679, help="監聽埠號")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="每個回應的模擬處理時間（毫秒）")
+    args = parser.parse_args()
+
+    print(f"🤖 n8n 模擬伺服器: http://{args.host}:{args.port}（延遲 {args.latency_ms}ms）")
+    uvicorn.run(build_app(args.latency_ms), host=args.host, port=args.port, log_level="warning", access_log=False)
+
+
+if __name__ == "__main__":
+    main()
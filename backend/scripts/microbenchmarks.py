@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+熱路徑微基準測試
+量測純計算的熱點函式（圖形編譯與分析、FormattedJSONB 寫入轉換、RateLimiter.is_allowed、
+JSONFormatter.format、WorkflowResponse 驗證與序列化、verify_token），圖形相關項目以
+10 / 100 / 1,000 / 10,000 個節點的合成圖形各測一次。
+
+統計方式同 pytest-benchmark：先校準每回合的呼叫次數，讓單一回合遠大於計時器解析度，
+再重複多個回合，回報每次呼叫的 min / median / mean / stddev 與每秒次數。
+結果以 JSON 保存在 .benchmarks/（依機器與 Python 版本分目錄），--compare 與先前的結果比較，
+中位數退步超過門檻時回傳非零結束碼。不需要 PostgreSQL / Redis。
+
+    python scripts/microbenchmarks.py --save                   # 量測並保存
+    python scripts/microbenchmarks.py -k compile --compare     # 只測名稱含 compile 的項目並與上次比較
+"""
+
+import argparse
+import json
+import logging
+import math
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+# 添加專案根目錄到 Python 路徑
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.core.logging import JSONFormatter
+from app.core.security import RateLimiter, create_access_token, verify_token
+from app.models.workflow import FormattedJSONB, Workflow
+from app.schemas.workflow import dump_workflow, workflow_adapter
+from app.services.graph_analyzer import analyze_graph
+from app.services.graph_compiler import compile_graph
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_STORAGE = BACKEND_DIR / ".benchmarks"
+
+GRAPH_SIZES = (10, 100, 1_000, 10_000)
+
+# (名稱, 參數列表, 工廠)：工廠依參數完成準備工作並回傳要計時的無參數函式
+BENCHMARKS: List[tuple] = []
+
+
+def benchmark(name: str, params=(None,)):
+    """註冊微基準項目"""
+    def decorate(factory: Callable[[Optional[int]], Callable[[], object]]):
+        BENCHMARKS.append((name, params, factory))
+        return factory
+
+    return decorate
+
+
+def build_graph(node_count: int, seed: int = 0) -> tuple:
+    """合成工作流圖形：觸發節點後接成一條主鏈，每 10 個節點插入一個條件分支與旁支節點"""
+    rng = random.Random(seed)
+    nodes = [{"id": "trigger", "type": "manualTrigger", "position": {"x": 0, "y": 0}, "data": {"label": "開始"}}]
+    edges = []
+    previous = "trigger"
+    while len(nodes) < node_count:
+        index = len(nodes)
+        node_type = "condition" if index % 10 == 0 else rng.choice(["httpRequest", "setData", "email", "linePay"])
+        node_id = f"node-{index}"
+        nodes.append({
+            "id": node_id,
+            "type": node_type,
+            "position": {"x": index * 200, "y": rng.randint(0, 600)},
+            "data": {"label": f"{node_type} {index}", "settings": {"url": f"https://example.com/{index}", "retry": 3}},
+        })
+        edges.append({"id": f"edge-{index}", "source": previous, "target": node_id})
+        if node_type == "condition" and len(nodes) < node_count:
+            branch_id = f"node-{index}-else"
+            nodes.append({"id": branch_id, "type": "email", "position": {"x": index * 200, "y": 800}, "data": {"label": "通知"}})
+            edges.append({"id": f"edge-{index}-else", "source": node_id, "target": branch_id, "sourceHandle": "false"})
+        previous = node_id
+    return nodes, edges
+
+
+# ==================== 微基準項目 ====================
+
+@benchmark("compile_graph", GRAPH_SIZES)
+def bench_compile_graph(size):
+    # 原 _convert_edges_to_connections 的後繼者：節點命名 + 連線轉換為 n8n connections
+    nodes, edges = build_graph(size)
+    return lambda: compile_graph(nodes, edges)
+
+
+@benchmark("analyze_graph", GRAPH_SIZES)
+def bench_analyze_graph(size):
+    nodes, edges = build_graph(size)
+    return lambda: analyze_graph(nodes, edges)
+
+
+@benchmark("FormattedJSONB.process_bind_param", GRAPH_SIZES)
+def bench_formatted_jsonb(size):
+    nodes, _ = build_graph(size)
+    column_type = FormattedJSONB()
+    return lambda: column_type.process_bind_param(nodes, None)
+
+
+@benchmark("RateLimiter.is_allowed", GRAPH_SIZES)
+def bench_rate_limiter(size):
+    # 參數為目前追蹤中的用戶端數；每個用戶端的紀錄以設定的每分鐘上限為界（達上限後不再增加）
+    limit = settings.RATE_LIMIT_PER_MINUTE
+    limiter = RateLimiter()
+    keys = [f"client-{index}" for index in range(size)]
+    # 直接填入紀錄：逐次呼叫 is_allowed 準備需 O(n²)
+    now = datetime.utcnow().timestamp()
+    limiter.requests = {key: [now] * limit for key in keys}
+    counter = iter(range(10**12))
+    return lambda: limiter.is_allowed(keys[next(counter) % size], limit)
+
+
+@benchmark("JSONFormatter.format")
+def bench_json_formatter(_):
+    formatter = JSONFormatter()
+    record = logging.makeLogRecord({
+        "name": "app.services.workflow_service",
+        "levelno": logging.INFO,
+        "levelname": "INFO",
+        "msg": "工作流執行成功: workflow_id=%s, execution_id=%s",
+        "args": (str(uuid.uuid4()), str(uuid.uuid4())),
+        "request_id": str(uuid.uuid4()),
+        "user_id": str(uuid.uuid4()),
+    })
+    return lambda: formatter.format(record)
+
+
+def build_workflow(size: int) -> Workflow:
+    nodes, edges = build_graph(size)
+    now = datetime.utcnow()
+    return Workflow(
+        id=uuid.uuid4(), user_id=uuid.uuid4(), name="微基準工作流", description="訂單通知", category="benchmark",
+        tags=["benchmark"], is_active=True, status="active", version=3, nodes=nodes, edges=edges,
+        settings={"timezone": "Asia/Taipei"}, execution_count=10, success_count=9, failure_count=1,
+        created_at=now, updated_at=now, last_executed_at=now,
+    )
+
+
+@benchmark("WorkflowResponse.validate", GRAPH_SIZES)
+def bench_workflow_validate(size):
+    workflow = build_workflow(size)
+    return lambda: workflow_adapter.validate_python(workflow, from_attributes=True)
+
+
+@benchmark("WorkflowResponse.dump_json", GRAPH_SIZES)
+def bench_workflow_dump(size):
+    workflow = build_workflow(size)
+    return lambda: dump_workflow(workflow)
+
+
+@benchmark("verify_token")
+def bench_verify_token(_):
+    token = create_access_token(subject=str(uuid.uuid4()))
+    return lambda: verify_token(token)
+
+
+# ==================== 量測 ====================
+
+def measure(func: Callable[[], object], min_round_time: float, max_time: float, min_rounds: int) -> dict:
+    """校準每回合呼叫次數後重複量測，回傳每次呼叫的統計（秒）"""
+    for _ in range(3):
+        func()
+
+    started = time.perf_counter()
+    func()
+    single = max(time.perf_counter() - started, 1e-9)
+    loops = max(1, math.ceil(min_round_time / single))
+
+    timings = []
+    deadline = time.perf_counter() + max_time
+    while len(timings) < min_rounds or time.perf_counter() < deadline:
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        timings.append((time.perf_counter() - started) / loops)
+
+    median = statistics.median(timings)
+    return {
+        "min": min(timings),
+        "max": max(timings),
+        "mean": statistics.fmean(timings),
+        "stddev": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        "median": median,
+        "ops": 1 / median,
+        "rounds": len(timings),
+        "loops": loops,
+    }
+
+
+def format_time(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("µs", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f}{unit}"
+    return f"{seconds / 1e-9:.0f}ns"
+
+
+def run(args) -> Dict[str, dict]:
+    results = {}
+    print(f"{'項目':<44}{'min':>11}{'median':>11}{'mean':>11}{'stddev':>11}{'ops/s':>14}{'rounds':>8}")
+    for name, params, factory in BENCHMARKS:
+        for param in params:
+            benchmark_id = name if param is None else f"{name}[{param}]"
+            if args.keyword and args.keyword.lower() not in benchmark_id.lower():
+                continue
+            stats = results[benchmark_id] = measure(factory(param), args.min_round_time, args.max_time, args.min_rounds)
+            print(
+                f"{benchmark_id:<44}{format_time(stats['min']):>11}{format_time(stats['median']):>11}"
+                f"{format_time(stats['mean']):>11}{format_time(stats['stddev']):>11}"
+                f"{stats['ops']:>14,.1f}{stats['rounds']:>8}"
+            )
+    return results
+
+
+# ==================== 保存與比較 ====================
+
+def machine_dir(storage: Path) -> Path:
+    """依機器與 Python 版本分目錄，不同環境的結果不互相比較"""
+    return storage / f"{platform.system()}-{platform.machine()}-{platform.python_implementation()}-{platform.python_version()}"
+
+
+def git_commit() -> str:
+    return subprocess.run(
+        ["git", "rev-parse", "--short=10", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True
+    ).stdout.strip() or "unknown"
+
+
+def save(results: Dict[str, dict], storage: Path) -> Path:
+    directory = machine_dir(storage)
+    directory.mkdir(parents=True, exist_ok=True)
+    number = len(list(directory.glob("*.json"))) + 1
+    commit = git_commit()
+    path = directory / f"{number:04d}_{commit}.json"
+    path.write_text(json.dumps({
+        "commit": commit,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "machine": platform.node(),
+        "python": platform.python_version(),
+        "benchmarks": results,
+    }, ensure_ascii=False, indent=2), encoding="utf-8")
+    return path
+
+
+def load_previous(storage: Path, reference: Optional[str]) -> Optional[Path]:
+    """--compare 未指定時取最近一次保存的結果；指定時可為編號（如 0003）或檔案路徑"""
+    if reference and Path(reference).is_file():
+        return Path(reference)
+    saved = sorted(machine_dir(storage).glob("*.json"))
+    if reference:
+        saved = [path for path in saved if path.name.startswith(reference)]
+    return saved[-1] if saved else None
+
+
+def compare(results: Dict[str, dict], previous_path: Path, threshold: float) -> bool:
+    """以中位數比較，回傳是否有項目退步超過門檻"""
+    previous = json.loads(previous_path.read_text(encoding="utf-8"))
+    print(f"\n📊 與 {previous_path.name}（{previous['commit']}）比較，門檻 {threshold}%")
+    regressed = False
+    for benchmark_id, stats in results.items():
+        before = previous["benchmarks"].get(benchmark_id)
+        if before is None:
+            continue
+        change = (stats["median"] - before["median"]) / before["median"] * 100
+        flag = "⚠️ 退步" if change > threshold else ("🚀 改善" if change < -threshold else "")
+        regressed = regressed or change > threshold
+        print(
+            f"{benchmark_id:<44}{format_time(before['median']):>11} → {format_time(stats['median']):>11}"
+            f"{change:>+9.1f}%  {flag}"
+        )
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="熱路徑微基準測試")
+    parser.add_argument("-k", "--keyword", help="只執行名稱包含此字串的項目")
+    parser.add_argument("--list", action="store_true", help="列出所有項目")
+    parser.add_argument("--max-time", type=float, default=1.0, help="每個項目的量測秒數")
+    parser.add_argument("--min-rounds", type=int, default=5, help="每個項目的最少回合數")
+    parser.add_argument("--min-round-time", type=float, default=0.001, help="每回合的最短秒數（校準呼叫次數）")
+    parser.add_argument("--storage", default=str(DEFAULT_STORAGE), help="結果保存目錄")
+    parser.add_argument("--save", action="store_true", help="保存本次結果")
+    parser.add_argument("--compare", nargs="?", const="", default=None, help="與先前的結果比較（預設為最近一次）")
+    parser.add_argument("--threshold", type=float, default=10.0, help="中位數退步門檻（%）")
+    args = parser.parse_args()
+
+    if args.list:
+        for name, params, _ in BENCHMARKS:
+            print(name if params == (None,) else f"{name}[{', '.join(str(param) for param in params)}]")
+        return
+
+    storage = Path(args.storage)
+    # 先找出比較對象，避免與本次保存的結果比較
+    previous_path = load_previous(storage, args.compare or None) if args.compare is not None else None
+
+    print("🚀 熱路徑微基準測試")
+    results = run(args)
+
+    if args.save:
+        print(f"\n💾 結果已保存: {save(results, storage)}")
+
+    if args.compare is not None:
+        if previous_path is None:
+            print("\n⚠️ 沒有可比較的保存結果（先以 --save 執行一次）")
+        elif compare(results, previous_path, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+串流匯出記憶體壓力測試
+在指定工作流下以 generate_series 產生大量執行記錄（預設 500 萬筆），
+完整走過匯出串流並定期取樣 RSS，驗證記憶體用量不隨筆數成長
+需要可連線的 PostgreSQL（13 以上，使用 gen_random_uuid）與一個既有的工作流
+"""
+
+import argparse
+import resource
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import orjson
+from sqlalchemy import text
+
+# 添加專案根目錄到 Python 路徑
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.database import SessionLocal
+from app.models.workflow import Workflow
+from app.services.export_service import export_executions, gzip_stream
+
+
+def current_rss_mb() -> float:
+    """目前常駐記憶體（MB），無 /proc 時退回最高 RSS"""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def seed_executions(workflow_id: str, rows: int, marker: str) -> int:
+    """以單一 INSERT ... SELECT generate_series 產生測試執行記錄（以 batch_id 標記，便於清除）"""
+    db = SessionLocal()
+    try:
+        workflow = db.query(Workflow.id, Workflow.user_id).filter(Workflow.id == uuid.UUID(workflow_id)).first()
+        if not workflow:
+            raise SystemExit(f"❌ 工作流不存在: {workflow_id}")
+        db.execute(text("""
+            INSERT INTO workflow_executions (
+                id, workflow_id, user_id, execution_id, status, trigger_type, batch_id,
+                trigger_data, result_data, nodes_executed, nodes_successful, nodes_failed,
+                started_at, finished_at, duration
+            )
+            SELECT gen_random_uuid(), :workflow_id, :user_id, gen_random_uuid()::text, 'SUCCESS', 'api', :marker,
+                   jsonb_build_object('index', n), jsonb_build_object('ok', true, 'index', n), 3, 3, 0,
+                   now() - make_interval(secs => :rows - n), now() - make_interval(secs => :rows - n) + interval '1 second', 1.0
+            FROM generate_series(1, :rows) AS n
+        """), {"workflow_id": workflow.id, "user_id": workflow.user_id, "marker": marker, "rows": rows})
+        db.commit()
+        return rows
+    finally:
+        db.close()
+
+
+def cleanup(marker: str):
+    db = SessionLocal()
+    try:
+        db.execute(text("DELETE FROM workflow_executions WHERE batch_id = :marker"), {"marker": marker})
+        db.commit()
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="串流匯出記憶體壓力測試")
+    parser.add_argument("--workflow-id", required=True, help="用來掛載測試執行記錄的工作流 ID")
+    parser.add_argument("--rows", type=int, default=5_000_000, help="產生的執行記錄數")
+    parser.add_argument("--gzip", action="store_true", help="同時測試 gzip 壓縮串流")
+    parser.add_argument("--max-growth-mb", type=float, default=64.0, help="允許的 RSS 成長上限（MB）")
+    parser.add_argument("--resume-at", type=int, default=0, help="在第 N 行中斷並以游標續傳（0 為不測試）")
+    args = parser.parse_args()
+
+    marker = f"export-stress-{uuid.uuid4().hex[:12]}"
+    print(f"🔍 產生 {args.rows:,} 筆執行記錄（標記 {marker}）...")
+    start = time.perf_counter()
+    seed_executions(args.workflow_id, args.rows, marker)
+    print(f"✅ 產生完成（{time.perf_counter() - start:.1f}s）")
+
+    passed = True
+    try:
+        baseline = current_rss_mb()
+        peak = baseline
+        lines = 0
+        size = 0
+        resume_cursor = None
+        start = time.perf_counter()
+
+        chunks = export_executions(uuid.UUID(args.workflow_id))
+        if args.gzip:
+            chunks = gzip_stream(chunks)
+        for chunk in chunks:
+            size += len(chunk)
+            if not args.gzip:
+                lines += chunk.count(b"\n")
+                if args.resume_at and resume_cursor is None and lines >= args.resume_at:
+                    last_line = chunk.rstrip(b"\n").rsplit(b"\n", 1)[-1]
+                    resume_cursor = orjson.loads(last_line).get("_cursor")
+                    resume_lines = lines
+            peak = max(peak, current_rss_mb())
+
+        elapsed = time.perf_counter() - start
+        print(f"\n📊 匯出 {'gzip ' if args.gzip else ''}{size / 1024 / 1024:,.1f} MB，耗時 {elapsed:.1f}s（{args.rows / elapsed:,.0f} 筆/秒）")
+        print(f"  RSS 基準 {baseline:.1f} MB，峰值 {peak:.1f} MB，成長 {peak - baseline:.1f} MB")
+        if peak - baseline > args.max_growth_mb:
+            passed = False
+            print(f"❌ RSS 成長超過 {args.max_growth_mb} MB")
+        if not args.gzip and lines < args.rows + 1:
+            passed = False
+            print(f"❌ 匯出行數不足: {lines:,}")
+
+        if resume_cursor:
+            # 其他工作流既有的執行記錄也會被匯出，因此只比較續傳後的行數
+            remaining = sum(chunk.count(b"\n") for chunk in export_executions(uuid.UUID(args.workflow_id), after=resume_cursor))
+            expected = lines - resume_lines
+            print(f"  續傳：自第 {resume_lines:,} 行後取得 {remaining:,} 行（預期 {expected:,}）")
+            if remaining != expected:
+                passed = False
+                print("❌ 續傳行數不符")
+    finally:
+        cleanup(marker)
+
+    print("\n✅ 匯出記憶體測試通過" if passed else "\n❌ 匯出記憶體測試失敗")
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+版本號併發壓力測試
+同時送出大量版本建立與儲存請求，驗證版本號不重複、連續，且自動快照有被合併
+需要執行中的 API 服務（含 PostgreSQL 與 Redis）與有效的存取權杖
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+import httpx
+
+# 添加專案根目錄到 Python 路徑
+sys.path.append(str(Path(__file__).parent.parent))
+
+
+async def fire_concurrently(count: int, make_request):
+    """同時送出 count 個請求，回傳 (成功回應, 失敗訊息)"""
+    results = await asyncio.gather(*(make_request(index) for index in range(count)), return_exceptions=True)
+    responses, errors = [], []
+    for result in results:
+        if isinstance(result, Exception):
+            errors.append(repr(result))
+        elif result.status_code >= 400:
+            errors.append(f"{result.status_code}: {result.text[:200]}")
+        else:
+            responses.append(result)
+    return responses, errors
+
+
+async def list_all_versions(client: httpx.AsyncClient, workflow_id: str):
+    """分頁取得所有版本"""
+    versions, skip = [], 0
+    while True:
+        response = await client.get(f"/api/v1/workflows/{workflow_id}/versions", params={"skip": skip, "limit": 100})
+        response.raise_for_status()
+        page = response.json()
+        versions.extend(page)
+        if len(page) < 100:
+            return versions
+        skip += 100
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="版本號併發壓力測試")
+    parser.add_argument("--base-url", default="http://localhost:8000", help="API 服務位址")
+    parser.add_argument("--token", required=True, help="存取權杖")
+    parser.add_argument("--concurrency", type=int, default=200, help="同時請求數")
+    args = parser.parse_args()
+
+    headers = {"Authorization": f"Bearer {args.token}"}
+    limits = httpx.Limits(max_connections=args.concurrency)
+    passed = True
+
+    async with httpx.AsyncClient(base_url=args.base_url, headers=headers, timeout=120, limits=limits) as client:
+        response = await client.post("/api/v1/workflows/", json={"name": "版本號併發測試"})
+        response.raise_for_status()
+        workflow_id = response.json()["id"]
+        print(f"✅ 測試工作流已建立: {workflow_id}")
+
+        try:
+            # 1. 同時儲存：自動快照應被去抖動/合併
+            print(f"\n🔍 同時送出 {args.concurrency} 個儲存請求...")
+            responses, errors = await fire_concurrently(args.concurrency, lambda index: client.post(
+                f"/api/v1/workflows/{workflow_id}/save",
+                json={"nodes": [{"id": "n1", "type": "set", "position": {"x": index, "y": 0}, "data": {}}], "edges": []}
+            ))
+            auto_versions = [v for v in await list_all_versions(client, workflow_id) if v.get("is_auto")]
+            print(f"  成功 {len(responses)}，失敗 {len(errors)}，自動快照 {len(auto_versions)} 個")
+            if errors:
+                passed = False
+                print(f"❌ 儲存失敗範例: {errors[:3]}")
+
+            # 2. 同時建立版本：版本號必須唯一且連續
+            print(f"\n🔍 同時送出 {args.concurrency} 個建立版本請求...")
+            responses, errors = await fire_concurrently(args.concurrency, lambda index: client.post(
+                f"/api/v1/workflows/{workflow_id}/versions",
+                json={"version_name": f"併發版本 {index}"}
+            ))
+            print(f"  成功 {len(responses)}，失敗 {len(errors)}")
+            if errors:
+                passed = False
+                print(f"❌ 建立失敗範例: {errors[:3]}")
+
+            numbers = sorted(v["version_number"] for v in await list_all_versions(client, workflow_id))
+            duplicates = len(numbers) - len(set(numbers))
+            contiguous = numbers == list(range(1, len(numbers) + 1))
+            print(f"\n📊 版本總數 {len(numbers)}，重複 {duplicates}，連續: {'是' if contiguous else '否'}")
+            if duplicates or not contiguous:
+                passed = False
+        finally:
+            await client.delete(f"/api/v1/workflows/{workflow_id}")
+
+    print("\n✅ 併發測試通過" if passed else "\n❌ 併發測試失敗")
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
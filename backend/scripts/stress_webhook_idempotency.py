@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Webhook 冪等性重送壓力測試
+同時重送大量重複的 webhook（預設 100 筆交易 × 100 次 = 10,000 個請求），驗證每筆交易只產生一個執行紀錄，
+且重送請求取得的都是第一次的回應（相同的執行 ID）
+
+交易依序輪流使用三種冪等鍵來源：綠界 MerchantTradeNo、Line Pay transactionId（觸發資料）與 Idempotency-Key 標頭。
+第一個請求仍在處理時的重送會收到 409（同金流供應商的重試行為，計為已拒絕的重複投遞）。
+需要執行中的 API 服務（含 PostgreSQL 與 Redis，並以 ENABLE_RATE_LIMITING=false 關閉速率限制）與有效的存取權杖，
+n8n 可用 scripts/loadtest/stub_n8n.py 代替
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict
+from pathlib import Path
+
+import httpx
+
+# 添加專案根目錄到 Python 路徑
+sys.path.append(str(Path(__file__).parent.parent))
+
+
+def build_delivery(run_id: str, index: int) -> tuple:
+    """第 index 筆交易的 webhook 內容：(交易鍵, 觸發資料, 額外標頭)"""
+    reference = f"IDEM{run_id}{index:06d}"
+    if index % 3 == 0:
+        trigger_data = {
+            "MerchantID": "3002607",
+            "MerchantTradeNo": reference,
+            "RtnCode": "1",
+            "RtnMsg": "交易成功",
+            "TradeAmt": str(100 + index),
+            "PaymentType": "Credit_CreditCard",
+        }
+        return reference, trigger_data, {}
+    if index % 3 == 1:
+        trigger_data = {"transactionId": reference, "orderId": f"order-{index}", "returnCode": "0000"}
+        return reference, trigger_data, {}
+    trigger_data = {"event": "payment.completed", "reference": reference}
+    return reference, trigger_data, {"Idempotency-Key": reference}
+
+
+def transaction_of(trigger_data: dict) -> str:
+    return trigger_data.get("MerchantTradeNo") or trigger_data.get("transactionId") or trigger_data.get("reference")
+
+
+async def list_all_executions(client: httpx.AsyncClient, workflow_id: str):
+    """分頁取得所有執行紀錄"""
+    executions, skip = [], 0
+    while True:
+        response = await client.get(f"/api/v1/workflows/{workflow_id}/executions", params={"skip": skip, "limit": 500})
+        response.raise_for_status()
+        page = response.json()
+        executions.extend(page)
+        if len(page) < 500:
+            return executions
+        skip += 500
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Webhook 冪等性重送壓力測試")
+    parser.add_argument("--base-url", default="http://localhost:8000", help="API 服務位址")
+    parser.add_argument("--token", required=True, help="存取權杖")
+    parser.add_argument("--transactions", type=int, default=100, help="不同交易數")
+    parser.add_argument("--replays", type=int, default=100, help="每筆交易的投遞次數")
+    # API 在 async 端點中使用同步資料庫 session，單一 worker 同時請求超過連線池上限（pool_size + max_overflow = 30）
+    # 時事件迴圈會阻塞在取得連線；提高並行數需同時增加 uvicorn worker 數
+    parser.add_argument("--concurrency", type=int, default=25, help="同時請求數")
+    parser.add_argument("--seed", type=int, default=0, help="投遞順序的亂數種子")
+    args = parser.parse_args()
+
+    headers = {"Authorization": f"Bearer {args.token}"}
+    limits = httpx.Limits(max_connections=args.concurrency)
+    run_id = uuid.uuid4().hex[:8]
+    passed = True
+
+    async with httpx.AsyncClient(base_url=args.base_url, headers=headers, timeout=120, limits=limits) as client:
+        response = await client.post("/api/v1/workflows/", json={
+            "name": "冪等性重送測試",
+            "is_active": True,
+            "nodes": [{"id": "trigger", "type": "webhookTrigger", "position": {"x": 0, "y": 0}, "data": {"label": "金流通知"}}],
+            "edges": [],
+        })
+        response.raise_for_status()
+        workflow_id = response.json()["id"]
+        print(f"✅ 測試工作流已建立: {workflow_id}")
+
+        try:
+            deliveries = [build_delivery(run_id, index) for index in range(args.transactions)] * args.replays
+            random.Random(args.seed).shuffle(deliveries)
+            semaphore = asyncio.Semaphore(args.concurrency)
+
+            async def deliver(delivery):
+                reference, trigger_data, extra_headers = delivery
+                async with semaphore:
+                    try:
+                        response = await client.post(
+                            f"/api/v1/workflows/{workflow_id}/execute",
+                            headers=extra_headers,
+                            json={"workflow_id": workflow_id, "trigger_type": "webhook", "trigger_data": trigger_data},
+                        )
+                    except httpx.HTTPError as e:
+                        return reference, None, repr(e)
+                    return reference, response, None
+
+            print(f"\n🔍 同時重送 {len(deliveries):,} 個 webhook（{args.transactions} 筆交易 × {args.replays} 次，並行 {args.concurrency}）...")
+            started = time.perf_counter()
+            results = await asyncio.gather(*(deliver(delivery) for delivery in deliveries))
+            elapsed = time.perf_counter() - started
+
+            statuses = Counter()
+            replayed = 0
+            # 交易鍵 -> 成功回應中的執行 ID
+            returned_ids = defaultdict(set)
+            errors = []
+            for reference, response, error in results:
+                if response is None:
+                    statuses["連線錯誤"] += 1
+                    errors.append(error)
+                    continue
+                statuses[response.status_code] += 1
+                if response.status_code == 200:
+                    returned_ids[reference].add(response.json()["id"])
+                    replayed += response.headers.get("Idempotent-Replayed") == "true"
+                elif response.status_code != 409:
+                    errors.append(f"{response.status_code}: {response.text[:200]}")
+
+            print(f"  耗時 {elapsed:.2f}s（{len(deliveries) / elapsed:,.0f} 請求/秒）")
+            print(f"  狀態碼: {dict(statuses)}，快取回應重播 {replayed:,} 次")
+            if errors:
+                passed = False
+                print(f"❌ 非預期的回應 {len(errors)} 個，範例: {errors[:3]}")
+
+            # 重送取得的必須是第一次的回應
+            inconsistent = {reference: ids for reference, ids in returned_ids.items() if len(ids) > 1}
+            if inconsistent:
+                passed = False
+                print(f"❌ {len(inconsistent)} 筆交易的重送回應了不同的執行 ID，範例: {list(inconsistent.items())[:3]}")
+            unanswered = args.transactions - len(returned_ids)
+            if unanswered:
+                passed = False
+                print(f"❌ {unanswered} 筆交易沒有任何成功的回應")
+
+            # 每筆交易恰好一個執行紀錄
+            executions = await list_all_executions(client, workflow_id)
+            per_transaction = Counter(transaction_of(execution.get("trigger_data") or {}) for execution in executions)
+            duplicated = {reference: count for reference, count in per_transaction.items() if count > 1}
+            missing = args.transactions - len(per_transaction)
+            print(f"\n📊 執行紀錄 {len(executions)} 個，交易 {len(per_transaction)} 筆，重複 {len(duplicated)} 筆，缺少 {missing} 筆")
+            if len(executions) != args.transactions or duplicated or missing:
+                passed = False
+                if duplicated:
+                    print(f"❌ 重複執行範例: {list(duplicated.items())[:3]}")
+
+            mismatched = [
+                reference for reference, ids in returned_ids.items()
+                if ids and {execution["id"] for execution in executions
+                            if transaction_of(execution.get("trigger_data") or {}) == reference} != ids
+            ]
+            if mismatched:
+                passed = False
+                print(f"❌ {len(mismatched)} 筆交易回應的執行 ID 與資料庫紀錄不符，範例: {mismatched[:3]}")
+        finally:
+            await client.delete(f"/api/v1/workflows/{workflow_id}")
+
+    print("\n✅ 冪等性測試通過" if passed else "\n❌ 冪等性測試失敗")
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,22 @@
+"""
+測試共用設定
+"""
+
+import fakeredis
+import pytest
+
+from app.core import redis as redis_module
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """以 fakeredis 取代 Redis 連線池，get_redis() 取得的客戶端都使用同一份記憶體資料"""
+    client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(redis_module, "redis_pool", client.connection_pool)
+    return client
+
+
+@pytest.fixture
+def redis_unavailable(monkeypatch):
+    """模擬 Redis 尚未初始化（get_redis() 拋出例外）"""
+    monkeypatch.setattr(redis_module, "redis_pool", None)
@@ -0,0 +1,61 @@
+"""
+整合測試共用設定
+
+需要執行中的 API 服務（含 PostgreSQL 與 Redis，並以 ENABLE_RATE_LIMITING=false 關閉速率限制），
+n8n 可用 scripts/loadtest/stub_n8n.py 代替。以 INTEGRATION_BASE_URL 指定 API 位址，未設定時略過：
+
+    INTEGRATION_BASE_URL=http://localhost:8000 pytest -m integration
+
+直接存取資料庫的測試使用與 API 服務相同的 DATABASE_URL。
+"""
+
+import os
+import uuid
+
+import httpx
+import pytest
+
+BASE_URL = os.environ.get("INTEGRATION_BASE_URL")
+TEST_PASSWORD = "Integration123!"
+
+
+@pytest.fixture
+def base_url() -> str:
+    if not BASE_URL:
+        pytest.skip("未設定 INTEGRATION_BASE_URL")
+    return BASE_URL
+
+
+@pytest.fixture
+async def api_client(base_url):
+    """註冊一個新使用者，回傳已帶入存取權杖的客戶端"""
+    email = f"it-{uuid.uuid4().hex[:12]}@example.com"
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        response = await client.post("/api/v1/auth/register", json={
+            "email": email, "password": TEST_PASSWORD, "full_name": "整合測試"
+        })
+        response.raise_for_status()
+        response = await client.post("/api/v1/auth/login", json={"username": email, "password": TEST_PASSWORD})
+        response.raise_for_status()
+        token = response.json()["access_token"]
+
+    limits = httpx.Limits(max_connections=200)
+    headers = {"Authorization": f"Bearer {token}"}
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, timeout=120, limits=limits) as client:
+        yield client
+
+
+@pytest.fixture
+async def workflow_factory(api_client):
+    """建立測試工作流，測試結束後刪除"""
+    created = []
+
+    async def create(**fields) -> str:
+        response = await api_client.post("/api/v1/workflows/", json={"name": "整合測試", **fields})
+        response.raise_for_status()
+        created.append(response.json()["id"])
+        return created[-1]
+
+    yield create
+    for workflow_id in created:
+        await api_client.delete(f"/api/v1/workflows/{workflow_id}")
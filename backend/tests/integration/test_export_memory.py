@@ -0,0 +1,92 @@
+"""
+串流匯出記憶體整合測試
+
+在新建立的工作流下以 generate_series 產生大量執行記錄（預設 500 萬筆），
+完整走過匯出串流並定期取樣 RSS，驗證記憶體用量不隨筆數成長、結尾標記的筆數正確。
+需要 PostgreSQL 13 以上（使用 gen_random_uuid）。
+"""
+
+import os
+import resource
+import uuid
+
+import orjson
+import pytest
+from sqlalchemy import text
+
+from app.core.database import SessionLocal
+from app.models.workflow import Workflow
+from app.services.export_service import export_executions
+
+pytestmark = pytest.mark.integration
+
+ROWS = int(os.environ.get("INTEGRATION_EXPORT_ROWS", "5000000"))
+MAX_RSS_GROWTH_MB = float(os.environ.get("INTEGRATION_EXPORT_MAX_RSS_GROWTH_MB", "64"))
+# 每隔幾批取樣一次 RSS（讀取 /proc 的成本遠低於一批序列化）
+SAMPLE_EVERY = 10
+
+
+def current_rss_mb() -> float:
+    """目前常駐記憶體（MB），無 /proc 時退回最高 RSS"""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+@pytest.fixture
+async def seeded_workflow(workflow_factory):
+    """
+    建立工作流並以單一 INSERT ... SELECT 產生執行記錄；
+    結束時先以 SQL 清除執行記錄，避免刪除工作流時由 ORM 逐筆載入
+    """
+    workflow_id = uuid.UUID(await workflow_factory())
+    db = SessionLocal()
+    try:
+        user_id = db.query(Workflow.user_id).filter(Workflow.id == workflow_id).scalar()
+        db.execute(text("""
+            INSERT INTO workflow_executions (
+                id, workflow_id, user_id, execution_id, status, trigger_type,
+                trigger_data, result_data, nodes_executed, nodes_successful, nodes_failed,
+                started_at, finished_at, duration
+            )
+            SELECT gen_random_uuid(), :workflow_id, :user_id, gen_random_uuid()::text, 'SUCCESS', 'api',
+                   jsonb_build_object('index', n), jsonb_build_object('ok', true, 'index', n), 3, 3, 0,
+                   now() - make_interval(secs => :rows - n), now() - make_interval(secs => :rows - n) + interval '1 second', 1.0
+            FROM generate_series(1, :rows) AS n
+        """), {"workflow_id": workflow_id, "user_id": user_id, "rows": ROWS})
+        db.commit()
+    finally:
+        db.close()
+
+    yield workflow_id
+
+    db = SessionLocal()
+    try:
+        db.execute(text("DELETE FROM workflow_executions WHERE workflow_id = :workflow_id"), {"workflow_id": workflow_id})
+        db.commit()
+    finally:
+        db.close()
+
+
+async def test_export_streams_with_bounded_rss(seeded_workflow):
+    baseline = peak = current_rss_mb()
+    lines = 0
+    tail = b""
+
+    for index, chunk in enumerate(export_executions(seeded_workflow)):
+        lines += chunk.count(b"\n")
+        tail = chunk
+        if index % SAMPLE_EVERY == 0:
+            peak = max(peak, current_rss_mb())
+    peak = max(peak, current_rss_mb())
+
+    end_marker = orjson.loads(tail.rstrip(b"\n").rsplit(b"\n", 1)[-1])
+    assert end_marker["_type"] == "end"
+    assert end_marker["count"] == ROWS
+    assert lines == ROWS + 1
+    assert peak - baseline <= MAX_RSS_GROWTH_MB, f"RSS 成長 {peak - baseline:.1f} MB（基準 {baseline:.1f} MB）"
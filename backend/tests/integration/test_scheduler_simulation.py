@@ -0,0 +1,78 @@
+"""
+排程引擎大量模擬整合測試
+
+以虛擬時鐘模擬 100,000 個排程工作流運作一小時（tick = 1 秒），
+驗證每個排程都準時觸發、觸發偏移不超過一個 tick，且排程器 CPU 使用量在預算內。
+不需要外部服務，但執行時間較長，因此標記為整合測試。
+"""
+
+import os
+import time
+import uuid
+from collections import Counter
+
+import pytest
+
+from app.services.scheduler_service import WorkflowScheduler
+
+pytestmark = pytest.mark.integration
+
+SCHEDULE_COUNT = int(os.environ.get("INTEGRATION_SCHEDULER_COUNT", "100000"))
+DURATION = 3600
+TICK = 1.0
+MAX_JITTER = 30
+# 排程器 CPU 時間佔模擬時間的上限（實測約 0.3%）
+CPU_BUDGET_RATIO = 0.02
+
+# 排程 -> 一小時內的觸發次數範圍（抖動可能讓第一次或最後一次落在區間外）
+SCHEDULES = [
+    ({"cron": "* * * * *"}, (59, 60)),
+    ({"cron": "*/5 * * * *"}, (11, 12)),
+    ({"cron": "0 * * * *"}, (0, 1)),
+    ({"cron": "30 */2 * * *"}, (0, 1)),
+    ({"interval": 600}, (5, 6)),
+]
+
+
+def test_hundred_thousand_schedules_fire_on_time():
+    virtual_now = [1_700_000_000.0]
+    scheduler = WorkflowScheduler(clock=lambda: virtual_now[0], max_jitter=MAX_JITTER)
+
+    expected = {}
+    for index in range(SCHEDULE_COUNT):
+        schedule, fire_range = SCHEDULES[index % len(SCHEDULES)]
+        workflow_id = str(uuid.uuid4())
+        scheduler.upsert(workflow_id, dict(schedule))
+        expected[workflow_id] = fire_range
+    assert len(scheduler) == SCHEDULE_COUNT
+
+    fires = Counter()
+    fires_per_second = Counter()
+    max_skew = 0.0
+    cpu = 0.0
+    end_time = virtual_now[0] + DURATION
+
+    while virtual_now[0] < end_time:
+        virtual_now[0] += TICK
+        start = time.process_time()
+        due = scheduler.pop_due(virtual_now[0])
+        cpu += time.process_time() - start
+
+        for entry, nominal, fire_at in due:
+            fires[entry.workflow_id] += 1
+            fires_per_second[int(fire_at)] += 1
+            max_skew = max(max_skew, virtual_now[0] - fire_at)
+            # 抖動只會延後觸發，且不超過設定上限
+            assert nominal <= fire_at <= nominal + MAX_JITTER
+
+    assert max_skew <= TICK
+    assert cpu <= DURATION * CPU_BUDGET_RATIO, f"排程器 CPU 時間 {cpu:.2f}s 超過預算"
+
+    out_of_range = [
+        workflow_id for workflow_id, (low, high) in expected.items()
+        if not low <= fires[workflow_id] <= high
+    ]
+    assert not out_of_range, f"{len(out_of_range)} 個排程的觸發次數不符"
+
+    # 抖動將整點排程分散開來，任一秒的觸發量都遠低於同時觸發的排程數
+    assert max(fires_per_second.values()) < SCHEDULE_COUNT / len(SCHEDULES) / 4
@@ -0,0 +1,55 @@
+"""
+版本號併發整合測試
+
+同時送出 200 個儲存請求與 200 個建立版本請求，
+驗證自動快照有被去抖動 / 合併，且版本號不重複、從 1 開始連續。
+"""
+
+import asyncio
+import os
+
+import pytest
+
+pytestmark = pytest.mark.integration
+
+CONCURRENCY = int(os.environ.get("INTEGRATION_VERSION_CONCURRENCY", "200"))
+
+
+async def list_all_versions(client, workflow_id: str):
+    versions, skip = [], 0
+    while True:
+        response = await client.get(f"/api/v1/workflows/{workflow_id}/versions", params={"skip": skip, "limit": 100})
+        response.raise_for_status()
+        page = response.json()
+        versions.extend(page)
+        if len(page) < 100:
+            return versions
+        skip += 100
+
+
+async def fire_concurrently(make_request):
+    responses = await asyncio.gather(*(make_request(index) for index in range(CONCURRENCY)))
+    failures = [f"{response.status_code}: {response.text[:200]}" for response in responses if response.status_code >= 400]
+    assert not failures, failures[:3]
+
+
+async def test_concurrent_saves_and_versions_get_contiguous_numbers(api_client, workflow_factory):
+    workflow_id = await workflow_factory()
+
+    await fire_concurrently(lambda index: api_client.post(
+        f"/api/v1/workflows/{workflow_id}/save",
+        json={"nodes": [{"id": "n1", "type": "set", "position": {"x": index, "y": 0}, "data": {}}], "edges": []},
+    ))
+    # 第一次儲存立即快照，其餘在去抖動視窗結束時最多補建一次
+    auto_versions = [version for version in await list_all_versions(api_client, workflow_id) if version.get("is_auto")]
+    assert 1 <= len(auto_versions) <= 2
+
+    await fire_concurrently(lambda index: api_client.post(
+        f"/api/v1/workflows/{workflow_id}/versions",
+        json={"version_name": f"併發版本 {index}"},
+    ))
+
+    versions = await list_all_versions(api_client, workflow_id)
+    numbers = sorted(version["version_number"] for version in versions)
+    assert len([version for version in versions if not version.get("is_auto")]) == CONCURRENCY
+    assert numbers == list(range(1, len(numbers) + 1))
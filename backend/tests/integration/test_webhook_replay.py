@@ -0,0 +1,90 @@
+"""
+Webhook 冪等性重送整合測試
+
+同時重送大量重複的 webhook（預設 100 筆交易 × 100 次 = 10,000 個請求），
+驗證每筆交易只產生一個執行紀錄，且重送請求取得的都是第一次的回應。
+"""
+
+import asyncio
+import os
+import random
+import uuid
+from collections import Counter, defaultdict
+
+import pytest
+
+pytestmark = pytest.mark.integration
+
+TRANSACTIONS = int(os.environ.get("INTEGRATION_REPLAY_TRANSACTIONS", "100"))
+REPLAYS = int(os.environ.get("INTEGRATION_REPLAY_COUNT", "100"))
+# API 在 async 端點中使用同步資料庫 session，單一 worker 的並行數不宜超過連線池上限
+CONCURRENCY = int(os.environ.get("INTEGRATION_REPLAY_CONCURRENCY", "25"))
+
+
+def build_delivery(run_id: str, index: int):
+    """第 index 筆交易的 webhook 內容：(交易鍵, 觸發資料, 額外標頭)，輪流使用綠界、LINE Pay 與 Idempotency-Key 標頭"""
+    reference = f"IDEM{run_id}{index:06d}"
+    if index % 3 == 0:
+        trigger_data = {"MerchantID": "3002607", "MerchantTradeNo": reference, "RtnCode": "1", "TradeAmt": str(100 + index)}
+        return reference, trigger_data, {}
+    if index % 3 == 1:
+        return reference, {"transactionId": reference, "orderId": f"order-{index}", "returnCode": "0000"}, {}
+    return reference, {"event": "payment.completed", "reference": reference}, {"Idempotency-Key": reference}
+
+
+def transaction_of(trigger_data: dict) -> str:
+    return trigger_data.get("MerchantTradeNo") or trigger_data.get("transactionId") or trigger_data.get("reference")
+
+
+async def list_all_executions(client, workflow_id: str):
+    executions, skip = [], 0
+    while True:
+        response = await client.get(f"/api/v1/workflows/{workflow_id}/executions", params={"skip": skip, "limit": 500})
+        response.raise_for_status()
+        page = response.json()
+        executions.extend(page)
+        if len(page) < 500:
+            return executions
+        skip += 500
+
+
+async def test_concurrent_replays_execute_each_transaction_once(api_client, workflow_factory):
+    workflow_id = await workflow_factory(
+        is_active=True,
+        nodes=[{"id": "trigger", "type": "webhookTrigger", "position": {"x": 0, "y": 0}, "data": {"label": "金流通知"}}],
+        edges=[],
+    )
+    run_id = uuid.uuid4().hex[:8]
+    deliveries = [build_delivery(run_id, index) for index in range(TRANSACTIONS)] * REPLAYS
+    random.Random(0).shuffle(deliveries)
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def deliver(delivery):
+        reference, trigger_data, headers = delivery
+        async with semaphore:
+            response = await api_client.post(
+                f"/api/v1/workflows/{workflow_id}/execute",
+                headers=headers,
+                json={"workflow_id": workflow_id, "trigger_type": "webhook", "trigger_data": trigger_data},
+            )
+        return reference, response
+
+    results = await asyncio.gather(*(deliver(delivery) for delivery in deliveries))
+
+    # 第一個請求仍在處理時的重送收到 409，其餘皆為 200
+    statuses = Counter(response.status_code for _, response in results)
+    assert set(statuses) <= {200, 409}, statuses
+
+    returned_ids = defaultdict(set)
+    for reference, response in results:
+        if response.status_code == 200:
+            returned_ids[reference].add(response.json()["id"])
+    assert len(returned_ids) == TRANSACTIONS
+    assert all(len(ids) == 1 for ids in returned_ids.values())
+
+    executions = await list_all_executions(api_client, workflow_id)
+    per_transaction = defaultdict(set)
+    for execution in executions:
+        per_transaction[transaction_of(execution.get("trigger_data") or {})].add(execution["id"])
+    assert len(executions) == TRANSACTIONS
+    assert per_transaction == returned_ids
@@ -0,0 +1,137 @@
+"""
+自動版本快照去抖動、合併視窗與版本號配置測試
+"""
+
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.core.config import settings
+from app.core.exceptions import ResourceNotFoundError
+from app.services import workflow_service as workflow_service_module
+from app.services.workflow_service import WorkflowService
+
+pytestmark = pytest.mark.unit
+
+WORKFLOW_ID = "6f1c2a4e-8b0d-4c57-9a3e-2d1f0b7c5e19"
+
+
+@pytest.fixture
+def snapshots(monkeypatch):
+    """記錄快照呼叫而不存取資料庫"""
+    calls = []
+
+    def record(self, workflow_id, user_id):
+        calls.append((workflow_id, user_id))
+        return None
+
+    monkeypatch.setattr(WorkflowService, "_snapshot_auto_version", record)
+    monkeypatch.setattr(workflow_service_module, "SessionLocal", MagicMock)
+    monkeypatch.setattr(settings, "AUTO_VERSION_ENABLED", True)
+    yield calls
+
+    for task in list(workflow_service_module._trailing_auto_version_tasks):
+        task.cancel()
+    # 每個測試使用獨立的事件迴圈，取消的任務不會再執行完成回呼
+    workflow_service_module._trailing_auto_version_tasks.clear()
+    workflow_service_module._trailing_auto_versions.clear()
+
+
+@pytest.fixture
+def service():
+    return WorkflowService(MagicMock())
+
+
+class TestDebounce:
+    async def test_first_save_snapshots_and_later_saves_wait_for_trailing_edge(self, fake_redis, snapshots, service):
+        await service.create_auto_version(WORKFLOW_ID, "user-a")
+        await service.create_auto_version(WORKFLOW_ID, "user-b")
+        await service.create_auto_version(WORKFLOW_ID, "user-c")
+
+        assert snapshots == [(WORKFLOW_ID, "user-a")]
+        assert 0 < await fake_redis.ttl(f"auto_version:{WORKFLOW_ID}") <= settings.AUTO_VERSION_DEBOUNCE_SECONDS
+        # 視窗內只排程一次補建，並歸屬最後儲存的使用者
+        assert workflow_service_module._trailing_auto_versions == {WORKFLOW_ID: "user-c"}
+        assert len(workflow_service_module._trailing_auto_version_tasks) == 1
+
+    async def test_trailing_snapshot_runs_when_window_ends(self, snapshots):
+        WorkflowService._schedule_trailing_auto_version(WORKFLOW_ID, "user-a", 20)
+        WorkflowService._schedule_trailing_auto_version(WORKFLOW_ID, "user-b", 20)
+        await asyncio.sleep(0.1)
+
+        assert snapshots == [(WORKFLOW_ID, "user-b")]
+        assert workflow_service_module._trailing_auto_versions == {}
+        assert not workflow_service_module._trailing_auto_version_tasks
+
+    async def test_flush_pending_snapshots_immediately(self, snapshots):
+        other_id = str(uuid.uuid4())
+        WorkflowService._schedule_trailing_auto_version(WORKFLOW_ID, "user-a", 60_000)
+        WorkflowService._schedule_trailing_auto_version(other_id, "user-b", 60_000)
+
+        await WorkflowService.flush_pending_auto_versions()
+
+        assert sorted(snapshots) == sorted([(WORKFLOW_ID, "user-a"), (other_id, "user-b")])
+        assert workflow_service_module._trailing_auto_versions == {}
+
+    async def test_disabled(self, fake_redis, snapshots, service, monkeypatch):
+        monkeypatch.setattr(settings, "AUTO_VERSION_ENABLED", False)
+        assert await service.create_auto_version(WORKFLOW_ID, "user-a") is None
+        assert snapshots == []
+
+    async def test_redis_unavailable_snapshots_every_save(self, redis_unavailable, snapshots, service):
+        await service.create_auto_version(WORKFLOW_ID, "user-a")
+        await service.create_auto_version(WORKFLOW_ID, "user-a")
+        assert snapshots == [(WORKFLOW_ID, "user-a")] * 2
+
+
+class TestCoalesceWindow:
+    def test_naive_utc_timestamps(self):
+        assert WorkflowService._within_coalesce_window(datetime.utcnow() - timedelta(seconds=10))
+        expired = datetime.utcnow() - timedelta(seconds=settings.AUTO_VERSION_COALESCE_SECONDS + 1)
+        assert not WorkflowService._within_coalesce_window(expired)
+
+    def test_aware_timestamps(self):
+        taipei = timezone(timedelta(hours=8))
+        assert WorkflowService._within_coalesce_window(datetime.now(taipei) - timedelta(seconds=10))
+        expired = datetime.now(timezone.utc) - timedelta(seconds=settings.AUTO_VERSION_COALESCE_SECONDS + 1)
+        assert not WorkflowService._within_coalesce_window(expired)
+
+    def test_missing_timestamp(self):
+        assert not WorkflowService._within_coalesce_window(None)
+
+
+class TestAllocateVersionNumber:
+    def test_returns_incremented_counter_in_one_statement(self, service):
+        service.db.execute.return_value.scalar.return_value = 7
+
+        assert service._allocate_version_number(uuid.UUID(WORKFLOW_ID)) == 7
+        statement = str(service.db.execute.call_args.args[0])
+        assert statement.startswith("UPDATE workflows SET last_version_number=")
+        assert "RETURNING workflows.last_version_number" in statement
+
+    def test_missing_workflow(self, service):
+        service.db.execute.return_value.scalar.return_value = None
+
+        with pytest.raises(ResourceNotFoundError):
+            service._allocate_version_number(uuid.UUID(WORKFLOW_ID))
+
+
+class TestSnapshotAutoVersion:
+    def test_workflow_row_is_locked_before_content_is_read(self, monkeypatch):
+        service = WorkflowService(MagicMock())
+        workflow_query = service.db.query.return_value.filter.return_value
+        locked_when_written = []
+
+        def write_snapshot(store, nodes, edges, settings_):
+            locked_when_written.append(workflow_query.with_for_update.called)
+            return {"format": 1}
+
+        monkeypatch.setattr(workflow_service_module.VersionStore, "write_snapshot", write_snapshot)
+        service._snapshot_auto_version(WORKFLOW_ID, str(uuid.uuid4()))
+
+        assert locked_when_written == [True]
+        workflow_query.with_for_update.return_value.first.assert_called_once()
+        workflow_query.first.assert_not_called()
@@ -0,0 +1,314 @@
+"""
+批次執行：觸發資料解析、建立、有限並行派送、進度與租約，以及中斷批次回收測試
+"""
+
+import asyncio
+import uuid
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+import orjson
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.api.v1.endpoints.workflows import _read_batch_payloads
+from app.core.config import settings
+from app.core.exceptions import ValidationError, WorkflowExecutionError
+from app.models.workflow import ExecutionStatus
+from app.services import batch_sweeper as batch_sweeper_module
+from app.services import workflow_service as workflow_service_module
+from app.services.batch_sweeper import INTERRUPTED_MESSAGE, BatchExecutionSweeper
+from app.services.workflow_service import WorkflowService
+
+pytestmark = pytest.mark.unit
+
+WORKFLOW_ID = "6f1c2a4e-8b0d-4c57-9a3e-2d1f0b7c5e19"
+BATCH_ID = "batch-1"
+BATCH_KEY = WorkflowService._batch_key(BATCH_ID)
+LEASE_KEY = WorkflowService._batch_lease_key(BATCH_ID)
+
+
+def compiled(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+class FakeRequest:
+    """只提供 _read_batch_payloads 用到的介面"""
+
+    def __init__(self, content_type: str, *chunks: bytes):
+        self.headers = {"content-type": content_type}
+        self.chunks = chunks
+
+    async def stream(self):
+        for chunk in self.chunks:
+            yield chunk
+
+    async def json(self):
+        return orjson.loads(b"".join(self.chunks))
+
+
+class TestReadBatchPayloads:
+    async def test_ndjson_lines_split_across_chunks(self):
+        request = FakeRequest("application/x-ndjson", b'{"a": 1}\n{"a"', b': 2}\n\n', b"null\n", b'{"a": 3}')
+        assert await _read_batch_payloads(request) == [{"a": 1}, {"a": 2}, None, {"a": 3}]
+
+    async def test_ndjson_invalid_line_reports_line_number(self):
+        request = FakeRequest("application/x-ndjson", b'{"a": 1}\n\n{oops}\n')
+        with pytest.raises(ValidationError, match="第 3 行不是有效的 JSON"):
+            await _read_batch_payloads(request)
+
+    async def test_ndjson_item_limit(self, monkeypatch):
+        monkeypatch.setattr(settings, "BATCH_EXECUTION_MAX_ITEMS", 2)
+        request = FakeRequest("application/jsonl", b"{}\n{}\n{}\n")
+        with pytest.raises(ValidationError, match="批次執行最多 2 筆"):
+            await _read_batch_payloads(request)
+
+    @pytest.mark.parametrize("body", [b'[{"a": 1}, null]', b'{"items": [{"a": 1}, null]}'])
+    async def test_json_array_or_items(self, body):
+        assert await _read_batch_payloads(FakeRequest("application/json", body)) == [{"a": 1}, None]
+
+    @pytest.mark.parametrize("body, message", [
+        (b"{not json", "請求內容不是有效的 JSON"),
+        (b'{"items": {}}', "批次觸發資料必須為陣列"),
+        (b'[{"a": 1}, 2]', "第 2 筆觸發資料必須為物件"),
+    ])
+    async def test_invalid_json_bodies(self, body, message):
+        with pytest.raises(ValidationError, match=message):
+            await _read_batch_payloads(FakeRequest("application/json", body))
+
+
+@pytest.fixture
+def workflow():
+    workflow = MagicMock()
+    workflow.id = uuid.UUID(WORKFLOW_ID)
+    workflow.user_id = uuid.UUID(int=1)
+    workflow.is_active = True
+    return workflow
+
+
+@pytest.fixture
+def service(monkeypatch, workflow):
+    service = WorkflowService(MagicMock())
+    monkeypatch.setattr(service, "get_workflow_by_id", AsyncMock(return_value=workflow))
+    return service
+
+
+class TestCreateExecutionBatch:
+    async def test_rows_are_inserted_in_one_statement(self, fake_redis, service):
+        batch = await service.create_execution_batch(WORKFLOW_ID, [{"a": 1}, None, {"a": 3}])
+
+        service.db.execute.assert_called_once()
+        statement, rows = service.db.execute.call_args.args
+        assert compiled(statement).startswith("INSERT INTO workflow_executions")
+        assert [row["trigger_data"] for row in rows] == [{"a": 1}, None, {"a": 3}]
+        assert {row["batch_id"] for row in rows} == {batch["batch_id"]}
+        assert {row["status"] for row in rows} == {ExecutionStatus.PENDING}
+        service.db.commit.assert_called_once()
+        assert batch["items"] == [(row["id"], row["trigger_data"]) for row in rows]
+
+    async def test_progress_and_lease_are_written(self, fake_redis, service):
+        batch = await service.create_execution_batch(WORKFLOW_ID, [{}, {}])
+        batch_id = batch["batch_id"]
+
+        progress = await fake_redis.hgetall(WorkflowService._batch_key(batch_id))
+        assert progress["status"] == "running"
+        assert (progress["total"], progress["pending"], progress["success"], progress["failed"]) == ("2", "2", "0", "0")
+        assert await fake_redis.get(WorkflowService._batch_lease_key(batch_id)) == WORKFLOW_ID
+        assert 0 < await fake_redis.ttl(WorkflowService._batch_lease_key(batch_id)) <= settings.BATCH_EXECUTION_LEASE_SECONDS
+
+    async def test_redis_unavailable_still_creates_batch(self, redis_unavailable, service):
+        batch = await service.create_execution_batch(WORKFLOW_ID, [{}])
+        assert batch["progress"]["total"] == 1
+        service.db.commit.assert_called_once()
+
+    async def test_inactive_workflow(self, fake_redis, service, workflow):
+        workflow.is_active = False
+        with pytest.raises(WorkflowExecutionError):
+            await service.create_execution_batch(WORKFLOW_ID, [{}])
+        service.db.execute.assert_not_called()
+
+
+class FakeN8n:
+    """記錄最大並行數的 n8n 客戶端；trigger_data 含 fail 時拋出例外"""
+
+    def __init__(self, delay: float = 0.005):
+        self.delay = delay
+        self.running = 0
+        self.max_running = 0
+        self.release = asyncio.Event()
+        self.release.set()
+        self.client = MagicMock(aclose=AsyncMock())
+
+    async def execute_workflow(self, workflow_id, trigger_data):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+            await self.release.wait()
+            if trigger_data and trigger_data.get("fail"):
+                raise RuntimeError("n8n 執行失敗")
+            return {"ok": True}
+        finally:
+            self.running -= 1
+
+
+@pytest.fixture
+def dispatch_env(monkeypatch, fake_redis):
+    """以假的資料庫 session 與 n8n 客戶端執行 dispatch_execution_batch"""
+    db = MagicMock()
+    n8n = FakeN8n()
+    monkeypatch.setattr(workflow_service_module, "SessionLocal", MagicMock(return_value=db))
+    monkeypatch.setattr(workflow_service_module, "N8nService", MagicMock(return_value=n8n))
+    return db, n8n
+
+
+async def seed_progress(client, total: int):
+    await client.hset(BATCH_KEY, mapping={"status": "running", "total": total, "pending": total, "success": 0, "failed": 0})
+    await client.set(LEASE_KEY, WORKFLOW_ID, ex=settings.BATCH_EXECUTION_LEASE_SECONDS)
+
+
+def batch_items(count: int, failing=()):
+    return [(uuid.UUID(int=index + 1), {"index": index, "fail": index in failing}) for index in range(count)]
+
+
+class TestDispatchExecutionBatch:
+    async def test_concurrency_is_bounded(self, dispatch_env, fake_redis):
+        db, n8n = dispatch_env
+        await seed_progress(fake_redis, 20)
+
+        result = await WorkflowService.dispatch_execution_batch(WORKFLOW_ID, BATCH_ID, batch_items(20), concurrency=3)
+
+        assert result == {"success": 20, "failed": 0}
+        assert n8n.max_running == 3
+        n8n.client.aclose.assert_awaited_once()
+        db.close.assert_called_once()
+
+    async def test_progress_counters_and_flushes(self, dispatch_env, fake_redis, monkeypatch):
+        monkeypatch.setattr(settings, "BATCH_EXECUTION_FLUSH_SIZE", 4)
+        db, _ = dispatch_env
+        await seed_progress(fake_redis, 10)
+
+        result = await WorkflowService.dispatch_execution_batch(
+            WORKFLOW_ID, BATCH_ID, batch_items(10, failing={2, 7}), concurrency=2
+        )
+
+        assert result == {"success": 8, "failed": 2}
+        progress = await fake_redis.hgetall(BATCH_KEY)
+        assert (progress["status"], progress["pending"], progress["success"], progress["failed"]) == ("completed", "0", "8", "2")
+        assert not await fake_redis.exists(LEASE_KEY)
+
+        # 4 + 4 + 2 筆分三次批次 UPDATE，最後以單一 UPDATE 累加工作流統計
+        item_updates = [call.args[1] for call in db.execute.call_args_list if len(call.args) == 2]
+        assert [len(updates) for updates in item_updates] == [4, 4, 2]
+        failed = [item for updates in item_updates for item in updates if item["status"] == ExecutionStatus.FAILED]
+        assert [item["error_message"] for item in failed] == ["n8n 執行失敗"] * 2
+        workflow_update = compiled(db.execute.call_args_list[-1].args[0])
+        assert workflow_update.startswith("UPDATE workflows SET")
+        assert "execution_count=(workflows.execution_count +" in workflow_update
+
+    async def test_lease_is_renewed_while_dispatching(self, dispatch_env, fake_redis, monkeypatch):
+        monkeypatch.setattr(settings, "BATCH_EXECUTION_LEASE_SECONDS", 3)
+        original_sleep = asyncio.sleep
+
+        async def fast_sleep(delay, *args, **kwargs):
+            # 續約間隔為租約的 1/3（1 秒），測試中縮短為 10ms
+            await original_sleep(delay / 100, *args, **kwargs)
+
+        monkeypatch.setattr(asyncio, "sleep", fast_sleep)
+        _, n8n = dispatch_env
+        n8n.release.clear()
+        await seed_progress(fake_redis, 1)
+
+        task = asyncio.create_task(WorkflowService.dispatch_execution_batch(WORKFLOW_ID, BATCH_ID, batch_items(1)))
+        await original_sleep(0.01)
+        await fake_redis.delete(LEASE_KEY)
+        await original_sleep(0.05)
+
+        assert await fake_redis.get(LEASE_KEY) == WORKFLOW_ID
+        assert 0 < await fake_redis.ttl(LEASE_KEY) <= 3
+
+        n8n.release.set()
+        await task
+        assert not await fake_redis.exists(LEASE_KEY)
+
+    async def test_redis_unavailable_does_not_stop_dispatch(self, dispatch_env, redis_unavailable):
+        result = await WorkflowService.dispatch_execution_batch(WORKFLOW_ID, BATCH_ID, batch_items(3))
+        assert result == {"success": 3, "failed": 0}
+
+
+@pytest.fixture
+def published(monkeypatch):
+    publish = AsyncMock(return_value=True)
+    monkeypatch.setattr(batch_sweeper_module, "publish_execution_events", publish)
+    return publish
+
+
+def interrupted_rows(count: int):
+    started_at = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return [(uuid.UUID(int=index + 1), started_at) for index in range(count)]
+
+
+class TestFailBatch:
+    async def test_unfinished_items_are_failed(self, fake_redis, published):
+        await seed_progress(fake_redis, 5)
+        await fake_redis.hset(BATCH_KEY, mapping={"pending": 3, "success": 2})
+        db = MagicMock()
+        db.execute.return_value.all.return_value = interrupted_rows(3)
+
+        assert await BatchExecutionSweeper().fail_batch(db, BATCH_ID, WORKFLOW_ID) == 3
+
+        statements = [compiled(call.args[0]) for call in db.execute.call_args_list]
+        assert statements[0].startswith("UPDATE workflow_executions SET status=")
+        assert "RETURNING workflow_executions.id, workflow_executions.started_at" in statements[0]
+        params = db.execute.call_args_list[0].args[0].compile(dialect=postgresql.dialect()).params
+        assert params["error_message"] == INTERRUPTED_MESSAGE
+        assert statements[1].startswith("UPDATE workflows SET execution_count=(workflows.execution_count +")
+        assert "failure_count=(workflows.failure_count +" in statements[1]
+        assert "success_count" not in statements[1]
+        db.commit.assert_called_once()
+
+        progress = await fake_redis.hgetall(BATCH_KEY)
+        assert (progress["status"], progress["pending"], progress["success"], progress["failed"]) == ("completed", "0", "2", "3")
+
+        events = published.await_args.args[1]
+        assert len(events) == 3
+        assert {event["status"] for event in events} == {"failed"}
+        assert {event["batch_id"] for event in events} == {BATCH_ID}
+
+    async def test_nothing_left_to_fail(self, fake_redis, published):
+        db = MagicMock()
+        db.execute.return_value.all.return_value = []
+
+        assert await BatchExecutionSweeper().fail_batch(db, BATCH_ID, WORKFLOW_ID) == 0
+
+        assert db.execute.call_count == 1
+        db.commit.assert_called_once()
+        published.assert_not_awaited()
+
+    async def test_expired_progress_is_not_recreated(self, fake_redis, published):
+        db = MagicMock()
+        db.execute.return_value.all.return_value = interrupted_rows(1)
+
+        assert await BatchExecutionSweeper().fail_batch(db, BATCH_ID, WORKFLOW_ID) == 1
+        assert not await fake_redis.exists(BATCH_KEY)
+
+
+class TestSweep:
+    async def test_only_batches_without_lease_are_failed(self, fake_redis, monkeypatch):
+        db = MagicMock()
+        db.query.return_value.filter.return_value.distinct.return_value.all.return_value = [
+            (BATCH_ID, uuid.UUID(WORKFLOW_ID)),
+            ("batch-2", uuid.UUID(WORKFLOW_ID)),
+        ]
+        monkeypatch.setattr(batch_sweeper_module, "SessionLocal", MagicMock(return_value=db))
+        await fake_redis.set(LEASE_KEY, WORKFLOW_ID)
+        sweeper = BatchExecutionSweeper(sweep_seconds=60)
+        fail_batch = AsyncMock(return_value=4)
+        monkeypatch.setattr(sweeper, "fail_batch", fail_batch)
+
+        assert await sweeper.sweep() == 4
+
+        fail_batch.assert_awaited_once_with(db, "batch-2", WORKFLOW_ID)
+        db.close.assert_called_once()
+        # 同一週期內其他 worker 不重複回收
+        assert await BatchExecutionSweeper(sweep_seconds=60).sweep() is None
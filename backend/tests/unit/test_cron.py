@@ -0,0 +1,98 @@
+"""
+Cron 表達式解析與下次觸發時間測試
+"""
+
+from datetime import datetime
+
+import pytest
+
+from app.core.cron import CronExpression
+
+pytestmark = pytest.mark.unit
+
+
+def next_after(expression: str, moment: datetime) -> datetime:
+    return CronExpression(expression).next_after(moment)
+
+
+class TestNextAfter:
+    def test_every_minute_is_strictly_after(self):
+        assert next_after("* * * * *", datetime(2024, 1, 1, 10, 0, 0)) == datetime(2024, 1, 1, 10, 1)
+        assert next_after("* * * * *", datetime(2024, 1, 1, 10, 0, 30)) == datetime(2024, 1, 1, 10, 1)
+
+    def test_weekdays_skip_the_weekend(self):
+        # 2024-01-05 為星期五
+        assert next_after("0 9 * * 1-5", datetime(2024, 1, 5, 10, 0)) == datetime(2024, 1, 8, 9, 0)
+
+    def test_steps(self):
+        assert next_after("*/15 * * * *", datetime(2024, 1, 1, 10, 16)) == datetime(2024, 1, 1, 10, 30)
+        assert next_after("5/15 * * * *", datetime(2024, 1, 1, 10, 51)) == datetime(2024, 1, 1, 11, 5)
+        assert next_after("30 */2 * * *", datetime(2024, 1, 1, 1, 0)) == datetime(2024, 1, 1, 2, 30)
+
+    def test_month_and_year_rollover(self):
+        assert next_after("0 0 1 * *", datetime(2024, 12, 15, 8, 0)) == datetime(2025, 1, 1, 0, 0)
+        assert next_after("59 23 31 12 *", datetime(2024, 12, 31, 23, 59)) == datetime(2025, 12, 31, 23, 59)
+
+    def test_leap_day(self):
+        assert next_after("0 0 29 2 *", datetime(2023, 3, 1)) == datetime(2024, 2, 29)
+
+    def test_day_and_weekday_match_either(self):
+        # 日與星期皆有限制時任一符合即觸發（Vixie cron）：2024-01-05 星期五早於 1 月 13 日
+        assert next_after("0 0 13 * 5", datetime(2024, 1, 1)) == datetime(2024, 1, 5)
+        assert next_after("0 0 13 * 5", datetime(2024, 1, 12, 1)) == datetime(2024, 1, 13)
+
+    def test_sunday_as_zero_or_seven(self):
+        # 2024-01-07 為星期日
+        assert next_after("0 0 * * 0", datetime(2024, 1, 1)) == datetime(2024, 1, 7)
+        assert next_after("0 0 * * 7", datetime(2024, 1, 1)) == datetime(2024, 1, 7)
+
+    @pytest.mark.parametrize("alias, expected", [
+        ("@hourly", datetime(2024, 1, 1, 11, 0)),
+        ("@daily", datetime(2024, 1, 2, 0, 0)),
+        ("@weekly", datetime(2024, 1, 7, 0, 0)),
+        ("@monthly", datetime(2024, 2, 1, 0, 0)),
+        ("@yearly", datetime(2025, 1, 1, 0, 0)),
+    ])
+    def test_aliases(self, alias, expected):
+        assert next_after(alias, datetime(2024, 1, 1, 10, 30)) == expected
+
+    def test_expression_that_never_fires(self):
+        with pytest.raises(ValueError):
+            next_after("0 0 30 2 *", datetime(2024, 1, 1))
+
+
+class TestNames:
+    def test_weekday_names_match_numbers(self):
+        assert CronExpression("0 9 * * MON-FRI").weekdays == CronExpression("0 9 * * 1-5").weekdays
+        assert CronExpression("0 9 * * sun,Sat").weekdays == frozenset({0, 6})
+
+    def test_month_names_match_numbers(self):
+        assert CronExpression("0 0 1 JAN,jul *").months == frozenset({1, 7})
+        assert CronExpression("0 0 1 mar-may *").months == frozenset({3, 4, 5})
+
+    @pytest.mark.parametrize("expression", [
+        "JAN * * * *",
+        "0 9 * * FOO",
+        "0 0 1 MON *",
+        "0 9 * JAN-FOO *",
+    ])
+    def test_unknown_or_misplaced_names_are_rejected(self, expression):
+        with pytest.raises(ValueError):
+            CronExpression(expression)
+
+
+@pytest.mark.parametrize("expression", [
+    "* * * *",
+    "* * * * * *",
+    "60 * * * *",
+    "* 24 * * *",
+    "* * 0 * *",
+    "* * * 13 *",
+    "* * * * 8",
+    "*/0 * * * *",
+    "5-1 * * * *",
+    "a-b * * * *",
+])
+def test_invalid_expressions(expression):
+    with pytest.raises(ValueError):
+        CronExpression(expression)
@@ -0,0 +1,73 @@
+"""
+ETag 計算與條件式請求（If-None-Match / If-Match）測試
+"""
+
+import pytest
+
+from app.core.etag import check_if_match, make_etag, not_modified_response
+from app.core.exceptions import PreconditionFailedError
+
+pytestmark = pytest.mark.unit
+
+ETAG = make_etag("workflow", "6f1c2a4e", 3, "2026-01-01T00:00:00")
+OTHER = make_etag("workflow", "6f1c2a4e", 4, "2026-01-02T00:00:00")
+
+
+class TestMakeEtag:
+    def test_strong_quoted_and_stable(self):
+        assert ETAG.startswith('"') and ETAG.endswith('"') and not ETAG.startswith("W/")
+        assert make_etag("workflow", "6f1c2a4e", 3, "2026-01-01T00:00:00") == ETAG
+        assert OTHER != ETAG
+
+    def test_parts_are_not_concatenated(self):
+        assert make_etag("ab", "c") != make_etag("a", "bc")
+        assert make_etag(None) == make_etag("")
+
+
+class TestCheckIfMatch:
+    def test_missing_header_is_not_checked(self):
+        check_if_match(None, ETAG)
+        check_if_match("", ETAG)
+
+    def test_strong_match(self):
+        check_if_match(ETAG, ETAG)
+
+    def test_any_of_several(self):
+        check_if_match(f"{OTHER}, {ETAG}", ETAG)
+
+    def test_star(self):
+        check_if_match("*", ETAG)
+
+    def test_weak_etag_never_matches(self):
+        # If-Match 使用強比較
+        with pytest.raises(PreconditionFailedError):
+            check_if_match(f"W/{ETAG}", ETAG)
+
+    def test_mismatch_reports_current_etag(self):
+        with pytest.raises(PreconditionFailedError) as exc_info:
+            check_if_match(OTHER, ETAG)
+        assert exc_info.value.details["current_etag"] == ETAG
+
+    def test_unquoted_value_does_not_match(self):
+        with pytest.raises(PreconditionFailedError):
+            check_if_match(ETAG.strip('"'), ETAG)
+
+
+class TestNotModifiedResponse:
+    def test_match_returns_304_with_etag(self):
+        response = not_modified_response(ETAG, ETAG)
+        assert response.status_code == 304
+        assert response.headers["ETag"] == ETAG
+        assert response.headers["Cache-Control"] == "private, no-cache"
+
+    def test_weak_comparison(self):
+        # 代理伺服器壓縮回應時會把 ETag 改為弱 ETag，If-None-Match 仍應相符
+        assert not_modified_response(f"W/{ETAG}", ETAG).status_code == 304
+
+    def test_star_and_list(self):
+        assert not_modified_response("*", ETAG) is not None
+        assert not_modified_response(f'"other", {ETAG}', ETAG) is not None
+
+    def test_mismatch_and_missing(self):
+        assert not_modified_response(OTHER, ETAG) is None
+        assert not_modified_response(None, ETAG) is None
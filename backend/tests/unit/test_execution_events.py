@@ -0,0 +1,54 @@
+"""
+執行事件內容測試
+"""
+
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.execution_events import build_batch_execution_event, build_execution_event
+
+pytestmark = pytest.mark.unit
+
+TAIPEI = timezone(timedelta(hours=8))
+
+
+def make_execution(**fields):
+    return SimpleNamespace(**{
+        "id": "e1",
+        "workflow_id": "w1",
+        "status": "success",
+        "started_at": None,
+        "finished_at": None,
+        "duration": None,
+        **fields,
+    })
+
+
+class TestBuildExecutionEvent:
+    def test_aware_timestamps_are_converted_to_utc(self):
+        started = datetime(2026, 10, 19, 20, 0, tzinfo=TAIPEI)
+        event = build_execution_event(make_execution(started_at=started, finished_at=started + timedelta(seconds=3)))
+
+        assert event["started_at"] == "2026-10-19T12:00:00Z"
+        assert datetime.fromisoformat(event["started_at"]) == started
+        assert datetime.fromisoformat(event["finished_at"]) - datetime.fromisoformat(event["started_at"]) == timedelta(seconds=3)
+
+    def test_single_zone_designator(self):
+        event = build_execution_event(make_execution(started_at=datetime.now(timezone.utc)))
+
+        for field in ("started_at", "timestamp"):
+            assert event[field].endswith("Z")
+            assert "+00:00" not in event[field]
+            assert datetime.fromisoformat(event[field]).tzinfo is not None
+
+    def test_naive_timestamps_are_treated_as_utc(self):
+        event = build_batch_execution_event("w1", "b1", {"id": "e1", "status": "running", "started_at": datetime(2026, 1, 1)})
+
+        assert event["started_at"] == "2026-01-01T00:00:00Z"
+        assert event["batch_id"] == "b1"
+
+    def test_missing_timestamps(self):
+        event = build_execution_event(make_execution())
+        assert event["started_at"] is None and event["finished_at"] is None
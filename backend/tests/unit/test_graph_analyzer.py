@@ -0,0 +1,145 @@
+"""
+圖形分析（結構錯誤、環路、可到達性、端口解析）測試
+"""
+
+import pytest
+
+from app.services.graph_analyzer import analyze_graph, resolve_handle_index
+
+pytestmark = pytest.mark.unit
+
+
+def node(node_id, node_type="setData"):
+    return {"id": node_id, "type": node_type, "data": {}}
+
+
+def edge(source, target, **handles):
+    return {"id": f"{source}-{target}", "source": source, "target": target, **handles}
+
+
+def warning_codes(analysis):
+    return [warning["code"] for warning in analysis.warnings]
+
+
+class TestTopologyAndCycles:
+    def test_dag_is_topologically_ordered(self):
+        nodes = [node("c"), node("b"), node("trigger", "manualTrigger"), node("a")]
+        edges = [edge("trigger", "a"), edge("a", "b"), edge("b", "c")]
+        analysis = analyze_graph(nodes, edges)
+
+        assert analysis.is_valid
+        assert analysis.topological_order == ["trigger", "a", "b", "c"]
+        assert analysis.cycles == [] and analysis.warnings == []
+
+    def test_cycle_excludes_downstream_nodes(self):
+        nodes = [node("trigger", "manualTrigger"), node("a"), node("b"), node("c"), node("after")]
+        edges = [edge("trigger", "a"), edge("a", "b"), edge("b", "c"), edge("c", "a"), edge("c", "after")]
+        analysis = analyze_graph(nodes, edges)
+
+        assert analysis.topological_order is None
+        assert [sorted(cycle) for cycle in analysis.cycles] == [["a", "b", "c"]]
+        assert warning_codes(analysis) == ["cycle"]
+        assert analysis.is_valid
+
+    def test_multiple_cycles(self):
+        nodes = [node("trigger", "manualTrigger"), node("a"), node("b"), node("c"), node("d")]
+        edges = [edge("trigger", "a"), edge("a", "b"), edge("b", "a"), edge("b", "c"), edge("c", "d"), edge("d", "c")]
+        analysis = analyze_graph(nodes, edges)
+
+        assert sorted(sorted(cycle) for cycle in analysis.cycles) == [["a", "b"], ["c", "d"]]
+
+    def test_self_loop_is_a_cycle(self):
+        analysis = analyze_graph([node("trigger", "manualTrigger"), node("a")], [edge("trigger", "a"), edge("a", "a")])
+        assert analysis.cycles == [["a"]]
+
+    def test_long_chain_does_not_recurse(self):
+        count = 20_000
+        nodes = [node("trigger", "manualTrigger")] + [node(f"n{index}") for index in range(count)]
+        edges = [edge("trigger", "n0")] + [edge(f"n{index}", f"n{index + 1}") for index in range(count - 1)]
+        edges.append(edge(f"n{count - 1}", "n0"))
+        analysis = analyze_graph(nodes, edges)
+
+        assert len(analysis.cycles) == 1 and len(analysis.cycles[0]) == count
+
+
+class TestReachability:
+    def test_unreachable_nodes(self):
+        nodes = [node("trigger", "manualTrigger"), node("a"), node("orphan"), node("orphan_child")]
+        edges = [edge("trigger", "a"), edge("orphan", "orphan_child")]
+        analysis = analyze_graph(nodes, edges)
+
+        assert analysis.unreachable == ["orphan", "orphan_child"]
+        assert warning_codes(analysis) == ["unreachable"]
+
+    def test_nodes_reached_only_through_a_cycle(self):
+        nodes = [node("trigger", "manualTrigger"), node("a"), node("b"), node("island1"), node("island2")]
+        edges = [edge("trigger", "a"), edge("a", "b"), edge("b", "a"), edge("island1", "island2"), edge("island2", "island1")]
+        analysis = analyze_graph(nodes, edges)
+
+        assert analysis.unreachable == ["island1", "island2"]
+        assert warning_codes(analysis) == ["cycle", "unreachable"]
+
+    def test_every_trigger_is_a_root(self):
+        nodes = [node("hook", "webhookTrigger"), node("schedule", "scheduleTrigger"), node("a")]
+        analysis = analyze_graph(nodes, [edge("hook", "a"), edge("schedule", "a")])
+
+        assert analysis.unreachable == []
+        assert analysis.warnings == []
+
+    def test_no_trigger(self):
+        analysis = analyze_graph([node("a"), node("b")], [edge("a", "b")])
+        assert warning_codes(analysis) == ["no_trigger"]
+
+    def test_empty_graph(self):
+        analysis = analyze_graph([], [])
+        assert analysis.is_valid and analysis.warnings == [] and analysis.topological_order == []
+
+
+class TestStructureErrors:
+    def test_duplicate_and_missing_ids(self):
+        analysis = analyze_graph([node("a"), node("a"), {"type": "setData"}], [])
+
+        assert [error["code"] for error in analysis.errors] == ["duplicate_node", "missing_node_id"]
+        assert analysis.node_ids == ["a"]
+
+    def test_dangling_edge(self):
+        analysis = analyze_graph([node("a")], [edge("a", "ghost")])
+
+        assert analysis.errors[0]["code"] == "dangling_edge"
+        assert analysis.errors[0]["edge_id"] == "a-ghost"
+        assert analysis.edges == []
+
+    def test_invalid_handle(self):
+        analysis = analyze_graph([node("a"), node("b")], [edge("a", "b", sourceHandle="sideways")])
+        assert analysis.errors[0]["code"] == "invalid_handle"
+
+    def test_non_string_ids_are_normalized(self):
+        analysis = analyze_graph([{"id": 1, "type": "manualTrigger"}, {"id": 2, "type": "setData"}], [edge(1, 2)])
+
+        assert analysis.is_valid
+        assert analysis.topological_order == ["1", "2"]
+
+    def test_structure_only_skips_topology(self):
+        nodes = [node("a"), node("b")]
+        analysis = analyze_graph(nodes, [edge("a", "b"), edge("b", "a")], structure_only=True)
+
+        assert analysis.is_valid
+        assert analysis.cycles == [] and analysis.warnings == [] and analysis.topological_order is None
+
+
+class TestResolveHandleIndex:
+    @pytest.mark.parametrize("handle, n8n_type, expected", [
+        (None, "n8n-nodes-base.set", 0),
+        ("output", "n8n-nodes-base.set", 0),
+        ("true", "n8n-nodes-base.if", 0),
+        ("FALSE", "n8n-nodes-base.if", 1),
+        ("loop", "n8n-nodes-base.splitInBatches", 1),
+        ("output-2", "n8n-nodes-base.set", 2),
+        ("main_3", "n8n-nodes-base.set", 3),
+    ])
+    def test_resolves(self, handle, n8n_type, expected):
+        assert resolve_handle_index(handle, n8n_type) == expected
+
+    def test_named_output_of_other_node_type(self):
+        with pytest.raises(ValueError):
+            resolve_handle_index("true", "n8n-nodes-base.set")
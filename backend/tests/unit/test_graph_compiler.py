@@ -0,0 +1,122 @@
+"""
+圖形編譯輸出與快取測試
+"""
+
+import pytest
+
+from app.services.graph_compiler import (
+    PLATFORM_SCHEDULED_N8N_TYPE,
+    GraphCompileError,
+    GraphCompiler,
+    compile_graph,
+)
+
+pytestmark = pytest.mark.unit
+
+
+def node(node_id, node_type="setData", label=None, **data):
+    return {"id": node_id, "type": node_type, "position": {"x": 0, "y": 0}, "data": {"label": label or node_id, **data}}
+
+
+def edge(source, target, **handles):
+    return {"id": f"{source}-{target}", "source": source, "target": target, **handles}
+
+
+class TestCompileGraph:
+    def test_nodes_keep_editor_order(self):
+        nodes = [node("c"), node("trigger", "manualTrigger"), node("a"), node("b")]
+        compiled = compile_graph(nodes, [edge("trigger", "a"), edge("a", "b"), edge("b", "c")])
+
+        assert [n8n_node["id"] for n8n_node in compiled.nodes] == ["c", "trigger", "a", "b"]
+        assert [n8n_node["type"] for n8n_node in compiled.nodes] == [
+            "n8n-nodes-base.set", "n8n-nodes-base.manualTrigger", "n8n-nodes-base.set", "n8n-nodes-base.set"
+        ]
+
+    def test_connections_follow_output_index(self):
+        nodes = [
+            node("trigger", "manualTrigger"),
+            node("check", "condition"),
+            node("yes"),
+            node("no"),
+        ]
+        edges = [
+            edge("trigger", "check"),
+            # false 端口先出現，仍排在 main[1]
+            edge("check", "no", sourceHandle="false"),
+            edge("check", "yes", sourceHandle="true"),
+        ]
+        connections = compile_graph(nodes, edges).connections
+
+        assert connections["check"]["main"] == [
+            [{"node": "yes", "type": "main", "index": 0}],
+            [{"node": "no", "type": "main", "index": 0}],
+        ]
+        assert connections["trigger"]["main"] == [[{"node": "check", "type": "main", "index": 0}]]
+
+    def test_skipped_output_index_leaves_empty_slot(self):
+        nodes = [node("trigger", "manualTrigger"), node("next")]
+        connections = compile_graph(nodes, [edge("trigger", "next", sourceHandle="output-2")]).connections
+
+        assert connections["trigger"]["main"] == [[], [], [{"node": "next", "type": "main", "index": 0}]]
+
+    def test_duplicate_labels_get_unique_names(self):
+        nodes = [node("trigger", "manualTrigger", label="步驟"), node("a", label="步驟"), node("b", label="步驟")]
+        compiled = compile_graph(nodes, [edge("trigger", "a"), edge("a", "b")])
+
+        assert [n8n_node["name"] for n8n_node in compiled.nodes] == ["步驟", "步驟 1", "步驟 2"]
+        assert compiled.connections["步驟 1"]["main"] == [[{"node": "步驟 2", "type": "main", "index": 0}]]
+
+    def test_schedule_trigger_becomes_manual_trigger(self):
+        schedule = node("schedule", "scheduleTrigger", settings={"cronExpression": "0 9 * * *"})
+        compiled = compile_graph([schedule], [])
+
+        assert compiled.nodes[0]["type"] == PLATFORM_SCHEDULED_N8N_TYPE
+        assert compiled.nodes[0]["parameters"] == {}
+
+    def test_parameters_and_position(self):
+        http = {"id": "http", "type": "httpRequest", "position": [10, 20], "data": {"parameters": {"url": "https://example.com"}}}
+        compiled = compile_graph([http], [])
+
+        assert compiled.nodes[0]["parameters"] == {"url": "https://example.com"}
+        assert compiled.nodes[0]["position"] == [10, 20]
+
+    def test_structural_errors_raise(self):
+        with pytest.raises(GraphCompileError) as exc_info:
+            compile_graph([node("a")], [edge("a", "ghost")])
+        assert exc_info.value.errors[0]["code"] == "dangling_edge"
+
+    def test_warnings_are_reported(self):
+        compiled = compile_graph([node("a"), node("b")], [edge("a", "b"), edge("b", "a")])
+        assert {warning["code"] for warning in compiled.warnings} == {"cycle", "no_trigger"}
+
+    def test_to_n8n(self):
+        payload = compile_graph([node("trigger", "manualTrigger")], []).to_n8n("訂單通知", active=True)
+        assert payload["name"] == "訂單通知"
+        assert payload["active"] is True
+        assert "settings" not in payload
+
+
+class TestGraphCompiler:
+    def test_cache_by_key(self):
+        compiler = GraphCompiler(cache_size=2)
+        nodes = [node("trigger", "manualTrigger")]
+
+        first = compiler.compile(nodes, [], "wf:1")
+        assert compiler.compile(nodes, [], "wf:1") is first
+        assert (compiler.hits, compiler.misses) == (1, 1)
+
+    def test_content_hash_key(self):
+        compiler = GraphCompiler()
+        first = compiler.compile([node("trigger", "manualTrigger")], [])
+        assert compiler.compile([node("trigger", "manualTrigger")], []) is first
+        assert compiler.compile([node("other", "manualTrigger")], []) is not first
+
+    def test_least_recently_used_is_evicted(self):
+        compiler = GraphCompiler(cache_size=2)
+        nodes = [node("trigger", "manualTrigger")]
+        compiler.compile(nodes, [], "a")
+        compiler.compile(nodes, [], "b")
+        compiler.compile(nodes, [], "a")
+        compiler.compile(nodes, [], "c")
+
+        assert list(compiler._cache) == ["a", "c"]
@@ -0,0 +1,208 @@
+"""
+增量儲存的集合追蹤與儲存前檢查測試
+"""
+
+import uuid
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.core.exceptions import ValidationError
+from app.schemas.workflow import WorkflowGraphPatch
+from app.services.workflow_service import WorkflowService, _GraphCollection
+
+pytestmark = pytest.mark.unit
+
+WORKFLOW_ID = str(uuid.uuid4())
+USER_ID = str(uuid.uuid4())
+
+SCHEDULE_NODE = {
+    "id": "schedule",
+    "type": "scheduleTrigger",
+    "data": {"settings": {"cronExpression": "0 9 * * *"}},
+}
+
+
+class TestGraphCollection:
+    def test_add_update_remove(self):
+        collection = _GraphCollection("節點", ["a", "b"])
+        assert not collection.changed
+
+        collection.add({"id": "c", "type": "set"})
+        collection.update("c", {"position": {"x": 1, "y": 2}})
+        collection.update("a", {"position": {"x": 0, "y": 0}})
+        collection.remove("b")
+
+        assert collection.changed
+        assert collection.added == {"c": {"id": "c", "type": "set", "position": {"x": 1, "y": 2}}}
+        assert collection.patches == {"a": {"position": {"x": 0, "y": 0}}}
+        assert collection.removed == {"b"}
+        assert sorted(collection.current_ids()) == ["a", "c"]
+
+    def test_removing_added_item_drops_it(self):
+        collection = _GraphCollection("節點", [])
+        collection.add({"id": "c"})
+        collection.remove("c")
+        assert not collection.changed
+
+    def test_removing_existing_item_discards_its_patches(self):
+        collection = _GraphCollection("節點", ["a"])
+        collection.update("a", {"name": "x"})
+        collection.remove("a")
+        assert collection.patches == {}
+
+    def test_duplicate_add(self):
+        collection = _GraphCollection("節點", ["a"])
+        with pytest.raises(ValidationError, match="已存在"):
+            collection.add({"id": "a"})
+
+    def test_re_add_after_remove(self):
+        collection = _GraphCollection("節點", ["a"])
+        collection.remove("a")
+        collection.add({"id": "a"})
+        assert collection.current_ids() == ["a"]
+
+    @pytest.mark.parametrize("method, args", [("update", ("z", {})), ("remove", ("z",))])
+    def test_missing_item(self, method, args):
+        collection = _GraphCollection("連線", ["a"])
+        with pytest.raises(ValidationError, match="不存在"):
+            getattr(collection, method)(*args)
+
+
+@pytest.fixture
+def service(monkeypatch):
+    service = WorkflowService(MagicMock())
+    monkeypatch.setattr(service, "create_auto_version", AsyncMock())
+    return service
+
+
+def stored_graph(service, node_refs, edge_refs, stored_nodes=None):
+    """
+    模擬資料庫：依序回傳鎖定讀取的 ID 清單、（有變更排程節點時）完整節點內容與 UPDATE ... RETURNING 結果
+    """
+    locked = MagicMock()
+    locked.first.return_value = (3, datetime(2026, 1, 1), node_refs, edge_refs)
+    updated = MagicMock()
+    updated.one.return_value = (4, datetime(2026, 1, 2))
+    results = [locked, updated]
+    if stored_nodes is not None:
+        loaded = MagicMock()
+        loaded.scalars.return_value = stored_nodes
+        results.insert(1, loaded)
+    service.db.execute.side_effect = results
+
+
+async def apply(service, *operations):
+    patch = WorkflowGraphPatch(base_version=3, operations=list(operations))
+    return await service.patch_workflow_graph(WORKFLOW_ID, USER_ID, patch)
+
+
+def error_codes(exc_info):
+    return [error["code"] for error in exc_info.value.details["errors"]]
+
+
+class TestEdgeEndpoints:
+    async def test_add_edge_to_missing_node_is_rejected(self, service):
+        stored_graph(service, [["a", "set"]], [])
+
+        with pytest.raises(ValidationError) as exc_info:
+            await apply(service, {"op": "add_edge", "edge": {"id": "e1", "source": "a", "target": "ghost"}})
+
+        assert error_codes(exc_info) == ["dangling_edge"]
+        assert service.db.execute.call_count == 1
+        service.db.commit.assert_not_called()
+
+    async def test_update_edge_to_missing_node_is_rejected(self, service):
+        stored_graph(service, [["a", "set"], ["b", "set"]], [["e1", "a", "b"]])
+
+        with pytest.raises(ValidationError) as exc_info:
+            await apply(service, {"op": "update_edge", "id": "e1", "changes": {"target": "ghost"}})
+
+        assert exc_info.value.details["errors"][0]["edge_id"] == "e1"
+
+    async def test_edge_to_node_added_in_same_patch(self, service):
+        stored_graph(service, [["a", "set"]], [])
+
+        result = await apply(
+            service,
+            {"op": "add_node", "node": {"id": "b", "type": "set"}},
+            {"op": "add_edge", "edge": {"id": "e1", "source": "a", "target": "b"}},
+        )
+
+        assert result["version"] == 4
+        service.db.commit.assert_called_once()
+
+    async def test_edge_to_node_removed_in_same_patch_is_rejected(self, service):
+        stored_graph(service, [["a", "set"], ["b", "set"]], [])
+
+        with pytest.raises(ValidationError):
+            await apply(
+                service,
+                {"op": "remove_node", "id": "b"},
+                {"op": "add_edge", "edge": {"id": "e1", "source": "a", "target": "b"}},
+            )
+
+    async def test_removing_node_removes_its_edges(self, service):
+        stored_graph(service, [["a", "set"], ["b", "set"]], [["e1", "a", "b"]])
+
+        result = await apply(service, {"op": "remove_node", "id": "b"})
+
+        assert result["applied"] == 1
+
+
+class TestScheduleNodes:
+    async def test_added_schedule_with_invalid_cron_is_rejected(self, service):
+        stored_graph(service, [], [])
+        node = {**SCHEDULE_NODE, "data": {"settings": {"cronExpression": "not a cron"}}}
+
+        with pytest.raises(ValidationError) as exc_info:
+            await apply(service, {"op": "add_node", "node": node})
+
+        assert error_codes(exc_info) == ["invalid_schedule"]
+
+    async def test_updated_schedule_with_invalid_cron_is_rejected(self, service):
+        stored_graph(service, [["schedule", "scheduleTrigger"]], [], stored_nodes=[SCHEDULE_NODE])
+
+        with pytest.raises(ValidationError) as exc_info:
+            await apply(service, {
+                "op": "update_node",
+                "id": "schedule",
+                "changes": {"data": {"settings": {"cronExpression": "61 * * * *"}}},
+            })
+
+        assert error_codes(exc_info) == ["invalid_schedule"]
+
+    async def test_updated_node_is_merged_with_stored_node(self, service):
+        stored = {**SCHEDULE_NODE, "data": {"settings": {"cronExpression": "0 9 * * *", "timezone": "Mars/Olympus"}}}
+        stored_graph(service, [["schedule", "scheduleTrigger"]], [], stored_nodes=[stored])
+
+        with pytest.raises(ValidationError) as exc_info:
+            await apply(service, {"op": "update_node", "id": "schedule", "changes": {"name": "每日九點"}})
+
+        assert error_codes(exc_info) == ["invalid_schedule"]
+
+    async def test_node_changed_into_schedule_trigger_is_checked(self, service):
+        node = {"id": "a", "type": "set", "data": {}}
+        stored_graph(service, [["a", "set"]], [], stored_nodes=[node])
+
+        with pytest.raises(ValidationError):
+            await apply(service, {
+                "op": "update_node",
+                "id": "a",
+                "changes": {"type": "scheduleTrigger", "data": {"schedule": "bad"}},
+            })
+
+    async def test_moving_schedule_node_keeps_stored_settings(self, service):
+        stored_graph(service, [["schedule", "scheduleTrigger"]], [], stored_nodes=[SCHEDULE_NODE])
+
+        result = await apply(service, {"op": "move_node", "id": "schedule", "position": {"x": 5, "y": 5}})
+
+        assert result["version"] == 4
+
+    async def test_other_node_updates_do_not_load_nodes(self, service):
+        stored_graph(service, [["a", "set"]], [])
+
+        await apply(service, {"op": "update_node", "id": "a", "changes": {"data": {"value": 1}}})
+
+        assert service.db.execute.call_count == 2
@@ -0,0 +1,99 @@
+"""
+冪等鍵解析與 IdempotencyGuard 測試
+"""
+
+import pytest
+
+from app.core.idempotency import (
+    MAX_KEY_LENGTH,
+    IdempotencyGuard,
+    provider_transaction,
+    resolve_idempotency_key,
+)
+
+pytestmark = pytest.mark.unit
+
+ECPAY_NOTIFY = {
+    "MerchantID": "3002607",
+    "MerchantTradeNo": "TW20240101001",
+    "RtnCode": "1",
+    "RtnMsg": "交易成功",
+    "TradeAmt": "100",
+}
+
+LINEPAY_CONFIRM = {"transactionId": "2024010100000001", "orderId": "order-1", "returnCode": "0000"}
+
+
+class TestResolveIdempotencyKey:
+    def test_header_takes_precedence(self):
+        assert resolve_idempotency_key("  abc-123 ", ECPAY_NOTIFY, "webhook") == "abc-123"
+
+    def test_header_is_truncated(self):
+        assert len(resolve_idempotency_key("k" * 1000)) == MAX_KEY_LENGTH
+
+    def test_blank_header_is_ignored(self):
+        assert resolve_idempotency_key("   ", None, "webhook") is None
+
+    def test_ecpay_payment_is_scoped_by_provider_and_event(self):
+        assert resolve_idempotency_key(None, ECPAY_NOTIFY, "webhook") == "ecpay:payment:3002607:TW20240101001"
+
+    def test_ecpay_period_payments_are_distinct(self):
+        first = resolve_idempotency_key(None, {**ECPAY_NOTIFY, "TotalSuccessTimes": "1"}, "webhook")
+        second = resolve_idempotency_key(None, {**ECPAY_NOTIFY, "TotalSuccessTimes": "2"}, "webhook")
+        assert first == "ecpay:period:3002607:TW20240101001:1"
+        assert first != second
+
+    def test_linepay_refund_does_not_collide_with_payment(self):
+        payment = resolve_idempotency_key(None, LINEPAY_CONFIRM, "webhook")
+        refund = resolve_idempotency_key(None, {**LINEPAY_CONFIRM, "refundTransactionId": "R1"}, "webhook")
+        assert payment == "linepay:payment:2024010100000001"
+        assert refund == "linepay:refund:2024010100000001:R1"
+
+    @pytest.mark.parametrize("trigger_type", [None, "api", "manual", "schedule"])
+    def test_only_webhooks_derive_keys(self, trigger_type):
+        assert resolve_idempotency_key(None, ECPAY_NOTIFY, trigger_type) is None
+
+    @pytest.mark.parametrize("trigger_data", [
+        {"orderId": "order-1"},
+        {"transactionId": "T1"},
+        {"TradeNo": "2401011234567890"},
+        {"MerchantTradeNo": "TW1", "RtnCode": "1"},
+        {"MerchantID": "3002607", "MerchantTradeNo": "", "RtnCode": "1"},
+        {"transactionId": "T1", "orderId": None},
+        None,
+        ["not", "a", "dict"],
+    ])
+    def test_generic_fields_are_not_transactions(self, trigger_data):
+        assert provider_transaction(trigger_data) is None
+        assert resolve_idempotency_key(None, trigger_data, "webhook") is None
+
+
+class TestIdempotencyGuard:
+    async def test_first_request_acquires_and_replays_get_cached_response(self, fake_redis):
+        guard = IdempotencyGuard(window_seconds=60)
+
+        assert await guard.acquire("wf-1", "key") is True
+        assert await guard.acquire("wf-1", "key") is False
+        # 第一個請求處理中
+        assert await guard.get_response("wf-1", "key") is None
+
+        await guard.store_response("wf-1", "key", {"id": "execution-1", "status": "success"})
+        assert await guard.get_response("wf-1", "key") == {"id": "execution-1", "status": "success"}
+        assert 0 < await fake_redis.ttl("idempotency:wf-1:key") <= 60
+
+    async def test_scopes_are_independent(self, fake_redis):
+        guard = IdempotencyGuard(window_seconds=60)
+        assert await guard.acquire("wf-1", "key") is True
+        assert await guard.acquire("wf-2", "key") is True
+
+    async def test_release_allows_retry(self, fake_redis):
+        guard = IdempotencyGuard(window_seconds=60)
+        assert await guard.acquire("wf-1", "key") is True
+        assert await guard.release("wf-1", "key") is True
+        assert await guard.acquire("wf-1", "key") is True
+
+    async def test_redis_unavailable_fails_open(self, redis_unavailable):
+        guard = IdempotencyGuard(window_seconds=60)
+        assert await guard.acquire("wf-1", "key") is True
+        assert await guard.get_response("wf-1", "key") is None
+        assert await guard.store_response("wf-1", "key", {"id": "execution-1"}) is False
@@ -0,0 +1,167 @@
+"""
+批次匯入的 COPY CSV 編碼與區塊驗證測試
+"""
+
+import csv
+import io
+
+import orjson
+import pytest
+
+from app.services.import_service import (
+    TEMPLATE_COPY_COLUMNS,
+    WORKFLOW_CATEGORY_MAX_LENGTH,
+    WORKFLOW_COPY_COLUMNS,
+    _csv_field,
+    _pg_array,
+    prepare_chunk,
+)
+
+pytestmark = pytest.mark.unit
+
+OWNER_ID = "6f1c2a4e-8b0d-4c57-9a3e-2d1f0b7c5e19"
+
+
+def record(**fields):
+    return orjson.dumps({"name": "金流通知", **fields})
+
+
+def items(*records):
+    return [(f"line {index}", raw) for index, raw in enumerate(records, 1)]
+
+
+def copy_rows(csv_text: str):
+    """以 CSV 解析 COPY 內容（PostgreSQL 的 CSV 格式與標準 CSV 相同）"""
+    return list(csv.reader(io.StringIO(csv_text)))
+
+
+class TestCsvField:
+    @pytest.mark.parametrize("value, expected", [
+        (None, ""),
+        (True, "t"),
+        (False, "f"),
+        (0, "0"),
+        (3, "3"),
+        (2.5, "2.5"),
+        ("", '""'),
+        ("plain", '"plain"'),
+        ('say "hi"', '"say ""hi"""'),
+        ("a,b", '"a,b"'),
+        ("line\nbreak", '"line\nbreak"'),
+        ("NULL", '"NULL"'),
+        ("\\N", '"\\N"'),
+    ])
+    def test_encoding(self, value, expected):
+        assert _csv_field(value) == expected
+
+    def test_empty_string_is_not_null(self):
+        # 未加引號的空欄位才是 NULL
+        assert _csv_field("") != _csv_field(None)
+
+    @pytest.mark.parametrize("value", ['say "hi"', "a,b", "line\nbreak", 'x"",\n"y', "台灣"])
+    def test_round_trip(self, value):
+        line = ",".join([_csv_field(value), _csv_field(None), _csv_field(1)])
+        assert copy_rows(line) == [[value, "", "1"]]
+
+
+class TestPgArray:
+    @pytest.mark.parametrize("values, expected", [
+        (None, None),
+        ([], "{}"),
+        (["金流"], '{"金流"}'),
+        (["a", "b"], '{"a","b"}'),
+        (["a,b"], '{"a,b"}'),
+        (["{x}"], '{"{x}"}'),
+        (['say "hi"'], '{"say \\"hi\\""}'),
+        (["back\\slash"], '{"back\\\\slash"}'),
+        (["NULL"], '{"NULL"}'),
+        ([""], '{""}'),
+        (["  spaced  "], '{"  spaced  "}'),
+    ])
+    def test_literal(self, values, expected):
+        assert _pg_array(values) == expected
+
+    def test_inside_csv_field(self):
+        literal = _pg_array(['say "hi"', "a,b"])
+        assert copy_rows(_csv_field(literal)) == [[literal]]
+
+
+class TestPrepareChunk:
+    def test_valid_workflow_row(self):
+        csv_text, row_ids, errors, skipped = prepare_chunk(
+            "workflows", OWNER_ID, items(record(tags=["金流", 'a"b'], category="payment"))
+        )
+
+        assert errors == [] and skipped == 0
+        (row,) = copy_rows(csv_text)
+        assert len(row) == len(WORKFLOW_COPY_COLUMNS)
+        columns = dict(zip(WORKFLOW_COPY_COLUMNS, row))
+        assert columns["id"] == row_ids[0]
+        assert columns["user_id"] == OWNER_ID
+        assert columns["name"] == "金流通知"
+        assert columns["description"] == ""  # NULL（未加引號）
+        assert columns["status"] == "DRAFT"
+        assert columns["is_active"] == "t"
+        assert columns["tags"] == '{"金流","a\\"b"}'
+        assert orjson.loads(columns["nodes"]) == []
+        assert columns["version"] == "1"
+
+    def test_null_and_empty_description_are_distinct(self):
+        csv_text, _, _, _ = prepare_chunk("workflows", OWNER_ID, items(record(), record(description="")))
+        lines = csv_text.splitlines()
+        # description 在 name 與 status 之間：NULL 不加引號，空字串加引號
+        assert '"金流通知",,"DRAFT"' in lines[0]
+        assert '"金流通知","","DRAFT"' in lines[1]
+
+    def test_template_row(self):
+        csv_text, row_ids, errors, _ = prepare_chunk(
+            "templates", OWNER_ID, items(record(category="payment", nodes=[{"id": "a", "type": "manualTrigger"}]))
+        )
+        assert errors == []
+        (row,) = copy_rows(csv_text)
+        columns = dict(zip(TEMPLATE_COPY_COLUMNS, row))
+        assert columns["author_id"] == OWNER_ID
+        assert orjson.loads(columns["nodes"]) == [{"id": "a", "type": "manualTrigger"}]
+        assert columns["rating"] == "0.0"
+
+    def test_end_marker_is_skipped(self):
+        csv_text, row_ids, errors, skipped = prepare_chunk(
+            "workflows", OWNER_ID, items(record(), orjson.dumps({"_type": "end", "count": 1}))
+        )
+        assert len(row_ids) == 1 and skipped == 1 and errors == []
+        assert len(copy_rows(csv_text)) == 1
+
+    def test_nul_character_is_rejected(self):
+        _, row_ids, errors, _ = prepare_chunk("workflows", OWNER_ID, items(record(description="a\u0000b")))
+        assert row_ids == []
+        assert errors == [{"location": "line 1", "message": "內容不可包含 NUL 字元"}]
+
+    def test_invalid_json_and_non_object(self):
+        _, _, errors, _ = prepare_chunk("workflows", OWNER_ID, items(b"{not json", b"[1, 2]"))
+        assert errors[0]["message"].startswith("JSON 格式錯誤")
+        assert errors[1]["message"] == "每筆資料必須為 JSON 物件"
+
+    def test_category_length(self):
+        _, _, errors, _ = prepare_chunk(
+            "workflows", OWNER_ID, items(record(category="x" * (WORKFLOW_CATEGORY_MAX_LENGTH + 1)))
+        )
+        assert errors == [{"location": "line 1", "message": f"category 長度不可超過 {WORKFLOW_CATEGORY_MAX_LENGTH}"}]
+
+    def test_pydantic_errors_are_summarized(self):
+        _, _, errors, _ = prepare_chunk("workflows", OWNER_ID, items(orjson.dumps({"name": "", "tags": "x"})))
+        message = errors[0]["message"]
+        assert message.startswith("name: ")
+        assert "tags: " in message
+
+    def test_graph_errors_are_reported(self):
+        broken = record(nodes=[{"id": "a", "type": "set"}], edges=[{"id": "e1", "source": "a", "target": "ghost"}])
+
+        _, row_ids, errors, _ = prepare_chunk("workflows", OWNER_ID, items(broken))
+        assert row_ids == []
+        assert errors[0]["errors"][0]["code"] == "dangling_edge"
+
+        _, row_ids, errors, _ = prepare_chunk("workflows", OWNER_ID, items(broken), validate_graph=False)
+        assert len(row_ids) == 1 and errors == []
+
+    def test_chunk_without_rows(self):
+        assert prepare_chunk("workflows", OWNER_ID, []) == ("", [], [], 0)
@@ -0,0 +1,112 @@
+"""
+預先編譯的 JSON Schema 驗證與錯誤訊息測試
+"""
+
+import pytest
+from fastjsonschema import JsonSchemaDefinitionException
+
+from app.core.json_schema import compile_schema
+from app.services.graph_analyzer import analyze_graph
+
+pytestmark = pytest.mark.unit
+
+HTTP_REQUEST_SCHEMA = {
+    "type": "object",
+    "required": ["url", "method"],
+    "properties": {
+        "url": {"type": "string", "format": "uri", "minLength": 8},
+        "method": {"enum": ["GET", "POST"]},
+        "timeout": {"type": "integer", "minimum": 1, "maximum": 300},
+        "headers": {
+            "type": "object",
+            "additionalProperties": False,
+            "properties": {"Authorization": {"type": "string"}},
+            "patternProperties": {"^X-": {"type": "string"}},
+        },
+        "retries": {"type": "array", "maxItems": 2, "items": {"type": "integer"}},
+    },
+}
+
+
+@pytest.fixture
+def schema():
+    return compile_schema(HTTP_REQUEST_SCHEMA)
+
+
+def valid_parameters(**overrides):
+    return {"url": "https://example.com", "method": "GET", **overrides}
+
+
+class TestCompiledSchema:
+    def test_valid(self, schema):
+        parameters = valid_parameters(timeout=30, headers={"X-Trace": "1"})
+        assert schema.errors(parameters) == []
+        assert schema.is_valid(parameters)
+
+    def test_all_missing_required_fields_are_listed(self, schema):
+        assert schema.errors({}) == ["缺少必要欄位 url", "缺少必要欄位 method"]
+        assert not schema.is_valid({})
+
+    @pytest.mark.parametrize("overrides, message", [
+        ({"method": "PUT"}, "method 必須為 ['GET', 'POST'] 其中之一"),
+        ({"timeout": "30"}, "timeout 必須為 integer"),
+        ({"timeout": 0}, "timeout 不可小於 1"),
+        ({"timeout": 301}, "timeout 不可大於 300"),
+        ({"url": "http://"}, "url 長度不可少於 8"),
+        ({"retries": [1, 2, 3]}, "retries 最多 2 個項目"),
+        ({"retries": [1, "x"]}, "retries[1] 必須為 integer"),
+    ])
+    def test_rule_messages(self, schema, overrides, message):
+        assert schema.errors(valid_parameters(**overrides)) == [message]
+
+    def test_additional_properties_name_the_field_and_keep_pattern_matches(self, schema):
+        headers = {"Authorization": "Bearer x", "X-Trace": "1", "Cookie": "a=b"}
+        assert schema.errors(valid_parameters(headers=headers)) == ["不允許的欄位 headers.Cookie"]
+
+    def test_nested_required_uses_path(self):
+        schema = compile_schema({
+            "type": "object",
+            "properties": {"auth": {"type": "object", "required": ["token"]}},
+        })
+        assert schema.errors({"auth": {}}) == ["缺少必要欄位 auth.token"]
+
+    def test_root_type(self, schema):
+        assert schema.errors([]) == ["值 必須為 object"]
+
+    def test_any_of(self):
+        schema = compile_schema({"anyOf": [{"type": "string"}, {"type": "integer"}]})
+        assert schema.errors(1.5) == ["值 不符合任何一個允許的格式"]
+
+    def test_defaults_are_not_written_back(self):
+        schema = compile_schema({"type": "object", "properties": {"mode": {"type": "string", "default": "cron"}}})
+        parameters = {}
+        assert schema.errors(parameters) == []
+        assert parameters == {}
+
+
+class TestCompileSchema:
+    def test_identical_schemas_share_compiled_validator(self):
+        assert compile_schema({"type": "string", "minLength": 1}) is compile_schema({"minLength": 1, "type": "string"})
+
+    def test_remote_ref_is_rejected(self):
+        with pytest.raises(ValueError, match="遠端"):
+            compile_schema({"$ref": "https://example.com/schema.json"})
+
+    def test_invalid_schema(self):
+        with pytest.raises(JsonSchemaDefinitionException):
+            compile_schema({"type": "object", "properties": {"a": {"minimum": "one"}}})
+
+
+class TestNodeParameterValidation:
+    def test_invalid_parameters_are_graph_errors(self, schema):
+        nodes = [
+            {"id": "trigger", "type": "manualTrigger", "data": {}},
+            {"id": "call", "type": "httpRequest", "data": {"settings": {"url": "https://example.com"}}},
+        ]
+        analysis = analyze_graph(nodes, [], {"httpRequest": schema})
+
+        assert analysis.errors == [{
+            "code": "invalid_parameters",
+            "node_id": "call",
+            "message": "節點 call: 缺少必要欄位 method",
+        }]
@@ -0,0 +1,77 @@
+"""
+日誌佇列 handler 測試
+"""
+
+import logging
+import queue
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.core.logging import QueueingHandler
+
+pytestmark = pytest.mark.unit
+
+
+def dropped() -> float:
+    return REGISTRY.get_sample_value("log_records_dropped_total") or 0.0
+
+
+@pytest.fixture
+def make_logger():
+    loggers = []
+
+    def make(handler: logging.Handler) -> logging.Logger:
+        logger = logging.getLogger(f"tests.queueing.{len(loggers)}.{id(handler)}")
+        logger.handlers = [handler]
+        logger.propagate = False
+        logger.setLevel(logging.DEBUG)
+        loggers.append(logger)
+        return logger
+
+    yield make
+    for logger in loggers:
+        logger.handlers = []
+
+
+class TestQueueingHandler:
+    def test_full_queue_drops_and_counts(self, make_logger):
+        log_queue = queue.Queue(maxsize=2)
+        logger = make_logger(QueueingHandler(log_queue))
+        before = dropped()
+
+        for index in range(5):
+            logger.info("訊息 %d", index)
+
+        # 放不下的日誌直接捨棄，不阻塞呼叫端
+        assert log_queue.qsize() == 2
+        assert [log_queue.get_nowait().msg for _ in range(2)] == ["訊息 0", "訊息 1"]
+        assert dropped() - before == 3
+
+    def test_queue_with_room_drops_nothing(self, make_logger):
+        log_queue = queue.Queue(maxsize=10)
+        logger = make_logger(QueueingHandler(log_queue))
+        before = dropped()
+
+        for index in range(3):
+            logger.info("訊息 %d", index)
+
+        assert log_queue.qsize() == 3
+        assert dropped() == before
+
+    def test_message_is_merged_before_enqueue(self, make_logger):
+        log_queue = queue.Queue()
+        logger = make_logger(QueueingHandler(log_queue))
+        payload = {"status": "running"}
+
+        try:
+            raise ValueError("失敗")
+        except ValueError:
+            logger.exception("狀態 %s", payload)
+        payload["status"] = "changed"
+
+        record = log_queue.get_nowait()
+        # 參數於呼叫端組合，之後修改不影響；例外資訊保留給背景執行緒格式化
+        assert record.msg == "狀態 {'status': 'running'}"
+        assert record.args is None
+        assert record.exc_info[0] is ValueError
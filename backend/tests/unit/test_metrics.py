@@ -0,0 +1,98 @@
+"""
+監控指標的批次寫入測試
+
+_batch_writer 整批寫入的區間計數與總和須與逐一 Histogram.observe 相同
+（總和的加總順序不同，只比較到浮點誤差內）。
+"""
+
+import pytest
+from prometheus_client import CollectorRegistry, Histogram
+
+from app.core import metrics
+from app.core.metrics import FAST_BUCKETS, _batch_writer, buffered_observer, flush_observations
+
+pytestmark = pytest.mark.unit
+
+# 含恰好等於區間上限、超過所有上限、零與負值的觀測值
+AMOUNTS = [0.0, -0.001, 0.0005, 0.0007, 0.001, 0.003, 0.01, 0.01, 0.2, 1.0, 2.5, 3.0, 120.0]
+
+
+def samples(histogram: Histogram) -> dict:
+    return {
+        (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+        for metric in histogram.collect()
+        for sample in metric.samples
+        if not sample.name.endswith("_created")
+    }
+
+
+def make_histogram(buckets=FAST_BUCKETS) -> Histogram:
+    return Histogram("test_duration_seconds", "測試", ["operation"], buckets=buckets, registry=CollectorRegistry())
+
+
+class TestBatchWriter:
+    @pytest.mark.parametrize("buckets", [FAST_BUCKETS, Histogram.DEFAULT_BUCKETS, (1, 2, 3, 5, 10)])
+    def test_matches_observe(self, buckets):
+        observed = make_histogram(buckets)
+        batched = make_histogram(buckets)
+        for amount in AMOUNTS:
+            observed.labels("op").observe(amount)
+
+        _batch_writer(batched.labels("op"))(AMOUNTS)
+
+        assert samples(batched) == pytest.approx(samples(observed))
+
+    def test_repeated_batches_accumulate(self):
+        observed = make_histogram()
+        batched = make_histogram()
+        for amount in AMOUNTS * 2:
+            observed.labels("op").observe(amount)
+
+        write = _batch_writer(batched.labels("op"))
+        write(AMOUNTS[:5])
+        write(AMOUNTS[5:] + AMOUNTS)
+
+        assert samples(batched) == pytest.approx(samples(observed))
+
+    def test_empty_batch_writes_nothing(self):
+        empty = make_histogram()
+        batched = make_histogram()
+        empty.labels("op")
+
+        _batch_writer(batched.labels("op"))([])
+
+        assert samples(batched) == samples(empty)
+
+    def test_falls_back_to_observe_without_internals(self):
+        class Child:
+            def __init__(self):
+                self.amounts = []
+
+            def observe(self, amount):
+                self.amounts.append(amount)
+
+        child = Child()
+        _batch_writer(child)(AMOUNTS)
+
+        assert child.amounts == AMOUNTS
+
+
+class TestBufferedObserver:
+    def test_flush_writes_buffered_observations(self):
+        observed = make_histogram()
+        batched = make_histogram()
+        record = buffered_observer(batched.labels("op"))
+        try:
+            for amount in AMOUNTS:
+                observed.labels("op").observe(amount)
+                record(amount)
+            assert samples(batched) != samples(observed)
+
+            flush_observations()
+            assert samples(batched) == pytest.approx(samples(observed))
+
+            # 已寫入的觀測值不會重複寫入
+            flush_observations()
+            assert samples(batched) == pytest.approx(samples(observed))
+        finally:
+            del metrics._buffers[-1]
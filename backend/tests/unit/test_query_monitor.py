@@ -0,0 +1,78 @@
+"""
+查詢監控的 N+1 判斷測試
+"""
+
+import pytest
+
+from app.core.config import settings
+from app.core.query_monitor import QueryStats, redact_parameters
+
+pytestmark = pytest.mark.unit
+
+SELECT_USER = "SELECT users.id FROM users WHERE users.id = %(pk_1)s"
+SELECT_WORKFLOW = "SELECT workflows.id FROM workflows WHERE workflows.id = %(pk_1)s"
+
+
+@pytest.fixture(autouse=True)
+def threshold(monkeypatch):
+    monkeypatch.setattr(settings, "N_PLUS_ONE_THRESHOLD", 3)
+    return 3
+
+
+def record(stats: QueryStats, statement: str, times: int):
+    for _ in range(times):
+        stats.record(statement, 0.001)
+
+
+class TestNPlusOne:
+    def test_below_threshold_reports_nothing(self):
+        stats = QueryStats()
+        record(stats, SELECT_USER, 2)
+        stats.lazy_loads["Workflow.user"] = 2
+
+        assert stats.n_plus_one() == []
+
+    def test_repeated_statement_at_threshold(self):
+        stats = QueryStats()
+        record(stats, SELECT_USER, 3)
+        record(stats, SELECT_WORKFLOW, 1)
+
+        assert stats.n_plus_one() == [("repeated_statement", 3, SELECT_USER)]
+        assert stats.count == 4
+        assert stats.duration == pytest.approx(0.004)
+
+    def test_lazy_loads_take_precedence_over_statements(self):
+        stats = QueryStats()
+        record(stats, SELECT_USER, 5)
+        stats.lazy_loads["Workflow.user"] = 5
+        stats.lazy_loads["WorkflowExecution.payment_records"] = 1
+
+        # 延遲載入可指出關聯，不再重複回報同一批語句
+        assert stats.n_plus_one() == [("Workflow.user", 5, None)]
+
+    def test_lazy_loads_below_threshold_fall_back_to_statements(self):
+        stats = QueryStats()
+        record(stats, SELECT_USER, 4)
+        record(stats, SELECT_WORKFLOW, 3)
+        stats.lazy_loads["Workflow.user"] = 2
+
+        assert stats.n_plus_one() == [
+            ("repeated_statement", 4, SELECT_USER),
+            ("repeated_statement", 3, SELECT_WORKFLOW),
+        ]
+
+    def test_follows_configured_threshold(self, monkeypatch):
+        stats = QueryStats()
+        record(stats, SELECT_USER, 3)
+        monkeypatch.setattr(settings, "N_PLUS_ONE_THRESHOLD", 4)
+
+        assert stats.n_plus_one() == []
+
+
+class TestRedactParameters:
+    def test_replaces_values_with_type_names(self):
+        assert redact_parameters({"email": "a@example.com", "id": 1}) == {"email": "str", "id": "int"}
+        assert redact_parameters(("secret", None)) == ["str", "NoneType"]
+
+    def test_executemany_reports_only_the_count(self):
+        assert redact_parameters([{"id": 1}, {"id": 2}], executemany=True) == "<2 組參數>"
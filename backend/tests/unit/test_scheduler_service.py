@@ -0,0 +1,134 @@
+"""
+排程設定擷取、儲存時檢查與排程器堆積測試
+"""
+
+import pytest
+
+from app.core.config import settings
+from app.services.scheduler_service import (
+    WorkflowScheduler,
+    extract_schedule,
+    node_schedule,
+    schedule_errors,
+)
+
+pytestmark = pytest.mark.unit
+
+
+def schedule_node(node_id="schedule", **node_settings):
+    return {"id": node_id, "type": "scheduleTrigger", "data": {"settings": node_settings}}
+
+
+class TestExtractSchedule:
+    def test_cron_schedule(self):
+        nodes = [schedule_node(cronExpression="0 9 * * MON-FRI", timezone="Asia/Tokyo")]
+        assert extract_schedule(nodes) == {"cron": "0 9 * * MON-FRI", "timezone": "Asia/Tokyo"}
+
+    def test_default_timezone(self):
+        assert extract_schedule([schedule_node(cronExpression="* * * * *")])["timezone"] == settings.SCHEDULER_DEFAULT_TIMEZONE
+
+    def test_legacy_schedule_field(self):
+        node = {"id": "schedule", "type": "scheduleTrigger", "data": {"schedule": "@hourly"}}
+        assert extract_schedule([node])["cron"] == "@hourly"
+
+    @pytest.mark.parametrize("unit, seconds", [("minutes", 60), ("hours", 3600), ("days", 86400), ("weeks", 604800)])
+    def test_interval_schedule(self, unit, seconds):
+        nodes = [schedule_node(mode="interval", intervalValue="5", intervalUnit=unit)]
+        assert extract_schedule(nodes)["interval"] == 5 * seconds
+
+    def test_disabled_schedule_is_skipped(self):
+        nodes = [
+            schedule_node("off", cronExpression="* * * * *", enabled=False),
+            schedule_node("on", cronExpression="0 * * * *", enabled=True),
+        ]
+        assert extract_schedule(nodes)["cron"] == "0 * * * *"
+        assert extract_schedule(nodes[:1]) is None
+
+    def test_other_nodes_and_empty_settings_are_ignored(self):
+        nodes = [
+            {"id": "webhook", "type": "webhookTrigger", "data": {"settings": {"cronExpression": "* * * * *"}}},
+            schedule_node(),
+            "not a node",
+        ]
+        assert extract_schedule(nodes) is None
+        assert extract_schedule(None) is None
+
+    @pytest.mark.parametrize("value", ["abc", "0", -1])
+    def test_invalid_interval_raises(self, value):
+        with pytest.raises(ValueError):
+            node_schedule(schedule_node(mode="interval", intervalValue=value))
+
+
+class TestScheduleErrors:
+    def test_valid_schedules_have_no_errors(self):
+        nodes = [
+            schedule_node("a", cronExpression="0 9 * * MON-FRI"),
+            schedule_node("b", mode="interval", intervalValue=10, intervalUnit="minutes"),
+        ]
+        assert schedule_errors(nodes) == []
+
+    @pytest.mark.parametrize("node_settings", [
+        {"cronExpression": "0 9 * * FOO"},
+        {"cronExpression": "0 0 30 2 *"},
+        {"cronExpression": "* * *"},
+        {"cronExpression": "* * * * *", "timezone": "Mars/Base"},
+        {"mode": "interval", "intervalValue": -1},
+    ])
+    def test_invalid_schedules_are_reported(self, node_settings):
+        errors = schedule_errors([schedule_node("bad", **node_settings)])
+        assert len(errors) == 1
+        assert errors[0]["code"] == "invalid_schedule"
+        assert errors[0]["node_id"] == "bad"
+
+    def test_disabled_schedules_are_not_checked(self):
+        assert schedule_errors([schedule_node(cronExpression="not a cron", enabled=False)]) == []
+
+
+class TestWorkflowScheduler:
+    def make_scheduler(self, now):
+        return WorkflowScheduler(clock=lambda: now[0], max_jitter=0, catchup_window=300)
+
+    def test_interval_fires_once_per_period(self):
+        now = [1_700_000_000.0]
+        scheduler = self.make_scheduler(now)
+        scheduler.upsert("wf", {"interval": 60})
+
+        assert scheduler.pop_due(now[0] + 59) == []
+        due = scheduler.pop_due(now[0] + 60)
+        assert [(entry.workflow_id, nominal) for entry, nominal, _ in due] == [("wf", now[0] + 60)]
+        assert scheduler.pop_due(now[0] + 60) == []
+        assert scheduler.next_wakeup() == now[0] + 120
+
+    def test_far_behind_fires_once_then_resumes_in_the_future(self):
+        now = [1_700_000_000.0]
+        scheduler = self.make_scheduler(now)
+        scheduler.upsert("wf", {"interval": 60})
+
+        assert len(scheduler.pop_due(now[0] + 3600)) == 1
+        assert scheduler.next_wakeup() > now[0] + 3600
+
+    def test_missed_run_within_catchup_window_fires_immediately(self):
+        now = [1_700_000_000.0]
+        scheduler = self.make_scheduler(now)
+        scheduler.upsert("wf", {"interval": 60}, last_fired_at=now[0] - 90)
+        assert scheduler.next_wakeup() == now[0]
+
+    def test_removed_and_updated_schedules(self):
+        now = [1_700_000_000.0]
+        scheduler = self.make_scheduler(now)
+        scheduler.upsert("gone", {"interval": 60})
+        scheduler.upsert("changed", {"interval": 60})
+        scheduler.remove("gone")
+        scheduler.upsert("changed", {"interval": 120})
+
+        assert scheduler.pop_due(now[0] + 60) == []
+        assert [entry.workflow_id for entry, _, _ in scheduler.pop_due(now[0] + 120)] == ["changed"]
+        assert len(scheduler) == 1
+
+    def test_jitter_is_stable_and_bounded(self):
+        now = [1_700_000_000.0]
+        scheduler = WorkflowScheduler(clock=lambda: now[0], max_jitter=30)
+        first = scheduler.upsert("wf", {"cron": "0 * * * *"})
+        again = WorkflowScheduler(clock=lambda: now[0], max_jitter=30).upsert("wf", {"cron": "0 * * * *"})
+        assert 0 <= first.jitter <= 30
+        assert first.jitter == again.jitter
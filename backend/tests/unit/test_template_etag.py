@@ -0,0 +1,51 @@
+"""
+模板列表 ETag 來源測試
+"""
+
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.services.template_leaderboard import LEADERBOARD_VERSION_KEY, template_leaderboard
+from app.services.workflow_service import WorkflowService
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def service():
+    service = WorkflowService(MagicMock())
+    service.db.query.return_value.one.return_value = (3, datetime(2026, 1, 1))
+    return service
+
+
+class TestTemplatesCollectionEtag:
+    async def test_built_leaderboard_skips_the_table(self, fake_redis, service):
+        await fake_redis.set(LEADERBOARD_VERSION_KEY, "1.0")
+
+        first = await service.get_templates_collection_etag(0, 50, None, None)
+        assert await service.get_templates_collection_etag(0, 50, None, None) == first
+        service.db.query.assert_not_called()
+
+        await template_leaderboard.mark_changed()
+        changed = await service.get_templates_collection_etag(0, 50, None, None)
+        assert changed != first
+
+        await fake_redis.set(LEADERBOARD_VERSION_KEY, "2.0")
+        assert await service.get_templates_collection_etag(0, 50, None, None) != changed
+
+    async def test_query_parameters_are_part_of_the_etag(self, fake_redis, service):
+        await fake_redis.set(LEADERBOARD_VERSION_KEY, "1.0")
+        assert (
+            await service.get_templates_collection_etag(0, 50, None, None)
+            != await service.get_templates_collection_etag(50, 50, None, None)
+        )
+
+    async def test_missing_leaderboard_falls_back_to_the_table(self, fake_redis, service):
+        await service.get_templates_collection_etag(0, 50, None, None)
+        service.db.query.assert_called_once()
+
+    async def test_redis_unavailable_falls_back_to_the_table(self, redis_unavailable, service):
+        await service.get_templates_collection_etag(0, 50, None, None)
+        service.db.query.assert_called_once()
@@ -0,0 +1,105 @@
+"""
+由模板建立的工作流寫入時複製（template_graph_property）測試
+"""
+
+import uuid
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects import postgresql
+
+import app.models  # noqa: F401  設定所有關聯
+from app.models.workflow import Workflow, WorkflowTemplate
+from app.schemas.workflow import WorkflowGraphPatch
+from app.services.export_service import WORKFLOW_EXPORT_COLUMNS
+from app.services.search_service import SearchService
+from app.services.workflow_service import WorkflowService
+
+pytestmark = pytest.mark.unit
+
+TEMPLATE_NODES = [{"id": "trigger", "type": "manualTrigger"}, {"id": "notify", "type": "lineNotify"}]
+TEMPLATE_EDGES = [{"id": "e1", "source": "trigger", "target": "notify"}]
+
+# 沿用模板時的讀取運算式
+COALESCED_NODES = (
+    "coalesce(workflows.nodes, (SELECT workflow_templates.nodes \n"
+    "FROM workflow_templates \n"
+    "WHERE workflow_templates.id = workflows.source_template_id))"
+)
+
+
+def compiled(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+def template():
+    return WorkflowTemplate(id=uuid.uuid4(), nodes=TEMPLATE_NODES, edges=TEMPLATE_EDGES)
+
+
+class TestGetter:
+    def test_null_graph_falls_back_to_template(self):
+        workflow = Workflow(source_template=template())
+        assert workflow.stored_nodes is None
+        assert workflow.nodes == TEMPLATE_NODES
+        assert workflow.edges == TEMPLATE_EDGES
+
+    def test_own_graph_wins(self):
+        workflow = Workflow(source_template=template(), stored_nodes=[{"id": "own"}], stored_edges=[])
+        assert workflow.nodes == [{"id": "own"}]
+        # 空列表是已清空的圖形，不會改回沿用模板
+        assert workflow.edges == []
+
+    def test_without_template(self):
+        workflow = Workflow()
+        assert workflow.nodes == []
+        assert workflow.edges == []
+
+
+class TestSetter:
+    def test_first_write_materializes(self):
+        source = template()
+        workflow = Workflow(source_template=source)
+
+        workflow.nodes = workflow.nodes + [{"id": "extra", "type": "set"}]
+
+        assert workflow.stored_nodes == TEMPLATE_NODES + [{"id": "extra", "type": "set"}]
+        assert workflow.stored_edges is None
+        assert workflow.edges == TEMPLATE_EDGES
+        # 模板內容不受影響
+        assert source.nodes == TEMPLATE_NODES
+
+    def test_none_clears_instead_of_reverting(self):
+        workflow = Workflow(source_template=template())
+        workflow.nodes = None
+        assert workflow.stored_nodes == []
+        assert workflow.nodes == []
+
+
+class TestExpression:
+    def test_select_reads_through_coalesce(self):
+        sql = compiled(select(Workflow.nodes))
+        assert sql.startswith(f"SELECT {COALESCED_NODES} AS nodes")
+
+    def test_nested_use_stays_correlated(self):
+        elements = select(func.jsonb_array_length(Workflow.nodes)).where(Workflow.id == uuid.uuid4())
+        sql = compiled(elements)
+        # 模板子查詢關聯外層的 workflows，不會變成交叉連接
+        assert "FROM workflows, workflow_templates" not in sql
+        assert sql.count("FROM workflows") == 1
+
+    def test_update_writes_own_column(self):
+        sql = compiled(update(Workflow).values({Workflow.nodes: [{"id": "a"}]}))
+        assert sql.startswith("UPDATE workflows SET nodes=")
+        assert "coalesce" not in sql
+
+    def test_export_reads_through_coalesce(self):
+        sql = compiled(select(*WORKFLOW_EXPORT_COLUMNS))
+        assert f"{COALESCED_NODES} AS nodes" in sql
+        assert "coalesce(workflows.edges, (SELECT workflow_templates.edges" in sql
+
+    def test_node_type_search_checks_the_template(self):
+        sql = compiled(select(Workflow.id).where(SearchService._node_types_condition(Workflow, ["lineNotify"])))
+        assert "jsonb_path_query_array(workflows.nodes, '$[*].type'::jsonpath) @>" in sql
+        assert "workflows.nodes IS NULL AND workflows.source_template_id IN (SELECT workflow_templates.id" in sql
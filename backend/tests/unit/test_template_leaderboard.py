@@ -0,0 +1,236 @@
+"""
+模板排行榜：評分記錄、計數寫回與排行榜範圍測試
+"""
+
+import uuid
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.core.exceptions import ResourceNotFoundError
+from app.services.template_leaderboard import (
+    FLUSHING_KEYS,
+    LEADERBOARD_SCOPES_KEY,
+    LEADERBOARD_VERSION_KEY,
+    PENDING_KEYS,
+    RATING_COUNT_PENDING_KEY,
+    RATING_SUM_PENDING_KEY,
+    USAGE_PENDING_KEY,
+    TemplateLeaderboard,
+    leaderboard_key,
+    leaderboard_score,
+    template_leaderboard,
+)
+from app.services.workflow_service import WorkflowService
+
+pytestmark = pytest.mark.unit
+
+TEMPLATE_ID = str(uuid.uuid4())
+USER_ID = uuid.uuid4()
+
+
+def compiled(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+@pytest.fixture
+def service():
+    service = WorkflowService(MagicMock())
+    service.db.query.return_value.filter.return_value.first.return_value = (uuid.UUID(TEMPLATE_ID),)
+    return service
+
+
+def rating_inserted(service, inserted=True):
+    """模擬評分記錄的 INSERT ... ON CONFLICT DO NOTHING RETURNING 結果"""
+    service.db.execute.return_value.first.return_value = (uuid.UUID(TEMPLATE_ID),) if inserted else None
+
+
+def executed(service):
+    return [compiled(call.args[0]) for call in service.db.execute.call_args_list]
+
+
+class TestRateTemplate:
+    async def test_new_rating_is_recorded_and_buffered(self, fake_redis, service):
+        rating_inserted(service)
+
+        assert await service.rate_template(TEMPLATE_ID, USER_ID, 4) is True
+
+        statements = executed(service)
+        assert len(statements) == 1
+        assert "INSERT INTO workflow_template_ratings" in statements[0]
+        assert "ON CONFLICT DO NOTHING" in statements[0]
+        service.db.commit.assert_called_once()
+        assert await fake_redis.zscore(RATING_SUM_PENDING_KEY, TEMPLATE_ID) == 4
+        assert await fake_redis.zscore(RATING_COUNT_PENDING_KEY, TEMPLATE_ID) == 1
+
+    async def test_repeated_rating_is_not_counted(self, fake_redis, service):
+        rating_inserted(service, inserted=False)
+
+        assert await service.rate_template(TEMPLATE_ID, USER_ID, 4) is False
+
+        service.db.commit.assert_not_called()
+        assert await fake_redis.zscore(RATING_COUNT_PENDING_KEY, TEMPLATE_ID) is None
+
+    async def test_redis_unavailable_updates_the_template_directly(self, redis_unavailable, service):
+        rating_inserted(service)
+
+        assert await service.rate_template(TEMPLATE_ID, USER_ID, 5) is True
+
+        statements = executed(service)
+        assert len(statements) == 2
+        assert statements[1].startswith("UPDATE workflow_templates SET rating=")
+        assert "rating_count=(workflow_templates.rating_count +" in statements[1]
+        service.db.commit.assert_called_once()
+
+    async def test_failed_commit_reverts_the_buffered_rating(self, fake_redis, service):
+        rating_inserted(service)
+        service.db.commit.side_effect = RuntimeError("connection lost")
+
+        with pytest.raises(RuntimeError):
+            await service.rate_template(TEMPLATE_ID, USER_ID, 3)
+
+        service.db.rollback.assert_called_once()
+        assert await fake_redis.zscore(RATING_SUM_PENDING_KEY, TEMPLATE_ID) == 0
+        assert await fake_redis.zscore(RATING_COUNT_PENDING_KEY, TEMPLATE_ID) == 0
+
+    async def test_unknown_template(self, fake_redis, service):
+        service.db.query.return_value.filter.return_value.first.return_value = None
+        with pytest.raises(ResourceNotFoundError):
+            await service.rate_template(TEMPLATE_ID, USER_ID, 3)
+        service.db.execute.assert_not_called()
+
+
+class TestRecordRating:
+    async def test_sum_and_count_are_written_together(self, fake_redis):
+        await template_leaderboard.record_rating(TEMPLATE_ID, 5)
+        await template_leaderboard.record_rating(TEMPLATE_ID, 3)
+        assert await fake_redis.zscore(RATING_SUM_PENDING_KEY, TEMPLATE_ID) == 8
+        assert await fake_redis.zscore(RATING_COUNT_PENDING_KEY, TEMPLATE_ID) == 2
+
+
+def flushed_deltas(db):
+    """取出寫回 UPDATE 的 VALUES 內容：{模板 ID: (使用次數, 評分總和, 評分筆數)}"""
+    params = db.execute.call_args.args[0].compile(dialect=postgresql.dialect()).params
+    values = [params[f"param_{index}"] for index in range(1, len(params))]
+    return {
+        str(values[start]): tuple(values[start + 1:start + 4])
+        for start in range(0, len(values), 4)
+    }
+
+
+class TestFlushCounters:
+    async def test_deltas_are_written_in_one_update(self, fake_redis):
+        other_id = str(uuid.uuid4())
+        await fake_redis.zincrby(USAGE_PENDING_KEY, 3, TEMPLATE_ID)
+        await fake_redis.zincrby(RATING_SUM_PENDING_KEY, 9, TEMPLATE_ID)
+        await fake_redis.zincrby(RATING_COUNT_PENDING_KEY, 2, TEMPLATE_ID)
+        await fake_redis.zincrby(RATING_SUM_PENDING_KEY, 5, other_id)
+        await fake_redis.zincrby(RATING_COUNT_PENDING_KEY, 1, other_id)
+        # 無效的 ID 直接略過
+        await fake_redis.zincrby(USAGE_PENDING_KEY, 1, "not-a-uuid")
+        db = MagicMock()
+
+        assert await template_leaderboard.flush_counters(db) == 2
+
+        db.execute.assert_called_once()
+        db.commit.assert_called_once()
+        assert flushed_deltas(db) == {TEMPLATE_ID: (3, 9.0, 2), other_id: (0, 5.0, 1)}
+        assert not await fake_redis.exists(*PENDING_KEYS, *FLUSHING_KEYS)
+
+    async def test_rating_is_a_weighted_average(self, fake_redis):
+        await fake_redis.zincrby(RATING_SUM_PENDING_KEY, 4, TEMPLATE_ID)
+        await fake_redis.zincrby(RATING_COUNT_PENDING_KEY, 1, TEMPLATE_ID)
+        db = MagicMock()
+
+        await template_leaderboard.flush_counters(db)
+
+        sql = compiled(db.execute.call_args.args[0])
+        assert sql.startswith("UPDATE workflow_templates SET usage_count=(workflow_templates.usage_count + delta.usage)")
+        # (舊平均 × 舊筆數 + 新評分總和) / 新筆數
+        assert (
+            "rating=((workflow_templates.rating * workflow_templates.rating_count + delta.rating_sum) / "
+            "CAST(greatest(workflow_templates.rating_count + delta.rating_count, %(greatest_1)s) AS NUMERIC))"
+        ) in sql
+        assert "rating_count=(workflow_templates.rating_count + delta.rating_count)" in sql
+        # 計數寫回不更新修改時間
+        assert "updated_at=workflow_templates.updated_at" in sql
+        assert sql.endswith("WHERE workflow_templates.id = delta.id")
+
+    async def test_nothing_pending(self, fake_redis):
+        db = MagicMock()
+        assert await template_leaderboard.flush_counters(db) == 0
+        db.execute.assert_not_called()
+        db.commit.assert_not_called()
+
+    async def test_failed_write_is_retried_with_new_counts(self, fake_redis):
+        await fake_redis.zincrby(USAGE_PENDING_KEY, 3, TEMPLATE_ID)
+        failing = MagicMock()
+        failing.commit.side_effect = RuntimeError("connection lost")
+
+        with pytest.raises(RuntimeError):
+            await template_leaderboard.flush_counters(failing)
+
+        # 累積值保留在 flushing 鍵，新的使用次數繼續累積在 pending 鍵
+        assert await fake_redis.zscore(FLUSHING_KEYS[0], TEMPLATE_ID) == 3
+        await fake_redis.zincrby(USAGE_PENDING_KEY, 2, TEMPLATE_ID)
+
+        db = MagicMock()
+        assert await template_leaderboard.flush_counters(db) == 1
+        assert flushed_deltas(db) == {TEMPLATE_ID: (5, 0.0, 0)}
+        assert not await fake_redis.exists(*PENDING_KEYS, *FLUSHING_KEYS)
+
+
+PAYMENT_ID = str(uuid.UUID(int=1))
+NOTIFY_ID = str(uuid.UUID(int=2))
+POPULAR_ID = str(uuid.UUID(int=3))
+
+
+@pytest.fixture
+async def leaderboard(fake_redis, monkeypatch):
+    """以三個公開模板重建排行榜（不預先序列化列表）"""
+    leaderboard = TemplateLeaderboard(refresh_seconds=60)
+    monkeypatch.setattr(leaderboard, "_cache_payloads", AsyncMock())
+    db = MagicMock()
+    db.query.return_value.filter.return_value.all.return_value = [
+        (uuid.UUID(PAYMENT_ID), "payment", True, 10, 4.5),
+        (uuid.UUID(NOTIFY_ID), "notify", False, 3, 0.0),
+        (uuid.UUID(POPULAR_ID), "payment", False, 10, 2.0),
+    ]
+    await fake_redis.sadd(LEADERBOARD_SCOPES_KEY, leaderboard_key("retired", None))
+    await fake_redis.zadd(leaderboard_key("retired", None), {PAYMENT_ID: 1})
+    assert await leaderboard.rebuild(db) == 8
+    return leaderboard
+
+
+class TestRebuild:
+    async def test_scope_fan_out(self, leaderboard, fake_redis):
+        assert await fake_redis.smembers(LEADERBOARD_SCOPES_KEY) == {
+            leaderboard_key(None, None), leaderboard_key(None, True), leaderboard_key(None, False),
+            leaderboard_key("payment", None), leaderboard_key("payment", True), leaderboard_key("payment", False),
+            leaderboard_key("notify", None), leaderboard_key("notify", False),
+        }
+        assert await fake_redis.zrange(leaderboard_key("payment", True), 0, -1) == [PAYMENT_ID]
+        assert await fake_redis.zrange(leaderboard_key("notify", None), 0, -1) == [NOTIFY_ID]
+        assert await fake_redis.zscore(leaderboard_key(None, None), PAYMENT_ID) == leaderboard_score(10, 4.5)
+
+    async def test_stale_scopes_are_removed(self, leaderboard, fake_redis):
+        assert not await fake_redis.exists(leaderboard_key("retired", None))
+        assert await fake_redis.get(LEADERBOARD_VERSION_KEY) is not None
+
+
+class TestPage:
+    async def test_not_built(self, fake_redis):
+        assert await TemplateLeaderboard().page(None, None, 0, 10) is None
+
+    async def test_order_and_paging(self, leaderboard):
+        # 使用次數相同時以評分排序
+        assert await leaderboard.page(None, None, 0, 10) == [PAYMENT_ID, POPULAR_ID, NOTIFY_ID]
+        assert await leaderboard.page(None, None, 1, 1) == [POPULAR_ID]
+        assert await leaderboard.page(None, None, 3, 10) == []
+
+    async def test_category_and_featured_scopes(self, leaderboard):
+        assert await leaderboard.page("payment", None, 0, 10) == [PAYMENT_ID, POPULAR_ID]
+        assert await leaderboard.page("payment", False, 0, 10) == [POPULAR_ID]
+        assert await leaderboard.page(None, True, 0, 10) == [PAYMENT_ID]
+        assert await leaderboard.page("unknown", None, 0, 10) == []
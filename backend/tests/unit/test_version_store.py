@@ -0,0 +1,241 @@
+"""
+內容定址版本儲存測試：快照寫入與重建、分段穩定性、版本比對與 blob 回收
+"""
+
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.core.config import settings
+from app.services import version_store
+from app.services.version_store import BlobCollector, VersionStore, build_snapshot
+
+pytestmark = pytest.mark.unit
+
+
+def graph(node_count: int):
+    nodes = [{"id": f"n{index}", "type": "set", "data": {"value": index}} for index in range(node_count)]
+    edges = [{"id": f"e{index}", "source": f"n{index}", "target": f"n{index + 1}"} for index in range(node_count - 1)]
+    return nodes, edges
+
+
+def executed(store, statement_prefix: str):
+    return [call.args[0] for call in store.db.execute.call_args_list if str(call.args[0]).startswith(statement_prefix)]
+
+
+class TestWriteSnapshot:
+    def test_missing_blobs_are_inserted_in_batches(self, monkeypatch):
+        monkeypatch.setattr(settings, "VERSION_BLOB_WRITE_BATCH_SIZE", 100)
+        nodes, edges = graph(250)
+        _, blobs = build_snapshot(nodes, edges, {})
+        store = VersionStore(MagicMock())
+        store.db.execute.return_value.scalars.return_value = []
+
+        manifest = store.write_snapshot(nodes, edges, {})
+
+        inserts = executed(store, "INSERT INTO workflow_blobs")
+        batches = -(-len(blobs) // 100)
+        assert len(inserts) == batches
+        assert len(executed(store, "WITH touched")) == batches
+        assert all(len(statement.compile().params) <= 100 * 3 for statement in inserts)
+        assert manifest["nodes"]
+
+    def test_existing_blobs_are_not_inserted(self):
+        nodes, edges = graph(10)
+        _, blobs = build_snapshot(nodes, edges, {})
+        store = VersionStore(MagicMock())
+        store.db.execute.return_value.scalars.return_value = list(blobs)
+
+        store.write_snapshot(nodes, edges, {})
+
+        assert executed(store, "INSERT INTO workflow_blobs") == []
+
+
+class MemoryVersionStore(VersionStore):
+    """blob 存在記憶體字典中的 VersionStore，記錄每次批次載入的雜湊"""
+
+    def __init__(self):
+        super().__init__(MagicMock())
+        self.blobs = {}
+        self.loads = []
+
+    def save(self, nodes, edges, settings):
+        manifest, blobs = build_snapshot(nodes, edges, settings)
+        self.blobs.update(blobs)
+        return manifest
+
+    def load_blobs(self, hashes, cache=None):
+        cache = cache if cache is not None else {}
+        wanted = [blob_hash for blob_hash in set(hashes) if blob_hash not in cache]
+        if wanted:
+            self.loads.append(wanted)
+            cache.update({blob_hash: self.blobs[blob_hash] for blob_hash in wanted})
+        return cache
+
+
+def version(manifest=None, **content):
+    return SimpleNamespace(manifest=manifest, **{"nodes": None, "edges": None, "settings": None, **content})
+
+
+def compiled(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+class TestSnapshotRoundTrip:
+    def test_read_snapshot_rebuilds_content_in_order(self):
+        store = MemoryVersionStore()
+        nodes, edges = graph(300)
+        manifest = store.save(nodes, edges, {"timezone": "Asia/Taipei"})
+
+        snapshot = store.read_snapshot(manifest)
+
+        assert snapshot == {"nodes": nodes, "edges": edges, "settings": {"timezone": "Asia/Taipei"}}
+        # 分段與設定一次、項目內容一次
+        assert len(store.loads) == 2
+
+    def test_empty_graph(self):
+        store = MemoryVersionStore()
+        manifest = store.save(None, None, None)
+
+        assert manifest["nodes"] == [] and manifest["edges"] == []
+        assert store.read_snapshot(manifest) == {"nodes": [], "edges": [], "settings": {}}
+
+    def test_duplicate_items_share_one_blob(self):
+        node = {"id": "a", "type": "set"}
+        _, blobs = build_snapshot([node, dict(node)], [], {})
+        assert sum(1 for content in blobs.values() if content == node) == 1
+
+    def test_legacy_full_copy(self):
+        store = MemoryVersionStore()
+        legacy = version(nodes=[{"id": "a"}], edges=None, settings=None)
+        assert store.read_version(legacy) == {"nodes": [{"id": "a"}], "edges": [], "settings": {}}
+
+
+class TestChunkStability:
+    def test_single_node_edit_changes_one_chunk(self):
+        nodes, edges = graph(1000)
+        before, _ = build_snapshot(nodes, edges, {})
+        nodes[500] = {**nodes[500], "data": {"value": "edited"}}
+        after, _ = build_snapshot(nodes, edges, {})
+
+        assert len(before["nodes"]) > 10
+        assert len(after["nodes"]) == len(before["nodes"])
+        assert sum(1 for old, new in zip(before["nodes"], after["nodes"]) if old != new) == 1
+        assert after["edges"] == before["edges"]
+        assert after["settings"] == before["settings"]
+
+    def test_insert_keeps_other_chunks(self):
+        nodes, edges = graph(1000)
+        before, _ = build_snapshot(nodes, edges, {})
+        nodes.insert(10, {"id": "new", "type": "set", "data": {}})
+        after, _ = build_snapshot(nodes, edges, {})
+
+        # 插入點之後的分段邊界只取決於內容，仍然相同
+        assert len(set(before["nodes"]) - set(after["nodes"])) <= 2
+
+    def test_chunk_size_is_bounded(self):
+        nodes, _ = graph(2000)
+        manifest, blobs = build_snapshot(nodes, [], {})
+        assert all(len(blobs[chunk]) <= version_store.CHUNK_MAX_SIZE for chunk in manifest["nodes"])
+
+
+class TestDiffVersions:
+    def test_added_removed_and_changed(self):
+        store = MemoryVersionStore()
+        nodes, edges = graph(200)
+        base = version(store.save(nodes, edges, {"retry": 1}))
+        edited = [{**node, "data": {"value": "x"}} if node["id"] == "n7" else node for node in nodes if node["id"] != "n3"]
+        edited.append({"id": "n999", "type": "set", "data": {}})
+        target = version(store.save(edited, edges, {"retry": 2}))
+
+        diff = store.diff_versions(base, target)
+
+        assert diff["nodes"]["added"] == [{"id": "n999", "type": "set", "data": {}}]
+        assert diff["nodes"]["removed"] == ["n3"]
+        assert diff["nodes"]["changed"] == [{"id": "n7", "before": nodes[7], "after": edited[6]}]
+        assert diff["edges"] == {"added": [], "removed": [], "changed": []}
+        assert diff["settings"] == {"before": {"retry": 1}, "after": {"retry": 2}}
+
+    def test_shared_chunks_are_not_loaded(self):
+        store = MemoryVersionStore()
+        nodes, edges = graph(1000)
+        base = version(store.save(nodes, edges, {}))
+        nodes[500] = {**nodes[500], "data": {"value": "edited"}}
+        target = version(store.save(nodes, edges, {}))
+
+        diff = store.diff_versions(base, target)
+
+        loaded = {blob_hash for batch in store.loads for blob_hash in batch}
+        assert len(loaded) <= 4  # 兩個不同的分段與變更前後的節點
+        assert [change["id"] for change in diff["nodes"]["changed"]] == ["n500"]
+        assert diff["settings"] is None
+
+    def test_legacy_version_against_manifest(self):
+        store = MemoryVersionStore()
+        nodes, edges = graph(20)
+        legacy = version(nodes=nodes, edges=edges, settings={})
+        target = version(store.save(nodes[:-1], edges, {}))
+
+        diff = store.diff_versions(legacy, target)
+
+        assert diff["nodes"]["removed"] == ["n19"]
+        assert diff["nodes"]["added"] == [] and diff["nodes"]["changed"] == []
+
+
+class TestBlobGarbageCollection:
+    def test_references_are_marked_once(self):
+        store = VersionStore(MagicMock())
+        cutoff = datetime(2026, 1, 1)
+        store.db.execute.return_value.scalar_one.return_value = cutoff
+
+        assert store.mark_referenced_blobs(3600) == cutoff
+
+        statements = [compiled(call.args[0]) for call in store.db.execute.call_args_list]
+        marked = [statement for statement in statements if "INSERT INTO workflow_blob_gc_refs" in statement]
+        assert len(marked) == 1
+        # manifest 的節點/連線分段、設定雜湊與分段內容中的項目雜湊
+        assert "manifest -> %(manifest_1)s" in marked[0]
+        assert "manifest ->> %(manifest_3)s" in marked[0]
+        assert "jsonb_array_elements(workflow_blobs_1.content)" in marked[0]
+
+    def test_delete_predicate(self):
+        store = VersionStore(MagicMock())
+        cutoff = datetime(2026, 1, 1)
+
+        store.delete_unreferenced_blobs(cutoff, 500)
+
+        statement = store.db.execute.call_args.args[0]
+        sql = compiled(statement)
+        assert sql.startswith("DELETE FROM workflow_blobs WHERE workflow_blobs.hash IN (SELECT workflow_blobs.hash")
+        assert "workflow_blobs.last_used_at < %(last_used_at_1)s" in sql
+        assert "NOT (EXISTS (SELECT * \nFROM workflow_blob_gc_refs" in sql
+        # 刪除階段不再展開 manifest
+        assert "workflow_versions" not in sql
+        params = statement.compile(dialect=postgresql.dialect()).params
+        assert params["last_used_at_1"] == cutoff
+        assert params["param_1"] == 500
+
+    async def test_collect_marks_once_and_deletes_in_batches(self, fake_redis, monkeypatch):
+        monkeypatch.setattr(settings, "VERSION_BLOB_GC_BATCH_SIZE", 100)
+        connection = MagicMock()
+        monkeypatch.setattr(version_store, "engine", MagicMock(connect=MagicMock(return_value=connection)))
+        session = MagicMock()
+        monkeypatch.setattr(version_store, "SessionLocal", MagicMock(return_value=session))
+        store = MagicMock()
+        store.mark_referenced_blobs.return_value = "cutoff"
+        store.delete_unreferenced_blobs.side_effect = [100, 100, 40]
+        monkeypatch.setattr(version_store, "VersionStore", MagicMock(return_value=store))
+
+        assert await BlobCollector(interval_seconds=60).collect() == 240
+
+        store.mark_referenced_blobs.assert_called_once()
+        assert [call.args for call in store.delete_unreferenced_blobs.call_args_list] == [("cutoff", 100)] * 3
+        store.clear_marks.assert_called_once()
+        version_store.SessionLocal.assert_called_once_with(bind=connection)
+        connection.close.assert_called_once()
+
+        # 同一週期內其他 worker 不重複回收
+        assert await BlobCollector(interval_seconds=60).collect() is None
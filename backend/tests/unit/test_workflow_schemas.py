@@ -0,0 +1,207 @@
+"""
+工作流請求模型的欄位驗證與回應序列化測試
+"""
+
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+
+import orjson
+import pytest
+from pydantic import ValidationError
+
+from app.models.workflow import ExecutionStatus, WorkflowStatus
+from app.schemas.workflow import (
+    WorkflowBulkAction,
+    WorkflowBulkOperation,
+    WorkflowGraphOperation,
+    dump_execution_list,
+    dump_version,
+    dump_version_summary_list,
+    dump_workflow,
+    dump_workflow_list,
+)
+
+pytestmark = pytest.mark.unit
+
+WORKFLOW_ID = "6f1c2a4e-8b0d-4c57-9a3e-2d1f0b7c5e19"
+
+
+class TestWorkflowBulkOperation:
+    def test_ids_are_normalized_and_deduplicated(self):
+        other = str(uuid.uuid4())
+        operation = WorkflowBulkOperation(action="activate", workflow_ids=[WORKFLOW_ID, other, WORKFLOW_ID.upper()])
+        assert operation.workflow_ids == [WORKFLOW_ID, other]
+        assert operation.tags is None
+
+    @pytest.mark.parametrize("workflow_ids", [[], ["not-a-uuid"]])
+    def test_invalid_ids(self, workflow_ids):
+        with pytest.raises(ValidationError):
+            WorkflowBulkOperation(action="delete", workflow_ids=workflow_ids)
+
+    @pytest.mark.parametrize("action", [WorkflowBulkAction.ADD_TAGS, WorkflowBulkAction.REMOVE_TAGS, WorkflowBulkAction.SET_TAGS])
+    def test_tag_actions_require_tags(self, action):
+        with pytest.raises(ValidationError, match="標籤操作必須提供 tags"):
+            WorkflowBulkOperation(action=action, workflow_ids=[WORKFLOW_ID])
+
+    def test_tags_are_trimmed_and_deduplicated(self):
+        operation = WorkflowBulkOperation(action="add_tags", workflow_ids=[WORKFLOW_ID], tags=[" 金流 ", "金流", "", "  "])
+        assert operation.tags == ["金流"]
+
+    def test_set_tags_accepts_empty_list(self):
+        assert WorkflowBulkOperation(action="set_tags", workflow_ids=[WORKFLOW_ID], tags=[]).tags == []
+
+
+class TestWorkflowGraphOperation:
+    @pytest.mark.parametrize("operation", [
+        {"op": "add_node", "node": {"id": "n1", "type": "setData"}},
+        {"op": "add_edge", "edge": {"id": "e1", "source": "a", "target": "b"}},
+        {"op": "move_node", "id": "n1", "position": {"x": 1, "y": 2}},
+        {"op": "update_node", "id": "n1", "changes": {"data": {}}},
+        {"op": "remove_edge", "id": "e1"},
+    ])
+    def test_valid(self, operation):
+        assert WorkflowGraphOperation(**operation).op == operation["op"]
+
+    @pytest.mark.parametrize("operation, message", [
+        ({"op": "add_node"}, "add_node 操作必須提供 node"),
+        ({"op": "move_node", "id": "n1"}, "move_node 操作必須提供 position"),
+        ({"op": "update_edge", "id": "e1"}, "update_edge 操作必須提供 changes"),
+        ({"op": "add_edge", "edge": {"source": "a"}}, "add_edge 操作的內容必須包含 id"),
+        ({"op": "remove_node"}, "remove_node 操作必須提供 id"),
+        ({"op": "update_node", "id": "n1", "changes": {"id": "n2"}}, "不可透過 changes 修改 id"),
+    ])
+    def test_missing_fields(self, operation, message):
+        with pytest.raises(ValidationError, match=message):
+            WorkflowGraphOperation(**operation)
+
+
+CREATED_AT = datetime(2026, 1, 2, 3, 4, 5)
+
+
+def orm_workflow(**overrides):
+    """模擬工作流 ORM 物件（只需屬性）"""
+    fields = dict(
+        id=uuid.UUID(WORKFLOW_ID),
+        user_id=uuid.UUID(int=1),
+        source_template_id=None,
+        name="金流通知",
+        description=None,
+        category="payment",
+        tags=["金流"],
+        is_active=True,
+        status=WorkflowStatus.ACTIVE,
+        version=3,
+        nodes=[{"id": "a", "type": "manualTrigger"}],
+        edges=[],
+        settings={},
+        execution_count=2,
+        success_count=1,
+        failure_count=1,
+        created_at=CREATED_AT,
+        updated_at=CREATED_AT,
+        last_executed_at=None,
+    )
+    fields.update(overrides)
+    return SimpleNamespace(**fields)
+
+
+def orm_execution(**overrides):
+    fields = dict(
+        id=uuid.UUID(int=2),
+        workflow_id=uuid.UUID(WORKFLOW_ID),
+        user_id=uuid.UUID(int=1),
+        execution_id="exec-1",
+        trigger_type="api",
+        trigger_data={"amount": 100},
+        status=ExecutionStatus.SUCCESS,
+        result_data=None,
+        error_message=None,
+        nodes_executed=1,
+        nodes_successful=1,
+        nodes_failed=0,
+        started_at=CREATED_AT,
+        finished_at=None,
+        duration=None,
+    )
+    fields.update(overrides)
+    return SimpleNamespace(**fields)
+
+
+def orm_version(**overrides):
+    fields = dict(
+        id=uuid.UUID(int=3),
+        workflow_id=uuid.UUID(WORKFLOW_ID),
+        version_number=4,
+        version_name="v4",
+        description=None,
+        is_published=False,
+        is_auto=True,
+        created_at=CREATED_AT,
+        created_by=uuid.UUID(int=1),
+        # 清單與舊版內容不屬於摘要，不應輸出
+        manifest={"nodes": ["hash"]},
+    )
+    fields.update(overrides)
+    return SimpleNamespace(**fields)
+
+
+class TestResponseSerialization:
+    def test_dump_workflow(self):
+        payload = orjson.loads(dump_workflow(orm_workflow()))
+
+        assert payload["id"] == WORKFLOW_ID
+        assert payload["user_id"] == str(uuid.UUID(int=1))
+        assert payload["source_template_id"] is None
+        assert payload["status"] == "active"
+        assert payload["created_at"] == "2026-01-02T03:04:05Z"
+        assert payload["last_executed_at"] is None
+        assert payload["nodes"] == [{"id": "a", "type": "manualTrigger"}]
+
+    def test_dump_workflow_list(self):
+        template_id = uuid.uuid4()
+        payload = orjson.loads(dump_workflow_list([
+            orm_workflow(),
+            orm_workflow(id=uuid.UUID(int=9), source_template_id=template_id, last_executed_at=CREATED_AT),
+        ]))
+
+        assert [item["id"] for item in payload] == [WORKFLOW_ID, str(uuid.UUID(int=9))]
+        assert payload[1]["source_template_id"] == str(template_id)
+        assert payload[1]["last_executed_at"] == "2026-01-02T03:04:05Z"
+
+    def test_dump_workflow_list_empty(self):
+        assert dump_workflow_list([]) == b"[]"
+
+    def test_dump_execution_list(self):
+        payload = orjson.loads(dump_execution_list([orm_execution(), orm_execution(finished_at=CREATED_AT)]))
+
+        assert payload[0]["id"] == str(uuid.UUID(int=2))
+        assert payload[0]["status"] == "success"
+        assert payload[0]["started_at"] == "2026-01-02T03:04:05Z"
+        assert payload[0]["finished_at"] is None
+        assert payload[1]["finished_at"] == "2026-01-02T03:04:05Z"
+
+    def test_dump_version_summary_list(self):
+        payload = orjson.loads(dump_version_summary_list([orm_version()]))
+
+        assert payload == [{
+            "id": str(uuid.UUID(int=3)),
+            "workflow_id": WORKFLOW_ID,
+            "version_number": 4,
+            "version_name": "v4",
+            "description": None,
+            "is_published": False,
+            "is_auto": True,
+            "created_at": "2026-01-02T03:04:05Z",
+            "created_by": str(uuid.UUID(int=1)),
+        }]
+
+    def test_dump_version_includes_content(self):
+        content = {"nodes": [{"id": "a"}], "edges": [], "settings": {"timezone": "Asia/Taipei"}}
+        payload = orjson.loads(dump_version(orm_version(), content))
+
+        assert payload["id"] == str(uuid.UUID(int=3))
+        assert payload["created_at"] == "2026-01-02T03:04:05Z"
+        assert payload["nodes"] == [{"id": "a"}]
+        assert payload["settings"] == {"timezone": "Asia/Taipei"}
+        assert "manifest" not in payload
@@ -0,0 +1,92 @@
+"""
+工作流更新（PUT）的儲存前檢查測試
+"""
+
+import uuid
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.core.exceptions import ValidationError
+from app.schemas.workflow import WorkflowUpdate
+from app.services.workflow_service import WorkflowService
+
+pytestmark = pytest.mark.unit
+
+WORKFLOW_ID = str(uuid.uuid4())
+
+NODES = [
+    {"id": "a", "type": "manualTrigger", "data": {}},
+    {"id": "b", "type": "set", "data": {}},
+]
+EDGES = [{"id": "e1", "source": "a", "target": "b"}]
+
+
+@pytest.fixture
+def workflow():
+    workflow = MagicMock()
+    workflow.id = uuid.UUID(WORKFLOW_ID)
+    workflow.version = 3
+    workflow.nodes = list(NODES)
+    workflow.edges = list(EDGES)
+    return workflow
+
+
+@pytest.fixture
+def service(monkeypatch, workflow):
+    service = WorkflowService(MagicMock())
+    monkeypatch.setattr(service, "get_workflow_by_id", AsyncMock(return_value=workflow))
+    monkeypatch.setattr(service, "n8n_service", AsyncMock())
+    return service
+
+
+async def update(service, **changes):
+    return await service.update_workflow(WORKFLOW_ID, WorkflowUpdate(**changes))
+
+
+def error_codes(exc_info):
+    return [error["code"] for error in exc_info.value.details["errors"]]
+
+
+class TestUpdateWorkflowGraphCheck:
+    async def test_dangling_edge_is_rejected(self, service, workflow):
+        with pytest.raises(ValidationError) as exc_info:
+            await update(service, edges=[{"id": "e1", "source": "a", "target": "ghost"}])
+
+        assert "dangling_edge" in error_codes(exc_info)
+        assert workflow.version == 3
+        service.db.commit.assert_not_called()
+        service.db.rollback.assert_called_once()
+
+    async def test_removed_node_is_checked_against_stored_edges(self, service):
+        with pytest.raises(ValidationError) as exc_info:
+            await update(service, nodes=[NODES[0]])
+
+        assert "dangling_edge" in error_codes(exc_info)
+
+    async def test_duplicate_node_ids_are_rejected(self, service):
+        with pytest.raises(ValidationError):
+            await update(service, nodes=NODES + [NODES[1]])
+
+    async def test_invalid_schedule_is_rejected(self, service):
+        schedule = {"id": "s", "type": "scheduleTrigger", "data": {"settings": {"cronExpression": "61 * * * *"}}}
+
+        with pytest.raises(ValidationError) as exc_info:
+            await update(service, nodes=NODES + [schedule])
+
+        assert error_codes(exc_info) == ["invalid_schedule"]
+
+    async def test_valid_graph_is_saved(self, service, workflow):
+        await update(service, nodes=NODES + [{"id": "c", "type": "set", "data": {}}])
+
+        assert workflow.version == 4
+        service.db.commit.assert_called_once()
+
+    async def test_metadata_only_update_skips_graph_check(self, service, workflow, monkeypatch):
+        check = MagicMock()
+        monkeypatch.setattr(service, "_check_graph_on_save", check)
+
+        await update(service, name="新名稱")
+
+        check.assert_not_called()
+        assert workflow.version == 3